@@ -16,15 +16,84 @@ class Settings(BaseSettings):
     POSTGRES_PORT: int = Field(5432, alias="DB_PORT")
     POSTGRES_DB: str = Field(..., alias="DB_NAME")
 
+    # Connection pool and statement instrumentation
+    DB_POOL_SIZE: int = Field(default=10)
+    DB_MAX_OVERFLOW: int = Field(default=20)
+    DB_POOL_TIMEOUT: int = Field(default=30)
+    DB_POOL_RECYCLE: int = Field(default=1800)
+    DB_POOL_PRE_PING: bool = Field(default=True)
+    DB_STATEMENT_TIMEOUT_MS: int = Field(default=30_000)  # 0 disables
+    DB_SLOW_QUERY_MS: int = Field(default=500)  # 0 disables the slow-query log
+    DB_ECHO: bool = Field(default=False)
+
     # JWT Configuration
     SECRET_KEY: str = Field(..., min_length=32)
     ALGORITHM: str = Field(default="HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(default=30)
 
+    # Password hashing pool (bcrypt runs off the event loop)
+    PASSWORD_HASH_WORKERS: int = Field(default=4)
+    PASSWORD_HASH_MAX_PENDING: int = Field(default=64)
+    PASSWORD_HASH_EXECUTOR: str = Field(default="thread", pattern="^(thread|process)$")
+
+    # Authenticated-user cache. It is per worker process: an invalidation (a
+    # password change or reset) only reaches the worker that made it. Other
+    # workers keep serving the cached principal for up to USER_CACHE_TTL_SECONDS
+    # and trust the claims of tokens issued before it until they expire
+    # (ACCESS_TOKEN_EXPIRE_MINUTES), whichever is longer
+    USER_CACHE_MAX_SIZE: int = Field(default=10_000)
+    USER_CACHE_TTL_SECONDS: int = Field(default=300)
+
     # Environment Configuration
     ENV: str = Field(default="development")
     DEBUG: bool = Field(default=False)
 
+    # Exercise catalog cache
+    ACTIVITY_CATALOG_CACHE: bool = Field(default=True)
+    CATALOG_VERSION_CHECK_SECONDS: int = Field(default=30)
+
+    # Realtime WebSocket fan-out ("broker" speaks the Redis pub/sub protocol)
+    REALTIME_BACKEND: str = Field(default="memory", pattern="^(memory|broker)$")
+    REALTIME_BROKER_HOST: str = Field(default="127.0.0.1")
+    REALTIME_BROKER_PORT: int = Field(default=6379)
+    REALTIME_SEND_QUEUE_SIZE: int = Field(default=64)
+    REALTIME_HEARTBEAT_SECONDS: int = Field(default=20)
+    REALTIME_HEARTBEAT_TIMEOUT_SECONDS: int = Field(default=60)
+
+    # Write-behind buffer for live session events
+    SESSION_EVENTS_FLUSH_SECONDS: float = Field(default=5)
+    SESSION_EVENTS_FLUSH_MAX_EVENTS: int = Field(default=20)
+    SESSION_JOURNAL_DIR: str = Field(default="./data/session_journal")
+    SESSION_JOURNAL_FSYNC: bool = Field(default=False)
+
+    # FatSecret food search (point the URLs at scripts/fatsecret_mock.py locally)
+    FATSECRET_CLIENT_ID: str = Field(default="")
+    FATSECRET_CLIENT_SECRET: str = Field(default="")
+    FATSECRET_API_URL: str = Field(default="https://platform.fatsecret.com/rest")
+    FATSECRET_TOKEN_URL: str = Field(default="https://oauth.fatsecret.com/connect/token")
+    FATSECRET_TIMEOUT_SECONDS: float = Field(default=10)
+    FATSECRET_MAX_CONNECTIONS: int = Field(default=20)
+    FATSECRET_CACHE_SIZE: int = Field(default=2048)
+    FATSECRET_CACHE_TTL_SECONDS: int = Field(default=3600)
+
+    # Local food catalog: answer from the foods table when it has this many
+    # matches, otherwise ask FatSecret (at most once per query per TTL)
+    FOOD_SEARCH_MIN_LOCAL_RESULTS: int = Field(default=5)
+    FOOD_SEARCH_SYNC_TTL_SECONDS: int = Field(default=86400)
+
+    # In-memory per-user training history behind the analytics endpoints
+    TRAINING_HISTORY_MEMORY_MB: int = Field(default=256)
+    # Share of a set credited to each secondary muscle in /analytics/volume
+    SECONDARY_MUSCLE_WEIGHT: float = Field(default=0.5, ge=0, le=1)
+    ANALYTICS_MAX_WEEKS: int = Field(default=530)
+
+    # Per-user monthly dashboard cache (dropped by the user's writes)
+    DASHBOARD_CACHE_MAX_SIZE: int = Field(default=10_000)
+    DASHBOARD_CACHE_TTL_SECONDS: int = Field(default=30)
+
+    # Bearer token Prometheus sends to scrape /metrics; empty disables the endpoint
+    METRICS_TOKEN: str = Field(default="")
+
     # CORS Configuration
     # ALLOWED_ORIGINS: list[str] = Field(default=["*"])
 
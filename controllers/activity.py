@@ -1,7 +1,39 @@
+from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, asc, desc
-from typing import Optional
+from sqlalchemy import JSON, String, cast, func, or_, select
+from typing import List, Optional
+from config import settings
 from models.activity import Activity
+from services.activity_catalog import catalog
+from services.activity_facets import MULTI_VALUE_FIELDS, FilterClause
+from services.activity_search import (
+    native_search_clauses,
+    ranked_activity_ids,
+    supports_native_search,
+)
+from services.pagination import (
+    Page,
+    apply_keyset,
+    build_offset_page,
+    build_page,
+    decode_cursor,
+)
+
+# Postgres can't ORDER BY json, so array columns only sort in the catalog
+UNSORTABLE_FIELDS = {
+    column.name for column in Activity.__table__.columns if isinstance(column.type, JSON)
+}
+
+
+def _filter_clause(field: str, values: List[str]):
+    column = getattr(Activity, field)
+    if field in MULTI_VALUE_FIELDS:
+        # JSON arrays: look for the quoted element in the serialised array
+        serialised = func.lower(cast(column, String))
+        return or_(
+            *[serialised.contains(f'"{v.lower()}"', autoescape=True) for v in values]
+        )
+    return func.lower(column).in_([v.lower() for v in values])
 
 
 async def get_activities(
@@ -10,32 +42,104 @@ async def get_activities(
     limit: int = 10,
     keyword: Optional[str] = None,
     sort: Optional[str] = None,
-    filters: Optional[dict] = None,
-):
+    filters: Optional[List[FilterClause]] = None,
+    cursor: Optional[str] = None,
+) -> Page:
+    """
+    Lists activities one page at a time. A `cursor` from a previous page takes
+    precedence over `page`; offset paging is kept for older clients.
+    Served from the in-memory catalog unless ACTIVITY_CATALOG_CACHE is off.
+    """
+    if settings.ACTIVITY_CATALOG_CACHE:
+        await catalog.ensure_fresh(db)
+        return catalog.list(
+            page=page,
+            limit=limit,
+            keyword=keyword,
+            sort=sort,
+            filters=filters,
+            cursor=cursor,
+        )
+
     query = select(Activity)
+    ranked_ids = None
+    rank = None
 
     if keyword:
-        query = query.where(Activity.name.ilike(f"%{keyword}%"))
-
-    # Apply filters
-    if filters:
-        for field, value in filters.items():
-            if hasattr(Activity, field):
-                query = query.where(getattr(Activity, field) == value)
-
-    # Apply sorting
-    if sort:
-        sort_field = sort.lstrip("-")
-        if hasattr(Activity, sort_field):
-            sort_method = desc if sort.startswith("-") else asc
-            query = query.order_by(sort_method(getattr(Activity, sort_field)))
-
-    # Apply pagination
+        if supports_native_search(db):
+            where_clause, rank = native_search_clauses(keyword)
+            query = query.where(where_clause)
+        else:
+            ranked_ids = await ranked_activity_ids(db, keyword)
+            if not ranked_ids:
+                return Page([])
+            query = query.where(Activity.id.in_(ranked_ids))
+
+    # Apply filters: values within a clause are OR'ed, clauses are AND'ed
+    for field, values in filters or []:
+        query = query.where(_filter_clause(field, values))
+
     offset = (page - 1) * limit
-    result = await db.execute(query.offset(offset).limit(limit))
-    return result.scalars().all()
+
+    # Relevance order can't be expressed as a keyset, so its cursor is an offset
+    if keyword and not sort:
+        key = "activities:relevance"
+        if cursor:
+            offset = decode_cursor(cursor, key)["o"]
+
+        if ranked_ids is not None:
+            positions = {activity_id: i for i, activity_id in enumerate(ranked_ids)}
+            result = await db.execute(query)
+            activities = sorted(result.scalars().all(), key=lambda a: positions[a.id])
+            rows = activities[offset : offset + limit + 1]
+        else:
+            result = await db.execute(
+                query.order_by(rank.desc(), Activity.id).offset(offset).limit(limit + 1)
+            )
+            rows = result.scalars().all()
+        return build_offset_page(rows, limit, key, offset)
+
+    # Apply sorting, with the id as tie-breaker so every row has a unique position
+    sort_field = sort.lstrip("-") if sort else "id"
+    if sort_field in UNSORTABLE_FIELDS:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, f"Cannot sort by {sort_field}")
+    if sort_field not in Activity.__table__.columns:
+        sort_field = "id"
+    descending = bool(sort) and sort.startswith("-")
+    columns = [getattr(Activity, sort_field)]
+    if sort_field != "id":
+        columns.append(Activity.id)
+
+    key = f"activities:{'-' if descending else ''}{sort_field}"
+    values = decode_cursor(cursor, key, len(columns))["v"] if cursor else None
+    query = apply_keyset(query, columns, descending, values, limit)
+    if values is None and offset:
+        query = query.offset(offset)
+
+    result = await db.execute(query)
+    return build_page(
+        result.scalars().all(),
+        limit,
+        key,
+        lambda a: [getattr(a, column.key) for column in columns],
+    )
 
 
 async def get_activity(db: AsyncSession, activity_id: str):
+    if settings.ACTIVITY_CATALOG_CACHE:
+        await catalog.ensure_fresh(db)
+        return catalog.get(activity_id)
+
     result = await db.execute(select(Activity).where(Activity.id == activity_id))
     return result.scalar_one_or_none()
+
+
+async def get_activity_facets(
+    db: AsyncSession,
+    keyword: Optional[str] = None,
+    filters: Optional[List[FilterClause]] = None,
+) -> dict:
+    # Facet counts always come from the in-memory bitset index
+    await catalog.ensure_fresh(db)
+    total, facets = catalog.facet_counts(keyword=keyword, filters=filters)
+    return {"total": total, "facets": facets}
@@ -0,0 +1,116 @@
+from datetime import date, timedelta
+from typing import List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from services import training_load
+from services.activity_catalog import catalog
+from services.training_history import activity_summary, training_history, window_bounds
+from services.training_series import activity_series
+from services.training_volume import default_range, muscle_matrix, week_number, week_start, weekly_volume
+
+
+def _check_range(start: Optional[date], end: Optional[date]) -> None:
+    if start is not None and end is not None and start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must not be after end",
+        )
+
+
+async def get_summary(db: AsyncSession, user_id: int, start: Optional[date], end: Optional[date]) -> dict:
+    """
+    Training totals and per-exercise bests over an inclusive date range
+    Steps:
+    1. Get the user's columnar history (loaded on first use, then in memory)
+    2. Slice the sets inside the range and aggregate them per activity
+    Either side of the range may be left open.
+    """
+    _check_range(start, end)
+    history = await training_history.get(db, user_id)
+    return {"start": start, "end": end, **activity_summary(history, *window_bounds(start, end))}
+
+
+async def get_volume(
+    db: AsyncSession,
+    user_id: int,
+    start: Optional[date],
+    end: Optional[date],
+    secondary_weight: Optional[float] = None,
+) -> dict:
+    """
+    Weekly working sets, reps and tonnage per muscle group
+    Steps:
+    1. Widen the range to whole weeks (Monday to Sunday); the last 52 by default
+    2. Get the user's history and bring its weekly rollup up to date
+    3. Spread each (week, activity) total over the activity's muscles:
+       1.0 per primary muscle, `secondary_weight` per secondary one
+    """
+    _check_range(start, end)
+    if start is None or end is None:
+        default_start, default_end = default_range(end or date.today())
+        start, end = start or default_start, end or default_end
+    first_week, last_week = week_number(start), week_number(end)
+    if last_week - first_week + 1 > settings.ANALYTICS_MAX_WEEKS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.ANALYTICS_MAX_WEEKS} weeks per request",
+        )
+    if secondary_weight is None:
+        secondary_weight = settings.SECONDARY_MUSCLE_WEIGHT
+
+    matrix = muscle_matrix(await catalog.ensure_fresh(db), secondary_weight)
+    history = await training_history.get(db, user_id)
+    return {
+        "start": week_start(first_week),
+        "end": week_start(last_week) + timedelta(days=6),
+        "secondary_weight": secondary_weight,
+        "muscles": matrix.muscles,
+        "weeks": weekly_volume(history, matrix, first_week, last_week),
+    }
+
+
+async def get_load(
+    db: AsyncSession, user_id: int, start: Optional[date], end: Optional[date]
+) -> List[training_load.LoadDay]:
+    """
+    Daily training load with its 7-day (acute) and 28-day (chronic) EWMAs,
+    their ratio, monotony and strain; the last 90 days by default
+    Steps:
+    1. Read the stored snapshots in the range
+    2. Project days after the latest snapshot up to today (no new sessions)
+    """
+    today = date.today()
+    end = end or today
+    start = start or end - timedelta(days=89)
+    _check_range(start, end)
+    if (end - start).days + 1 > settings.ANALYTICS_MAX_WEEKS * 7:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.ANALYTICS_MAX_WEEKS * 7} days per request",
+        )
+    return await training_load.get_range(db, user_id, start, end, today)
+
+
+async def get_activity_series(
+    db: AsyncSession,
+    user_id: int,
+    activity_id: str,
+    metric: str,
+    points: int,
+    method: str,
+    start: Optional[date],
+    end: Optional[date],
+) -> dict:
+    """
+    One activity's progress over time, thinned to at most `points` points
+    Steps:
+    1. Get the user's columnar history
+    2. Reduce the activity's sets to one value per session
+    3. Downsample with LTTB (shape) or min/max buckets (extremes)
+    """
+    _check_range(start, end)
+    history = await training_history.get(db, user_id)
+    return activity_series(history, activity_id, metric, points, method, *window_bounds(start, end))
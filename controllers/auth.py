@@ -11,7 +11,7 @@ async def get_user_by_email(db: AsyncSession, email: str):
 
 
 async def create_user(db: AsyncSession, user_data: SignupRequest):
-    hashed_password = hash_password(user_data.password)
+    hashed_password = await hash_password(user_data.password)
     print("Creating user with pw:", hashed_password)
     user = User(
         email=user_data.email,
@@ -24,3 +24,4 @@ async def create_user(db: AsyncSession, user_data: SignupRequest):
     await db.refresh(user)
     print("User created:", user)
     return user
+
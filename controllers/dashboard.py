@@ -0,0 +1,17 @@
+from datetime import date
+from typing import Optional
+
+from services import dashboard
+from services.db import async_session
+
+
+async def get_dashboard(user_id: int, month: Optional[date] = None) -> dict:
+    """
+    Calendar grid of a month with recent sessions, routines and meals
+    Steps:
+    1. Serve the user's cached dashboard for the month if no write happened since
+    2. Otherwise run its aggregate queries concurrently, each on its own pooled connection
+    3. Cache the result for DASHBOARD_CACHE_TTL_SECONDS
+    `month` is any day in the month; the current month by default.
+    """
+    return await dashboard.get(async_session, user_id, month or date.today())
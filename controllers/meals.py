@@ -1,311 +1,305 @@
-import requests
-from services.db import get_db_connection
-from sqlalchemy.orm import Session
-from models.meals import FoodCreate, MealCreate, DayCreate, MealPlanCreate, Food, MealPlan, Meal, Day
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.security import HTTPBearer
-from sqlalchemy.orm import Session
-from models.meals import (
-    FoodCreate, MealCreate, DayCreate, MealPlanCreate,
-    Food, Meal, Day, MealPlan
-)
-from services.db import get_db_connection
-from middleware.auth import get_current_user
-
-FATSECRET_BASE_URL = "https://platform.fatsecret.com/rest/"
-FATSECRET_URLS = {
-  "token":
-    "https://oauth.fatsecret.com/connect/token",
-  "food_search":
-    f"{FATSECRET_BASE_URL}/foods/search/v1",
-  "food_search_by_id":
-    f"{FATSECRET_BASE_URL}/food/v4",
-  "recipe_search":
-    f"{FATSECRET_BASE_URL}/recipes/search/v3",
-  "recipe_search_by_id":
-    f"{FATSECRET_BASE_URL}/recipe/v2",
-}
-FATSECRET_CLIENT_ID = "YOUR_CLIENT"
-FATSECRET_CLIENT_SECRET = ""
-
-
-def generate_fatsecret_token(client_id, client_secret):
-  try:
-    response = requests.post(
-      url="https://oauth.fatsecret.com/connect/token",
-      data={
-          "grant_type": "client_credentials",
-          "scope": "basic",
-      },
-      auth=(client_id, client_secret)
+# crud/meals.py
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional
+from fastapi import HTTPException, status
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from models.meals import Day, Food, FoodSource, Meal, MealFood, MealPlan
+from schemas.meals import DayCreate, FoodCreate, MealCreate, MealPlanCreate
+from services import daily_ledger
+from services.dashboard import dashboard_cache
+from services.fatsecret import fatsecret
+from services.food_catalog import food_catalog
+
+# Loader options for the nested responses; every level is fetched with one
+# extra IN query instead of one lazy load per parent row
+MEAL_TREE = (selectinload(Meal.foods),)
+DAY_TREE = (selectinload(Day.meals).selectinload(Meal.foods),)
+PLAN_TREE = (selectinload(MealPlan.days).selectinload(Day.meals).selectinload(Meal.foods),)
+
+
+def _unique(ids: Iterable[int]) -> List[int]:
+    return list(dict.fromkeys(ids))
+
+
+async def _fetch_by_ids(
+    db: AsyncSession, model, ids: List[int], user_id: Optional[int] = None, options=()
+) -> list:
+    """
+    Loads `ids` of `model` with a single IN query, in the order requested.
+    Rows owned by another user count as missing; any missing id is a 404.
+    Identity-map rows are refreshed, since ledger upserts bypass the ORM.
+    """
+    ids = _unique(ids)
+    if not ids:
+        return []
+    query = (
+        select(model)
+        .where(model.id.in_(ids))
+        .options(*options)
+        .execution_options(populate_existing=True)
     )
+    if user_id is not None:
+        query = query.where(model.user_id == user_id)
+    rows: Dict[int, object] = {row.id: row for row in (await db.execute(query)).scalars()}
+    missing = [i for i in ids if i not in rows]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"{model.__name__} not found: {', '.join(map(str, missing))}",
+        )
+    return [rows[i] for i in ids]
 
-    if not response.status_code == 200:
-      return {
-        "error": response.text
-      }
-
-    data = response.json()
-    access_token = data.get("access_token")
-    if not access_token:
-      return {
-        "error": data
-      }
-
-    return access_token
-  except Exception as e:
-    return {"error": str(e)}
-
-def search_food(food_name, token, region = 'EN', language = 'en', max_results = 20, page_number = None):
-  try:
-    headers = {
-      "Authorization": f"Bearer {token}",
-      "Content-Type": "application/json"
-    }
-    response = requests.get(
-      url=FATSECRET_URLS["food_search"],
-      headers=headers,
-      params={
-          "method": "foods.search",
-          "search_expression": food_name,
-          "region": region,
-          "language": language,
-          "max_results": max_results,
-          "page_number": page_number,
-          "format": "json",
-      }
-    )
 
-    if not response.status_code == 200:
-      return {
-        "error": response.text
-      }
-
-    data = response.json()
-    foods = data.get("foods")
-    if not foods or not foods.get("food"):
-      return {
-        "error": data
-      }
-
-    food =  foods.get("food")
-    quantity = food.get("food_description").split("-")[0].strip()
-    nutrition = food.get("food_description").split("-")[1].strip()
-
-    calories = nutrition.split("|")[0].split(":")[1].strip()
-    fat = nutrition.split("|")[1].split(":")[1].strip()
-    carbohydrate = nutrition.split("|")[2].split(":")[1].strip()
-    protein = nutrition.split("|")[3].split(":")[1].strip()
-
-    return {
-      "id": food.get("food_id"),
-      "name": food.get("food_name"),
-      "description": food.get("food_description"),
-      "brand": food.get("brand_name"),
-      "type": food.get("serving_size"),
-      "url": food.get("url"),
-      "quantity": quantity,
-      "calories": calories,
-      "fat": fat,
-      "carbohydrate": carbohydrate,
-      "protein": protein,
-    }
-  
-  except Exception as e:
-    return {"error": str(e)}
-
-def search_recipe(recipe_name, token):
-  response = requests.get(
-    url="https://platform.fatsecret.com/rest/server.api",
-    params={
-        "method": "recipes.search",
-        "search_expression": recipe_name,
-        "format": "json",
-        "oauth_consumer_key": token["client_id"],
-        "oauth_signature_method": "HMAC-SHA1",
-        "oauth_timestamp": token["timestamp"],
-        "oauth_nonce": token["nonce"],
-        "oauth_version": "1.0",
-        "oauth_signature": token["signature"]
-    }
-  )
-
-  return response.json()
-
-
-# Endpoints
-def create_food(food: FoodCreate, db: Session = Depends(get_db_connection)):
-    db_food = Food(**food.dict())
-    db.add(db_food)
-    db.commit()
-    db.refresh(db_food)
-    return db_food
-
-def create_meal(meal: MealCreate, db: Session = Depends(get_db_connection)):
-    db_meal = Meal(meal_type=meal.meal_type, timestamp=meal.timestamp, notes=meal.notes)
-    for food_id in meal.foods:
-        food = db.query(Food).filter(Food.id == food_id).first()
-        if not food:
-            raise HTTPException(status_code=404, detail=f"Food with ID {food_id} not found")
-        db_meal.foods.append(food)
-    db.add(db_meal)
-    db.commit()
-    db.refresh(db_meal)
-    return db_meal
-
-def create_day(day: DayCreate, db: Session = Depends(get_db_connection)):
-    db_day = Day(date=day.date)
-    for meal_id in day.meals:
-        meal = db.query(Meal).filter(Meal.id == meal_id).first()
-        if not meal:
-            raise HTTPException(status_code=404, detail=f"Meal with ID {meal_id} not found")
-        db_day.meals.append(meal)
-    db.add(db_day)
-    db.commit()
-    db.refresh(db_day)
-    return db_day
-
-def create_meal_plan(meal_plan: MealPlanCreate, db: Session = Depends(get_db_connection)):
-    db_meal_plan = MealPlan(start_date=meal_plan.start_date, end_date=meal_plan.end_date, notes=meal_plan.notes)
-    for day_id in meal_plan.days:
-        day = db.query(Day).filter(Day.id == day_id).first()
-        if not day:
-            raise HTTPException(status_code=404, detail=f"Day with ID {day_id} not found")
-        db_meal_plan.days.append(day)
-    db.add(db_meal_plan)
-    db.commit()
-    db.refresh(db_meal_plan)
-    return db_meal_plan
+async def _get_owned(db: AsyncSession, model, object_id: int, user_id: int, options=()):
+    return (await _fetch_by_ids(db, model, [object_id], user_id, options))[0]
 
-def log_meal(meal_id: int, db: Session = Depends(get_db_connection)):
-    meal = db.query(Meal).filter(Meal.id == meal_id).first()
-    if not meal:
-        raise HTTPException(status_code=404, detail="Meal not found")
-    day = meal.day
-    if not day:
-        raise HTTPException(status_code=404, detail="Day not found for this meal")
-    # Update daily calories
-    day.total_calories = (day.total_calories or 0) + sum(food.calories for food in meal.foods)
-    db.commit()
-    return {"message": "Meal logged and daily calories updated"}
-
-def get_meal(meal_id: int, db: Session = Depends(get_db_connection)):
-    meal = db.query(Meal).filter(Meal.id == meal_id).first()
-    if not meal:
-        raise HTTPException(status_code=404, detail="Meal not found")
-    return meal
-
-def get_meal_plan(db: Session, meal_plan_id: int):
-    meal_plan = db.query(MealPlan).filter(MealPlan.id == meal_plan_id).first()
-    if not meal_plan:
-        raise HTTPException(status_code=404, detail="Meal plan not found")
-    return meal_plan
-
-def get_day(db: Session, day_id: int):
-    day = db.query(Day).filter(Day.id == day_id).first()
-    if not day:
-        raise HTTPException(status_code=404, detail="Day not found")
-    return day
-
-def get_food(db: Session, food_id: int):
-    food = db.query(Food).filter(Food.id == food_id).first()
-    if not food:
-        raise HTTPException(status_code=404, detail="Food not found")
-    return food
-
-# Protected endpoints
-def log_meal(meal_id: int, db: Session = Depends(get_db_connection), user_id: int = Depends(get_current_user)):
-    meal = get_meal(db, meal_id)
-    day = meal.day
-    if not day:
-        raise HTTPException(status_code=404, detail="Day not found for this meal")
-    # Update daily calories
-    day.total_calories = (day.total_calories or 0) + sum(food.calories for food in meal.foods)
-    db.commit()
-    return {"message": "Meal logged and daily calories updated"}
-
-def mark_meal_complete(meal_id: int, meal_plan_id: int, db: Session = Depends(get_db_connection), user_id: int = Depends(get_current_user)):
-    meal = get_meal(db, meal_id)
-    
-    meal_plan = get_meal_plan(db, meal_plan_id)
-    # Mark meal as completed (add your logic here)
-    return {"message": "Meal marked as completed"}
 
-def get_meal_plan(meal_plan_id: int, db: Session = Depends(get_db_connection), user_id: int = Depends(get_current_user)):
-    meal_plan = get_meal_plan(db, meal_plan_id)
-    return meal_plan
+# Food search
+async def search_food(db: AsyncSession, food_name, max_results=20, page_number=0):
+    """
+    Searches the local foods table first and falls back to FatSecret; provider
+    results are stored locally so they can be added to meals by id.
+    """
+    return await food_catalog.search(db, food_name, limit=max_results, page_number=page_number)
 
-def get_meal_plans(db: Session = Depends(get_db_connection), user_id: int = Depends(get_current_user)):
-    return db.query(MealPlan).all()
+async def get_food_details(food_id):
+    return await fatsecret.get_food(food_id)
 
-def create_meal_plan(meal_plan: MealPlanCreate, db: Session = Depends(get_db_connection), user_id: int = Depends(get_current_user)):
-    db_meal_plan = MealPlan(**meal_plan.dict())
-    db.add(db_meal_plan)
-    db.commit()
-    db.refresh(db_meal_plan)
-    return db_meal_plan
+async def search_recipe(recipe_name, max_results=20):
+    return await fatsecret.search_recipes(recipe_name, max_results=max_results)
 
-def update_meal_plan(meal_plan_id: int, meal_plan: MealPlanCreate, db: Session = Depends(get_db_connection), user_id: int = Depends(get_current_user)):
-    db_meal_plan = get_meal_plan(db, meal_plan_id)
-    for key, value in meal_plan.dict().items():
-        setattr(db_meal_plan, key, value)
-    db.commit()
-    db.refresh(db_meal_plan)
-    return db_meal_plan
 
-def get_days(db: Session = Depends(get_db_connection), user_id: int = Depends(get_current_user)):
-    return db.query(Day).all()
+# Foods
+async def get_foods(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Food]:
+    result = await db.execute(select(Food).order_by(Food.id).offset(skip).limit(limit))
+    return list(result.scalars())
 
-def create_day(day: DayCreate, db: Session = Depends(get_db_connection), user_id: int = Depends(get_current_user)):
-    db_day = Day(**day.dict())
-    db.add(db_day)
-    db.commit()
-    db.refresh(db_day)
-    return db_day
+async def get_food(db: AsyncSession, food_id: int) -> Food:
+    return (await _fetch_by_ids(db, Food, [food_id]))[0]
 
-def update_day(day_id: int, day: DayCreate, db: Session = Depends(get_db_connection), user_id: int = Depends(get_current_user)):
-    db_day = get_day(db, day_id)
-    for key, value in day.dict().items():
-        setattr(db_day, key, value)
-    db.commit()
-    db.refresh(db_day)
-    return db_day
+async def create_food(db: AsyncSession, user_id: int, food: FoodCreate) -> Food:
+    db_food = Food(**food.model_dump(), source=FoodSource.LOCAL.value, user_id=user_id)
+    db.add(db_food)
+    await db.commit()
+    return db_food
 
-def get_meal(meal_id: int, db: Session = Depends(get_db_connection), user_id: int = Depends(get_current_user)):
-    return get_meal(db, meal_id)
+async def update_food(db: AsyncSession, food_id: int, user_id: int, food: FoodCreate) -> Food:
+    """
+    Edits a food the user created. Once a meal uses the food it is left as
+    it is, so logged meals and their ledger totals keep the values they were
+    logged with, and the edit is saved (and returned) as a new food.
+    """
+    db_food = await get_food(db, food_id)
+    if db_food.source != FoodSource.LOCAL.value:
+        # Provider and imported rows are overwritten on the next sync
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only user-created foods can be edited",
+        )
+    if db_food.user_id != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only the food's creator can edit it",
+        )
+    in_use = await db.scalar(select(MealFood.meal_id).where(MealFood.food_id == food_id).limit(1))
+    if in_use is not None:
+        db_food = Food(source=FoodSource.LOCAL.value, user_id=user_id)
+        db.add(db_food)
+    for key, value in food.model_dump().items():
+        setattr(db_food, key, value)
+    await db.commit()
+    return db_food
 
-def get_meals(db: Session = Depends(get_db_connection), user_id: int = Depends(get_current_user)):
-    return db.query(Meal).all()
 
-def create_meal(meal: MealCreate, db: Session = Depends(get_db_connection), user_id: int = Depends(get_current_user)):
-    db_meal = Meal(**meal.dict())
+# Meals
+async def get_meals(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 100) -> List[Meal]:
+    result = await db.execute(
+        select(Meal)
+        .where(Meal.user_id == user_id)
+        .options(*MEAL_TREE)
+        .order_by(Meal.timestamp.desc(), Meal.id.desc())
+        .offset(skip)
+        .limit(limit)
+    )
+    return list(result.scalars())
+
+async def get_meal(db: AsyncSession, meal_id: int, user_id: int) -> Meal:
+    return await _get_owned(db, Meal, meal_id, user_id, MEAL_TREE)
+
+async def create_meal(db: AsyncSession, user_id: int, meal: MealCreate) -> Meal:
+    db_meal = Meal(
+        user_id=user_id,
+        meal_type=meal.meal_type,
+        timestamp=meal.timestamp,
+        notes=meal.notes,
+        foods=await _fetch_by_ids(db, Food, meal.foods),
+    )
     db.add(db_meal)
-    db.commit()
-    db.refresh(db_meal)
+    await db.commit()
+    dashboard_cache.invalidate(user_id)
     return db_meal
 
-def update_meal(meal_id: int, meal: MealCreate, db: Session = Depends(get_db_connection), user_id: int = Depends(get_current_user)):
-    db_meal = get_meal(db, meal_id)
-    for key, value in meal.dict().items():
-        setattr(db_meal, key, value)
-    db.commit()
-    db.refresh(db_meal)
+async def _apply_meal_changes(db: AsyncSession, user_id: int, meals: List[Meal], before: dict) -> None:
+    """Flushes pending meal changes and moves the ledger by what they changed."""
+    await db.flush()
+    after = await daily_ledger.meal_entries(db, meals)
+    await daily_ledger.apply(db, user_id, daily_ledger.diff(before, after))
+
+async def update_meal(db: AsyncSession, meal_id: int, user_id: int, meal: MealCreate) -> Meal:
+    db_meal = await get_meal(db, meal_id, user_id)
+    before = await daily_ledger.meal_entries(db, [db_meal])
+    db_meal.meal_type = meal.meal_type
+    db_meal.timestamp = meal.timestamp
+    db_meal.notes = meal.notes
+    db_meal.foods = await _fetch_by_ids(db, Food, meal.foods)
+    await _apply_meal_changes(db, user_id, [db_meal], before)
+    await db.commit()
+    dashboard_cache.invalidate(user_id)
     return db_meal
 
-def get_foods(db: Session = Depends(get_db_connection), user_id: int = Depends(get_current_user)):
-    return db.query(Food).all()
+async def delete_meal(db: AsyncSession, meal_id: int, user_id: int) -> dict:
+    db_meal = await get_meal(db, meal_id, user_id)
+    before = await daily_ledger.meal_entries(db, [db_meal])
+    await db.delete(db_meal)
+    await daily_ledger.apply(db, user_id, daily_ledger.diff(before, {}))
+    await db.commit()
+    dashboard_cache.invalidate(user_id)
+    return {"message": "Meal deleted"}
+
+async def log_meal(db: AsyncSession, meal_id: int, user_id: int) -> dict:
+    """
+    Counts a meal towards its day's totals
+    Steps:
+    1. Attach the meal to the day of its timestamp (today if unset) when it has none
+    2. Stamp logged_at with a conditional UPDATE; logging an already logged
+       meal changes nothing, also when two requests race
+    3. Add the meal's calories and macros to the day's ledger row
+    """
+    meal = await get_meal(db, meal_id, user_id)
+    if meal.logged_at is not None:
+        return {"message": "Meal already logged", "day_id": meal.day_id}
+    day_id = meal.day_id or await daily_ledger.ensure_day(
+        db, user_id, (meal.timestamp or datetime.now()).date()
+    )
+    claimed = await db.scalar(
+        update(Meal)
+        .where(Meal.id == meal_id, Meal.user_id == user_id, Meal.logged_at.is_(None))
+        .values(day_id=day_id, logged_at=datetime.now())
+        .returning(Meal.id)
+    )
+    if claimed is None:
+        # Logged by a concurrent request; drop the day row this one may have created
+        await db.rollback()
+        day_id = await db.scalar(select(Meal.day_id).where(Meal.id == meal_id))
+        return {"message": "Meal already logged", "day_id": day_id}
+    await _apply_meal_changes(db, user_id, [meal], {})
+    await db.commit()
+    dashboard_cache.invalidate(user_id)
+    return {"message": "Meal logged and daily calories updated", "day_id": meal.day_id}
+
+async def mark_meal_complete(db: AsyncSession, meal_id: int, meal_plan_id: int, user_id: int) -> dict:
+    await _get_owned(db, Meal, meal_id, user_id)
+    await _get_owned(db, MealPlan, meal_plan_id, user_id)
+    # Mark meal as completed (add your logic here)
+    return {"message": "Meal marked as completed"}
 
-def create_food(food: FoodCreate, db: Session = Depends(get_db_connection), user_id: int = Depends(get_current_user)):
-    db_food = Food(**food.dict())
-    db.add(db_food)
-    db.commit()
-    db.refresh(db_food)
-    return db_food
 
-def update_food(food_id: int, food: FoodCreate, db: Session = Depends(get_db_connection), user_id: int = Depends(get_current_user)):
-    db_food = get_food(db, food_id)
-    for key, value in food.dict().items():
-        setattr(db_food, key, value)
-    db.commit()
-    db.refresh(db_food)
-    return db_food
+# Days
+async def get_days(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 100) -> List[Day]:
+    result = await db.execute(
+        select(Day)
+        .where(Day.user_id == user_id)
+        .options(*DAY_TREE)
+        .order_by(Day.date.desc(), Day.id.desc())
+        .offset(skip)
+        .limit(limit)
+    )
+    return list(result.scalars())
+
+async def get_day(db: AsyncSession, day_id: int, user_id: int) -> Day:
+    return await _get_owned(db, Day, day_id, user_id, DAY_TREE)
+
+def _unique_meals(meals: Iterable[Meal]) -> List[Meal]:
+    return list({meal.id: meal for meal in meals}.values())
+
+async def _set_day_meals(db: AsyncSession, db_day: Day, user_id: int, meal_ids: List[int]) -> None:
+    # Logged meals moving in, out or between days carry their totals along
+    meals = await _fetch_by_ids(db, Meal, meal_ids, user_id, MEAL_TREE)
+    touched = _unique_meals([*db_day.meals, *meals])
+    before = await daily_ledger.meal_entries(db, touched)
+    db_day.meals = meals
+    await _apply_meal_changes(db, user_id, touched, before)
+
+async def create_day(db: AsyncSession, user_id: int, day: DayCreate) -> Day:
+    """
+    Days are unique per user and date, so creating one that exists adds the
+    meals to it (the row may already hold workout totals)
+    """
+    db_day = await get_day(db, await daily_ledger.ensure_day(db, user_id, day.date), user_id)
+    await _set_day_meals(db, db_day, user_id, [meal.id for meal in db_day.meals] + day.meals)
+    await db.commit()
+    dashboard_cache.invalidate(user_id)
+    return await get_day(db, db_day.id, user_id)
+
+async def update_day(db: AsyncSession, day_id: int, user_id: int, day: DayCreate) -> Day:
+    db_day = await get_day(db, day_id, user_id)
+    if day.date != db_day.date:
+        # The ledger is keyed by date; move meals to another day instead
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A day's date cannot be changed",
+        )
+    # Meals dropped from the list are detached from the day, not deleted
+    await _set_day_meals(db, db_day, user_id, day.meals)
+    await db.commit()
+    dashboard_cache.invalidate(user_id)
+    return await get_day(db, day_id, user_id)
+
+async def get_ledger(db: AsyncSession, user_id: int, start: date, end: date) -> List[Day]:
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must not be after end",
+        )
+    return await daily_ledger.get_range(db, user_id, start, end)
+
+
+# Meal plans
+async def get_meal_plans(db: AsyncSession, user_id: int) -> List[MealPlan]:
+    result = await db.execute(
+        select(MealPlan)
+        .where(MealPlan.user_id == user_id)
+        .options(*PLAN_TREE)
+        .order_by(MealPlan.start_date.desc(), MealPlan.id.desc())
+    )
+    return list(result.scalars())
+
+async def get_meal_plan(db: AsyncSession, meal_plan_id: int, user_id: int) -> MealPlan:
+    return await _get_owned(db, MealPlan, meal_plan_id, user_id, PLAN_TREE)
+
+async def create_meal_plan(db: AsyncSession, user_id: int, meal_plan: MealPlanCreate) -> MealPlan:
+    db_meal_plan = MealPlan(
+        user_id=user_id,
+        start_date=meal_plan.start_date,
+        end_date=meal_plan.end_date,
+        notes=meal_plan.notes,
+        days=await _fetch_by_ids(db, Day, meal_plan.days, user_id, DAY_TREE),
+    )
+    db.add(db_meal_plan)
+    await db.commit()
+    dashboard_cache.invalidate(user_id)
+    return db_meal_plan
+
+async def update_meal_plan(
+    db: AsyncSession, meal_plan_id: int, user_id: int, meal_plan: MealPlanCreate
+) -> MealPlan:
+    db_meal_plan = await get_meal_plan(db, meal_plan_id, user_id)
+    db_meal_plan.start_date = meal_plan.start_date
+    db_meal_plan.end_date = meal_plan.end_date
+    db_meal_plan.notes = meal_plan.notes
+    db_meal_plan.days = await _fetch_by_ids(db, Day, meal_plan.days, user_id, DAY_TREE)
+    await db.commit()
+    dashboard_cache.invalidate(user_id)
+    return db_meal_plan
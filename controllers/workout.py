@@ -2,84 +2,153 @@
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from models.workout import (
-    PerformedExercise,
-    PerformedSet,
-    PerformedWorkout,
-    WorkoutTemplate,
-    WorkoutExercise,
-    ExerciseSet,
+    ActivitySets,
+    WorkoutTemplateActivities,
+    WorkoutTemplates,
 )
-from schemas.workout import ExerciseStart, SetComplete, SetStart, WorkoutTemplateCreate
-from typing import List, Optional
+from schemas.workout import (
+    ExerciseCreate,
+    SetCreate,
+    WorkoutTemplateCreate,
+    WorkoutTemplateUpdate,
+)
+from typing import List, Optional, Tuple
 import isodate
+import uuid
 from fastapi import HTTPException, status
-from errors.websocket import WebSocketError
-from sqlalchemy import select, and_, func
-from sqlalchemy.orm import joinedload
-from datetime import datetime, timedelta
+from sqlalchemy import delete, insert, update
+from sqlalchemy.orm import selectinload
+from datetime import datetime
+from services.dashboard import dashboard_cache
+from services.pagination import Page, apply_keyset, build_page, decode_cursor
+
+# Columns compared when diffing a template update
+TEMPLATE_EXERCISE_FIELDS = ("activity_id", "order", "rest_between_sets", "notes")
+TEMPLATE_SET_FIELDS = (
+    "set_number",
+    "set_type",
+    "weight",
+    "reps",
+    "is_warmup",
+    "rpe",
+    "notes",
+    "duration",
+    "rest_after_set",
+)
 
 
-async def create_workout_template(
-    db: AsyncSession, user_id: int, template_data: WorkoutTemplateCreate
-) -> WorkoutTemplate:
-    # Create main template
-    db_template = WorkoutTemplate(
-        user_id=user_id, name=template_data.name, description=template_data.description
-    )
+def _seconds(duration: Optional[str]) -> Optional[float]:
+    return isodate.parse_duration(duration).total_seconds() if duration else None
 
-    db.add(db_template)
-    await db.commit()
-    await db.refresh(db_template)
-
-    # Add exercises and sets
-    for exercise in template_data.exercises:
-        db_exercise = WorkoutExercise(
-            template_id=db_template.id,
-            activity_id=exercise.activity_id,
-            order=exercise.order,
-            notes=exercise.notes,
+
+def _exercise_values(exercise: ExerciseCreate) -> dict:
+    return {
+        "activity_id": exercise.activity_id,
+        "order": exercise.order,
+        "rest_between_sets": _seconds(exercise.rest_between_sets),
+        "notes": exercise.notes,
+    }
+
+
+def _set_values(set_data: SetCreate) -> dict:
+    return {
+        "set_number": set_data.set_number,
+        "set_type": set_data.set_type,
+        "weight": set_data.weight,
+        "reps": set_data.reps,
+        "is_warmup": set_data.is_warmup,
+        "rpe": set_data.rpe,
+        "notes": set_data.notes,
+        "duration": _seconds(set_data.duration),
+        "rest_after_set": _seconds(set_data.rest_after_set),
+    }
+
+
+def _changed(current: dict, desired: dict) -> bool:
+    return any(current[field] != value for field, value in desired.items())
+
+
+def _new_exercise_rows(template_id: int, exercises) -> Tuple[List[dict], List[dict]]:
+    # Ids are assigned here so sets can reference their exercise in the same batch
+    exercise_rows, set_rows = [], []
+    for exercise in exercises:
+        exercise_id = uuid.uuid4()
+        exercise_rows.append(
+            {"id": exercise_id, "template_id": template_id, **_exercise_values(exercise)}
         )
-        db.add(db_exercise)
-        await db.commit()
-        await db.refresh(db_exercise)
-
-        for set_data in exercise.sets:
-            db_set = ExerciseSet(
-                exercise_id=db_exercise.id,
-                set_number=set_data.set_number,
-                set_type=set_data.set_type,
-                duration=isodate.parse_duration(set_data.duration),
-                weight=set_data.weight,
-                reps=set_data.reps,
-                is_warmup=set_data.is_warmup,
-                rest_after_set=isodate.parse_duration(set_data.rest_after_set),
-                is_cooldown=set_data.is_cooldown,
-            )
-            db.add(db_set)
+        set_rows.extend(
+            {"id": uuid.uuid4(), "template_activity_id": exercise_id, **_set_values(s)}
+            for s in exercise.sets or []
+        )
+    return exercise_rows, set_rows
+
 
+async def _insert_rows(db: AsyncSession, exercise_rows: List[dict], set_rows: List[dict]):
+    if exercise_rows:
+        await db.execute(insert(WorkoutTemplateActivities), exercise_rows)
+    if set_rows:
+        await db.execute(insert(ActivitySets), set_rows)
+
+
+async def create_workout_template(
+    db: AsyncSession, user_id: int, template_data: WorkoutTemplateCreate
+) -> WorkoutTemplates:
+    # One transaction: template row, then every exercise and set in one batch each
+    template_id = await db.scalar(
+        insert(WorkoutTemplates)
+        .values(user_id=user_id, name=template_data.name, description=template_data.description)
+        .returning(WorkoutTemplates.id)
+    )
+    await _insert_rows(db, *_new_exercise_rows(template_id, template_data.exercises or []))
     await db.commit()
-    return db_template
+    dashboard_cache.invalidate(user_id)
+    return await get_template_by_id(db, template_id, user_id)
 
 
 async def get_user_templates(
-    db: AsyncSession, user_id: int, skip: int = 0, limit: int = 100
-) -> List[WorkoutTemplate]:
-    result = await db.execute(
-        select(WorkoutTemplate)
-        .where(WorkoutTemplate.user_id == user_id)
-        .offset(skip)
-        .limit(limit)
+    db: AsyncSession,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+) -> Page:
+    # Keyset on id; `skip` is only honoured for clients that don't send a cursor
+    key = "templates:id"
+    values = decode_cursor(cursor, key, 1)["v"] if cursor else None
+    query = apply_keyset(
+        select(WorkoutTemplates)
+        .where(WorkoutTemplates.user_id == user_id)
+        .options(
+            selectinload(WorkoutTemplates.exercises).selectinload(
+                WorkoutTemplateActivities.sets
+            )
+        ),
+        [WorkoutTemplates.id],
+        False,
+        values,
+        limit,
     )
-    return result.scalars().all()
+    if values is None and skip:
+        query = query.offset(skip)
+
+    result = await db.execute(query)
+    return build_page(result.scalars().all(), limit, key, lambda t: [t.id])
 
 
 async def get_template_by_id(
     db: AsyncSession, template_id: int, user_id: int
-) -> Optional[WorkoutTemplate]:
+) -> Optional[WorkoutTemplates]:
     result = await db.execute(
-        select(WorkoutTemplate).where(
-            (WorkoutTemplate.id == template_id) & (WorkoutTemplate.user_id == user_id)
+        select(WorkoutTemplates)
+        .where(
+            (WorkoutTemplates.id == template_id) & (WorkoutTemplates.user_id == user_id)
         )
+        .options(
+            selectinload(WorkoutTemplates.exercises).selectinload(
+                WorkoutTemplateActivities.sets
+            )
+        )
+        .execution_options(populate_existing=True)
     )
     return result.scalar_one_or_none()
 
@@ -88,45 +157,121 @@ async def update_workout_template(
     db: AsyncSession,
     user_id: int,
     template_id: int,
-    template_data: WorkoutTemplateCreate,
-) -> WorkoutTemplate:
-    # Get existing template
-    existing_template = await get_template_by_id(db, template_id, user_id)
-    if not existing_template:
-        raise HTTPException(status_code=404, detail="Template not found")
-
-    # Update top-level fields
-    existing_template.name = template_data.name
-    existing_template.description = template_data.description
-
-    # Clear existing exercises (cascade delete sets)
-    existing_template.exercises = []
-
-    # Add new exercises
-    for exercise in template_data.exercises:
-        db_exercise = WorkoutExercise(
-            template_id=existing_template.id,
-            activity_id=exercise.activity_id,
-            order=exercise.order,
-            rest_between_sets=isodate.parse_duration(exercise.rest_between_sets),
-            notes=exercise.notes,
+    template_data: WorkoutTemplateUpdate,
+) -> WorkoutTemplates:
+    """
+    Applies an edit as a diff against the stored template
+    Steps:
+    1. Compare-and-set the version, so a stale edit from another device gets a 409
+    2. Match exercises by order and sets by set_number
+    3. Delete, insert and update only the rows that differ, one batch each
+    """
+    bumped = await db.execute(
+        update(WorkoutTemplates)
+        .where(
+            WorkoutTemplates.id == template_id,
+            WorkoutTemplates.user_id == user_id,
+            WorkoutTemplates.version == template_data.version,
+        )
+        .values(
+            name=template_data.name,
+            description=template_data.description,
+            version=WorkoutTemplates.version + 1,
+            updated_at=datetime.now(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if bumped.rowcount == 0:
+        await db.rollback()
+        if await get_template_by_id(db, template_id, user_id) is None:
+            raise HTTPException(status_code=404, detail="Template not found")
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Template was modified by another request; reload and retry",
         )
 
-        # Add sets
-        db_exercise.sets = [
-            ExerciseSet(
-                set_number=set_data.set_number,
-                set_type=set_data.set_type,
-                parameters=set_data.parameters,
+    set_columns = [getattr(ActivitySets, field) for field in TEMPLATE_SET_FIELDS]
+    result = await db.execute(
+        select(
+            WorkoutTemplateActivities.id.label("exercise_id"),
+            *(getattr(WorkoutTemplateActivities, f) for f in TEMPLATE_EXERCISE_FIELDS),
+            ActivitySets.id.label("set_id"),
+            *(column.label(f"set_{column.key}") for column in set_columns),
+        )
+        .outerjoin(
+            ActivitySets,
+            ActivitySets.template_activity_id == WorkoutTemplateActivities.id,
+        )
+        .where(WorkoutTemplateActivities.template_id == template_id)
+    )
+    current = {}  # order -> (exercise_id, fields, {set_number: (set_id, fields)})
+    for row in result:
+        _, _, sets = current.setdefault(
+            row.order,
+            (
+                row.exercise_id,
+                {f: getattr(row, f) for f in TEMPLATE_EXERCISE_FIELDS},
+                {},
+            ),
+        )
+        if row.set_id is not None:
+            sets[row.set_set_number] = (
+                row.set_id,
+                {f: getattr(row, f"set_{f}") for f in TEMPLATE_SET_FIELDS},
             )
-            for set_data in exercise.sets
-        ]
 
-        db.add(db_exercise)
+    desired = {exercise.order: exercise for exercise in template_data.exercises or []}
+    deleted_exercises, deleted_sets = [], []
+    exercise_updates, set_updates = [], []
+    new_exercises, new_sets = [], []
+
+    for order, (exercise_id, fields, sets) in current.items():
+        exercise = desired.get(order)
+        if exercise is None:
+            deleted_exercises.append(exercise_id)
+            deleted_sets.extend(set_id for set_id, _ in sets.values())
+            continue
+
+        values = _exercise_values(exercise)
+        if _changed(fields, values):
+            exercise_updates.append({"id": exercise_id, **values})
+
+        wanted = {s.set_number: s for s in exercise.sets or []}
+        for set_number, (set_id, set_fields) in sets.items():
+            if set_number not in wanted:
+                deleted_sets.append(set_id)
+                continue
+            set_values = _set_values(wanted.pop(set_number))
+            if _changed(set_fields, set_values):
+                set_updates.append({"id": set_id, **set_values})
+        new_sets.extend(
+            {"id": uuid.uuid4(), "template_activity_id": exercise_id, **_set_values(s)}
+            for s in wanted.values()
+        )
 
+    added_rows, added_sets = _new_exercise_rows(
+        template_id, [e for order, e in desired.items() if order not in current]
+    )
+    new_exercises.extend(added_rows)
+    new_sets.extend(added_sets)
+
+    if deleted_sets:
+        await db.execute(delete(ActivitySets).where(ActivitySets.id.in_(deleted_sets)))
+    if deleted_exercises:
+        await db.execute(
+            delete(WorkoutTemplateActivities).where(
+                WorkoutTemplateActivities.id.in_(deleted_exercises)
+            )
+        )
+    if exercise_updates:
+        await db.execute(update(WorkoutTemplateActivities), exercise_updates)
+    if set_updates:
+        await db.execute(update(ActivitySets), set_updates)
+    await _insert_rows(db, new_exercises, new_sets)
     await db.commit()
-    await db.refresh(existing_template)
-    return existing_template
+    dashboard_cache.invalidate(user_id)
+
+    return await get_template_by_id(db, template_id, user_id)
 
 
 async def delete_workout_template(
@@ -138,131 +283,5 @@ async def delete_workout_template(
 
     await db.delete(template)
     await db.commit()
+    dashboard_cache.invalidate(user_id)
 
-
-async def get_set(db: AsyncSession, set_id: int, user_id: int) -> PerformedSet:
-    result = await db.execute(
-        select(PerformedSet)
-        .join(PerformedExercise)
-        .join(PerformedWorkout)
-        .where(and_(PerformedSet.id == set_id, PerformedWorkout.user_id == user_id))
-        .options(joinedload(PerformedSet.exercise))
-    )
-    set_record = result.scalar_one_or_none()
-
-    if set_record := result.scalar_one_or_none():
-        return set_record
-    else:
-        raise HTTPException(status_code=404, detail="Set not found")
-
-
-async def calculate_rest_periods(db: AsyncSession, set_record: PerformedSet) -> None:
-    # Get previous set in the same exercise
-    result = await db.execute(
-        select(PerformedSet)
-        .where(
-            and_(
-                PerformedSet.exercise_id == set_record.exercise_id,
-                PerformedSet.set_number < set_record.set_number,
-            )
-        )
-        .order_by(PerformedSet.set_number.desc())
-        .limit(1)
-    )
-    previous_set = result.scalar_one_or_none()
-
-    rest_duration = timedelta(0)
-    if previous_set and previous_set.end_time:
-        rest_duration = set_record.start_time - previous_set.end_time
-
-    # Update exercise's rest periods
-    exercise = set_record.exercise
-    rest_periods = exercise.rest_periods or {"between_sets": []}
-
-    if len(rest_periods["between_sets"]) >= set_record.set_number - 1:
-        # Update existing entry
-        rest_periods["between_sets"][
-            set_record.set_number - 2
-        ] = rest_duration.total_seconds()
-    else:
-        # Add new entry
-        rest_periods["between_sets"].append(rest_duration.total_seconds())
-
-    exercise.rest_periods = rest_periods
-    await db.commit()
-
-
-async def handle_exercise_start(
-    db: AsyncSession, workout: PerformedWorkout, data: dict
-) -> None:
-    exercise_data = ExerciseStart(**data.get("data", {}))
-
-    # Create new exercise record
-    exercise = PerformedExercise(
-        workout_id=workout.id,
-        activity_id=exercise_data.activity_id,
-        start_time=datetime.now(),
-        rest_periods={"between_sets": []},
-    )
-
-    db.add(exercise)
-    await db.commit()
-
-    # Add to workout structure
-    workout.exercises.append(exercise)
-    await db.refresh(workout)
-
-
-async def handle_set_start(
-    db: AsyncSession, workout: PerformedWorkout, data: dict
-) -> None:
-    set_data = SetStart(**data.get("data", {}))
-
-    # Get current exercise
-    if not workout.exercises or workout.exercises[-1].end_time is not None:
-        raise WebSocketError(
-            code=status.WS_1003_UNSUPPORTED_DATA, reason="No active exercise"
-        )
-
-    current_exercise = workout.exercises[-1]
-
-    # Create new set
-    set_number = len(current_exercise.sets) + 1
-    set_record = PerformedSet(
-        exercise_id=current_exercise.id,
-        set_number=set_number,
-        weight=set_data.weight,
-        reps=set_data.reps,
-        is_warmup=set_data.is_warmup,
-        start_time=datetime.now(),
-    )
-
-    db.add(set_record)
-    await db.commit()
-    await db.refresh(current_exercise)
-
-
-async def handle_set_complete(
-    db: AsyncSession, workout: PerformedWorkout, data: dict
-) -> None:
-    set_data = SetComplete(**data.get("data", {}))
-
-    # Get latest set
-    if not workout.exercises:
-        raise WebSocketError(
-            code=status.WS_1003_UNSUPPORTED_DATA, reason="No exercises started"
-        )
-
-    current_exercise = workout.exercises[-1]
-    if not current_exercise.sets:
-        raise WebSocketError(
-            code=status.WS_1003_UNSUPPORTED_DATA, reason="No sets started"
-        )
-
-    set_record = current_exercise.sets[-1]
-    set_record.end_time = datetime.now()
-    set_record.rpe = set_data.rpe
-    set_record.notes = set_data.notes
-
-    await calculate_rest_periods(db, set_record)
-    await db.commit()
@@ -4,6 +4,7 @@ from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from models.workout_plan import WorkoutPlan, PlanDay, ScheduledWorkout
 from schemas.workout_plan import WorkoutPlanCreate
+from services.dashboard import dashboard_cache
 from typing import List, Optional
 from sqlalchemy import update
 
@@ -55,6 +56,7 @@ async def create_workout_plan(
         db.add(db_day)
 
     await db.commit()
+    dashboard_cache.invalidate(user_id)
     return db_plan
 
 
@@ -89,6 +91,7 @@ async def update_workout_plan(
         db.add(db_day)
 
     await db.commit()
+    dashboard_cache.invalidate(user_id)
     await db.refresh(plan)
     return plan
 
@@ -108,6 +111,7 @@ async def activate_plan(db: AsyncSession, user_id: int, plan_id: int) -> Workout
 
     plan.is_active = True
     await db.commit()
+    dashboard_cache.invalidate(user_id)
     await db.refresh(plan)
     return plan
 
@@ -119,6 +123,7 @@ async def delete_workout_plan(db: AsyncSession, user_id: int, plan_id: int) -> N
 
     await db.delete(plan)
     await db.commit()
+    dashboard_cache.invalidate(user_id)
 
 
 async def get_plan_by_id(
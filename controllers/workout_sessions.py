@@ -1,20 +1,27 @@
 from sqlalchemy import select, UUID
 from sqlalchemy import delete
+from sqlalchemy import insert
 from sqlalchemy import update
 from sqlalchemy.orm import selectinload
-from typing import List, Optional
+from typing import Optional
 from fastapi import HTTPException, status
 from sqlalchemy import and_, func
-from sqlalchemy.orm import joinedload
 from datetime import datetime, timedelta
-from models.activity import ActivityRecords
+import uuid
 from models.workout import (
     ActivitySets,
     WorkoutSessions,
     WorkoutSessionActivities,
     WorkoutTemplateActivities,
+    WorkoutTemplates,
 )
 from services.calories import get_calories_burnt
+from services import daily_ledger, training_load
+from services.personal_records import record_session
+from services.session_events import session_events
+from services.training_history import training_history
+from services.dashboard import dashboard_cache
+from services.pagination import Page, apply_keyset, build_page, decode_cursor
 
 
 async def _get_next_activity_order(session, session_id: UUID) -> int:
@@ -27,57 +34,113 @@ async def _get_next_activity_order(session, session_id: UUID) -> int:
     return (last_order or 0) + 1
 
 
-async def start_session_from_template(db, template_id: UUID, user_id: UUID):
-    # takes in a template_id and starts a session by bulk populating session_activities and activity_sets if they exist in the template
-    # returns the session object
+# Sessions without a start time page after every started one (tuple
+# comparison would drop NULL rows from later pages)
+UNSTARTED = datetime.min
+
+
+# Set columns carried over from the template when a session starts
+TEMPLATE_SET_COLUMNS = (
+    "set_number",
+    "reps",
+    "weight",
+    "duration",
+    "rpe",
+    "pace",
+    "heart_rate",
+    "notes",
+    "is_warmup",
+    "is_cooldown",
+    "rest_after_set",
+    "set_type",
+)
 
-    # Create a new session object
-    async with db.AsyncSession() as session:
-        new_session = WorkoutSessions(
-            user_id=user_id,
-            template_id=template_id,
-            started_at=datetime.now(),
-        )
-        session.add(new_session)
-        await session.flush()
 
-        template_activities = await session.execute(
-            select(WorkoutTemplateActivities).filter_by(template_id=template_id)
+async def start_session_from_template(db, template_id: int, user_id: int) -> dict:
+    """
+    Starts a session pre-populated with the template's activities and sets
+    Steps:
+    1. Read template, activities and sets in one joined query
+    2. Assign ids client-side so sets can reference their activity without RETURNING
+    3. Insert session, activities and sets as one batched statement each
+    The number of round trips no longer grows with the template size.
+    """
+    result = await db.execute(
+        select(
+            WorkoutTemplates.name.label("template_name"),
+            WorkoutTemplateActivities.id.label("template_activity_id"),
+            WorkoutTemplateActivities.activity_id,
+            WorkoutTemplateActivities.order,
+            WorkoutTemplateActivities.notes.label("activity_notes"),
+            *(getattr(ActivitySets, column) for column in TEMPLATE_SET_COLUMNS),
         )
-
-        for ta in template_activities.scalars():
-            sa = WorkoutSessionActivities(
-                session_id=new_session.id, activity_id=ta.activity_id, order=ta.order
+        .select_from(WorkoutTemplates)
+        .outerjoin(
+            WorkoutTemplateActivities,
+            WorkoutTemplateActivities.template_id == WorkoutTemplates.id,
+        )
+        .outerjoin(
+            ActivitySets,
+            ActivitySets.template_activity_id == WorkoutTemplateActivities.id,
+        )
+        .where(WorkoutTemplates.id == template_id, WorkoutTemplates.user_id == user_id)
+        .order_by(WorkoutTemplateActivities.order, ActivitySets.set_number)
+    )
+    rows = result.all()
+    if not rows:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Template not found")
+
+    now = datetime.now()
+    session_id = uuid.uuid4()
+    session_activity_ids = {}
+    activity_rows, set_rows = [], []
+    for row in rows:
+        if row.template_activity_id is None:
+            continue
+        session_activity_id = session_activity_ids.get(row.template_activity_id)
+        if session_activity_id is None:
+            session_activity_id = uuid.uuid4()
+            session_activity_ids[row.template_activity_id] = session_activity_id
+            activity_rows.append(
+                {
+                    "id": session_activity_id,
+                    "session_id": session_id,
+                    "activity_id": row.activity_id,
+                    "order": row.order,
+                    "notes": row.activity_notes,
+                }
             )
-            session.add(sa)
-            await session.flush()
-
-            # Copy sets
-            sets = await session.execute(
-                select(ActivitySets).filter_by(template_activity_id=ta.id)
+        if row.set_number is not None:
+            set_rows.append(
+                {
+                    "id": uuid.uuid4(),
+                    "session_activity_id": session_activity_id,
+                    "is_active": False,
+                    "created_at": now,
+                    **{column: getattr(row, column) for column in TEMPLATE_SET_COLUMNS},
+                }
             )
-            for s in sets.scalars():
-                session.add(
-                    ActivitySets(
-                        session_activity_id=sa.id,
-                        set_number=s.set_number,
-                        reps=s.reps,
-                        weight=s.weight,
-                        duration=s.duration,
-                        rpe=s.rpe,
-                        pace=s.pace,
-                        heart_rate=s.heart_rate,
-                        is_active=s.is_active,
-                        notes=s.notes,
-                        is_warmup=s.is_warmup,
-                        is_cooldown=s.is_cooldown,
-                        rest_after_set=s.rest_after_set,
-                        set_type=s.set_type,
-                    )
-                )
-
-        await session.commit()
-        return {"session_id": new_session.id}
+
+    await db.execute(
+        insert(WorkoutSessions).values(
+            id=session_id,
+            user_id=user_id,
+            template_id=template_id,
+            name=rows[0].template_name,
+            started_at=now,
+        )
+    )
+    if activity_rows:
+        await db.execute(insert(WorkoutSessionActivities), activity_rows)
+    if set_rows:
+        await db.execute(insert(ActivitySets), set_rows)
+    await db.commit()
+
+    return {
+        "session_id": session_id,
+        "activity_count": len(activity_rows),
+        "set_count": len(set_rows),
+    }
 
 
 async def start_empty_session(db, user_id: UUID, name: Optional[str] = None) -> dict:
@@ -87,16 +150,15 @@ async def start_empty_session(db, user_id: UUID, name: Optional[str] = None) ->
     1. Create session with 'draft' status
     2. Return immediate session ID for real-time updates
     """
-    async with db.AsyncSession() as session:
-        new_session = WorkoutSessions(
-            user_id=user_id,
-            status="draft",
-            name=name or f"Workout {datetime.now().strftime('%m/%d')}",
-            started_at=datetime.now(),
-        )
-        session.add(new_session)
-        await session.commit()
-        return {"session_id": new_session.id, "status": "draft"}
+    new_session = WorkoutSessions(
+        user_id=user_id,
+        status="draft",
+        name=name or f"Workout {datetime.now().strftime('%m/%d')}",
+        started_at=datetime.now(),
+    )
+    db.add(new_session)
+    await db.commit()
+    return {"session_id": new_session.id, "status": "draft"}
 
 
 def start_activity_in_session():
@@ -121,27 +183,26 @@ async def add_activity_to_session(
     2. Create session activity record
     3. Initialize empty sets
     """
-    async with db.AsyncSession() as session:
-        # Validate session state
-        workout = await session.get(WorkoutSessions, session_id)
-        if not workout:
-            raise HTTPException(status.HTTP_404_NOT_FOUND, "Session not found")
-        if workout.status not in ("draft", "active"):
-            raise HTTPException(status.HTTP_400_BAD_REQUEST, "Session is locked")
-
-        # Create activity
-        new_activity = WorkoutSessionActivities(
-            session_id=session_id,
-            activity_id=activity_id,
-            order=await _get_next_activity_order(session, session_id),
-        )
-        session.add(new_activity)
-        await session.flush()
+    # Validate session state
+    workout = await db.get(WorkoutSessions, session_id)
+    if not workout:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Session not found")
+    if workout.status not in ("draft", "active"):
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Session is locked")
+
+    # Create activity
+    new_activity = WorkoutSessionActivities(
+        session_id=session_id,
+        activity_id=activity_id,
+        order=await _get_next_activity_order(db, session_id),
+    )
+    db.add(new_activity)
+    await db.flush()
 
-        # Add default sets
+    # Add default sets
 
-        await session.commit()
-        return {"activity_id": new_activity.id}
+    await db.commit()
+    return {"activity_id": new_activity.id}
 
 
 def remove_activity_from_session():
@@ -156,40 +217,41 @@ async def start_set_in_session(db, set_id: UUID) -> dict:
     2. Ensure no other active sets in session
     3. Update set and session state
     """
-    async with db.AsyncSession() as session:
-        # Lock set for update
-        active_set = await session.execute(
-            select(ActivitySets).filter_by(id=set_id).with_for_update()
-        )
-        active_set = active_set.scalar_one_or_none()
+    # Lock set for update
+    active_set = await db.execute(
+        select(ActivitySets).filter_by(id=set_id).with_for_update()
+    )
+    active_set = active_set.scalar_one_or_none()
 
-        if not active_set:
-            raise HTTPException(status.HTTP_404_NOT_FOUND, "Set not found")
+    if not active_set:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Set not found")
 
-        # Verify session state
-        session_obj = await session.get(
-            WorkoutSessions, active_set.session_activity.session_id
-        )
-        if session_obj.status != "active":
-            raise HTTPException(status.HTTP_400_BAD_REQUEST, "Session not active")
-
-        # Deactivate other sets
-        await session.execute(
-            update(ActivitySets)
-            .where(
-                ActivitySets.session_activity_id == active_set.session_activity_id,
-                ActivitySets.is_active == True,
-            )
-            .values(is_active=False)
+    # Verify session state
+    session_obj = await db.scalar(
+        select(WorkoutSessions)
+        .join(WorkoutSessionActivities)
+        .where(WorkoutSessionActivities.id == active_set.session_activity_id)
+    )
+    if session_obj.status != "active":
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Session not active")
+
+    # Deactivate other sets
+    await db.execute(
+        update(ActivitySets)
+        .where(
+            ActivitySets.session_activity_id == active_set.session_activity_id,
+            ActivitySets.is_active == True,
         )
+        .values(is_active=False)
+    )
 
-        # Activate current set
-        active_set.is_active = True
-        active_set.started_at = datetime.now()
-        session_obj.status = "active"
+    # Activate current set
+    active_set.is_active = True
+    active_set.started_at = datetime.now()
+    session_obj.status = "active"
 
-        await session.commit()
-        return {"status": "active"}
+    await db.commit()
+    return {"status": "active"}
 
 
 async def complete_set_in_session(
@@ -202,38 +264,37 @@ async def complete_set_in_session(
     2. Update performance metrics
     3. Calculate rest period if applicable
     """
-    async with db.AsyncSession() as session:
-        set_record = await session.get(ActivitySets, set_id)
-        if not set_record:
-            raise HTTPException(status.HTTP_404_NOT_FOUND, "Set not found")
-
-        if not set_record.is_active:
-            raise HTTPException(status.HTTP_400_BAD_REQUEST, "Set not started")
-
-        # Update metrics
-        set_record.reps = reps
-        set_record.weight = weight
-        set_record.ended_at = datetime.now()
-        set_record.is_active = False
-        set_record.duration = (
-            set_record.ended_at - set_record.started_at
-        ).total_seconds()
-
-        # Auto-calculate rest period
-        next_set = await session.execute(
-            select(ActivitySets).filter_by(
-                session_activity_id=set_record.session_activity_id,
-                set_number=set_record.set_number + 1,
-            )
+    set_record = await db.get(ActivitySets, set_id)
+    if not set_record:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Set not found")
+
+    if not set_record.is_active:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Set not started")
+
+    # Update metrics
+    set_record.reps = reps
+    set_record.weight = weight
+    set_record.ended_at = datetime.now()
+    set_record.is_active = False
+    set_record.duration = (
+        set_record.ended_at - set_record.started_at
+    ).total_seconds()
+
+    # Auto-calculate rest period
+    next_set = await db.execute(
+        select(ActivitySets).filter_by(
+            session_activity_id=set_record.session_activity_id,
+            set_number=set_record.set_number + 1,
+        )
+    )
+    if next_set := next_set.scalar_one_or_none():
+        next_set.rest_after_set = min(
+            300,  # Cap at 5 minutes
+            int(set_record.duration * 0.3),  # 30% of set duration
         )
-        if next_set := next_set.scalar_one_or_none():
-            next_set.rest_after_set = min(
-                300,  # Cap at 5 minutes
-                int(set_record.duration * 0.3),  # 30% of set duration
-            )
 
-        await session.commit()
-        return {"status": "completed"}
+    await db.commit()
+    return {"status": "completed"}
 
 
 def discard_set_in_session():
@@ -241,123 +302,101 @@ def discard_set_in_session():
 
 
 def add_set_to_session(db, session_activity_id: UUID, set_data: list):
-    with db.AsyncSession as session:
-        for i in range(len(set_data)):
-            session.add(
-                ActivitySets(
-                    session_activity_id=session_activity_id,
-                    reps=set_data[i].get("reps"),
-                    weight=set_data[i].get("weight"),
-                    duration=set_data[i].get("duration"),
-                    rpe=set_data[i].get("rpe"),
-                    pace=set_data[i].get("pace"),
-                    heart_rate=set_data[i].get("heart_rate"),
-                    is_active=False,
-                    notes=set_data[i].get("notes"),
-                    rest_after_set=set_data[i].get("rest_after_set"),
-                    set_type=set_data[i].get("set_type"),
-                    set_number=i,
-                    is_warmup=(i == 0),  # First set as warmup by default
-                    is_cooldown=(i == len(set_data) - 1),  # Last set as cooldown
-                )
+    for i in range(len(set_data)):
+        db.add(
+            ActivitySets(
+                session_activity_id=session_activity_id,
+                reps=set_data[i].get("reps"),
+                weight=set_data[i].get("weight"),
+                duration=set_data[i].get("duration"),
+                rpe=set_data[i].get("rpe"),
+                pace=set_data[i].get("pace"),
+                heart_rate=set_data[i].get("heart_rate"),
+                is_active=False,
+                notes=set_data[i].get("notes"),
+                rest_after_set=set_data[i].get("rest_after_set"),
+                set_type=set_data[i].get("set_type"),
+                set_number=i,
+                is_warmup=(i == 0),  # First set as warmup by default
+                is_cooldown=(i == len(set_data) - 1),  # Last set as cooldown
             )
+        )
 
 
 async def discard_session(db, session_id: UUID):
-    async with db.AsyncSession() as session:
-        workout = await session.get(WorkoutSessions, session_id)
-        if not workout:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Session not found",
-            )
-        # Mark as discarded
-        workout.status = "discarded"
-        workout.ended_at = datetime.now()
-        await session.commit()
-
-
-async def finish_session(db, session_id: UUID, user_id: UUID):
-    async with db.AsyncSession() as session:
-        # Mark as finished
-        workout_session = await session.get(WorkoutSessions, session_id)
-        if not workout_session:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Session not found",
-            )
-        workout_session.status = "finished"
-        workout_session.ended_at = datetime.now()
-
-        # Calculate totals - calories burnt
+    workout = await db.get(WorkoutSessions, session_id)
+    if not workout:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Session not found",
+        )
+    # Mark as discarded
+    workout.status = "discarded"
+    workout.ended_at = datetime.now()
+    await db.commit()
 
-        total_calories = get_calories_burnt(workout_session)
-        workout_session.calories_burnt = total_calories
 
-        workout_session_activities = await session.execute(
-            select(WorkoutSessionActivities)
-            .where(WorkoutSessionActivities.session_id == workout_session.id)
-            .options(joinedload(WorkoutSessionActivities.sets))
+async def finish_session(db, session_id: UUID, user_id: int) -> dict:
+    """
+    Closes a session and folds it into the user's personal records
+    Steps:
+    1. Mark the session finished and store calories burnt (services.calories)
+    2. Upsert activity_records from one aggregate over the session's sets
+    3. Add the calories and the workout to the day's ledger row
+    4. Roll the session's load into the user's training-load snapshots
+    5. Commit all four together and drop the user's cached dashboards
+    6. Append the session to the user's in-memory training history
+    Buffered live events are flushed first so the records see every set.
+    Events buffered by another worker (its socket landed there) can't be
+    flushed from here, so the finish is a 409 to retry until that worker's
+    next flush; across hosts, sticky routing keeps the socket and the finish
+    on one worker. The session is claimed with a conditional UPDATE, so
+    finishing twice (also concurrently) or finishing a discarded session is
+    a 409 and the ledger never counts a session twice.
+    """
+    workout_session = await db.get(WorkoutSessions, session_id)
+    if not workout_session or workout_session.user_id != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Session not found",
+        )
+    if workout_session.status in ("finished", "discarded"):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Session already {workout_session.status}",
+        )
+    if session_events.buffered_elsewhere(session_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Session has live events not saved yet, retry shortly",
+        )
+    await session_events.close_session(session_id)
+    # Only one of two concurrent finishes gets the row back
+    claimed = await db.scalar(
+        update(WorkoutSessions)
+        .where(
+            WorkoutSessions.id == session_id,
+            WorkoutSessions.status.notin_(("finished", "discarded")),
+        )
+        .values(status="finished", ended_at=datetime.now())
+        .returning(WorkoutSessions.id)
+    )
+    if claimed is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Session already finished",
         )
+    workout_session.calories_burnt = await get_calories_burnt(db, workout_session)
 
-        # Update activity records table
-        for activity in workout_session_activities:
-
-            if record := session.execute(
-                select(ActivityRecords).where(
-                    ActivityRecords.activity_id == activity.activity_id,
-                )
-            ):
-                record.times_performed += 1
-                record.max_reps = max(
-                    record.max_reps,
-                    max(s.reps for s in activity.sets if s.reps is not None),
-                )
-                record.max_duration = max(
-                    record.max_duration,
-                    max(s.duration for s in activity.sets if s.duration is not None),
-                )
-                record.max_rpe = max(
-                    record.max_rpe,
-                    max(s.rpe for s in activity.sets if s.rpe is not None),
-                )
-                record.max_heart_rate = max(
-                    record.max_heart_rate,
-                    max(
-                        s.heart_rate for s in activity.sets if s.heart_rate is not None
-                    ),
-                )
-                record.max_pace = max(
-                    record.max_pace,
-                    max(s.pace for s in activity.sets if s.pace is not None),
-                )
-                record.recorded_at = datetime.now().isoformat()
-                record.max_weight = max(
-                    record.max_weight,
-                    max(s.weight for s in activity.sets if s.weight is not None),
-                )
-            else:
-                record = ActivityRecords(
-                    activity_id=activity.activity_id,
-                    user_id=user_id,
-                    times_performed=1,
-                    max_reps=max(s.reps for s in activity.sets if s.reps is not None),
-                    max_duration=max(
-                        s.duration for s in activity.sets if s.duration is not None
-                    ),
-                    max_rpe=max(s.rpe for s in activity.sets if s.rpe is not None),
-                    max_heart_rate=max(
-                        s.heart_rate for s in activity.sets if s.heart_rate is not None
-                    ),
-                    max_pace=max(s.pace for s in activity.sets if s.pace is not None),
-                    recorded_at=datetime.now().isoformat(),
-                    max_weight=max(
-                        s.weight for s in activity.sets if s.weight is not None
-                    ),
-                )
-                session.add(record)
-
-        await session.commit()
+    updated_activities = await record_session(db, session_id, user_id)
+    await daily_ledger.record_workout(
+        db, user_id, workout_session.ended_at.date(), workout_session.calories_burnt
+    )
+    await training_load.record_session(db, user_id, session_id)
+    await db.commit()
+    dashboard_cache.invalidate(user_id)
+    await training_history.append_session(db, user_id, session_id)
+    return {"session_id": session_id, "records_updated": updated_activities}
 
 
 def get_session():
@@ -365,29 +404,37 @@ def get_session():
 
 
 async def get_sessions(
-    db, user_id: UUID, status_filter: Optional[str] = None, limit: int = 50
-) -> List[dict]:
+    db,
+    user_id: UUID,
+    status_filter: Optional[str] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+) -> Page:
     """
-    Retrieves session summaries with pagination
+    Retrieves session summaries with keyset pagination
     Steps:
     1. Apply status filter if provided
-    2. Load basic session data
-    3. Include activity count
+    2. Seek past the cursor (started_at, id), newest first, unstarted last
+    3. Load basic session data
+    4. Include activity count
     """
-    query = (
-        select(WorkoutSessions)
-        .filter_by(user_id=user_id)
-        .options(selectinload(WorkoutSessions.activities))
-        .order_by(WorkoutSessions.started_at.desc())
-        .limit(limit)
-    )
+    key = "sessions:-started_at"
+    values = decode_cursor(cursor, key, 2)["v"] if cursor else None
 
+    query = select(WorkoutSessions).filter_by(user_id=user_id)
     if status_filter:
         query = query.filter_by(status=status_filter)
+    query = apply_keyset(
+        query.options(selectinload(WorkoutSessions.activities)),
+        [func.coalesce(WorkoutSessions.started_at, UNSTARTED), WorkoutSessions.id],
+        True,
+        values,
+        limit,
+    )
 
-    async with db.AsyncSession() as session:
-        result = await session.execute(query)
-        return [
+    result = await db.execute(query)
+    return build_page(
+        [
             {
                 "id": s.id,
                 "name": s.name,
@@ -396,7 +443,25 @@ async def get_sessions(
                 "status": s.status,
             }
             for s in result.scalars()
-        ]
+        ],
+        limit,
+        key,
+        lambda s: [s["started_at"] or UNSTARTED, s["id"]],
+    )
+
+
+async def get_active_session(db, user_id: int) -> Optional[WorkoutSessions]:
+    """The user's most recent draft or active session, if any"""
+    result = await db.execute(
+        select(WorkoutSessions)
+        .where(
+            WorkoutSessions.user_id == user_id,
+            WorkoutSessions.status.in_(("draft", "active")),
+        )
+        .order_by(WorkoutSessions.started_at.desc())
+        .limit(1)
+    )
+    return result.scalar_one_or_none()
 
 
 async def get_live_session(db, session_id: str):
@@ -420,17 +485,16 @@ async def modify_template_session(db, session_id: UUID) -> dict:
     2. Nullify template reference
     3. Keep existing activities
     """
-    async with db.AsyncSession() as session:
-        workout = await session.get(WorkoutSessions, session_id)
-        if not workout:
-            raise HTTPException(status.HTTP_404_NOT_FOUND, "Session not found")
-        if not workout.template_id:
-            raise HTTPException(status.HTTP_400_BAD_REQUEST, "No template linked")
+    workout = await db.get(WorkoutSessions, session_id)
+    if not workout:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Session not found")
+    if not workout.template_id:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "No template linked")
 
-        workout.template_id = None
-        workout.status = "active"  # Force active state
-        await session.commit()
-        return {"status": "detached"}
+    workout.template_id = None
+    workout.status = "active"  # Force active state
+    await db.commit()
+    return {"status": "detached"}
 
 
 async def delete_discarded_sessions(db, older_than_days: int = 30) -> dict:
@@ -440,17 +504,16 @@ async def delete_discarded_sessions(db, older_than_days: int = 30) -> dict:
     1. Query sessions meeting criteria
     2. Cascade delete all related records
     """
-    async with db.AsyncSession() as session:
-        cutoff = datetime.now() - timedelta(days=older_than_days)
-        result = await session.execute(
-            delete(WorkoutSessions)
-            .where(
-                and_(
-                    WorkoutSessions.status == "discarded",
-                    WorkoutSessions.ended_at < cutoff,
-                )
+    cutoff = datetime.now() - timedelta(days=older_than_days)
+    result = await db.execute(
+        delete(WorkoutSessions)
+        .where(
+            and_(
+                WorkoutSessions.status == "discarded",
+                WorkoutSessions.ended_at < cutoff,
             )
-            .returning(WorkoutSessions.id)
         )
-        await session.commit()
-        return {"deleted_count": len(result.all())}
+        .returning(WorkoutSessions.id)
+    )
+    await db.commit()
+    return {"deleted_count": len(result.all())}
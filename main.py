@@ -1,18 +1,56 @@
+import secrets
 import uvicorn
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import FastAPI, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
 from routers import auth
 from routers import activity
 from routers import workout_plan
 from routers import workout
+from routers import meals
+from routers import analytics
+from routers import dashboard
+from config import settings
+from middleware.metrics import MetricsMiddleware
+from services.activity_catalog import catalog
+from services.db import async_session
+from services.fatsecret import fatsecret
+from services import metrics
+from services.password_hashing import password_hasher
+from services.realtime import hub
+from services.runtime_metrics import runtime_monitor
+from services.session_events import session_events
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    runtime_monitor.start()
+    # Warm the exercise catalog so the first requests don't pay for the load
+    if settings.ACTIVITY_CATALOG_CACHE:
+        async with async_session() as db:
+            await catalog.ensure_fresh(db)
+    # Replay live-session events journaled by a worker that died before flushing
+    await session_events.start()
+    yield
+    await hub.close()
+    await session_events.close()
+    await fatsecret.close()
+    password_hasher.shutdown()
+    await runtime_monitor.stop()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
 
 
 app.include_router(auth.router)
 app.include_router(activity.router)
 app.include_router(workout.router)
 app.include_router(workout_plan.router)
+app.include_router(meals.router)
+app.include_router(analytics.router)
+app.include_router(dashboard.router)
 
 
 @app.get("/healthcheck")
@@ -20,5 +58,16 @@ async def root():
     return {"message": "Ok!"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint(authorization: Optional[str] = Header(default=None)):
+    # Scrapers authenticate with METRICS_TOKEN; without one configured the endpoint doesn't exist
+    expected = f"Bearer {settings.METRICS_TOKEN}"
+    if not settings.METRICS_TOKEN or not secrets.compare_digest(
+        (authorization or "").encode(), expected.encode()
+    ):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -5,6 +5,7 @@ from fastapi import Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from controllers.auth import get_user_by_email
 from services.db import get_db
+from services.user_cache import UserPrincipal, user_cache, user_cache_requests
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
@@ -28,7 +29,25 @@ async def get_current_user(
     except JWTError as e:
         raise credentials_exception from e
 
-    user = await get_user_by_email(db, email=email)
-    if user is None:
-        raise credentials_exception
-    return user
+    principal = user_cache.get(email)
+    if principal is not None:
+        user_cache_requests.inc(result="hit")
+        return principal
+
+    # Tokens carry the user id and plan; trust them unless the user changed since
+    if payload.get("uid") is not None and user_cache.claims_trusted(
+        email, payload.get("iat")
+    ):
+        user_cache_requests.inc(result="claims")
+        principal = UserPrincipal(
+            id=payload["uid"], email=email, plan=payload.get("plan")
+        )
+    else:
+        user_cache_requests.inc(result="miss")
+        user = await get_user_by_email(db, email=email)
+        if user is None:
+            raise credentials_exception
+        principal = UserPrincipal.from_user(user)
+
+    user_cache.put(principal)
+    return principal
@@ -0,0 +1,68 @@
+import time
+
+from services.metrics import registry
+
+# Bytes; from empty 204s up to large template/plan listings
+SIZE_BUCKETS = (100, 500, 1_000, 5_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000)
+
+# Label used for requests that matched no route, so scanners probing random
+# paths can't blow up the number of series
+UNMATCHED = "<unmatched>"
+
+requests_total = registry.counter(
+    "http_requests_total", "HTTP requests by route template and status", ("method", "route", "status")
+)
+request_seconds = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route")
+)
+response_bytes = registry.histogram(
+    "http_response_size_bytes",
+    "HTTP response body size by route template",
+    ("method", "route"),
+    buckets=SIZE_BUCKETS,
+)
+in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served", ("method",)
+)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware, so responses keep streaming
+    and nothing is buffered). Requests are labelled with the route template
+    FastAPI records in scope["route"] while routing, e.g.
+    /workouts/templates/{template_id}, never with the raw path.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500  # what the client sees if the app raises before responding
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        in_flight.inc(method=method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_flight.dec(method=method)
+            route = scope.get("route")
+            template = getattr(route, "path", None) or UNMATCHED
+            requests_total.inc(method=method, route=template, status=status)
+            request_seconds.observe(elapsed, method=method, route=template)
+            response_bytes.observe(size, method=method, route=template)
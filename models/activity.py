@@ -1,16 +1,16 @@
 from sqlalchemy import (
-    UUID,
     Column,
     BigInteger,
+    DateTime,
     Float,
+    Integer,
     ForeignKey,
     SmallInteger,
     String,
     JSON,
+    UniqueConstraint,
 )
-from sqlalchemy.ext.declarative import declarative_base
-
-Base = declarative_base()
+from services.db import Base
 
 
 class Activity(Base):
@@ -33,12 +33,42 @@ class ActivityRecords(Base):
     __tablename__ = "activity_records"
     id = Column(BigInteger, primary_key=True, index=True)
     activity_id = Column(String, ForeignKey("activities.id"), nullable=False)
-    user_id = Column(UUID, ForeignKey("user.id"), nullable=False)
+    user_id = Column(BigInteger, ForeignKey("user.id"), nullable=False)
     max_weight = Column(Float, nullable=True)
     max_reps = Column(SmallInteger, nullable=True)
     max_duration = Column(Float, nullable=True)
     max_rpe = Column(Float, nullable=True)
     max_heart_rate = Column(Float, nullable=True)
     max_pace = Column(Float, nullable=True)
+    max_estimated_1rm = Column(Float, nullable=True)  # Epley, working sets only
+    max_session_volume = Column(Float, nullable=True)  # sum(weight * reps) in one session
     times_performed = Column(SmallInteger, default=0)
     recorded_at = Column(String, nullable=False)
+
+    # Upsert target for services.personal_records
+    __table_args__ = (
+        UniqueConstraint("user_id", "activity_id", name="uq_activity_records_user_activity"),
+    )
+
+
+class CatalogVersion(Base):
+    # Single row (id=1) bumped by every catalog import, used to invalidate
+    # the in-process catalog cache
+    __tablename__ = "catalog_version"
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=1)
+    updated_at = Column(DateTime, nullable=True)
+
+
+class ActivityEnergy(Base):
+    # Energy cost of one activity at several body weights, loaded from the
+    # published calorie tables by scripts/import_energy_tables.py. Calories
+    # are normalised to kcal per hour; services.calories turns them into METs
+    __tablename__ = "activity_energy"
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True)  # normalised table name
+    activity_id = Column(String, ForeignKey("activities.id"), nullable=True, index=True)
+    source = Column(String, nullable=False)
+    weights_kg = Column(JSON, nullable=False)
+    kcal_per_hour = Column(JSON, nullable=False)
+    updated_at = Column(DateTime, nullable=True)
@@ -3,11 +3,9 @@ from datetime import datetime
 import secrets
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql.sqltypes import DateTime
-from sqlalchemy.ext.declarative import declarative_base
+from services.db import Base
 from datetime import timedelta
 
-Base = declarative_base()
-
 
 class User(Base):
     __tablename__ = "user"
@@ -0,0 +1,117 @@
+# models/meals.py
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Integer,
+    String,
+    Float,
+    DateTime,
+    Date,
+    Enum,
+    ForeignKey,
+    UniqueConstraint,
+)
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from enum import Enum as PyEnum
+from services.db import Base
+
+
+class MealType(str, PyEnum):
+    BREAKFAST = "breakfast"
+    LUNCH = "lunch"
+    DINNER = "dinner"
+    SNACK = "snack"
+    OTHER = "other"
+
+
+class FoodSource(str, PyEnum):
+    LOCAL = "local"  # created by a user
+    FATSECRET = "fatsecret"  # cached from the FatSecret API
+    IMPORT = "import"  # bulk-loaded open dataset (scripts/import_foods.py)
+
+
+class Food(Base):
+    __tablename__ = "foods"
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+    brand = Column(String, nullable=True)
+    description = Column(String, nullable=True)
+    quantity = Column(Float, nullable=True, default=100)
+    quantity_unit = Column(String, nullable=True, default="grams")
+    food_type = Column(String, nullable=True, default="generic")
+    food_url = Column(String, nullable=True)
+    calories = Column(Float, nullable=False)
+    protein = Column(Float, nullable=True)
+    carbs = Column(Float, nullable=True)
+    fats = Column(Float, nullable=True)
+    # Where the row came from and its id there; provider rows are refreshed
+    # in place on re-fetch or re-import instead of being duplicated
+    source = Column(String, nullable=False, default=FoodSource.LOCAL.value)
+    external_id = Column(String, nullable=True)
+    fetched_at = Column(DateTime, nullable=True)
+    # Creator of a LOCAL food, the only user who may edit it; NULL for
+    # provider and imported rows
+    user_id = Column(BigInteger, ForeignKey("user.id"), nullable=True, index=True)
+
+    __table_args__ = (
+        UniqueConstraint("source", "external_id", name="uq_foods_source_external_id"),
+    )
+
+
+class Meal(Base):
+    __tablename__ = "meals"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(BigInteger, ForeignKey("user.id"), nullable=False, index=True)
+    meal_type = Column(Enum(MealType), nullable=False)
+    timestamp = Column(DateTime, nullable=True)
+    notes = Column(String, nullable=True)
+    day_id = Column(Integer, ForeignKey("days.id"))
+    # Set by log_meal; only logged meals count towards their day's totals
+    logged_at = Column(DateTime, nullable=True)
+    foods = relationship("Food", secondary="meal_foods")
+
+
+class MealFood(Base):
+    __tablename__ = "meal_foods"
+    meal_id = Column(Integer, ForeignKey("meals.id"), primary_key=True)
+    food_id = Column(Integer, ForeignKey("foods.id"), primary_key=True)
+
+
+class Day(Base):
+    # One row per user and date. The total_*, meals_logged and
+    # workouts_completed columns are the daily ledger, maintained
+    # incrementally by services.daily_ledger
+    __tablename__ = "days"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(BigInteger, ForeignKey("user.id"), nullable=False, index=True)
+    date = Column(Date, nullable=False)
+    total_calories_consumed = Column(Float, nullable=True)
+    total_calories_burned = Column(Float, nullable=True)
+    total_protein = Column(Float, nullable=True)
+    total_carbs = Column(Float, nullable=True)
+    total_fats = Column(Float, nullable=True)
+    meals_logged = Column(Integer, nullable=True, default=0)
+    workouts_completed = Column(Integer, nullable=True, default=0)
+    updated_at = Column(DateTime, nullable=True)
+    meals = relationship("Meal", backref="day")
+    muscle_group_activation = Column(String, nullable=True)
+    activity_level = Column(String, nullable=True)
+    overall_score = Column(Integer, nullable=True)
+    notes = Column(String, nullable=True)
+    meal_plan_id = Column(Integer, ForeignKey("meal_plans.id"), nullable=True)
+
+    # Upsert target for ledger deltas
+    __table_args__ = (UniqueConstraint("user_id", "date", name="uq_days_user_date"),)
+
+
+class MealPlan(Base):
+    __tablename__ = "meal_plans"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(BigInteger, ForeignKey("user.id"), nullable=False, index=True)
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=False)
+    notes = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, onupdate=datetime.utcnow)
+    days = relationship("Day", backref="meal_plan")
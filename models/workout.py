@@ -9,21 +9,23 @@ from sqlalchemy import (
     Float,
     Integer,
     Boolean,
+    Date,
 )
 from sqlalchemy.orm import relationship
 from datetime import datetime
+import uuid
 from services.db import Base
 
 
 class ActivitySets(Base):
     __tablename__ = "activity_sets"
 
-    id = Column(UUID, primary_key=True, index=True)
+    id = Column(UUID, primary_key=True, index=True, default=uuid.uuid4)
     template_activity_id = Column(
         UUID, ForeignKey("workout_template_activities.id"), nullable=True
     )
     session_activity_id = Column(
-        UUID, ForeignKey("workout_session_activities.id"), nullable=True
+        UUID, ForeignKey("workout_session_activities.id"), nullable=True, index=True
     )
     reps = Column(Integer, nullable=True)
     weight = Column(Float, nullable=True)
@@ -43,8 +45,10 @@ class ActivitySets(Base):
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, onupdate=datetime.now)
     # Relationships
-    template_activity = relationship("WorkoutTemplateActivity", back_populates="sets")
-    session_activity = relationship("WorkoutSessionActivity", back_populates="sets")
+    template_activity = relationship(
+        "WorkoutTemplateActivities", back_populates="sets"
+    )
+    session_activity = relationship("WorkoutSessionActivities", back_populates="sets")
     __table_args__ = (
         {
             "sqlite_autoincrement": True,
@@ -55,18 +59,24 @@ class ActivitySets(Base):
 
 class WorkoutSessionActivities(Base):
     __tablename__ = "workout_session_activities"
-    id = Column(UUID, primary_key=True, index=True)
+    id = Column(UUID, primary_key=True, index=True, default=uuid.uuid4)
     activity_id = Column(String, nullable=False)
-    session_id = Column(UUID, ForeignKey("workout_sessions.id"), nullable=False)
+    session_id = Column(
+        UUID, ForeignKey("workout_sessions.id"), nullable=False, index=True
+    )
+    order = Column(Integer, nullable=False)
     notes = Column(String, nullable=True)
     is_active = Column(Boolean, default=False)
     started_at = Column(DateTime, nullable=True)
     ended_at = Column(DateTime, nullable=True)
 
     # Relationships
-    session = relationship("WorkoutSession", back_populates="activities")
+    session = relationship("WorkoutSessions", back_populates="activities")
     sets = relationship(
-        "ActivitySet", back_populates="session_activity", cascade="all, delete-orphan"
+        "ActivitySets",
+        back_populates="session_activity",
+        cascade="all, delete-orphan",
+        order_by="ActivitySets.set_number",
     )
     __table_args__ = (
         {
@@ -79,16 +89,22 @@ class WorkoutSessionActivities(Base):
 class WorkoutTemplateActivities(Base):
     __tablename__ = "workout_template_activities"
 
-    id = Column(UUID, primary_key=True, index=True)
+    id = Column(UUID, primary_key=True, index=True, default=uuid.uuid4)
     activity_id = Column(String, nullable=False)
-    template_id = Column(UUID, ForeignKey("workout_templates.id"), nullable=False)
+    template_id = Column(
+        BigInteger, ForeignKey("workout_templates.id"), nullable=False
+    )
     order = Column(Integer, nullable=False)
+    rest_between_sets = Column(Float, nullable=True)  # seconds
     notes = Column(String, nullable=True)
 
     # Relationships
-    template = relationship("WorkoutTemplate", back_populates="exercises")
+    template = relationship("WorkoutTemplates", back_populates="exercises")
     sets = relationship(
-        "ActivitySet", back_populates="template_activity", cascade="all, delete-orphan"
+        "ActivitySets",
+        back_populates="template_activity",
+        cascade="all, delete-orphan",
+        order_by="ActivitySets.set_number",
     )
 
 
@@ -96,25 +112,33 @@ class WorkoutTemplates(Base):
     __tablename__ = "workout_templates"
 
     id = Column(BigInteger, primary_key=True, index=True)
-    user_id = Column(BigInteger, ForeignKey("user.id"), nullable=False)
+    user_id = Column(BigInteger, ForeignKey("user.id"), nullable=False, index=True)
     name = Column(String(100), nullable=False)
     description = Column(String(500))
+    # Bumped on every write; updates must name the version they were based on
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, onupdate=datetime.now)
 
     exercises = relationship(
-        "WorkoutExercise", back_populates="template", cascade="all, delete-orphan"
+        "WorkoutTemplateActivities",
+        back_populates="template",
+        cascade="all, delete-orphan",
+        order_by="WorkoutTemplateActivities.order",
     )
+    sessions = relationship("WorkoutSessions", back_populates="template")
+
+    __mapper_args__ = {"version_id_col": version}
 
 
 class WorkoutSessions(Base):
     __tablename__ = "workout_sessions"
 
-    id = Column(UUID, primary_key=True, index=True)
-    template_id = Column(UUID, ForeignKey("workout_templates.id"), nullable=True)
+    id = Column(UUID, primary_key=True, index=True, default=uuid.uuid4)
+    template_id = Column(BigInteger, ForeignKey("workout_templates.id"), nullable=True)
     name = Column(String(100), nullable=False)
     description = Column(String(500))
-    user_id = Column(BigInteger, ForeignKey("user.id"), nullable=False)
+    user_id = Column(BigInteger, ForeignKey("user.id"), nullable=False, index=True)
     status = Column(
         String,
         nullable=False,
@@ -127,10 +151,13 @@ class WorkoutSessions(Base):
     calories_burnt = Column(Float, nullable=True)
 
     # Relationships
-    user = relationship("User", back_populates="workout_sessions")
-    template = relationship("WorkoutTemplate", back_populates="sessions")
+    user = relationship("User")
+    template = relationship("WorkoutTemplates", back_populates="sessions")
     activities = relationship(
-        "WorkoutSessionActivity", back_populates="session", cascade="all, delete-orphan"
+        "WorkoutSessionActivities",
+        back_populates="session",
+        cascade="all, delete-orphan",
+        order_by="WorkoutSessionActivities.order",
     )
     __table_args__ = (
         {
@@ -140,16 +167,20 @@ class WorkoutSessions(Base):
     )
 
 
-class WorkoutPlans(Base):
-    __tablename__ = "workout_plans"
 
-    id = Column(BigInteger, primary_key=True, index=True)
-    user_id = Column(BigInteger, ForeignKey("user.id"), nullable=False)
-    name = Column(String(100), nullable=False)
-    description = Column(String(500))
-    created_at = Column(DateTime, default=datetime.now)
-    updated_at = Column(DateTime, onupdate=datetime.now)
+class TrainingLoad(Base):
+    # One row per user and day from their first finished session on: the
+    # day's session load and the rolling loads after it, maintained by
+    # services.training_load and rebuilt by scripts/backfill_training_load.py
+    __tablename__ = "training_load"
 
-    templates = relationship(
-        "WorkoutTemplate", back_populates="workout_plan", cascade="all, delete-orphan"
-    )
+    user_id = Column(BigInteger, ForeignKey("user.id"), primary_key=True)
+    date = Column(Date, primary_key=True)
+    load = Column(Float, nullable=False, default=0)  # session RPE x minutes, summed
+    tonnage = Column(Float, nullable=False, default=0)
+    sessions = Column(Integer, nullable=False, default=0)
+    acute = Column(Float, nullable=False)  # 7-day EWMA
+    chronic = Column(Float, nullable=False)  # 28-day EWMA
+    monotony = Column(Float, nullable=True)  # mean / sd of the last 7 days' load
+    strain = Column(Float, nullable=True)  # 7-day load x monotony
+    updated_at = Column(DateTime, nullable=True)
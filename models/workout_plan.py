@@ -9,7 +9,7 @@ class WorkoutPlan(Base):
     __tablename__ = "workout_plans"
 
     id = Column(BigInteger, primary_key=True, index=True)
-    user_id = Column(BigInteger, ForeignKey("user.id"), nullable=False)
+    user_id = Column(BigInteger, ForeignKey("user.id"), nullable=False, index=True)
     name = Column(String(100), nullable=False)
     description = Column(String(500))
     start_date = Column(Date, nullable=False)
@@ -24,7 +24,7 @@ class PlanDay(Base):
     __tablename__ = "plan_days"
 
     id = Column(BigInteger, primary_key=True, index=True)
-    plan_id = Column(BigInteger, ForeignKey("workout_plans.id"), nullable=False)
+    plan_id = Column(BigInteger, ForeignKey("workout_plans.id"), nullable=False, index=True)
     day_number = Column(BigInteger, nullable=False)
     focus_area = Column(String(100))
     notes = Column(String(500))
@@ -39,10 +39,10 @@ class ScheduledWorkout(Base):
     __tablename__ = "scheduled_workouts"
 
     id = Column(BigInteger, primary_key=True, index=True)
-    day_id = Column(BigInteger, ForeignKey("plan_days.id"), nullable=False)
+    day_id = Column(BigInteger, ForeignKey("plan_days.id"), nullable=False, index=True)
     template_id = Column(BigInteger, ForeignKey("workout_templates.id"), nullable=False)
     scheduled_time = Column(String(5))  # HH:MM format
     is_completed = Column(Boolean, default=False)
 
     day = relationship("PlanDay", back_populates="scheduled_workouts")
-    template = relationship("WorkoutTemplate")
+    template = relationship("WorkoutTemplates")
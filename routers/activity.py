@@ -1,59 +1,118 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from typing import Optional, List
-from controllers.activity import get_activities, get_activity
-from schemas.activity import ActivityResponse
+from controllers.activity import get_activities, get_activity, get_activity_facets
+from schemas.activity import ActivityFacetsResponse, ActivityResponse
 from models.activity import Activity
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from config import settings
+from services.activity_catalog import catalog, etag_matches
+from services.activity_facets import parse_filters
 from services.db import get_db
+from services.pagination import NEXT_CURSOR_HEADER, set_next_cursor
 
 router = APIRouter(prefix="/activities", tags=["activities"])
 
+FILTER_DESCRIPTION = (
+    "Repeatable 'column:value[,value...]' filter. Values in one filter are OR'ed, "
+    "separate filters are AND'ed (e.g., 'primary_muscles:glutes,hamstrings')"
+)
+
+
+def _parse_filter_params(params: Optional[List[str]]):
+    try:
+        return parse_filters(params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
 
 @router.get("/", response_model=List[ActivityResponse])
 async def get_activities_endpoint(
+    request: Request,
+    response: Response,
     page: int = Query(1, ge=1, description="Page number (starting from 1)"),
+    cursor: Optional[str] = Query(
+        None,
+        description=f"Opaque cursor from the {NEXT_CURSOR_HEADER} header of the previous page (overrides page)",
+    ),
     keyword: Optional[str] = Query(
-        None, description="Keyword to search in name and description"
+        None,
+        description="Search name, muscles, equipment, category and instructions (ranked, typo tolerant)",
     ),
     limit: int = Query(10, ge=1, le=100, description="Number of items per page"),
     sort: Optional[str] = Query(
         None, description="Sort by column (e.g., 'name' or '-name' for descending)"
     ),
-    filter: Optional[str] = Query(
+    filter: Optional[List[str]] = Query(
         None,
-        description="Filter by column and value (e.g., 'target_muscle_group:Glutes')",
+        description=FILTER_DESCRIPTION,
     ),
     db: AsyncSession = Depends(get_db),
 ):
-    filters = {}
-    if filter:
-        try:
-            key, value = filter.split(":")
-            if hasattr(Activity, key):
-                filters[key] = value
-        except ValueError as e:
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid filter format. Use 'column_name:value'.",
-            ) from e
+    filters = _parse_filter_params(filter)
 
     valid_sort_columns = [column.name for column in Activity.__table__.columns]
     if sort and sort.lstrip("-") not in valid_sort_columns:
         sort = None
 
+    # Listings only change when the catalog version does
+    if settings.ACTIVITY_CATALOG_CACHE:
+        await catalog.ensure_fresh(db)
+        etag = catalog.etag(sorted(request.query_params.multi_items()))
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+
     # try:
-    return await get_activities(
-        db, page=page, limit=limit, keyword=keyword, sort=sort, filters=filters
+    result = await get_activities(
+        db,
+        page=page,
+        limit=limit,
+        keyword=keyword,
+        sort=sort,
+        filters=filters,
+        cursor=cursor,
     )
+    return set_next_cursor(response, result)
     # except Exception as e:
     #     raise HTTPException(
     #         status_code=500, detail=f"Error retrieving activities: {str(e)}"
     #     ) from e
 
 
+@router.get("/facets", response_model=ActivityFacetsResponse)
+async def get_activity_facets_endpoint(
+    request: Request,
+    response: Response,
+    keyword: Optional[str] = Query(None, description="Restrict counts to a search"),
+    filter: Optional[List[str]] = Query(None, description=FILTER_DESCRIPTION),
+    db: AsyncSession = Depends(get_db),
+):
+    filters = _parse_filter_params(filter)
+
+    await catalog.ensure_fresh(db)
+    etag = catalog.etag("facets", sorted(request.query_params.multi_items()))
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+
+    return await get_activity_facets(db, keyword=keyword, filters=filters)
+
+
 @router.get("/{activity_id}", response_model=ActivityResponse)
-async def get_activity_endpoint(activity_id: str, db: AsyncSession = Depends(get_db)):
+async def get_activity_endpoint(
+    activity_id: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+):
+    if settings.ACTIVITY_CATALOG_CACHE:
+        await catalog.ensure_fresh(db)
+        etag = catalog.etag(activity_id)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+
     activity = await get_activity(db, activity_id)
     if not activity:
         raise HTTPException(status_code=404, detail="Activity not found")
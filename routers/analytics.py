@@ -0,0 +1,64 @@
+from datetime import date
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+import controllers.analytics as analytics
+from schemas.analytics import (
+    ActivitySeriesResponse,
+    LoadDayResponse,
+    TrainingSummaryResponse,
+    VolumeResponse,
+)
+from services.db import get_db
+from services.training_series import DOWNSAMPLERS, METRICS
+from middleware.auth import get_current_user
+from models.auth import User
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+
+@router.get("/summary/", response_model=TrainingSummaryResponse)
+async def get_summary(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await analytics.get_summary(db, current_user.id, start, end)
+
+
+@router.get("/volume/", response_model=VolumeResponse)
+async def get_volume(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    secondary_weight: Optional[float] = Query(None, ge=0, le=1),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await analytics.get_volume(db, current_user.id, start, end, secondary_weight)
+
+
+@router.get("/load/", response_model=List[LoadDayResponse])
+async def get_load(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await analytics.get_load(db, current_user.id, start, end)
+
+
+@router.get("/activities/{activity_id}/series/", response_model=ActivitySeriesResponse)
+async def get_activity_series(
+    activity_id: str,
+    metric: str = Query("estimated_1rm", pattern=f"^({'|'.join(METRICS)})$"),
+    points: int = Query(300, ge=3, le=5000),
+    method: str = Query("lttb", pattern=f"^({'|'.join(DOWNSAMPLERS)})$"),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await analytics.get_activity_series(
+        db, current_user.id, activity_id, metric, points, method, start, end
+    )
@@ -19,9 +19,11 @@ from services.auth import (
     create_access_token,
     create_refresh_token,
     decode_token,
+    access_token_claims,
 )
 from controllers.auth import get_user_by_email, create_user
 from services.db import get_db
+from services.user_cache import user_cache
 from datetime import datetime
 from sqlalchemy import select
 
@@ -46,7 +48,7 @@ async def register_user(
     print("User created:", user)
 
     # Generate tokens
-    access_token = create_access_token({"sub": user.email})
+    access_token = create_access_token(access_token_claims(user))
     refresh_token = create_refresh_token({"sub": user.email})
 
     return AuthResponse(
@@ -57,12 +59,12 @@ async def register_user(
 @router.post("/login", response_model=AuthResponse)
 async def login_user(auth_request: AuthRequest, db: AsyncSession = Depends(get_db)):
     user = await get_user_by_email(db, auth_request.email)
-    if not user or not verify_password(auth_request.password, user.password):
+    if not user or not await verify_password(auth_request.password, user.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials"
         )
 
-    access_token = create_access_token({"sub": user.email})
+    access_token = create_access_token(access_token_claims(user))
     refresh_token = create_refresh_token({"sub": user.email})
 
     return AuthResponse(
@@ -71,16 +73,25 @@ async def login_user(auth_request: AuthRequest, db: AsyncSession = Depends(get_d
 
 
 @router.post("/refresh", response_model=AuthResponse)
-async def refresh_token_endpoint(refresh_request: RefreshRequest):
+async def refresh_token_endpoint(
+    refresh_request: RefreshRequest, db: AsyncSession = Depends(get_db)
+):
     payload = decode_token(refresh_request.refresh_token)
     if not payload or payload.get("type") != "refresh":
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token"
         )
 
-    new_access = create_access_token({"sub": payload.get("sub")})
+    # Re-read the user so the new token carries current uid/plan claims
+    user = await get_user_by_email(db, payload.get("sub"))
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token"
+        )
+
+    new_access = create_access_token(access_token_claims(user))
     return AuthResponse(
-        email=payload.get("sub"),
+        email=user.email,
         access_token=new_access,
         refresh_token=refresh_request.refresh_token,
     )
@@ -102,8 +113,9 @@ async def reset_password(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
 
-    user.password = hash_password(reset_request.new_password)
+    user.password = await hash_password(reset_request.new_password)
     await db.commit()
+    user_cache.invalidate(user.email)
     return {"message": "Password reset successful"}
 
 
@@ -112,13 +124,14 @@ async def change_password(
     email: str, request: ChangePasswordRequest, db: AsyncSession = Depends(get_db)
 ):
     user = await get_user_by_email(db, email)
-    if not user or not verify_password(request.old_password, user.password):
+    if not user or not await verify_password(request.old_password, user.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid old password"
         )
 
-    user.password = hash_password(request.new_password)
+    user.password = await hash_password(request.new_password)
     await db.commit()
+    user_cache.invalidate(user.email)
     return {"message": "Password changed successfully"}
 
 
@@ -153,15 +166,17 @@ async def verify_otp_and_reset(
     )
 
     otp_record = result.scalar_one_or_none()
-    if not otp_record or not verify_otp(request.otp, otp_record.otp_code):
+    if not otp_record or not await verify_otp(request.otp, otp_record.otp_code):
         raise HTTPException(status_code=400, detail="Invalid or expired OTP")
 
     # Update password
     user = await get_user_by_email(db, request.email)
-    user.password = hash_password(request.new_password)
+    user.password = await hash_password(request.new_password)
 
     # Mark OTP as used
     otp_record.used = True
 
     await db.commit()
+    user_cache.invalidate(user.email)
     return {"message": "Password reset successful"}
+
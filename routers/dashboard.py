@@ -0,0 +1,18 @@
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+import controllers.dashboard as dashboard
+from schemas.dashboard import DashboardResponse
+from middleware.auth import get_current_user
+from models.auth import User
+
+router = APIRouter(prefix="/dashboard", tags=["dashboard"])
+
+
+@router.get("/", response_model=DashboardResponse)
+async def get_dashboard(
+    month: Optional[date] = Query(None, description="Any day of the month to show"),
+    current_user: User = Depends(get_current_user),
+):
+    # Queries run on their own pooled sessions, so no request-scoped one is opened
+    return await dashboard.get_dashboard(current_user.id, month)
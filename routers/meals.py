@@ -1,89 +1,198 @@
+from datetime import date
 from typing import List
-from fastapi import APIRouter, Depends
-from fastapi.security import HTTPBearer
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
 import controllers.meals as meals
-from models.meals import Day, DayCreate, FoodCreate, Meal, MealCreate, MealPlan, MealPlanCreate, Food
-from services.db import get_db_connection
+from schemas.meals import (
+    DayCreate,
+    DayResponse,
+    FoodCreate,
+    FoodResponse,
+    LedgerDayResponse,
+    MealCreate,
+    MealPlanCreate,
+    MealPlanResponse,
+    MealResponse,
+)
+from services.db import get_db
+from middleware.auth import get_current_user
+from models.auth import User
 
 router = APIRouter(prefix="/meals", tags=["meals"])
-security = HTTPBearer()
 
 
 @router.post("/log-meal/")
-def log_meal(meal_id: int):
-    return meals.log_meal(meal_id=meal_id)
+async def log_meal(
+    meal_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await meals.log_meal(db, meal_id, current_user.id)
 
 @router.post("/mark-meal-complete/")
-def mark_meal_complete(meal_id: int, meal_plan_id: int):
-    return meals.mark_meal_complete(meal_id=meal_id, meal_plan_id=meal_plan_id)
-
-@router.get("/meal-plans/{meal_plan_id}/")
-def get_meal_plan(meal_plan_id: int):
-    return meals.get_meal_plan(meal_plan_id=meal_plan_id)
-
-@router.get("/meal-plans/", response_model=List[MealPlan])
-def get_meal_plans():
-    return meals.get_meal_plans()
-
-@router.post("/meal-plans/", response_model=MealPlan)
-def create_meal_plan(meal_plan: MealPlanCreate):
-    return meals.create_meal_plan(meal_plan=meal_plan,)
-
-@router.put("/meal-plans/{meal_plan_id}", response_model=MealPlan)
-def update_meal_plan(meal_plan_id: int, meal_plan: MealPlanCreate):
-    return meals.update_meal_plan(meal_plan_id=meal_plan_id, meal_plan=meal_plan)
-
-
-@router.get("/days/", response_model=List[Day])
-def get_days():
-    return meals.get_days()
-
-@router.post("/days/", response_model=Day)
-def create_day(day: DayCreate):
-    return meals.create_day(day=day)
-
-@router.put("/days/{day_id}", response_model=Day)
-def update_day(day_id: int, day: DayCreate):
-    return meals.update_day(day_id=day_id, day=day)
-
-
-@router.get("/meals/{meal_id}/", response_model=Meal)
-def get_meal(meal_id: int):
-    return meals.get_meal(meal_id=meal_id)
-
-# Paginate this endpoint
-@router.get("/meals/", response_model=List[Meal])
-def get_meals():
-    return meals.get_meals()
-
-@router.post("/meals/", response_model=Meal)
-def create_meal(meal: MealCreate):
-    return meals.create_meal(meal=meal)
-
-@router.put("/meals/{meal_id}", response_model=Meal)
-def update_meal(meal_id: int, meal: MealCreate):
-    return meals.update_meal(meal_id=meal_id, meal=meal)
-
-@router.get("/foods/", response_model=List[Food])
-def get_foods():
-    return meals.get_foods()
-
-@router.post("/foods/", response_model=Food)
-def create_food(food: FoodCreate):
-    return meals.create_food(food=food)
-
-@router.put("/foods/{food_id}", response_model=Food)
-def update_food(food_id: int, food: FoodCreate):
-    return meals.update_food(food_id=food_id, food=food)
-
-@router.get("/search-foods/")
-def search_foods(query: str):
-    # Call your existing function to search foods
-    foods = meals.search_food(query)  # Replace with your function
-    return foods
+async def mark_meal_complete(
+    meal_id: int,
+    meal_plan_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await meals.mark_meal_complete(db, meal_id, meal_plan_id, current_user.id)
+
+@router.get("/meal-plans/{meal_plan_id}/", response_model=MealPlanResponse)
+async def get_meal_plan(
+    meal_plan_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await meals.get_meal_plan(db, meal_plan_id, current_user.id)
+
+@router.get("/meal-plans/", response_model=List[MealPlanResponse])
+async def get_meal_plans(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await meals.get_meal_plans(db, current_user.id)
+
+@router.post("/meal-plans/", response_model=MealPlanResponse, status_code=status.HTTP_201_CREATED)
+async def create_meal_plan(
+    meal_plan: MealPlanCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await meals.create_meal_plan(db, current_user.id, meal_plan)
+
+@router.put("/meal-plans/{meal_plan_id}", response_model=MealPlanResponse)
+async def update_meal_plan(
+    meal_plan_id: int,
+    meal_plan: MealPlanCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await meals.update_meal_plan(db, meal_plan_id, current_user.id, meal_plan)
+
+
+@router.get("/days/", response_model=List[DayResponse])
+async def get_days(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await meals.get_days(db, current_user.id, skip, limit)
+
+@router.post("/days/", response_model=DayResponse, status_code=status.HTTP_201_CREATED)
+async def create_day(
+    day: DayCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await meals.create_day(db, current_user.id, day)
+
+@router.put("/days/{day_id}", response_model=DayResponse)
+async def update_day(
+    day_id: int,
+    day: DayCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await meals.update_day(db, day_id, current_user.id, day)
+
+@router.get("/ledger/", response_model=List[LedgerDayResponse])
+async def get_ledger(
+    start: date,
+    end: date,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await meals.get_ledger(db, current_user.id, start, end)
+
+
+@router.get("/meals/{meal_id}/", response_model=MealResponse)
+async def get_meal(
+    meal_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await meals.get_meal(db, meal_id, current_user.id)
+
+@router.get("/meals/", response_model=List[MealResponse])
+async def get_meals(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await meals.get_meals(db, current_user.id, skip, limit)
+
+@router.post("/meals/", response_model=MealResponse, status_code=status.HTTP_201_CREATED)
+async def create_meal(
+    meal: MealCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await meals.create_meal(db, current_user.id, meal)
+
+@router.put("/meals/{meal_id}", response_model=MealResponse)
+async def update_meal(
+    meal_id: int,
+    meal: MealCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await meals.update_meal(db, meal_id, current_user.id, meal)
+
+@router.delete("/meals/{meal_id}")
+async def delete_meal(
+    meal_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await meals.delete_meal(db, meal_id, current_user.id)
+
+@router.get("/foods/", response_model=List[FoodResponse])
+async def get_foods(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await meals.get_foods(db, skip, limit)
+
+@router.post("/foods/", response_model=FoodResponse, status_code=status.HTTP_201_CREATED)
+async def create_food(
+    food: FoodCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await meals.create_food(db, current_user.id, food)
+
+@router.put("/foods/{food_id}", response_model=FoodResponse)
+async def update_food(
+    food_id: int,
+    food: FoodCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await meals.update_food(db, food_id, current_user.id, food)
+
+@router.get("/search-foods/", response_model=List[FoodResponse])
+async def search_foods(
+    query: str,
+    max_results: int = Query(20, ge=1, le=50),
+    page_number: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await meals.search_food(db, query, max_results=max_results, page_number=page_number)
+
+@router.get("/foods/external/{food_id}")
+async def get_external_food(food_id: str, current_user: User = Depends(get_current_user)):
+    return await meals.get_food_details(food_id)
 
 @router.get("/search-recipes/")
-def search_recipes(query: str):
-    # Call your existing function to search recipes
-    recipes = meals.search_recipe(query)  # Replace with your function
-    return recipes
+async def search_recipes(
+    query: str,
+    max_results: int = Query(20, ge=1, le=50),
+    current_user: User = Depends(get_current_user),
+):
+    return await meals.search_recipe(query, max_results=max_results)
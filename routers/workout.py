@@ -1,17 +1,19 @@
 # routers/workout.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from models.workout import PerformedExercise, PerformedWorkout
+from typing import List, Optional
 from schemas.workout import *
 from controllers.workout import *
 from services.db import get_db
 from middleware.auth import get_current_user
 from models.auth import User
 from fastapi import WebSocket, WebSocketDisconnect
-from services.realtime import ConnectionManager
+from services.realtime import hub
+from services.session_events import session_events
+from controllers.workout_sessions import get_active_session
+from errors.websocket import WebSocketError
 from services.websocket import authenticate_websocket
-
-manager = ConnectionManager()
+from services.pagination import set_next_cursor
 
 
 router = APIRouter(prefix="/workouts/templates", tags=["workout_templates"])
@@ -35,12 +37,15 @@ async def create_template(
 
 @router.get("/", response_model=List[WorkoutTemplateResponse])
 async def list_templates(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    return await get_user_templates(db, current_user.id, skip, limit)
+    page = await get_user_templates(db, current_user.id, skip, limit, cursor)
+    return set_next_cursor(response, page)
 
 
 @router.get("/{template_id}", response_model=WorkoutTemplateResponse)
@@ -60,7 +65,7 @@ async def get_template(
 @router.put("/{template_id}", response_model=WorkoutTemplateResponse)
 async def update_template(
     template_id: int,
-    template_data: WorkoutTemplateCreate,
+    template_data: WorkoutTemplateUpdate,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -92,132 +97,57 @@ async def delete_template(
         ) from e
 
 
-@router.post("/active", response_model=WorkoutResponse, status_code=201)
-async def start_workout(
-    workout_data: WorkoutStart,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
-    # Check for existing active workout
-    active_workout = await get_active_workout(db, current_user.id)
-    if active_workout:
-        raise HTTPException(400, "Finish current workout first")
-
-    # Create new workout
-    workout = PerformedWorkout(
-        user_id=current_user.id, template_id=workout_data.template_id
-    )
-    db.add(workout)
-    await db.commit()
-    return workout
-
-
-@router.get("/active", response_model=WorkoutResponse)
-async def get_active_workout(
-    db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)
-):
-    workout = await get_active_workout(db, current_user.id)
-    if not workout:
-        raise HTTPException(404, "No active workout")
-    return workout
-
-
-@router.post("/active/complete", response_model=WorkoutResponse)
-async def complete_workout(
-    db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)
-):
-    workout = await get_active_workout(db, current_user.id)
-    workout.status = "completed"
-    workout.end_time = datetime.now()
-
-    # Calculate metrics
-    # workout.performance_metrics = await calculate_metrics(workout)
-
-    await db.commit()
-    return workout
-
-
 @router.websocket("/active/ws")
 async def workout_websocket(
     websocket: WebSocket, token: str, db: AsyncSession = Depends(get_db)
 ):
-    user = await authenticate_websocket(token, db)
-    await manager.connect(websocket)
+    user = await authenticate_websocket(websocket, token, db)
+    if user is None:
+        return
+    connection = await hub.connect(websocket, user.id)
+    active_session = None
 
     try:
-        active_workout = await get_active_workout(db, user.id)
-        if not active_workout:
+        active_session = await get_active_session(db, user.id)
+        if not active_session:
             await websocket.close(code=1008)
             return
+        session_events.open_session(active_session.id)
 
         while True:
             data = await websocket.receive_json()
+            connection.touch()
             update_type = data.get("type")
 
-            # Handle different update types
-            if update_type == "set_start":
-                await handle_set_start(db, active_workout, data)
-            elif update_type == "set_complete":
-                await handle_set_complete(db, active_workout, data)
-            elif update_type == "exercise_start":
-                await handle_exercise_start(db, active_workout, data)
-
-            # Broadcast update to all connected clients
-            await manager.broadcast(
-                {"type": update_type, "data": data, "userId": user.id}
+            # Heartbeat: the hub pings idle clients, clients may ping too
+            if update_type == "pong":
+                continue
+            if update_type == "ping":
+                hub.send(connection, {"type": "pong"})
+                continue
+
+            # Acknowledge as soon as the event is journaled; the database
+            # write happens in the next batched flush
+            try:
+                ack = await session_events.record(active_session.id, data)
+            except WebSocketError as e:
+                hub.send(connection, {"type": "error", "reason": e.reason, "seq": data.get("seq")})
+                continue
+            hub.send(connection, {"type": "ack", "seq": data.get("seq"), **ack})
+
+            # Broadcast update to all of the user's connected clients
+            await hub.broadcast(
+                {"type": update_type, "data": {**data, **ack}, "userId": user.id}, user.id
             )
 
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
-
-
-@router.post("/active/exercises", status_code=201)
-async def start_exercise(
-    exercise_data: ExerciseStart,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
-    workout = await get_active_workout(db, current_user.id)
-    exercise = PerformedExercise(
-        workout_id=workout.id,
-        activity_id=exercise_data.activity_id,
-        start_time=datetime.now(),
-    )
-    db.add(exercise)
-    await db.commit()
-    return exercise
-
-
-@router.put("/active/sets/{set_id}/start")
-async def start_set(
-    set_id: int,
-    set_data: SetStart,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
-    set_record = await get_set(db, set_id, current_user.id)
-    set_record.start_time = datetime.now()
-    set_record.weight = set_data.weight
-    set_record.reps = set_data.reps
-    set_record.is_warmup = set_data.is_warmup
-    await db.commit()
-    return set_record
-
-
-@router.put("/active/sets/{set_id}/complete")
-async def complete_set(
-    set_id: int,
-    set_data: SetComplete,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
-    set_record = await get_set(db, set_id, current_user.id)
-    set_record.end_time = datetime.now()
-    set_record.rpe = set_data.rpe
-    set_record.notes = set_data.notes
-
-    # Calculate rest period
-    await calculate_rest_periods(db, set_record)
+        pass
+    except RuntimeError:
+        # Receiving on a socket the hub already closed (evicted) fails this way
+        if not connection.closed:
+            raise
+    finally:
+        await hub.disconnect(connection)
+        if active_session is not None:
+            await session_events.release_session(active_session.id)
 
-    await db.commit()
-    return set_record
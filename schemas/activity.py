@@ -24,3 +24,8 @@ class ActivityResponse(Activity):
 
     class Config:
         from_attributes = True
+
+
+class ActivityFacetsResponse(BaseModel):
+    total: int
+    facets: Dict[str, Dict[str, int]]
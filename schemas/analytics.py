@@ -0,0 +1,79 @@
+from datetime import date, datetime
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class ActivitySummary(BaseModel):
+    activity_id: str
+    sets: int
+    working_sets: int
+    reps: int
+    volume: float
+    duration: float
+    max_weight: Optional[float] = None
+    max_estimated_1rm: Optional[float] = None
+    last_performed: datetime
+
+
+class TrainingSummaryResponse(BaseModel):
+    start: Optional[date] = None
+    end: Optional[date] = None
+    sessions: int
+    sets: int
+    working_sets: int
+    reps: int
+    volume: float
+    duration: float
+    activities: List[ActivitySummary]
+
+
+class MuscleVolume(BaseModel):
+    muscle: str
+    sets: float
+    reps: float
+    volume: float
+
+
+class WeekVolume(BaseModel):
+    week_start: date
+    sets: int
+    reps: int
+    volume: float
+    unmapped_sets: int
+    muscles: List[MuscleVolume]
+
+
+class VolumeResponse(BaseModel):
+    start: date
+    end: date
+    secondary_weight: float
+    muscles: List[str]
+    weeks: List[WeekVolume]
+
+
+class LoadDayResponse(BaseModel):
+    date: date
+    load: float
+    tonnage: float
+    sessions: int
+    acute: float
+    chronic: float
+    ratio: Optional[float] = None
+    monotony: Optional[float] = None
+    strain: Optional[float] = None
+
+    class Config:
+        from_attributes = True
+
+
+class SeriesPoint(BaseModel):
+    t: datetime
+    value: float
+
+
+class ActivitySeriesResponse(BaseModel):
+    activity_id: str
+    metric: str
+    method: str
+    total_points: int
+    points: List[SeriesPoint]
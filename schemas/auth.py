@@ -1,5 +1,5 @@
 from typing import Optional
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field, field_validator
 
 
 class SignupRequest(BaseModel):
@@ -36,5 +36,12 @@ class ChangePasswordRequest(BaseModel):
 
 class PasswordResetRequest(BaseModel):
     email: EmailStr
-    otp: int
+    # OTPs are issued zero-padded to six digits
+    otp: str = Field(..., pattern=r"^\d{6}$")
     new_password: str
+
+    @field_validator("otp", mode="before")
+    @classmethod
+    def pad_numeric_otp(cls, value):
+        # Clients that send the code as a JSON number lose its leading zeros
+        return str(value).zfill(6) if isinstance(value, int) else value
@@ -0,0 +1,68 @@
+from datetime import date, datetime
+from pydantic import BaseModel
+from typing import List, Optional
+from uuid import UUID
+
+from models.meals import MealType
+
+
+class DashboardTotals(BaseModel):
+    sessions: int
+    calories_burned: float
+    calories_consumed: float
+    meals_logged: int
+    scheduled: int
+    completed: int
+
+
+class DashboardDay(BaseModel):
+    date: date
+    sessions: int
+    calories_burned: float
+    calories_consumed: float
+    meals_logged: int
+    scheduled: int
+    completed: int
+
+
+class RecentSession(BaseModel):
+    id: UUID
+    name: str
+    started_at: Optional[datetime] = None
+    ended_at: Optional[datetime] = None
+    calories_burnt: Optional[float] = None
+
+
+class RoutineSummary(BaseModel):
+    id: int
+    name: str
+    updated_at: Optional[datetime] = None
+
+
+class ActivePlanSummary(BaseModel):
+    id: int
+    name: str
+    start_date: date
+    end_date: date
+
+
+class DashboardRoutines(BaseModel):
+    templates: int
+    recent: List[RoutineSummary]
+    active_plan: Optional[ActivePlanSummary] = None
+
+
+class RecentMeal(BaseModel):
+    id: int
+    meal_type: MealType
+    timestamp: Optional[datetime] = None
+    logged_at: Optional[datetime] = None
+
+
+class DashboardResponse(BaseModel):
+    month: date
+    days: List[DashboardDay]
+    totals: DashboardTotals
+    recent_sessions: List[RecentSession]
+    routines: DashboardRoutines
+    recent_meals: List[RecentMeal]
@@ -1,73 +1,8 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Date, Enum, ForeignKey
-from sqlalchemy.orm import relationship
-from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime, date
-from enum import Enum as PyEnum
 from pydantic import BaseModel
 from typing import List, Optional
 
-Base = declarative_base()
-
-class MealType(str, PyEnum):
-    BREAKFAST = "breakfast"
-    LUNCH = "lunch"
-    DINNER = "dinner"
-    SNACK = "snack"
-    OTHER = "other"
-
-class Food(Base):
-    __tablename__ = "foods"
-    id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, nullable=False)
-    description = Column(String, nullable=True)
-    quantity = Column(Float, nullable=True, default=100)
-    quantity_unit = Column(String, nullable=True, default="grams")
-    food_type = Column(String, nullable=True, default="generic")
-    food_url = Column(String, nullable=True)
-    calories = Column(Integer, nullable=False)
-    protein = Column(Float, nullable=True)
-    carbs = Column(Float, nullable=True)
-    fats = Column(Float, nullable=True)
-
-class Meal(Base):
-    __tablename__ = "meals"
-    id = Column(Integer, primary_key=True, index=True)
-    meal_type = Column(Enum(MealType), nullable=False)
-    timestamp = Column(DateTime, nullable=True)
-    notes = Column(String, nullable=True)
-    day_id = Column(Integer, ForeignKey("days.id"))
-    foods = relationship("Food", secondary="meal_foods")
-
-class MealFood(Base):
-    __tablename__ = "meal_foods"
-    meal_id = Column(Integer, ForeignKey("meals.id"), primary_key=True)
-    food_id = Column(Integer, ForeignKey("foods.id"), primary_key=True)
-
-class Day(Base):
-    __tablename__ = "days"
-    id = Column(Integer, primary_key=True, index=True)
-    date = Column(Date, nullable=False)
-    total_calories_consumed = Column(Float, nullable=True)
-    total_calories_burned = Column(Float, nullable=True)
-    total_protein = Column(Float, nullable=True)
-    total_carbs = Column(Float, nullable=True)
-    total_fats = Column(Float, nullable=True)
-    meals = relationship("Meal", backref="day")
-    workouts = relationship("Workout", backref="day")
-    muscle_group_activation = Column(String, nullable=True)
-    activity_level = Column(String, nullable=True)
-    overall_score = Column(Integer, nullable=True)
-    notes = Column(String, nullable=True)
-
-class MealPlan(Base):
-    __tablename__ = "meal_plans"
-    id = Column(Integer, primary_key=True, index=True)
-    start_date = Column(Date, nullable=False)
-    end_date = Column(Date, nullable=False)
-    notes = Column(String, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, onupdate=datetime.utcnow)
-    days = relationship("Day", backref="meal_plan")
+from models.meals import MealType
 
 
 # Pydantic schemas for request/response
@@ -78,11 +13,20 @@ class FoodCreate(BaseModel):
     quantity_unit: Optional[str] = "grams"
     food_type: Optional[str] = "generic"
     food_url: Optional[str] = None
-    calories: int
+    brand: Optional[str] = None
+    calories: float
     protein: Optional[float] = None
     carbs: Optional[float] = None
     fats: Optional[float] = None
 
+class FoodResponse(FoodCreate):
+    id: int
+    source: str
+    external_id: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
 class MealCreate(BaseModel):
     meal_type: MealType
     foods: List[int]  # List of food IDs
@@ -98,3 +42,45 @@ class MealPlanCreate(BaseModel):
     end_date: date
     days: List[int]  # List of day IDs
     notes: Optional[str] = None
+
+
+class MealResponse(BaseModel):
+    id: int
+    meal_type: MealType
+    timestamp: Optional[datetime] = None
+    notes: Optional[str] = None
+    day_id: Optional[int] = None
+    logged_at: Optional[datetime] = None
+    foods: List[FoodResponse]
+
+    class Config:
+        from_attributes = True
+
+class LedgerDayResponse(BaseModel):
+    id: int
+    date: date
+    total_calories_consumed: Optional[float] = None
+    total_calories_burned: Optional[float] = None
+    total_protein: Optional[float] = None
+    total_carbs: Optional[float] = None
+    total_fats: Optional[float] = None
+    meals_logged: Optional[int] = None
+    workouts_completed: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+class DayResponse(LedgerDayResponse):
+    notes: Optional[str] = None
+    meal_plan_id: Optional[int] = None
+    meals: List[MealResponse]
+
+class MealPlanResponse(BaseModel):
+    id: int
+    start_date: date
+    end_date: date
+    notes: Optional[str] = None
+    days: List[DayResponse]
+
+    class Config:
+        from_attributes = True
@@ -1,7 +1,15 @@
 # schemas/workout.py
-from pydantic import BaseModel, Field
-from datetime import datetime
+from pydantic import BaseModel, Field, field_validator, model_validator
+from datetime import datetime, timedelta
 from typing import List, Optional
+import isodate
+
+
+def _iso_duration(value):
+    # Durations are stored as seconds and exchanged as ISO 8601 strings
+    if isinstance(value, (int, float)):
+        return isodate.duration_isoformat(timedelta(seconds=value))
+    return value
 
 
 class SetCreate(BaseModel):
@@ -12,6 +20,7 @@ class SetCreate(BaseModel):
     is_warmup: bool = False
     rpe: Optional[float] = Field(None, ge=6, le=10)
     notes: Optional[str] = None
+    duration: Optional[str] = None  # ISO 8601 duration format
     rest_after_set: Optional[str]  # ISO 8601 duration format
 
 
@@ -22,17 +31,46 @@ class ExerciseCreate(BaseModel):
     notes: Optional[str]
     sets: Optional[List[SetCreate]] = []
 
+    @model_validator(mode="after")
+    def unique_set_numbers(self):
+        numbers = [s.set_number for s in self.sets or []]
+        if len(numbers) != len(set(numbers)):
+            raise ValueError("set_number must be unique within an exercise")
+        return self
+
 
 class WorkoutTemplateCreate(BaseModel):
     name: str = Field(..., max_length=100)
     description: Optional[str] = Field(None, max_length=500)
     exercises: Optional[List[ExerciseCreate]] = []
 
+    @model_validator(mode="after")
+    def unique_orders(self):
+        # Exercises are matched by order when a template is updated
+        orders = [e.order for e in self.exercises or []]
+        if len(orders) != len(set(orders)):
+            raise ValueError("order must be unique within a template")
+        return self
+
+
+class WorkoutTemplateUpdate(WorkoutTemplateCreate):
+    version: int  # version the edit was based on, from WorkoutTemplateResponse
+
 
 class SetResponse(BaseModel):
     set_number: int
-    set_type: str
-    parameters: dict
+    set_type: Optional[str]
+    weight: Optional[float]
+    reps: Optional[int]
+    is_warmup: Optional[bool]
+    rpe: Optional[float]
+    notes: Optional[str]
+    duration: Optional[str]
+    rest_after_set: Optional[str]
+
+    _durations = field_validator("duration", "rest_after_set", mode="before")(
+        _iso_duration
+    )
 
     class Config:
         from_attributes = True
@@ -45,6 +83,8 @@ class ExerciseResponse(BaseModel):
     notes: Optional[str]
     sets: List[SetResponse]
 
+    _durations = field_validator("rest_between_sets", mode="before")(_iso_duration)
+
     class Config:
         from_attributes = True
 
@@ -53,6 +93,7 @@ class WorkoutTemplateResponse(BaseModel):
     id: int
     name: str
     description: Optional[str]
+    version: int
     created_at: datetime
     updated_at: Optional[datetime]
     exercises: List[ExerciseResponse]
@@ -76,21 +117,6 @@ class ExerciseStart(BaseModel):
     activity_id: str
 
 
-class WorkoutStart(BaseModel):
-    template_id: Optional[int] = None
-
-
-class WorkoutResponse(BaseModel):
-    id: int
-    status: str
-    start_time: datetime
-    duration: Optional[float]
-    exercises: List[dict]
-
-    class Config:
-        from_attributes = True
-
-
 class RealTimeUpdate(BaseModel):
     type: str  # 'set_start', 'set_complete', 'exercise_start', 'pause'
     data: dict
@@ -0,0 +1,112 @@
+"""
+Rebuild the training_load snapshots of every user from their sessions.
+
+Finished sessions keep the snapshots current incrementally; this recomputes
+them from scratch (after a formula change, a restore or an import of old
+sessions). Users are split into chunks processed by a pool of worker
+processes, each with its own database engine; a chunk is one query for its
+sessions' loads and one transaction replacing its users' rows.
+
+    python scripts/backfill_training_load.py --workers 8
+    python scripts/backfill_training_load.py --user 42
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+from typing import List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sqlalchemy import select  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+import models.activity  # noqa: E402,F401
+import models.auth  # noqa: E402,F401
+from models.workout import WorkoutSessions  # noqa: E402
+from services import training_load  # noqa: E402
+from services.db_runtime import create_engine  # noqa: E402
+
+
+async def _rebuild_chunk(dsn: Optional[str], user_ids: List[int], until: date) -> int:
+    engine = create_engine(dsn)
+    try:
+        async with sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)() as db:
+            written = await training_load.rebuild(db, user_ids, until)
+    finally:
+        await engine.dispose()
+    return sum(written.values())
+
+
+def rebuild_chunk(dsn: Optional[str], user_ids: List[int], until: date) -> tuple:
+    """Worker process entry point; returns (users, days written)."""
+    return len(user_ids), asyncio.run(_rebuild_chunk(dsn, user_ids, until))
+
+
+async def user_ids(dsn: Optional[str], user: Optional[int]) -> List[int]:
+    if user is not None:
+        return [user]
+    engine = create_engine(dsn)
+    try:
+        async with engine.connect() as conn:
+            result = await conn.execute(
+                select(WorkoutSessions.user_id)
+                .where(WorkoutSessions.status == "finished")
+                .distinct()
+                .order_by(WorkoutSessions.user_id)
+            )
+            return list(result.scalars())
+    finally:
+        await engine.dispose()
+
+
+def backfill(
+    dsn: Optional[str] = None,
+    workers: int = os.cpu_count() or 1,
+    chunk_size: int = 200,
+    until: Optional[date] = None,
+    user: Optional[int] = None,
+) -> dict:
+    started = time.perf_counter()
+    until = until or date.today()
+    users = asyncio.run(user_ids(dsn, user))
+    chunks = [users[i : i + chunk_size] for i in range(0, len(users), chunk_size)]
+    stats = {"users": 0, "days": 0, "chunks": len(chunks), "workers": workers}
+    if workers <= 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            done, days = rebuild_chunk(dsn, chunk, until)
+            stats["users"] += done
+            stats["days"] += days
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(rebuild_chunk, dsn, chunk, until) for chunk in chunks]
+            for future in as_completed(futures):
+                done, days = future.result()
+                stats["users"] += done
+                stats["days"] += days
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dsn", default=None, help="defaults to the app database")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=200, help="users per transaction")
+    parser.add_argument("--until", type=date.fromisoformat, default=None, help="last day to write (today)")
+    parser.add_argument("--user", type=int, default=None, help="only this user id")
+    args = parser.parse_args()
+
+    stats = backfill(args.dsn, args.workers, args.chunk_size, args.until, args.user)
+    print(
+        f"rebuilt {stats['users']} users ({stats['days']:,} days) in {stats['chunks']} chunks "
+        f"on {stats['workers']} workers in {stats['seconds']:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Latency benchmark for activity search.
+
+Replays search-box traffic (every keystroke prefix of real exercise names plus
+misspelled variants) against the exercise catalog imported by clean_data.py
+and prints p50/p99 latency.
+
+    python scripts/benchmarks/activity_search.py --catalog ./data/exercises.json
+    python scripts/benchmarks/activity_search.py --dsn postgresql+asyncpg://...
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+from services.activity_search import ActivitySearchIndex  # noqa: E402
+
+
+def load_catalog(path):
+    with open(path, "r", encoding="utf-8") as file:
+        exercises = json.load(file)
+    return [
+        SimpleNamespace(
+            id=exercise["id"],
+            name=exercise["name"],
+            category=exercise["category"],
+            equipment=exercise["equipment"],
+            primary_muscles=exercise["primaryMuscles"],
+            secondary_muscles=exercise["secondaryMuscles"],
+            instructions=exercise["instructions"],
+        )
+        for exercise in exercises
+    ]
+
+
+def misspell(word, rng):
+    if len(word) < 4:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    return word[:i] + word[i + 1 :] if rng.random() < 0.5 else word[:i] + word[i] + word[i:]
+
+
+def build_queries(catalog, count, seed):
+    rng = random.Random(seed)
+    names = [activity.name for activity in rng.sample(catalog, min(count, len(catalog)))]
+    queries = []
+    for name in names:
+        # Keystroke-by-keystroke prefixes, as the search box sends them
+        queries.extend(name[:i] for i in range(2, len(name) + 1, 2))
+        queries.append(" ".join(misspell(word, rng) for word in name.split()))
+    queries.extend(["glutes", "dumbell press", "hamstring curl", "lats cable", "abdominals"])
+    return queries
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(label, samples):
+    samples_ms = [s * 1000 for s in samples]
+    print(
+        f"{label:<24} n={len(samples_ms):<6} "
+        f"p50={percentile(samples_ms, 50):.3f}ms "
+        f"p99={percentile(samples_ms, 99):.3f}ms "
+        f"mean={statistics.mean(samples_ms):.3f}ms"
+    )
+
+
+def bench_in_process(catalog, queries):
+    started = time.perf_counter()
+    index = ActivitySearchIndex().build(catalog)
+    print(f"index build: {(time.perf_counter() - started) * 1000:.1f}ms for {len(index)} activities")
+
+    samples = []
+    for query in queries:
+        started = time.perf_counter()
+        index.search(query, limit=10)
+        samples.append(time.perf_counter() - started)
+    report("in-process index", samples)
+
+    samples = []
+    lowered = [(a, a.name.lower()) for a in catalog]
+    for query in queries:
+        started = time.perf_counter()
+        needle = query.lower()
+        [a for a, name in lowered if needle in name][:10]
+        samples.append(time.perf_counter() - started)
+    report("substring scan", samples)
+
+
+async def bench_postgres(dsn, queries):
+    from sqlalchemy import select
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from controllers.activity import get_activities
+    from models.activity import Activity
+
+    engine = create_async_engine(dsn)
+    session_factory = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    async with session_factory() as db:
+        for label, search in (("postgres ilike", False), ("postgres fts+trgm", True)):
+            samples = []
+            for query in queries:
+                started = time.perf_counter()
+                if search:
+                    await get_activities(db, keyword=query)
+                else:
+                    await db.execute(
+                        select(Activity).where(Activity.name.ilike(f"%{query}%")).limit(10)
+                    )
+                samples.append(time.perf_counter() - started)
+            report(label, samples)
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--catalog", default="./data/exercises.json")
+    parser.add_argument("--queries", type=int, default=200, help="names to sample")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--dsn", help="also benchmark the Postgres path")
+    args = parser.parse_args()
+
+    catalog = load_catalog(args.catalog)
+    queries = build_queries(catalog, args.queries, args.seed)
+    bench_in_process(catalog, queries)
+    if args.dsn:
+        asyncio.run(bench_postgres(args.dsn, queries))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Vectorised calorie computation against a per-set Python loop.
+
+Builds a synthetic energy table and a history of sessions (sets with and
+without logged durations, reps and rest), then computes every session's
+calories twice: with services.calories.batch_calories in one pass, and set
+by set with np.interp on each activity's own curve, the way a naive
+implementation would. Checks that both agree and prints sets per second.
+
+    python scripts/benchmarks/calories.py --sessions 200000
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+from services.calories import (  # noqa: E402
+    DEFAULT_REST_SECONDS,
+    DEFAULT_SET_SECONDS,
+    LB_TO_KG,
+    REST_MET,
+    SECONDS_PER_REP,
+    EnergyTable,
+    batch_calories,
+    set_seconds,
+)
+
+
+def make_table(rng, activities):
+    rows = []
+    for i in range(activities):
+        # Same weight points as the scrape_data.py and html_to_json.py tables
+        weights_lb = (125, 155, 185) if i % 2 else (130, 155, 180, 205)
+        met = rng.uniform(2.5, 11)
+        rows.append(
+            SimpleNamespace(
+                name=f"activity {i}",
+                activity_id=f"a{i}",
+                weights_kg=[lb * LB_TO_KG for lb in weights_lb],
+                # Per-hour kcal with a little per-weight noise, as in the published tables
+                kcal_per_hour=[met * rng.uniform(0.95, 1.05) * lb * LB_TO_KG for lb in weights_lb],
+            )
+        )
+    return rows
+
+
+def scalar_reference(rows, sets, weights):
+    """One np.interp per set on the activity's own MET points, summed in a dict."""
+    totals = {}
+    for session, activity, duration, reps, rest, last in sets:
+        row = rows[activity]
+        kg = weights[session]
+        points = sorted(zip(row.weights_kg, row.kcal_per_hour))
+        met = float(np.interp(kg, [w for w, _ in points], [k / w for w, k in points]))
+        if duration is not None:
+            active = duration
+        elif reps is not None:
+            active = reps * SECONDS_PER_REP
+        else:
+            active = DEFAULT_SET_SECONDS
+        if rest is None:
+            rest = 0 if last else DEFAULT_REST_SECONDS
+        kcal = met * kg * active / 3600 + REST_MET * kg * rest / 3600
+        totals[session] = totals.get(session, 0.0) + kcal
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=50_000)
+    parser.add_argument("--activities", type=int, default=800)
+    parser.add_argument("--scalar-sessions", type=int, default=5_000, help="sessions timed with the loop")
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rows = make_table(rng, args.activities)
+    table = EnergyTable(rows)
+    weights = [rng.uniform(45, 140) for _ in range(args.sessions)]
+
+    sets = []
+    for session in range(args.sessions):
+        count = rng.randint(8, 30)
+        for n in range(count):
+            sets.append(
+                (
+                    session,
+                    rng.randrange(args.activities),
+                    rng.choice([None, rng.uniform(20, 90)]),
+                    rng.choice([None, rng.randint(3, 15)]),
+                    rng.choice([None, rng.uniform(30, 180)]),
+                    n == count - 1,
+                )
+            )
+    print(f"{args.sessions:,} sessions, {len(sets):,} sets, {args.activities} activities")
+
+    started = time.perf_counter()
+    session_index = np.fromiter((s[0] for s in sets), dtype=np.int64, count=len(sets))
+    table_rows = np.fromiter((table.resolve(f"a{s[1]}") for s in sets), dtype=np.int64, count=len(sets))
+
+    def column(i):
+        return np.array([np.nan if s[i] is None else s[i] for s in sets], dtype=float)
+
+    duration, reps, rest = column(2), column(3), column(4)
+    last = np.array([s[5] for s in sets])
+    prepared = time.perf_counter()
+    active, rest_seconds = set_seconds(duration, np.full(len(sets), np.nan), reps, rest, last)
+    totals = batch_calories(
+        table, session_index, table_rows, np.asarray(weights)[session_index], active, rest_seconds, args.sessions
+    )
+    finished = time.perf_counter()
+    print(
+        f"vectorised: {finished - started:.2f}s incl. array building "
+        f"({finished - prepared:.3f}s compute, {len(sets) / (finished - prepared):,.0f} sets/s)"
+    )
+
+    subset = [s for s in sets if s[0] < args.scalar_sessions]
+    started = time.perf_counter()
+    reference = scalar_reference(rows, subset, weights)
+    seconds = time.perf_counter() - started
+    print(f"per-set loop: {seconds:.2f}s for {len(subset):,} sets ({len(subset) / seconds:,.0f} sets/s)")
+
+    mismatches = sum(
+        not math.isclose(reference[session], totals[session], rel_tol=1e-3)
+        for session in reference
+    )
+    print(f"{len(reference):,} sessions compared, {mismatches} mismatches")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
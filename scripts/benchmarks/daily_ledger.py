@@ -0,0 +1,207 @@
+"""
+A year of dashboard reads: raw aggregates vs the daily ledger.
+
+Seeds one user with a year of logged meals (several foods each) and finished
+sessions through the ledger-maintaining paths, then times reading 365 days of
+calorie and macro totals two ways: aggregating meals/meal_foods/foods and
+sessions on the fly, and a range read of the ledger rows. Also times the
+incremental cost of log_meal and checks that reconciliation finds no drift,
+repairs deliberately corrupted days and is clean again afterwards.
+
+    python scripts/benchmarks/daily_ledger.py --days 365
+    python scripts/benchmarks/daily_ledger.py --dsn postgresql+asyncpg://...
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+from sqlalchemy import insert, select, update  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+# Every model must be registered before controllers.meals builds its loaders
+import models.activity  # noqa: E402,F401
+from models.auth import User  # noqa: E402
+from controllers.meals import log_meal  # noqa: E402
+from models.meals import Day, Food, Meal, MealFood, MealPlan, MealType  # noqa: E402
+from models.workout import WorkoutSessions  # noqa: E402
+from services import daily_ledger  # noqa: E402
+from services.db import Base  # noqa: E402
+
+TABLES = [
+    User.__table__,
+    Food.__table__,
+    MealPlan.__table__,
+    Day.__table__,
+    Meal.__table__,
+    MealFood.__table__,
+    WorkoutSessions.__table__,
+]
+USER_ID = 1
+
+
+def timed(samples):
+    samples = sorted(samples)
+    return f"p50 {statistics.median(samples) * 1000:7.2f}ms, p95 {samples[int(len(samples) * 0.95) - 1] * 1000:7.2f}ms"
+
+
+async def seed(session_factory, rng, days, foods):
+    start = date.today() - timedelta(days=days - 1)
+    async with session_factory() as db:
+        await db.execute(
+            insert(User),
+            [{"id": USER_ID, "username": "bench", "password": "x", "email": "bench@example.com", "plan": "free"}],
+        )
+        await db.execute(
+            insert(Food),
+            [
+                {
+                    "id": i,
+                    "name": f"food {i}",
+                    "source": "local",
+                    "calories": round(rng.uniform(20, 600), 1),
+                    "protein": round(rng.uniform(0, 40), 1),
+                    "carbs": round(rng.uniform(0, 80), 1),
+                    "fats": round(rng.uniform(0, 30), 1),
+                }
+                for i in range(1, foods + 1)
+            ],
+        )
+        await db.commit()
+
+    meal_ids = []
+    async with session_factory() as db:
+        meal_id = 0
+        for offset in range(days):
+            day = start + timedelta(days=offset)
+            rows, links = [], []
+            for meal_type in list(MealType)[: rng.randint(3, 5)]:
+                meal_id += 1
+                rows.append(
+                    {
+                        "id": meal_id,
+                        "user_id": USER_ID,
+                        "meal_type": meal_type,
+                        "timestamp": datetime.combine(day, datetime.min.time()) + timedelta(hours=8),
+                    }
+                )
+                links.extend(
+                    {"meal_id": meal_id, "food_id": food_id}
+                    for food_id in rng.sample(range(1, foods + 1), rng.randint(2, 6))
+                )
+                meal_ids.append(meal_id)
+            await db.execute(insert(Meal), rows)
+            await db.execute(insert(MealFood), links)
+        await db.commit()
+    return start, meal_ids
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dsn", default="sqlite+aiosqlite:///:memory:")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--foods", type=int, default=2000)
+    parser.add_argument("--reads", type=int, default=50)
+    parser.add_argument("--corrupt", type=int, default=25)
+    parser.add_argument("--seed", type=int, default=17)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    engine = create_async_engine(args.dsn)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all, tables=TABLES)
+        await conn.run_sync(Base.metadata.create_all, tables=TABLES)
+    session_factory = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    start, meal_ids = await seed(session_factory, rng, args.days, args.foods)
+    end = start + timedelta(days=args.days - 1)
+
+    # Incremental path: every meal goes through log_meal, every session
+    # through the same ledger call finish_session makes
+    log_timings = []
+    for meal_id in meal_ids:
+        async with session_factory() as db:
+            started = time.perf_counter()
+            await log_meal(db, meal_id, USER_ID)
+            log_timings.append(time.perf_counter() - started)
+    session_timings = []
+    for offset in range(args.days):
+        if rng.random() < 0.6:
+            continue
+        ended_at = datetime.combine(start + timedelta(days=offset), datetime.min.time()) + timedelta(hours=18)
+        calories = round(rng.uniform(150, 900), 1)
+        async with session_factory() as db:
+            await db.execute(
+                insert(WorkoutSessions).values(
+                    id=uuid.uuid4(), user_id=USER_ID, name="bench", status="finished",
+                    ended_at=ended_at, calories_burnt=calories,
+                )
+            )
+            started = time.perf_counter()
+            await daily_ledger.record_workout(db, USER_ID, ended_at.date(), calories)
+            await db.commit()
+            session_timings.append(time.perf_counter() - started)
+    print(f"log_meal         x{len(log_timings):>5}: {timed(log_timings)} (incl. commit)")
+    print(f"record_workout   x{len(session_timings):>5}: {timed(session_timings)} (incl. commit)")
+
+    raw_timings, ledger_timings = [], []
+    async with session_factory() as db:
+        for _ in range(args.reads):
+            started = time.perf_counter()
+            rows = 0
+            for query in daily_ledger.expected_totals_queries(USER_ID, start, end):
+                rows += len((await db.execute(query)).all())
+            raw_timings.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            ledger = (
+                await db.execute(
+                    select(Day.date, *(Day.__table__.c[f] for f in daily_ledger.LEDGER_FIELDS))
+                    .where(Day.user_id == USER_ID, Day.date >= start, Day.date <= end)
+                    .order_by(Day.date)
+                )
+            ).all()
+            ledger_timings.append(time.perf_counter() - started)
+    print(f"{args.days} days, raw aggregates : {timed(raw_timings)} ({rows} groups)")
+    print(f"{args.days} days, ledger range   : {timed(ledger_timings)} ({len(ledger)} rows)")
+    print(f"speedup {statistics.median(raw_timings) / statistics.median(ledger_timings):.1f}x at p50")
+
+    failures = 0
+    async with session_factory() as db:
+        drifted = await daily_ledger.reconcile(db)
+        print(f"reconcile after incremental load: {len(drifted)} drifted days")
+        failures += bool(drifted)
+
+        for offset in rng.sample(range(args.days), min(args.corrupt, args.days)):
+            await db.execute(
+                update(Day)
+                .where(Day.user_id == USER_ID, Day.date == start + timedelta(days=offset))
+                .values(total_calories_consumed=Day.total_calories_consumed + 123, meals_logged=0)
+            )
+        await db.commit()
+        started = time.perf_counter()
+        drifted = await daily_ledger.reconcile(db)
+        print(
+            f"reconcile after corrupting {args.corrupt} days: fixed {len(drifted)} "
+            f"in {(time.perf_counter() - started) * 1000:.1f}ms"
+        )
+        failures += len(drifted) != min(args.corrupt, args.days)
+        drifted = await daily_ledger.reconcile(db)
+        print(f"reconcile again: {len(drifted)} drifted days")
+        failures += bool(drifted)
+
+    await engine.dispose()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
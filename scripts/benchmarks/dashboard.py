@@ -0,0 +1,227 @@
+"""
+/dashboard month reads: queries in turn vs concurrently vs the cache.
+
+Seeds users with a couple of years of finished sessions, logged meals, the
+daily ledger rebuilt from them, workout templates and an active plan whose
+days schedule one or two workouts each, some completed. Then times one
+user's current-month dashboard with its aggregate queries run one after
+another on a single session, run concurrently on a session each, and
+served from the cache. Checks that both paths agree, that the grid matches
+the seeded sessions and plan, and that an invalidation (also one landing
+while a dashboard is being computed) is never answered from the cache.
+
+    python scripts/benchmarks/dashboard.py --users 200
+    python scripts/benchmarks/dashboard.py --dsn postgresql+asyncpg://...
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "scripts", "benchmarks"))
+from sqlalchemy import insert  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from training_history import timed  # noqa: E402
+from models.auth import User  # noqa: E402
+from models.meals import Day, Food, Meal, MealFood, MealPlan, MealType  # noqa: E402
+from models.workout import WorkoutSessions, WorkoutTemplates  # noqa: E402
+from models.workout_plan import PlanDay, ScheduledWorkout, WorkoutPlan  # noqa: E402
+from services import daily_ledger, dashboard  # noqa: E402
+from services.db import Base  # noqa: E402
+
+TABLES = [
+    User.__table__,
+    Food.__table__,
+    MealPlan.__table__,
+    Day.__table__,
+    Meal.__table__,
+    MealFood.__table__,
+    WorkoutTemplates.__table__,
+    WorkoutSessions.__table__,
+    WorkoutPlan.__table__,
+    PlanDay.__table__,
+    ScheduledWorkout.__table__,
+]
+USER_ID = 1
+
+
+async def seed(session_factory, rng, user_id, days, plan_days):
+    """Returns the seeded finished sessions per date and (scheduled, completed) per plan date."""
+    today = date.today()
+    start = today - timedelta(days=days - 1)
+    sessions, meals, deltas = [], [], {}
+    for n in range(days):
+        day = start + timedelta(days=n)
+        totals = deltas[day] = {"meals_logged": 0, "total_calories_consumed": 0.0,
+                                "workouts_completed": 0, "total_calories_burned": 0.0}
+        for _ in range(rng.choice([0, 0, 1, 1, 2])):
+            ended_at = datetime.combine(day, datetime.min.time()) + timedelta(hours=rng.randint(7, 21))
+            session = {"id": uuid.uuid4(), "user_id": user_id, "name": "bench",
+                       "status": "discarded" if rng.random() < 0.1 else "finished",
+                       "started_at": ended_at - timedelta(minutes=60), "ended_at": ended_at,
+                       "calories_burnt": round(rng.uniform(200, 700), 1)}
+            sessions.append(session)
+            if session["status"] == "finished":
+                totals["workouts_completed"] += 1
+                totals["total_calories_burned"] += session["calories_burnt"]
+        for meal_type in rng.sample(list(MealType), rng.randint(1, 4)):
+            timestamp = datetime.combine(day, datetime.min.time()) + timedelta(hours=rng.randint(7, 21))
+            meals.append({"user_id": user_id, "meal_type": meal_type, "timestamp": timestamp, "logged_at": timestamp})
+            totals["meals_logged"] += 1
+            totals["total_calories_consumed"] += round(rng.uniform(300, 900), 1)
+
+    plan_start = today.replace(day=1) - timedelta(days=rng.randint(0, 20))
+    schedule = {}
+    async with session_factory() as db:
+        await db.execute(
+            insert(User),
+            [{"id": user_id, "username": f"bench{user_id}", "password": "x",
+              "email": f"bench{user_id}@example.com", "plan": "free"}],
+        )
+        # BigInteger keys don't autoincrement on SQLite, so ids are made up per user
+        template_ids = [user_id * 1000 + n for n in range(rng.randint(3, 12))]
+        await db.execute(
+            insert(WorkoutTemplates),
+            [{"id": template_id, "user_id": user_id, "name": f"Routine {n}",
+              "created_at": datetime.now() - timedelta(days=n)} for n, template_id in enumerate(template_ids)],
+        )
+        await db.execute(insert(WorkoutSessions), sessions)
+        await db.execute(insert(Meal), meals)
+        plan_id = user_id
+        await db.execute(
+            insert(WorkoutPlan),
+            [{"id": plan_id, "user_id": user_id, "name": "Block", "start_date": plan_start,
+              "end_date": plan_start + timedelta(days=plan_days - 1), "is_active": True}],
+        )
+        plan_rows, scheduled = [], []
+        for number in range(1, plan_days + 1):
+            day_id = user_id * 1000 + number
+            plan_rows.append({"id": day_id, "plan_id": plan_id, "day_number": number})
+            done = plan_start + timedelta(days=number - 1) < today
+            workouts = [
+                {"id": day_id * 10 + n, "day_id": day_id, "template_id": rng.choice(template_ids), "is_completed": done and rng.random() < 0.7}
+                for n in range(rng.randint(1, 2))
+            ]
+            scheduled.extend(workouts)
+            schedule[plan_start + timedelta(days=number - 1)] = (
+                len(workouts), sum(w["is_completed"] for w in workouts)
+            )
+        await db.execute(insert(PlanDay), plan_rows)
+        await db.execute(insert(ScheduledWorkout), scheduled)
+        # The ledger rows the meal and session write paths would have kept
+        await daily_ledger.apply(db, user_id, deltas)
+        await db.commit()
+    finished = Counter(s["ended_at"].date() for s in sessions if s["status"] == "finished")
+    return finished, schedule
+
+
+def grid_matches(result, finished, schedule):
+    return all(
+        cell["sessions"] == finished.get(cell["date"], 0)
+        and (cell["scheduled"], cell["completed"]) == schedule.get(cell["date"], (0, 0))
+        for cell in result["days"]
+    )
+
+
+async def sequential(session_factory, user_id, month):
+    """The same queries one after another on one session, as a single request-scoped db would run them."""
+    first, last = dashboard.month_bounds(month)
+    async with session_factory() as db:
+        rows = [
+            (await db.execute(query)).all()
+            for query in (
+                dashboard.ledger_query(user_id, first, last),
+                dashboard.schedule_query(user_id),
+                dashboard.recent_sessions_query(user_id),
+                dashboard.routines_query(user_id),
+                dashboard.recent_meals_query(user_id),
+            )
+        ]
+    return dashboard.build(month, *rows)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dsn", default=None, help="defaults to a temporary SQLite file")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--plan-days", type=int, default=56)
+    parser.add_argument("--reads", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=25)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    dsn = args.dsn or f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(prefix='dashboard_bench_'), 'dashboard.db')}"
+    engine = create_async_engine(dsn)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all, tables=TABLES)
+        await conn.run_sync(Base.metadata.create_all, tables=TABLES)
+    session_factory = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    started = time.perf_counter()
+    for user_id in range(1, args.users + 1):
+        seeded = await seed(session_factory, rng, user_id, args.days, args.plan_days)
+        if user_id == USER_ID:
+            finished, schedule = seeded
+    print(f"seeded {args.users} users x {args.days} days in {time.perf_counter() - started:.1f}s")
+
+    failures = 0
+    month = date.today()
+    one_by_one, concurrent, cached = [], [], []
+    for _ in range(args.reads):
+        began = time.perf_counter()
+        expected = await sequential(session_factory, USER_ID, month)
+        one_by_one.append(time.perf_counter() - began)
+        began = time.perf_counter()
+        result = await dashboard.load(session_factory, USER_ID, month)
+        concurrent.append(time.perf_counter() - began)
+    ok = result == expected and grid_matches(result, finished, schedule)
+    failures += not ok
+    print(f"queries in turn, one session     : {timed(one_by_one)}")
+    print(f"queries concurrently, one session each: {timed(concurrent)}" + ("" if ok else "  MISMATCH"))
+
+    dashboard.dashboard_cache.clear()
+    await dashboard.get(session_factory, USER_ID, month)
+    for _ in range(args.reads):
+        began = time.perf_counter()
+        result = await dashboard.get(session_factory, USER_ID, month)
+        cached.append(time.perf_counter() - began)
+    print(f"cached                           : {timed(cached)}")
+    totals = result["totals"]
+    print(
+        f"{result['month']:%B %Y}: {totals['sessions']} sessions, {totals['calories_burned']:,.0f} kcal burned, "
+        f"{totals['calories_consumed']:,.0f} consumed, {totals['meals_logged']} meals, "
+        f"{totals['completed']}/{totals['scheduled']} scheduled workouts done, "
+        f"{result['routines']['templates']} routines"
+    )
+
+    # A write after the read: the next read goes to the database
+    async with session_factory() as db:
+        await daily_ledger.record_workout(db, USER_ID, month, 321.0)
+        await db.commit()
+    dashboard.dashboard_cache.invalidate(USER_ID)
+    result = await dashboard.get(session_factory, USER_ID, month)
+    fresh = result["totals"]["sessions"] == totals["sessions"] + 1
+    # A write committed while a dashboard is being computed: that result is never served
+    key = dashboard.dashboard_cache.key(USER_ID, month)
+    dashboard.dashboard_cache.invalidate(USER_ID)
+    dashboard.dashboard_cache.put(key, {"stale": True})
+    fresh = fresh and "stale" not in await dashboard.get(session_factory, USER_ID, month)
+    failures += not fresh
+    print(f"invalidated reads are fresh: {fresh}")
+    await engine.dispose()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
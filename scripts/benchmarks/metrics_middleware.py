@@ -0,0 +1,114 @@
+"""
+Per-request overhead of middleware.metrics.MetricsMiddleware.
+
+Builds a small FastAPI app with a static route, a templated route and a
+JSON listing, then drives it in-process through raw ASGI calls (no sockets,
+no HTTP client) with and without the middleware. Rounds alternate between
+the two apps so CPU frequency drift hits both equally; the median round is
+reported.
+
+    python scripts/benchmarks/metrics_middleware.py --requests 20000
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+from fastapi import FastAPI  # noqa: E402
+
+from middleware.metrics import MetricsMiddleware, requests_total  # noqa: E402
+
+PATHS = ("/healthcheck", "/workouts/templates/42", "/activities", "/missing")
+
+
+def build_app(instrumented: bool) -> FastAPI:
+    app = FastAPI()
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+
+    @app.get("/healthcheck")
+    async def healthcheck():
+        return {"message": "Ok!"}
+
+    @app.get("/workouts/templates/{template_id}")
+    async def template(template_id: int):
+        return {"id": template_id, "name": "Push", "version": 1}
+
+    @app.get("/activities")
+    async def activities():
+        return [{"id": f"Exercise_{i}", "name": f"Exercise {i}"} for i in range(20)]
+
+    return app
+
+
+def make_scope(path: str) -> dict:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+    }
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def run_round(app, requests: int) -> float:
+    started = time.perf_counter()
+    for i in range(requests):
+        await app(make_scope(PATHS[i % len(PATHS)]), receive, send)
+    return time.perf_counter() - started
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=10_000)
+    parser.add_argument("--rounds", type=int, default=7)
+    args = parser.parse_args()
+
+    plain, instrumented = build_app(False), build_app(True)
+    # Warm-up builds the middleware stacks and the route label series
+    await run_round(plain, 200)
+    await run_round(instrumented, 200)
+
+    timings = {"plain": [], "instrumented": []}
+    for _ in range(args.rounds):
+        timings["plain"].append(await run_round(plain, args.requests))
+        timings["instrumented"].append(await run_round(instrumented, args.requests))
+
+    per_request = {
+        name: statistics.median(rounds) / args.requests * 1e6 for name, rounds in timings.items()
+    }
+    overhead = per_request["instrumented"] - per_request["plain"]
+    print(f"{'app':<14}{'us/request':>12}{'req/s':>12}")
+    for name, micros in per_request.items():
+        print(f"{name:<14}{micros:>12.1f}{1e6 / micros:>12.0f}")
+    print(
+        f"middleware overhead: {overhead:.1f}us per request "
+        f"({overhead / per_request['plain'] * 100:.1f}%)"
+    )
+    routes = sorted({key[1] for key in requests_total._values})
+    print(f"route labels recorded: {', '.join(routes)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
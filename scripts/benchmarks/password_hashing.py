@@ -0,0 +1,85 @@
+"""
+Event-loop impact of bcrypt during a login burst.
+
+Fires concurrent password verifications while a ticker coroutine measures how
+late the event loop wakes it up, once with bcrypt called inline (the old
+behaviour) and once per pool configuration. Prints loop lag and throughput.
+
+    python scripts/benchmarks/password_hashing.py --logins 64 --workers 4
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+from services.password_hashing import PasswordHasher, pwd_context  # noqa: E402
+
+TICK = 0.005
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def ticker(lags, stop):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - started - TICK)
+
+
+async def run(label, verify, logins, password, hashed):
+    lags, stop = [], asyncio.Event()
+    tick_task = asyncio.create_task(ticker(lags, stop))
+    await asyncio.sleep(TICK * 2)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(verify(password, hashed) for _ in range(logins)), return_exceptions=True
+    )
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await tick_task
+
+    ok = sum(1 for result in results if result is True)
+    rejected = len(results) - ok
+    lags_ms = [lag * 1000 for lag in lags] or [0.0]
+    print(
+        f"{label:<20} {ok / elapsed:>7.1f} logins/s  rejected={rejected:<4} "
+        f"loop lag p50={percentile(lags_ms, 50):.1f}ms "
+        f"p99={percentile(lags_ms, 99):.1f}ms max={max(lags_ms):.1f}ms "
+        f"mean={statistics.mean(lags_ms):.1f}ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=64, help="concurrent verifications")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--max-pending", type=int, default=256)
+    args = parser.parse_args()
+
+    password = "correct horse battery staple"
+    hashed = pwd_context.hash(password)
+
+    async def inline(secret, hashed_secret):
+        return pwd_context.verify(secret, hashed_secret)
+
+    await run("inline", inline, args.logins, password, hashed)
+    for kind in ("thread", "process"):
+        hasher = PasswordHasher(args.workers, args.max_pending, executor=kind)
+        await hasher.verify(password, hashed)  # start the workers
+        await run(f"{kind} pool x{args.workers}", hasher.verify, args.logins, password, hashed)
+        hasher.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,202 @@
+"""
+Replay harness for the personal-records engine.
+
+Generates random finished sessions for a handful of users, folds each one
+into activity_records with services.personal_records.record_session, and
+checks the stored records against a pure-Python reference at the end. Prints
+throughput and exits non-zero on any mismatch.
+
+    python scripts/benchmarks/personal_records.py --sessions 5000
+    python scripts/benchmarks/personal_records.py --dsn postgresql+asyncpg://...
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import random
+import sys
+import time
+import uuid
+from collections import defaultdict
+
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+from sqlalchemy import Integer, insert, select  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from models.activity import ActivityRecords  # noqa: E402
+from models.auth import User  # noqa: E402
+from models.workout import (  # noqa: E402
+    ActivitySets,
+    WorkoutSessionActivities,
+    WorkoutSessions,
+)
+from services.db import Base  # noqa: E402
+from services.personal_records import RECORD_FIELDS, record_session  # noqa: E402
+
+TABLES = [
+    User.__table__,
+    WorkoutSessions.__table__,
+    WorkoutSessionActivities.__table__,
+    ActivitySets.__table__,
+    ActivityRecords.__table__,
+]
+
+
+def random_session(rng, activities):
+    chosen = rng.sample(activities, rng.randint(1, 6))
+    session = {}
+    for activity_id in chosen:
+        sets = []
+        for set_number in range(1, rng.randint(1, 6) + 1):
+            sets.append(
+                {
+                    "set_number": set_number,
+                    "weight": rng.choice([None, round(rng.uniform(5, 200), 1)]),
+                    "reps": rng.choice([None, rng.randint(1, 15)]),
+                    "duration": rng.choice([None, rng.uniform(10, 600)]),
+                    "rpe": rng.choice([None, rng.randint(6, 10)]),
+                    "heart_rate": rng.choice([None, rng.randint(90, 190)]),
+                    "pace": None,
+                    "is_warmup": set_number == 1 and rng.random() < 0.3,
+                }
+            )
+        session[activity_id] = sets
+    return session
+
+
+def reference_update(records, session):
+    """What activity_records should hold after folding in `session`."""
+    for activity_id, sets in session.items():
+        best = {}
+        for field, column in (
+            ("max_weight", "weight"),
+            ("max_reps", "reps"),
+            ("max_duration", "duration"),
+            ("max_rpe", "rpe"),
+            ("max_heart_rate", "heart_rate"),
+            ("max_pace", "pace"),
+        ):
+            values = [s[column] for s in sets if s[column] is not None]
+            best[field] = max(values) if values else None
+
+        working = [s for s in sets if not s["is_warmup"] and None not in (s["weight"], s["reps"])]
+        one_rms = [
+            s["weight"] if s["reps"] == 1 else s["weight"] * (1 + s["reps"] / 30.0)
+            for s in working
+        ]
+        best["max_estimated_1rm"] = max(one_rms) if one_rms else None
+        best["max_session_volume"] = (
+            sum(s["weight"] * s["reps"] for s in working) if working else None
+        )
+
+        record = records.get(activity_id)
+        if record is None:
+            records[activity_id] = {**best, "times_performed": 1}
+            continue
+        for field in RECORD_FIELDS:
+            candidates = [v for v in (record[field], best[field]) if v is not None]
+            record[field] = max(candidates) if candidates else None
+        record["times_performed"] += 1
+
+
+def same(expected, actual):
+    if expected is None or actual is None:
+        return expected is None and actual is None
+    return math.isclose(expected, actual, rel_tol=1e-6, abs_tol=1e-6)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dsn", default="sqlite+aiosqlite:///:memory:")
+    parser.add_argument("--sessions", type=int, default=3000)
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--activities", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    activities = [f"Exercise_{i}" for i in range(args.activities)]
+
+    engine = create_async_engine(args.dsn)
+    if engine.dialect.name == "sqlite":
+        # SQLite only autoincrements INTEGER PRIMARY KEY columns
+        ActivityRecords.__table__.c.id.type = Integer()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all, tables=TABLES)
+        await conn.run_sync(Base.metadata.create_all, tables=TABLES)
+    session_factory = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+    async with session_factory() as db:
+        await db.execute(
+            insert(User),
+            [
+                {"id": i, "username": f"u{i}", "password": "x", "email": f"u{i}@example.com", "plan": "free"}
+                for i in range(1, args.users + 1)
+            ],
+        )
+        await db.commit()
+
+    expected = defaultdict(dict)
+    fold_seconds = 0.0
+    for _ in range(args.sessions):
+        user_id = rng.randint(1, args.users)
+        session = random_session(rng, activities)
+        session_id = uuid.uuid4()
+        activity_rows, set_rows = [], []
+        for order, (activity_id, sets) in enumerate(session.items()):
+            session_activity_id = uuid.uuid4()
+            activity_rows.append(
+                {"id": session_activity_id, "session_id": session_id, "activity_id": activity_id, "order": order}
+            )
+            set_rows.extend(
+                {"id": uuid.uuid4(), "session_activity_id": session_activity_id, **s} for s in sets
+            )
+
+        async with session_factory() as db:
+            await db.execute(
+                insert(WorkoutSessions).values(
+                    id=session_id, user_id=user_id, name="replay", status="finished"
+                )
+            )
+            await db.execute(insert(WorkoutSessionActivities), activity_rows)
+            await db.execute(insert(ActivitySets), set_rows)
+            started = time.perf_counter()
+            await record_session(db, session_id, user_id)
+            await db.commit()
+            fold_seconds += time.perf_counter() - started
+
+        reference_update(expected[user_id], session)
+
+    mismatches = 0
+    async with session_factory() as db:
+        records = (await db.execute(select(ActivityRecords))).scalars().all()
+    stored = {(r.user_id, r.activity_id): r for r in records}
+    expected_count = sum(len(per_user) for per_user in expected.values())
+    if len(stored) != expected_count:
+        print(f"record count: expected {expected_count}, stored {len(stored)}")
+        mismatches += 1
+    for user_id, per_user in expected.items():
+        for activity_id, want in per_user.items():
+            record = stored.get((user_id, activity_id))
+            for field in (*RECORD_FIELDS, "times_performed"):
+                got = getattr(record, field, None) if record else None
+                if not same(want[field], got):
+                    mismatches += 1
+                    if mismatches <= 10:
+                        print(f"user {user_id} {activity_id} {field}: expected {want[field]}, got {got}")
+
+    print(
+        f"{args.sessions} sessions folded in {fold_seconds:.2f}s "
+        f"({fold_seconds / args.sessions * 1000:.2f}ms per session incl. commit), "
+        f"{len(stored)} records, {mismatches} mismatches"
+    )
+    await engine.dispose()
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
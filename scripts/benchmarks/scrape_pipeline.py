@@ -0,0 +1,216 @@
+"""
+Pages per minute of the scraper pipeline against a local fixture site.
+
+Serves a synthetic copy of the exercise library from a threaded HTTP server
+(paginated listings, exercise pages and images, with a fixed per-request
+latency and a share of images failing with 503 once), then runs
+scripts/scrape_data.py with --browser http: serially (one worker, one image
+at a time, one row per transaction) and with the worker pool. A third run is
+interrupted part-way and resumed from its checkpoint, and must end with every
+exercise and image present exactly once.
+
+    python scripts/benchmarks/scrape_pipeline.py --exercises 400 --workers 8
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+from scrape_data import scrape  # noqa: E402
+
+IMAGE = bytes(range(256)) * 80  # 20 KB
+
+
+class FixtureSite:
+    def __init__(self, items: int, exercises: int, per_page: int, latency: float, flaky_every: int):
+        self.items = items
+        self.per_item = exercises // items
+        self.per_page = per_page
+        self.latency = latency
+        self.flaky_every = flaky_every
+        self.failed_once = set()
+        self.lock = threading.Lock()
+
+    def categories(self):
+        return [
+            {
+                "name": "Muscle Groups",
+                "items": [{"name": f"Group {i}", "url": f"/exercises/group-{i}"} for i in range(self.items)],
+            }
+        ]
+
+    def listing(self, item: int, page: int) -> str:
+        first = page * self.per_page
+        cells = "".join(
+            f"""<div class="cell small-12 bp600-6">
+                  <div class="node-image"><img src="/img/thumb-{item}-{n}.jpg"></div>
+                  <div class="node-title"><a href="/exercises/ex-{item}-{n}.html">Exercise {item} {n}</a></div>
+                  <div class="exercise-meta"><div class="meta-box">Strength</div><div class="meta-box">Barbell</div>
+                  <div class="meta-box">Compound</div><div class="meta-box">Beginner</div></div>
+                </div>"""
+            for n in range(first, min(first + self.per_page, self.per_item))
+        )
+        pager = (
+            f'<ul><li class="pager-next"><a href="/exercises/group-{item}?page={page + 1}">Next</a></li></ul>'
+            if first + self.per_page < self.per_item
+            else ""
+        )
+        return f'<html><body><div class="taxonomy-body">{cells}</div>{pager}</body></html>'
+
+    def exercise(self, slug: str) -> str:
+        return f"""<html><body>
+          <div class="video-wrap"><iframe src="https://video.example/{slug}"></iframe></div>
+          <div class="node-stats-block"><ul>
+            <li><span class="row-label">Target Muscle Group</span><a href="#">Group</a></li>
+            <li><span class="row-label">Exercise Type</span>Strength</li>
+            <li><span class="row-label">Equipment Required</span>Barbell</li>
+            <li><span class="row-label">Mechanics</span>Compound</li>
+            <li><span class="row-label">Force Type</span>Push</li>
+            <li><span class="row-label">Experience Level</span>Beginner</li>
+            <li><span class="row-label">Secondary Muscles</span><div class="field-type-list-text">Glutes</div></li>
+          </ul></div>
+          <div class="target-muscles"><img src="/img/muscles-{slug}.jpg"></div>
+          <div class="field-name-field-exercise-overview">Overview of {slug}.</div>
+          <div class="field-name-body">Step one. Step two.</div>
+          <div class="field-name-field-exercise-tips">Keep your back straight.</div>
+        </body></html>"""
+
+    def handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def send(self, status, body, content_type):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path.startswith("/img/"):
+                    time.sleep(site.latency / 5)
+                    with site.lock:
+                        flaky = zlib.crc32(url.path.encode()) % site.flaky_every == 0 and url.path not in site.failed_once
+                        if flaky:
+                            site.failed_once.add(url.path)
+                    if flaky:
+                        return self.send(503, b"busy", "text/plain")
+                    return self.send(200, IMAGE, "image/jpeg")
+                time.sleep(site.latency)
+                if url.path.endswith(".html"):
+                    slug = url.path.rsplit("/", 1)[-1][: -len(".html")]
+                    return self.send(200, site.exercise(slug).encode(), "text/html")
+                if url.path.startswith("/exercises/group-"):
+                    item = int(url.path.rsplit("-", 1)[-1])
+                    page = int(parse_qs(url.query).get("page", ["0"])[0])
+                    return self.send(200, site.listing(item, page).encode(), "text/html")
+                self.send(404, b"not found", "text/plain")
+
+        return Handler
+
+
+def count_rows(database: str) -> int:
+    conn = sqlite3.connect(database)
+    try:
+        return conn.execute("SELECT count(*) FROM activities").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def count_images(output_dir: str) -> tuple:
+    done = partial = 0
+    for _, _, files in os.walk(output_dir):
+        done += sum(name.endswith(".jpg") for name in files)
+        partial += sum(name.endswith(".part") for name in files)
+    return done, partial
+
+
+async def run(label, site, base_url, workdir, fresh=True, interrupt_after=None, **options):
+    os.makedirs(workdir, exist_ok=True)
+    paths = {
+        "database": os.path.join(workdir, "fitness.db"),
+        "output_dir": os.path.join(workdir, "exercises"),
+        "checkpoint_path": os.path.join(workdir, "checkpoint.json"),
+    }
+    task = scrape(site.categories(), browser="http", base_url=base_url, fresh=fresh, **paths, **options)
+    if interrupt_after is None:
+        stats = await task
+    else:
+        try:
+            stats = await asyncio.wait_for(task, interrupt_after)
+        except asyncio.TimeoutError:
+            print(f"{label:<28} interrupted after {interrupt_after:.1f}s with {count_rows(paths['database'])} rows saved")
+            return None
+    print(
+        f"{label:<28} {stats['pages'] + stats['listing_pages']:>5} pages in {stats['seconds']:6.2f}s "
+        f"= {stats['pages_per_minute']:>8,.0f} pages/min; {stats['written']} saved, "
+        f"{stats['skipped']} skipped, {stats['failed']} failed, images {stats['images']}"
+    )
+    return stats
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--exercises", type=int, default=180)
+    parser.add_argument("--items", type=int, default=6)
+    parser.add_argument("--per-page", type=int, default=12)
+    parser.add_argument("--latency-ms", type=float, default=40, help="per page; images get a fifth")
+    parser.add_argument("--flaky-every", type=int, default=7, help="one image in N fails once with 503")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--image-concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    site = FixtureSite(args.items, args.exercises, args.per_page, args.latency_ms / 1000, args.flaky_every)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), site.handler())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    expected = site.per_item * args.items
+
+    failures = 0
+    workdir = tempfile.mkdtemp(prefix="scrape_bench_")
+    try:
+        serial = await run(
+            "serial (1 worker)", site, base_url, os.path.join(workdir, "serial"),
+            workers=1, image_concurrency=1, batch_size=1,
+        )
+        site.failed_once.clear()
+        pooled = await run(
+            f"pipeline ({args.workers} workers)", site, base_url, os.path.join(workdir, "pooled"),
+            workers=args.workers, image_concurrency=args.image_concurrency,
+        )
+        print(f"speedup {pooled['pages_per_minute'] / serial['pages_per_minute']:.1f}x")
+
+        site.failed_once.clear()
+        options = {"workers": args.workers, "image_concurrency": args.image_concurrency}
+        resume_dir = os.path.join(workdir, "resume")
+        await run("interrupted run", site, base_url, resume_dir, interrupt_after=pooled["seconds"] / 2, **options)
+        resumed = await run("resumed run", site, base_url, resume_dir, fresh=False, **options)
+        rows = count_rows(os.path.join(resume_dir, "fitness.db"))
+        images, partial = count_images(os.path.join(resume_dir, "exercises"))
+        print(f"after resume: {rows}/{expected} exercises, {images}/{expected * 2} images, {partial} partial files")
+        failures += rows != expected or images != expected * 2 or partial or resumed["skipped"] == 0
+    finally:
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
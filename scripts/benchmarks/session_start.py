@@ -0,0 +1,147 @@
+"""
+Session start latency as a function of template size.
+
+Seeds templates with 1..N activities (4 sets each) and times starting a
+session from each one, comparing the previous per-row implementation (flush
+per activity, SELECT of sets per activity) with the batched one. Every
+statement can be delayed by --rtt-ms to approximate a remote database.
+
+    python scripts/benchmarks/session_start.py
+    python scripts/benchmarks/session_start.py --dsn postgresql+asyncpg://... --rtt-ms 0
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+from sqlalchemy import event, select  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from controllers.workout_sessions import start_session_from_template  # noqa: E402
+from models.auth import User  # noqa: E402
+from models.workout import (  # noqa: E402
+    ActivitySets,
+    WorkoutSessionActivities,
+    WorkoutSessions,
+    WorkoutTemplateActivities,
+    WorkoutTemplates,
+)
+from services.db import Base  # noqa: E402
+
+SETS_PER_ACTIVITY = 4
+TABLES = [
+    User.__table__,
+    WorkoutTemplates.__table__,
+    WorkoutTemplateActivities.__table__,
+    WorkoutSessions.__table__,
+    WorkoutSessionActivities.__table__,
+    ActivitySets.__table__,
+]
+
+
+async def legacy_start(db, template_id, user_id):
+    """The per-row copy this benchmark is measured against."""
+    template = await db.get(WorkoutTemplates, template_id)
+    new_session = WorkoutSessions(
+        user_id=user_id, template_id=template_id, name=template.name, started_at=datetime.now()
+    )
+    db.add(new_session)
+    await db.flush()
+
+    template_activities = await db.execute(
+        select(WorkoutTemplateActivities).filter_by(template_id=template_id)
+    )
+    for ta in template_activities.scalars().all():
+        sa = WorkoutSessionActivities(
+            session_id=new_session.id, activity_id=ta.activity_id, order=ta.order
+        )
+        db.add(sa)
+        await db.flush()
+        sets = await db.execute(select(ActivitySets).filter_by(template_activity_id=ta.id))
+        for s in sets.scalars().all():
+            db.add(
+                ActivitySets(
+                    session_activity_id=sa.id,
+                    set_number=s.set_number,
+                    reps=s.reps,
+                    weight=s.weight,
+                    rest_after_set=s.rest_after_set,
+                )
+            )
+    await db.commit()
+    return {"session_id": new_session.id}
+
+
+async def seed(session_factory, sizes):
+    async with session_factory() as db:
+        db.add(User(id=1, username="bench", password="x", email="bench@example.com", plan="free"))
+        for size in sizes:
+            template = WorkoutTemplates(id=size, user_id=1, name=f"{size} exercises")
+            for order in range(size):
+                activity = WorkoutTemplateActivities(
+                    id=uuid.uuid4(), activity_id=f"Exercise_{order}", order=order
+                )
+                activity.sets = [
+                    ActivitySets(
+                        id=uuid.uuid4(), set_number=n, reps=8, weight=60.0, rest_after_set=90
+                    )
+                    for n in range(1, SETS_PER_ACTIVITY + 1)
+                ]
+                template.exercises.append(activity)
+            db.add(template)
+        await db.commit()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dsn", default="sqlite+aiosqlite:///:memory:")
+    parser.add_argument("--sizes", default="1,5,10,20,40")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--rtt-ms", type=float, default=1.0, help="delay added per statement")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    engine = create_async_engine(args.dsn)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all, tables=TABLES)
+        await conn.run_sync(Base.metadata.create_all, tables=TABLES)
+    session_factory = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    await seed(session_factory, sizes)
+
+    statements = 0
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count_statement(*_):
+        nonlocal statements
+        statements += 1
+        if args.rtt_ms:
+            time.sleep(args.rtt_ms / 1000)  # runs are sequential, blocking is fine
+
+    print(f"{'activities':>10} {'impl':<8} {'stmts':>5} {'p50':>9} {'mean':>9}")
+    for size in sizes:
+        for label, start in (("per-row", legacy_start), ("batched", start_session_from_template)):
+            samples = []
+            for _ in range(args.runs):
+                async with session_factory() as db:
+                    statements = 0
+                    started = time.perf_counter()
+                    await start(db, size, 1)
+                    samples.append((time.perf_counter() - started) * 1000)
+            print(
+                f"{size:>10} {label:<8} {statements:>5} "
+                f"{statistics.median(samples):>7.2f}ms {statistics.mean(samples):>7.2f}ms"
+            )
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,260 @@
+"""
+Analytics over years of history: ORM walk vs the columnar training history.
+
+Seeds users with several years of finished sessions (a few exercises of a
+few sets each, some warm-ups, the odd cardio set with duration and heart
+rate), then for one of them times:
+
+* the cold load of services.training_history (one query into arrays),
+* a training summary over all time and over the last year from the arrays,
+  against loading WorkoutSessions -> activities -> sets as ORM objects and
+  aggregating them in Python, checking both give the same numbers,
+* appending a newly finished session in place, and
+* memory per user. A store with room for about two users is then filled
+  with more to show LRU eviction.
+
+    python scripts/benchmarks/training_history.py --years 5.5
+    python scripts/benchmarks/training_history.py --dsn postgresql+asyncpg://...
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+from sqlalchemy import insert, select  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+from sqlalchemy.orm import selectinload, sessionmaker  # noqa: E402
+
+import models.activity  # noqa: E402,F401
+from models.auth import User  # noqa: E402
+from models.workout import ActivitySets, WorkoutSessionActivities, WorkoutSessions  # noqa: E402
+from services.db import Base  # noqa: E402
+from services.training_history import (  # noqa: E402
+    TrainingHistoryStore,
+    activity_summary,
+    history_evictions,
+    to_timestamp,
+)
+
+TABLES = [
+    User.__table__,
+    WorkoutSessions.__table__,
+    WorkoutSessionActivities.__table__,
+    ActivitySets.__table__,
+]
+EXERCISES = [f"Exercise_{i}" for i in range(60)]
+CARDIO = [f"Cardio_{i}" for i in range(6)]
+
+
+def timed(samples):
+    samples = sorted(samples)
+    return f"p50 {statistics.median(samples) * 1000:8.2f}ms, p95 {samples[int(len(samples) * 0.95) - 1] * 1000:8.2f}ms"
+
+
+def session_rows(rng, user_id, ended_at):
+    session_id = uuid.uuid4()
+    session = {
+        "id": session_id, "user_id": user_id, "name": "bench", "status": "finished",
+        "started_at": ended_at - timedelta(minutes=70), "ended_at": ended_at,
+    }
+    activities, sets = [], []
+    for order, activity_id in enumerate(rng.sample(EXERCISES, rng.randint(4, 7)) + rng.sample(CARDIO, rng.randint(0, 1))):
+        session_activity_id = uuid.uuid4()
+        activities.append(
+            {"id": session_activity_id, "session_id": session_id, "activity_id": activity_id, "order": order}
+        )
+        cardio = activity_id in CARDIO
+        base = rng.uniform(20, 140)
+        for set_number in range(1 if cardio else rng.randint(3, 5)):
+            warmup = not cardio and set_number == 0 and rng.random() < 0.5
+            sets.append(
+                {
+                    "id": uuid.uuid4(),
+                    "session_activity_id": session_activity_id,
+                    "set_number": set_number,
+                    "reps": None if cardio else rng.randint(3, 12),
+                    "weight": None if cardio else round(base * (0.5 if warmup else rng.uniform(0.9, 1.05)), 1),
+                    "duration": rng.uniform(600, 1800) if cardio else None,
+                    "heart_rate": rng.uniform(120, 170) if cardio else None,
+                    "pace": rng.uniform(4, 7) if cardio else None,
+                    "rpe": rng.choice([None, 7, 8, 9]),
+                    "is_warmup": warmup,
+                    "ended_at": ended_at - timedelta(minutes=60 - 2 * len(sets)),
+                }
+            )
+    return session, activities, sets
+
+
+async def seed(session_factory, rng, user_id, years, per_week):
+    now = datetime.now().replace(microsecond=0)
+    day = now - timedelta(days=int(years * 365))
+    counts = {"sessions": 0, "sets": 0}
+    async with session_factory() as db:
+        await db.execute(
+            insert(User),
+            [{"id": user_id, "username": f"bench{user_id}", "password": "x",
+              "email": f"bench{user_id}@example.com", "plan": "free"}],
+        )
+        batch = ([], [], [])
+
+        async def flush():
+            for model, rows in zip((WorkoutSessions, WorkoutSessionActivities, ActivitySets), batch):
+                if rows:
+                    await db.execute(insert(model), rows)
+            counts["sessions"] += len(batch[0])
+            counts["sets"] += len(batch[2])
+            for rows in batch:
+                rows.clear()
+
+        while day < now - timedelta(days=1):
+            if rng.random() < per_week / 7:
+                session, activities, sets = session_rows(rng, user_id, day.replace(hour=18))
+                batch[0].append(session)
+                batch[1].extend(activities)
+                batch[2].extend(sets)
+            day += timedelta(days=1)
+            if len(batch[2]) > 5000:
+                await flush()
+        await flush()
+        await db.commit()
+    return counts["sessions"], counts["sets"]
+
+
+async def orm_summary(db, user_id, start=None):
+    """What an endpoint would do without the store: walk the ORM graph and aggregate in Python."""
+    query = (
+        select(WorkoutSessions)
+        .where(WorkoutSessions.user_id == user_id, WorkoutSessions.status == "finished")
+        .options(selectinload(WorkoutSessions.activities).selectinload(WorkoutSessionActivities.sets))
+    )
+    if start is not None:
+        query = query.where(WorkoutSessions.ended_at >= start)
+    totals = {"sessions": 0, "sets": 0, "volume": 0.0}
+    best = {}
+    for session in (await db.execute(query)).scalars():
+        totals["sessions"] += 1
+        for activity in session.activities:
+            for s in activity.sets:
+                totals["sets"] += 1
+                if s.is_warmup or s.weight is None or not s.reps:
+                    continue
+                totals["volume"] += s.weight * s.reps
+                e1rm = s.weight if s.reps == 1 else s.weight * (1 + s.reps / 30.0)
+                best[activity.activity_id] = max(best.get(activity.activity_id, 0.0), e1rm)
+    return totals, best
+
+
+def same(orm, summary):
+    totals, best = orm
+    if (totals["sessions"], totals["sets"]) != (summary["sessions"], summary["sets"]):
+        return False
+    if not math.isclose(totals["volume"], summary["volume"], rel_tol=1e-5):
+        return False
+    columnar = {a["activity_id"]: a["max_estimated_1rm"] for a in summary["activities"] if a["max_estimated_1rm"]}
+    return columnar.keys() == best.keys() and all(
+        math.isclose(best[k], columnar[k], rel_tol=1e-4) for k in best
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dsn", default="sqlite+aiosqlite:///:memory:")
+    parser.add_argument("--years", type=float, default=5.5)
+    parser.add_argument("--per-week", type=float, default=4)
+    parser.add_argument("--users", type=int, default=4, help="users seeded for the eviction run")
+    parser.add_argument("--reads", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=21)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    engine = create_async_engine(args.dsn)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all, tables=TABLES)
+        await conn.run_sync(Base.metadata.create_all, tables=TABLES)
+    session_factory = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    started = time.perf_counter()
+    for user_id in range(1, args.users + 1):
+        sessions, sets = await seed(session_factory, rng, user_id, args.years, args.per_week)
+    print(
+        f"seeded {args.users} users x {args.years} years: {sessions:,} sessions, {sets:,} sets each "
+        f"(about), in {time.perf_counter() - started:.1f}s"
+    )
+
+    failures = 0
+    user_id = 1
+    store = TrainingHistoryStore(memory_budget_bytes=1 << 30)
+    async with session_factory() as db:
+        started = time.perf_counter()
+        history = await store.get(db, user_id)
+        loaded_bytes = history.nbytes
+        print(f"cold load: {(time.perf_counter() - started) * 1000:.1f}ms for {len(history):,} sets, "
+              f"{history.nbytes / 1024:.0f} KiB in memory ({history.nbytes / len(history):.0f} B/set)")
+
+        year_ago = datetime.now() - timedelta(days=365)
+        for label, start in (("all time", None), ("last year", year_ago)):
+            orm_timings, array_timings = [], []
+            for _ in range(args.reads):
+                db.expunge_all()
+                began = time.perf_counter()
+                orm = await orm_summary(db, user_id, start)
+                orm_timings.append(time.perf_counter() - began)
+                began = time.perf_counter()
+                summary = activity_summary(
+                    await store.get(db, user_id), None if start is None else to_timestamp(start)
+                )
+                array_timings.append(time.perf_counter() - began)
+            ok = same(orm, summary)
+            failures += not ok
+            print(f"{label:<9} ORM walk : {timed(orm_timings)} ({summary['sets']:,} sets)")
+            print(
+                f"{label:<9} columnar : {timed(array_timings)} "
+                f"speedup {statistics.median(orm_timings) / statistics.median(array_timings):.0f}x"
+                + ("" if ok else "  MISMATCH")
+            )
+
+        append_timings = []
+        before = activity_summary(history)["sets"]
+        added = 0
+        for n in range(args.reads):
+            session, activities, sets = session_rows(rng, user_id, datetime.now() + timedelta(minutes=n))
+            await db.execute(insert(WorkoutSessions), [session])
+            await db.execute(insert(WorkoutSessionActivities), activities)
+            await db.execute(insert(ActivitySets), sets)
+            await db.commit()
+            added += len(sets)
+            began = time.perf_counter()
+            await store.append_session(db, user_id, session["id"])
+            append_timings.append(time.perf_counter() - began)
+        after = activity_summary(await store.get(db, user_id))["sets"]
+        failures += after != before + added
+        print(f"append_session x{len(append_timings)}: {timed(append_timings)}; "
+              f"{before:,} + {added} = {after:,} sets" + ("" if after == before + added else "  MISMATCH"))
+
+        budget = int(loaded_bytes * 2.5)
+        small = TrainingHistoryStore(memory_budget_bytes=budget)
+        evicted = history_evictions.value()
+        for other in range(1, args.users + 1):
+            await small.get(db, other)
+        evicted = history_evictions.value() - evicted
+        print(
+            f"budget {budget / 1024:.0f} KiB, {args.users} users loaded: {len(small)} kept, "
+            f"{evicted:.0f} evicted, {small.bytes / 1024:.0f} KiB held"
+        )
+        failures += small.bytes > budget or evicted != args.users - len(small)
+
+    await engine.dispose()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,149 @@
+"""
+Training-load snapshots: incremental updates and the parallel backfill.
+
+Seeds users with years of finished sessions (the training_history.py
+generator, sets with RPE and rest) in a SQLite file, then runs:
+
+* scripts/backfill_training_load.py with one worker and with a pool,
+  printing users per second for each,
+* a series of newly finished sessions for one user through
+  services.training_load.record_session, timed against rebuilding that
+  user's snapshots from all of their sessions, and
+* a check that the incrementally maintained rows match a rebuild, and an
+  /analytics/load read of the last 90 days.
+
+    python scripts/benchmarks/training_load.py --users 48 --workers 8
+    python scripts/benchmarks/training_load.py --dsn postgresql+asyncpg://...
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+sys.path.insert(0, os.path.join(ROOT, "scripts", "benchmarks"))
+from sqlalchemy import insert, select  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from backfill_training_load import backfill  # noqa: E402
+from training_history import TABLES, seed, session_rows, timed  # noqa: E402
+from models.workout import ActivitySets, TrainingLoad, WorkoutSessionActivities, WorkoutSessions  # noqa: E402
+from services import training_load  # noqa: E402
+from services.db import Base  # noqa: E402
+
+FIELDS = ("load", "tonnage", "sessions", "acute", "chronic", "monotony", "strain")
+
+
+async def snapshot_rows(db, user_id):
+    result = await db.execute(
+        select(TrainingLoad).where(TrainingLoad.user_id == user_id).order_by(TrainingLoad.date)
+    )
+    return {row.date: tuple(getattr(row, f) for f in FIELDS) for row in result.scalars()}
+
+
+def same_rows(left, right):
+    def close(a, b):
+        return (a is None and b is None) or (
+            a is not None and b is not None and math.isclose(a, b, rel_tol=1e-6, abs_tol=1e-6)
+        )
+
+    return left.keys() == right.keys() and all(
+        close(a, b) for day in left for a, b in zip(left[day], right[day])
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dsn", default=None, help="defaults to a temporary SQLite file")
+    parser.add_argument("--users", type=int, default=48)
+    parser.add_argument("--years", type=float, default=2)
+    parser.add_argument("--per-week", type=float, default=4)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--sessions", type=int, default=30, help="new sessions finished incrementally")
+    parser.add_argument("--seed", type=int, default=23)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    dsn = args.dsn or f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(prefix='load_bench_'), 'load.db')}"
+    engine = create_async_engine(dsn)
+    tables = TABLES + [TrainingLoad.__table__]
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all, tables=tables)
+        await conn.run_sync(Base.metadata.create_all, tables=tables)
+    session_factory = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    started = time.perf_counter()
+    total_sessions = 0
+    for user_id in range(1, args.users + 1):
+        sessions, _ = await seed(session_factory, rng, user_id, args.years, args.per_week)
+        total_sessions += sessions
+    print(f"seeded {args.users} users, {total_sessions:,} sessions in {time.perf_counter() - started:.1f}s")
+    await engine.dispose()
+
+    # The backfill runs its own engines (in worker processes for the pool)
+    runs = {}
+    for workers in (1, args.workers):
+        stats = await asyncio.to_thread(backfill, dsn, workers, max(args.users // (workers * 2), 1))
+        runs[workers] = stats
+        print(
+            f"backfill, {workers:>2} worker(s): {stats['users']} users, {stats['days']:,} days in "
+            f"{stats['seconds']:.2f}s ({stats['users'] / stats['seconds']:,.0f} users/s)"
+        )
+    print(f"speedup {runs[1]['seconds'] / runs[args.workers]['seconds']:.1f}x")
+
+    failures = 0
+    engine = create_async_engine(dsn)
+    session_factory = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    user_id = 1
+    incremental, rescans = [], []
+    async with session_factory() as db:
+        now = datetime.now()
+        for n in range(args.sessions):
+            # The backfill wrote through today; these are the sessions of the days after
+            ended_at = now + timedelta(days=n // 2 + 1)
+            session, activities, sets = session_rows(rng, user_id, ended_at)
+            await db.execute(insert(WorkoutSessions), [session])
+            await db.execute(insert(WorkoutSessionActivities), activities)
+            await db.execute(insert(ActivitySets), sets)
+            began = time.perf_counter()
+            await training_load.record_session(db, user_id, session["id"])
+            await db.commit()
+            incremental.append(time.perf_counter() - began)
+        maintained = await snapshot_rows(db, user_id)
+
+        last_day = max(maintained)
+        for _ in range(5):
+            began = time.perf_counter()
+            await training_load.rebuild(db, [user_id], last_day)
+            rescans.append(time.perf_counter() - began)
+        rebuilt = await snapshot_rows(db, user_id)
+        ok = same_rows(maintained, rebuilt)
+        failures += not ok
+        print(f"record_session x{len(incremental)}: {timed(incremental)} (incl. commit)")
+        print(f"full rescan of one user   : {timed(rescans)} ({len(rebuilt):,} days)")
+        print(f"incremental rows == rebuilt rows: {ok}")
+
+        began = time.perf_counter()
+        today = last_day + timedelta(days=7)
+        days = await training_load.get_range(db, user_id, today - timedelta(days=89), today, today)
+        latest = days[-1]
+        print(
+            f"/analytics/load 90 days: {(time.perf_counter() - began) * 1000:.1f}ms, {len(days)} days; a week on "
+            f"acute {latest.acute:.0f}, chronic {latest.chronic:.0f}, ratio {latest.ratio or 0:.2f}, "
+            f"monotony {latest.monotony or 0:.2f}, strain {latest.strain or 0:.0f}"
+        )
+        failures += len(days) != 90
+    await engine.dispose()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
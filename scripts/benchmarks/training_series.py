@@ -0,0 +1,113 @@
+"""
+Progress-chart series: raw per-session points vs LTTB and min/max downsampling.
+
+Builds an in-memory training history for a user who has done one exercise
+in tens of thousands of sessions (a slow strength trend with noise, deloads
+and the occasional PR spike), then for each point budget times extracting
+the per-session estimated-1RM series and thinning it, and reports:
+
+* JSON payload size of the /analytics/activities/{id}/series response,
+* how many of the series' PRs (points above everything before them) and
+  the all-time best survive, against simply keeping every k-th point.
+
+    python scripts/benchmarks/training_series.py --sessions 30000
+"""
+
+import argparse
+import math
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+from schemas.analytics import ActivitySeriesResponse  # noqa: E402
+from services.training_history import UserHistory  # noqa: E402
+from services.training_series import activity_series, downsample, session_series  # noqa: E402
+
+ACTIVITY = "Barbell_Squat"
+
+
+def build_history(rng, sessions):
+    rows = []
+    start = datetime(2015, 1, 1, 18)
+    for n in range(sessions):
+        ended_at = start + timedelta(hours=3 * n)
+        session_id = uuid.uuid4()
+        trend = 60 + 80 * (1 - math.exp(-n / (sessions / 3)))
+        deload = 0.8 if n % 400 < 30 else 1.0
+        spike = 1.15 if rng.random() < 0.001 else 1.0
+        for s in range(rng.integers(3, 6)):
+            weight = round(trend * deload * spike * rng.uniform(0.9, 1.0), 1)
+            row = (session_id, ended_at, ended_at - timedelta(minutes=30 - s), ACTIVITY,
+                   int(rng.integers(3, 9)), weight, None, None, None, None, s == 0 and rng.random() < 0.3)
+            rows.append(row)
+        rows.append((session_id, ended_at, ended_at, "Plank", None, None, 60.0, None, None, None, False))
+    history = UserHistory(1, capacity=len(rows))
+    history.extend(rows)
+    return history
+
+
+def records(y):
+    """Indices of the points that beat every earlier one."""
+    previous = np.maximum.accumulate(np.r_[-np.inf, y[:-1]])
+    return np.flatnonzero(y > previous)
+
+
+def timed_ms(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - began)
+    return result, statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=30_000)
+    parser.add_argument("--budgets", default="300,1000")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=24)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    history = build_history(rng, args.sessions)
+    (x, y), extract_ms = timed_ms(lambda: session_series(history, ACTIVITY, "estimated_1rm"), args.repeat)
+    print(f"{len(history):,} sets in memory; {len(x):,} session points extracted in {extract_ms:.2f}ms")
+
+    full = activity_series(history, ACTIVITY, "estimated_1rm", len(x), "lttb")
+    raw_bytes = len(ActivitySeriesResponse.model_validate(full).model_dump_json())
+    print(f"raw series: {len(full['points']):,} points, {raw_bytes / 1024:,.0f} KiB of JSON")
+
+    failures = 0
+    best = y.max()
+    prs = records(y)
+    for budget in (int(b) for b in args.budgets.split(",")):
+        stride = np.unique(np.r_[np.arange(0, len(x), max(len(x) // budget, 1)), len(x) - 1])
+        print(f"budget {budget}: every k-th point keeps {np.isin(prs, stride).sum()}/{len(prs)} PRs, "
+              f"best kept: {bool(np.isclose(y[stride].max(), best))}")
+        for method in ("lttb", "minmax"):
+            keep, ms = timed_ms(lambda: downsample(x, y, budget, method), args.repeat)
+            response, total_ms = timed_ms(
+                lambda: activity_series(history, ACTIVITY, "estimated_1rm", budget, method), args.repeat
+            )
+            payload = len(ActivitySeriesResponse.model_validate(response).model_dump_json())
+            kept_best = bool(np.isclose(y[keep].max(), best))
+            print(
+                f"  {method:<6}: {len(keep):>5} points in {ms:6.2f}ms ({total_ms:6.2f}ms end to end), "
+                f"{payload / 1024:5.1f} KiB ({raw_bytes / payload:4.0f}x smaller), "
+                f"{np.isin(prs, keep).sum()}/{len(prs)} PRs, best kept: {kept_best}"
+            )
+            failures += len(keep) > budget or (method == "minmax" and not kept_best)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
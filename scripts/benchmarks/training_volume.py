@@ -0,0 +1,170 @@
+"""
+Weekly volume by muscle: per-row Python loop vs the rollup + incidence matrix.
+
+Seeds one user with several years of sessions (the same generator as
+training_history.py) and a catalog giving every exercise a primary and up to
+two secondary muscles, a few left out of the catalog. Then times
+/analytics/volume's computation for the last year and for all of it: cold
+(history load and rollup build), warm, and right after a new session is
+appended, when only the current week is rebuilt. Every result is checked
+against a loop over the query rows that credits each set to its muscles one
+by one.
+
+    python scripts/benchmarks/training_volume.py --years 5.5
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "scripts", "benchmarks"))
+from sqlalchemy import insert  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from training_history import CARDIO, EXERCISES, TABLES, seed, session_rows, timed  # noqa: E402
+from models.workout import ActivitySets, WorkoutSessionActivities, WorkoutSessions  # noqa: E402
+from services.activity_catalog import CatalogEntry, CatalogSnapshot  # noqa: E402
+from services.db import Base  # noqa: E402
+from services.training_history import TrainingHistoryStore, history_query  # noqa: E402
+from services.training_volume import muscle_matrix, week_number, weekly_volume  # noqa: E402
+
+MUSCLES = ["abdominals", "biceps", "calves", "chest", "glutes", "hamstrings", "lats", "quadriceps", "shoulders", "triceps"]
+USER_ID = 1
+
+
+def make_snapshot(rng, unmapped):
+    entries = []
+    for activity_id in EXERCISES[:-unmapped] + CARDIO:
+        primary = rng.sample(MUSCLES, 1)
+        secondary = rng.sample([m for m in MUSCLES if m not in primary], rng.randint(0, 2))
+        entries.append(
+            CatalogEntry(activity_id, activity_id, "push", "beginner", "compound", "barbell",
+                         tuple(primary), tuple(secondary), (), "strength", ())
+        )
+    return CatalogSnapshot(1, entries)
+
+
+def loop_reference(rows, snapshot, secondary_weight, first_week, last_week):
+    """(week, muscle) -> [sets, reps, volume], one set at a time."""
+    grid = {}
+    for _, _, ended_at, activity_id, reps, weight, *_, warmup in rows:
+        week = week_number(ended_at.date())
+        if warmup or not first_week <= week <= last_week:
+            continue
+        entry = snapshot.by_id.get(activity_id)
+        if entry is None:
+            continue
+        shares = {m: secondary_weight for m in entry.secondary_muscles}
+        shares.update({m: 1.0 for m in entry.primary_muscles})
+        for muscle, share in shares.items():
+            cell = grid.setdefault((week, muscle), [0.0, 0.0, 0.0])
+            cell[0] += share
+            cell[1] += share * (reps or 0)
+            cell[2] += share * (reps or 0) * (weight or 0)
+    return grid
+
+
+def matches(weeks, reference, first_week):
+    got = {
+        (first_week + w, m["muscle"]): [m["sets"], m["reps"], m["volume"]]
+        for w, week in enumerate(weeks)
+        for m in week["muscles"]
+    }
+    return got.keys() == reference.keys() and all(
+        math.isclose(a, b, rel_tol=1e-4, abs_tol=0.02) for k in got for a, b in zip(got[k], reference[k])
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dsn", default="sqlite+aiosqlite:///:memory:")
+    parser.add_argument("--years", type=float, default=5.5)
+    parser.add_argument("--per-week", type=float, default=4)
+    parser.add_argument("--secondary-weight", type=float, default=0.5)
+    parser.add_argument("--reads", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=22)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    engine = create_async_engine(args.dsn)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all, tables=TABLES)
+        await conn.run_sync(Base.metadata.create_all, tables=TABLES)
+    session_factory = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    sessions, sets = await seed(session_factory, rng, USER_ID, args.years, args.per_week)
+    snapshot = make_snapshot(rng, unmapped=3)
+    matrix = muscle_matrix(snapshot, args.secondary_weight)
+    print(f"{sessions:,} sessions, {sets:,} sets over {args.years} years, {len(matrix.muscles)} muscles")
+
+    today = date.today()
+    ranges = {
+        "last year": (week_number(today - timedelta(weeks=51)), week_number(today)),
+        "all time": (week_number(today - timedelta(days=int(args.years * 366))), week_number(today)),
+    }
+    failures = 0
+    store = TrainingHistoryStore(memory_budget_bytes=1 << 30)
+    async with session_factory() as db:
+        rows = (await db.execute(history_query(USER_ID))).all()
+        started = time.perf_counter()
+        history = await store.get(db, USER_ID)
+        weekly_volume(history, matrix, *ranges["last year"])
+        print(f"cold (history load + rollup build): {(time.perf_counter() - started) * 1000:.1f}ms, "
+              f"rollup {history.derived['weekly'].nbytes / 1024:.0f} KiB")
+
+        for label, (first_week, last_week) in ranges.items():
+            loop_timings, rollup_timings = [], []
+            for _ in range(args.reads):
+                began = time.perf_counter()
+                reference = loop_reference(rows, snapshot, args.secondary_weight, first_week, last_week)
+                loop_timings.append(time.perf_counter() - began)
+                began = time.perf_counter()
+                weeks = weekly_volume(await store.get(db, USER_ID), matrix, first_week, last_week)
+                rollup_timings.append(time.perf_counter() - began)
+            ok = matches(weeks, reference, first_week)
+            failures += not ok
+            print(f"{label:<9} ({len(weeks):>3} weeks) per-row loop: {timed(loop_timings)}")
+            print(
+                f"{label:<9} ({len(weeks):>3} weeks) rollup      : {timed(rollup_timings)}"
+                + ("" if ok else "  MISMATCH")
+            )
+            if label == "last year":
+                failures += statistics.quantiles(rollup_timings, n=20)[-1] > 0.05
+
+        sync_timings = []
+        for n in range(args.reads):
+            session, activities, new_sets = session_rows(rng, USER_ID, datetime.now() + timedelta(minutes=n))
+            await db.execute(insert(WorkoutSessions), [session])
+            await db.execute(insert(WorkoutSessionActivities), activities)
+            await db.execute(insert(ActivitySets), new_sets)
+            await db.commit()
+            await store.append_session(db, USER_ID, session["id"])
+            began = time.perf_counter()
+            weeks = weekly_volume(history, matrix, *ranges["last year"])
+            sync_timings.append(time.perf_counter() - began)
+        rows = (await db.execute(history_query(USER_ID))).all()
+        ok = matches(weeks, loop_reference(rows, snapshot, args.secondary_weight, *ranges["last year"]),
+                     ranges["last year"][0])
+        failures += not ok
+        print(f"last year after each append (incremental rollup sync): {timed(sync_timings)}"
+              + ("" if ok else "  MISMATCH"))
+
+        history.derived.clear()
+        began = time.perf_counter()
+        weekly_volume(history, matrix, *ranges["last year"])
+        print(f"same query with the rollup rebuilt from scratch: {(time.perf_counter() - began) * 1000:.2f}ms")
+
+    await engine.dispose()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
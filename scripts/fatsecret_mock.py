@@ -0,0 +1,145 @@
+"""
+Local stand-in for the FatSecret API.
+
+Serves the OAuth2 token endpoint and the foods.search, food.get and
+recipes.search endpoints used by services.fatsecret, with canned data,
+configurable latency and short-lived tokens, so the client's pooling,
+token refresh, coalescing and caching can be exercised offline. Request
+counts per endpoint are available at /stats.
+
+    python scripts/fatsecret_mock.py --port 8900 --latency-ms 150
+
+    FATSECRET_API_URL=http://127.0.0.1:8900/rest
+    FATSECRET_TOKEN_URL=http://127.0.0.1:8900/connect/token
+    FATSECRET_CLIENT_ID=mock FATSECRET_CLIENT_SECRET=mock
+"""
+
+import argparse
+import asyncio
+import secrets
+import time
+from collections import Counter
+
+import uvicorn
+from fastapi import FastAPI, Header
+
+FOODS = [
+    ("33691", "Apple", None, "Per 100g - Calories: 52kcal | Fat: 0.17g | Carbs: 13.81g | Protein: 0.26g"),
+    ("35755", "Banana", None, "Per 100g - Calories: 89kcal | Fat: 0.33g | Carbs: 22.84g | Protein: 1.09g"),
+    ("1641", "Chicken Breast", None, "Per 100g - Calories: 165kcal | Fat: 3.57g | Carbs: 0g | Protein: 31.02g"),
+    ("4881", "White Rice", None, "Per 1 cup - Calories: 205kcal | Fat: 0.44g | Carbs: 44.51g | Protein: 4.25g"),
+    ("3092", "Egg", None, "Per 1 large - Calories: 72kcal | Fat: 4.76g | Carbs: 0.36g | Protein: 6.28g"),
+    ("6172", "Oatmeal", None, "Per 1 cup - Calories: 166kcal | Fat: 3.56g | Carbs: 28.08g | Protein: 5.94g"),
+    ("51218", "Greek Yogurt", "Fage", "Per 1 container - Calories: 130kcal | Fat: 0g | Carbs: 7g | Protein: 23g"),
+    ("5822", "Apple Pie", None, "Per 1 piece - Calories: 411kcal | Fat: 19.38g | Carbs: 57.5g | Protein: 3.72g"),
+]
+RECIPES = [
+    ("91", "Chicken and Rice Bowl", "High-protein lunch bowl"),
+    ("92", "Apple Oatmeal", "Baked oats with apple and cinnamon"),
+    ("93", "Banana Pancakes", "Two-ingredient pancakes"),
+]
+
+
+def food_json(food_id, name, brand, description):
+    food = {
+        "food_id": food_id,
+        "food_name": name,
+        "food_description": description,
+        "food_type": "Brand" if brand else "Generic",
+        "food_url": f"https://www.fatsecret.com/calories-nutrition/generic/{name.lower().replace(' ', '-')}",
+    }
+    if brand:
+        food["brand_name"] = brand
+    return food
+
+
+def build_app(latency: float, token_ttl: int) -> FastAPI:
+    app = FastAPI(title="FatSecret mock")
+    stats = Counter()
+    tokens = {}  # token -> expiry (epoch seconds)
+
+    async def slow():
+        if latency:
+            await asyncio.sleep(latency)
+
+    def authorized(authorization):
+        token = (authorization or "").removeprefix("Bearer ")
+        return tokens.get(token, 0) > time.time()
+
+    @app.post("/connect/token")
+    async def token():
+        stats["token"] += 1
+        await slow()
+        value = secrets.token_hex(16)
+        tokens[value] = time.time() + token_ttl
+        return {"access_token": value, "expires_in": token_ttl, "token_type": "Bearer", "scope": "basic"}
+
+    @app.get("/rest/foods/search/v1")
+    async def foods_search(
+        search_expression: str = "", max_results: int = 20, page_number: int = 0,
+        authorization: str = Header(None),
+    ):
+        stats["foods.search"] += 1
+        await slow()
+        if not authorized(authorization):
+            return {"error": {"code": 13, "message": "Invalid token"}}
+        terms = search_expression.lower().split()
+        matches = [f for f in FOODS if all(term in f[1].lower() for term in terms)]
+        page = matches[page_number * max_results:(page_number + 1) * max_results]
+        if not page:
+            return {"foods": {"max_results": str(max_results), "total_results": "0", "page_number": str(page_number)}}
+        foods = [food_json(*f) for f in page]
+        return {
+            "foods": {
+                # Like the real API, a single hit is an object rather than a list
+                "food": foods[0] if len(foods) == 1 else foods,
+                "max_results": str(max_results),
+                "total_results": str(len(matches)),
+                "page_number": str(page_number),
+            }
+        }
+
+    @app.get("/rest/food/v4")
+    async def food_get(food_id: str, authorization: str = Header(None)):
+        stats["food.get"] += 1
+        await slow()
+        if not authorized(authorization):
+            return {"error": {"code": 13, "message": "Invalid token"}}
+        for food in FOODS:
+            if food[0] == food_id:
+                return {"food": {**food_json(*food), "servings": {"serving": {"serving_description": "100 g"}}}}
+        return {"error": {"code": 106, "message": f"Invalid ID: {food_id}"}}
+
+    @app.get("/rest/recipes/search/v3")
+    async def recipes_search(search_expression: str = "", authorization: str = Header(None)):
+        stats["recipes.search"] += 1
+        await slow()
+        if not authorized(authorization):
+            return {"error": {"code": 13, "message": "Invalid token"}}
+        terms = search_expression.lower().split()
+        recipes = [
+            {"recipe_id": r[0], "recipe_name": r[1], "recipe_description": r[2]}
+            for r in RECIPES
+            if all(term in r[1].lower() for term in terms)
+        ]
+        return {"recipes": {"recipe": recipes, "total_results": str(len(recipes))}}
+
+    @app.get("/stats")
+    async def get_stats():
+        return dict(stats)
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--token-ttl", type=int, default=86400)
+    args = parser.parse_args()
+    uvicorn.run(build_app(args.latency_ms / 1000, args.token_ttl), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""
+Import the exercise catalog into the activities table, idempotently.
+
+Streams a JSON array (the free-exercise-db exercises.json layout, camelCase
+or snake_case keys) or JSON Lines without loading the file whole, validates
+every record against schemas.activity, and upserts on id:
+
+* PostgreSQL: records are COPY'd into a temporary staging table, then one
+  transaction diffs it against activities, upserts only new or changed rows,
+  optionally deletes rows missing from the file (--prune) and bumps
+  catalog_version. Readers never see a half-applied import.
+* Other databases: the current catalog is read once, the diff is done in
+  Python and new or changed rows go in with batched executemany upserts.
+
+Re-running with the same file changes nothing and leaves the version alone.
+Prints added/changed/removed counts; --report writes the ids as JSON.
+
+    python scripts/import_catalog.py data/exercises.json
+    python scripts/import_catalog.py exercises.json --prune --report changes.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pydantic import ValidationError  # noqa: E402
+from sqlalchemy import JSON, delete, select, text  # noqa: E402
+from sqlalchemy.dialects import postgresql, sqlite  # noqa: E402
+
+from models.activity import Activity, CatalogVersion  # noqa: E402
+from schemas.activity import ActivityResponse  # noqa: E402
+from services.activity_search import SEARCH_INDEX_DDL  # noqa: E402
+from services.db_runtime import create_engine  # noqa: E402
+
+IMAGE_PREFIX = "https://raw.githubusercontent.com/yuhonas/free-exercise-db/main/dist/exercises/"
+
+COLUMNS = tuple(column.name for column in Activity.__table__.columns)
+JSON_COLUMNS = {column.name for column in Activity.__table__.columns if isinstance(column.type, JSON)}
+# Keys of the free-exercise-db layout that differ from the column names
+ALIASES = {"primaryMuscles": "primary_muscles", "secondaryMuscles": "secondary_muscles"}
+# The dataset uses null for "not applicable"; the columns are NOT NULL
+NULLABLE_TEXT = ("force", "mechanic", "equipment")
+
+STAGING_DDL = "CREATE TEMP TABLE activities_staging (LIKE activities INCLUDING DEFAULTS) ON COMMIT DROP"
+
+
+def _compared(alias: str, column: str) -> str:
+    # json has no equality operator; jsonb compares structurally
+    return f"{alias}.{column}::jsonb" if column in JSON_COLUMNS else f"{alias}.{column}"
+
+
+def _distinct(left: str, right: str) -> str:
+    fields = [column for column in COLUMNS if column != "id"]
+    return (
+        f"({', '.join(_compared(left, c) for c in fields)}) "
+        f"IS DISTINCT FROM ({', '.join(_compared(right, c) for c in fields)})"
+    )
+
+
+DIFF_SQL = {
+    "added": "SELECT s.id FROM activities_staging s "
+    "WHERE NOT EXISTS (SELECT 1 FROM activities a WHERE a.id = s.id)",
+    "changed": f"SELECT s.id FROM activities_staging s JOIN activities a ON a.id = s.id WHERE {_distinct('a', 's')}",
+    "removed": "SELECT a.id FROM activities a "
+    "WHERE NOT EXISTS (SELECT 1 FROM activities_staging s WHERE s.id = a.id)",
+}
+MERGE_SQL = f"""
+INSERT INTO activities ({", ".join(COLUMNS)})
+SELECT {", ".join(COLUMNS)} FROM activities_staging
+ON CONFLICT (id) DO UPDATE SET
+    {", ".join(f"{c} = EXCLUDED.{c}" for c in COLUMNS if c != "id")}
+WHERE {_distinct("activities", "EXCLUDED")}
+"""
+PRUNE_SQL = (
+    "DELETE FROM activities a WHERE NOT EXISTS (SELECT 1 FROM activities_staging s WHERE s.id = a.id)"
+)
+
+
+def iter_json_array(file: TextIO, chunk_size: int = 1 << 16) -> Iterator:
+    """Yields the elements of a top-level JSON array, reading `chunk_size` characters at a time."""
+    decoder = json.JSONDecoder()
+    buffer, position, eof, started = "", 0, False, False
+    while True:
+        # Skip whitespace and separators, pulling more input as needed
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position < len(buffer) or eof:
+                break
+            buffer, position = file.read(chunk_size), 0
+            eof = not buffer
+        if position >= len(buffer):
+            raise ValueError("Unexpected end of JSON input")
+        if not started:
+            if buffer[position] != "[":
+                raise ValueError("Expected a JSON array")
+            started, position = True, position + 1
+            continue
+        if buffer[position] == "]":
+            return
+        try:
+            value, end = decoder.raw_decode(buffer, position)
+            if end == len(buffer) and not eof and not isinstance(value, (dict, list)):
+                # A number or literal may continue in the next chunk
+                raise json.JSONDecodeError("Truncated value", buffer, end)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            more = file.read(chunk_size)
+            eof = not more
+            buffer, position = buffer[position:] + more, 0
+            continue
+        yield value
+        position = end
+
+
+def read_records(path: str) -> Iterator[dict]:
+    with open(path, encoding="utf-8") as file:
+        if path.lower().endswith((".jsonl", ".ndjson")):
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from iter_json_array(file)
+
+
+def normalize_record(record: dict, image_prefix: str) -> dict:
+    """Column values for one exercise; raises ValidationError if it doesn't fit the schema."""
+    record = {ALIASES.get(key, key): value for key, value in record.items()}
+    for field in NULLABLE_TEXT:
+        if record.get(field) is None:
+            record[field] = ""
+    activity = ActivityResponse.model_validate(record)
+    row = activity.model_dump()
+    row["images"] = [
+        image if image.startswith(("http://", "https://")) else image_prefix + image
+        for image in row["images"]
+    ]
+    return {column: row[column] for column in COLUMNS}
+
+
+def batched(rows: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(rows)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def version_statement(dialect_name: str, now: datetime):
+    insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    stmt = insert(CatalogVersion).values(id=1, version=1, updated_at=now)
+    return stmt.on_conflict_do_update(
+        index_elements=[CatalogVersion.id],
+        set_={"version": CatalogVersion.version + 1, "updated_at": now},
+    ).returning(CatalogVersion.version)
+
+
+async def load_postgres(conn, rows: Iterable[dict], batch_size: int, prune: bool) -> Dict[str, List[str]]:
+    await conn.execute(text(STAGING_DDL))
+    raw = await conn.get_raw_connection()
+    for batch in batched(rows, batch_size):
+        records = [
+            tuple(json.dumps(row[c]) if c in JSON_COLUMNS else row[c] for c in COLUMNS)
+            for row in batch
+        ]
+        await raw.driver_connection.copy_records_to_table(
+            "activities_staging", records=records, columns=COLUMNS
+        )
+    await conn.execute(text("ANALYZE activities_staging"))
+    diff = {key: list((await conn.execute(text(sql))).scalars()) for key, sql in DIFF_SQL.items()}
+    await conn.execute(text(MERGE_SQL))
+    if prune and diff["removed"]:
+        await conn.execute(text(PRUNE_SQL))
+    return diff
+
+
+async def load_generic(conn, rows: Iterable[dict], batch_size: int, prune: bool) -> Dict[str, List[str]]:
+    current = {
+        row.id: tuple(getattr(row, c) for c in COLUMNS)
+        for row in await conn.execute(select(*Activity.__table__.columns))
+    }
+    insert = postgresql.insert if conn.dialect.name == "postgresql" else sqlite.insert
+    stmt = insert(Activity)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Activity.id],
+        set_={c: stmt.excluded[c] for c in COLUMNS if c != "id"},
+    )
+    diff: Dict[str, List[str]] = {"added": [], "changed": [], "removed": []}
+    seen = set()
+
+    def pending():
+        for row in rows:
+            seen.add(row["id"])
+            existing = current.get(row["id"])
+            if existing is None:
+                diff["added"].append(row["id"])
+            elif existing != tuple(row[c] for c in COLUMNS):
+                diff["changed"].append(row["id"])
+            else:
+                continue
+            yield row
+
+    for batch in batched(pending(), batch_size):
+        await conn.execute(stmt, batch)
+    diff["removed"] = [activity_id for activity_id in current if activity_id not in seen]
+    if prune:
+        for ids in batched(diff["removed"], batch_size):
+            await conn.execute(delete(Activity).where(Activity.id.in_(ids)))
+    return diff
+
+
+async def import_catalog(
+    path: str,
+    dsn: Optional[str] = None,
+    image_prefix: str = IMAGE_PREFIX,
+    batch_size: int = 5_000,
+    prune: bool = False,
+    create_tables: bool = False,
+    max_errors: int = 10,
+) -> dict:
+    started = time.perf_counter()
+    engine = create_engine(dsn)
+    stats = {"read": 0, "invalid": 0, "duplicates": 0, "errors": []}
+
+    def rows():
+        seen = set()
+        for record in read_records(path):
+            stats["read"] += 1
+            try:
+                row = normalize_record(record, image_prefix)
+            except (ValidationError, AttributeError) as e:
+                stats["invalid"] += 1
+                if len(stats["errors"]) < max_errors:
+                    label = record.get("id") if isinstance(record, dict) else record
+                    stats["errors"].append(f"{label}: {e}".splitlines()[0])
+                continue
+            # First occurrence wins; ON CONFLICT can't touch a row twice per statement
+            if row["id"] in seen:
+                stats["duplicates"] += 1
+                continue
+            seen.add(row["id"])
+            yield row
+
+    try:
+        if create_tables:
+            async with engine.begin() as conn:
+                await conn.run_sync(
+                    Activity.metadata.create_all,
+                    tables=[Activity.__table__, CatalogVersion.__table__],
+                )
+        async with engine.begin() as conn:
+            load = load_postgres if conn.dialect.name == "postgresql" else load_generic
+            diff = await load(conn, rows(), batch_size, prune)
+            version = None
+            if diff["added"] or diff["changed"] or (prune and diff["removed"]):
+                version = (await conn.execute(version_statement(conn.dialect.name, datetime.now()))).scalar()
+        if engine.dialect.name == "postgresql":
+            async with engine.begin() as conn:
+                for statement in SEARCH_INDEX_DDL:
+                    await conn.execute(text(statement))
+    finally:
+        await engine.dispose()
+
+    return {
+        **stats,
+        **{key: len(ids) for key, ids in diff.items()},
+        "ids": diff,
+        "pruned": prune,
+        "version": version,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("path", help="JSON array or JSON Lines of exercises")
+    parser.add_argument("--dsn", default=None, help="defaults to the app database")
+    parser.add_argument("--image-prefix", default=IMAGE_PREFIX, help="prepended to relative image paths")
+    parser.add_argument("--batch-size", type=int, default=5_000)
+    parser.add_argument("--prune", action="store_true", help="delete activities missing from the file")
+    parser.add_argument("--report", default=None, help="write the added/changed/removed ids here")
+    parser.add_argument("--create-tables", action="store_true")
+    args = parser.parse_args()
+
+    stats = await import_catalog(
+        args.path,
+        dsn=args.dsn,
+        image_prefix=args.image_prefix,
+        batch_size=args.batch_size,
+        prune=args.prune,
+        create_tables=args.create_tables,
+    )
+    for error in stats["errors"]:
+        print(f"invalid: {error}")
+    removed = f"{stats['removed']} {'removed' if stats['pruned'] else 'missing from the file (use --prune)'}"
+    print(
+        f"read {stats['read']} records ({stats['invalid']} invalid, {stats['duplicates']} duplicate ids) "
+        f"in {stats['seconds']:.1f}s: {stats['added']} added, {stats['changed']} changed, {removed}"
+    )
+    print(f"catalog version {stats['version']}" if stats["version"] else "catalog unchanged")
+    if args.report:
+        with open(args.report, "w") as file:
+            json.dump(stats["ids"], file, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,146 @@
+"""
+Load per-activity calorie tables into activity_energy.
+
+Understands the two tables the scrapers produce:
+
+* the JSON written by html_to_json.py: calories_130lb ... calories_205lb,
+  burned in one hour
+* the fitness.db written by scrape_data.py: calories_125lbs ... calories_185lbs
+  columns of its activities table, burned in 30 minutes
+
+Every row is normalised to kcal per hour at body weights in kg, linked to the
+catalog activity with the same id or name, and upserted on its name, so
+re-running an import refreshes rows. services.calories picks the new table up
+within its refresh interval.
+
+    python scripts/import_energy_tables.py activities.json fitness.db
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import sys
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sqlalchemy import select  # noqa: E402
+from sqlalchemy.dialects import postgresql, sqlite  # noqa: E402
+
+from models.activity import Activity, ActivityEnergy  # noqa: E402
+from services.calories import LB_TO_KG, normalize_name  # noqa: E402
+from services.db_runtime import create_engine  # noqa: E402
+
+# source -> (calorie column pattern with the weight in lb, minutes the values cover)
+SOURCES = {
+    "activities": (re.compile(r"^calories_(\d+)lb$"), 60),  # html_to_json.py
+    "scraped": (re.compile(r"^calories_(\d+)lbs$"), 30),  # scrape_data.py
+}
+
+
+def read_records(path: str) -> Iterator[dict]:
+    if path.endswith((".db", ".sqlite", ".sqlite3")):
+        conn = sqlite3.connect(path)
+        conn.row_factory = sqlite3.Row
+        try:
+            for row in conn.execute("SELECT * FROM activities"):
+                yield dict(row)
+        finally:
+            conn.close()
+        return
+    with open(path, encoding="utf-8") as file:
+        data = json.load(file)
+    yield from data if isinstance(data, list) else [data]
+
+
+def normalize_record(record: dict) -> Optional[dict]:
+    """activity_energy values for one table row, or None when it has no usable calories."""
+    for source, (pattern, minutes) in SOURCES.items():
+        points = sorted(
+            (int(match.group(1)), value)
+            for key, value in record.items()
+            if (match := pattern.match(key)) and value
+        )
+        if not points:
+            continue
+        name = normalize_name(record.get("name") or "")
+        if not name:
+            return None
+        return {
+            "name": name,
+            "source": source,
+            "source_id": record.get("id"),
+            "weights_kg": [round(lb * LB_TO_KG, 2) for lb, _ in points],
+            "kcal_per_hour": [round(float(kcal) * 60 / minutes, 1) for _, kcal in points],
+        }
+    return None
+
+
+async def import_energy_tables(paths: List[str], dsn: Optional[str] = None, create_tables: bool = False) -> dict:
+    engine = create_engine(dsn)
+    stats = {"read": 0, "skipped": 0, "linked": 0, "written": 0}
+    try:
+        if create_tables:
+            async with engine.begin() as conn:
+                await conn.run_sync(ActivityEnergy.metadata.create_all, tables=[ActivityEnergy.__table__])
+
+        rows: Dict[str, dict] = {}
+        for path in paths:
+            for record in read_records(path):
+                stats["read"] += 1
+                row = normalize_record(record)
+                if row is None:
+                    stats["skipped"] += 1
+                    continue
+                # Later files win for the same activity
+                rows[row["name"]] = row
+        if not rows:
+            return stats
+
+        now = datetime.now()
+        async with engine.begin() as conn:
+            activities = (await conn.execute(select(Activity.id, Activity.name))).all()
+            ids = {activity_id for activity_id, _ in activities}
+            by_name = {normalize_name(name): activity_id for activity_id, name in activities}
+            values = []
+            for row in rows.values():
+                source_id = row.pop("source_id")
+                activity_id = source_id if source_id in ids else by_name.get(row["name"])
+                stats["linked"] += activity_id is not None
+                values.append({**row, "activity_id": activity_id, "updated_at": now})
+
+            insert = postgresql.insert if conn.dialect.name == "postgresql" else sqlite.insert
+            stmt = insert(ActivityEnergy)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[ActivityEnergy.name],
+                set_={
+                    column: stmt.excluded[column]
+                    for column in ("activity_id", "source", "weights_kg", "kcal_per_hour", "updated_at")
+                },
+            )
+            await conn.execute(stmt, values)
+            stats["written"] = len(values)
+    finally:
+        await engine.dispose()
+    return stats
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("paths", nargs="+", help="html_to_json.py JSON and/or scrape_data.py fitness.db")
+    parser.add_argument("--dsn", default=None, help="defaults to the app database")
+    parser.add_argument("--create-tables", action="store_true")
+    args = parser.parse_args()
+
+    stats = await import_energy_tables(args.paths, dsn=args.dsn, create_tables=args.create_tables)
+    print(
+        f"read {stats['read']} rows, skipped {stats['skipped']}, wrote {stats['written']} "
+        f"({stats['linked']} linked to catalog activities)"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
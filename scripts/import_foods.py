@@ -0,0 +1,276 @@
+"""
+Bulk-load an open nutrition dataset into the foods table.
+
+Reads CSV/TSV (including the Open Food Facts export), JSON Lines or a JSON
+array, normalises each record and loads it in batches. On PostgreSQL every
+batch is COPY'd into a temporary staging table and merged with one
+INSERT ... SELECT ... ON CONFLICT (source, external_id) DO UPDATE, so
+re-running an import refreshes rows instead of duplicating them. Each batch
+commits on its own, which keeps a multi-million-row load from holding one
+huge transaction; an interrupted run can simply be restarted. Other
+databases get the same upsert through batched executemany.
+
+    python scripts/import_foods.py en.openfoodfacts.org.products.csv --preset off
+    python scripts/import_foods.py foods.jsonl --source usda
+    python scripts/import_foods.py foods.csv --dsn sqlite+aiosqlite:///./foods.db
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sqlalchemy import text  # noqa: E402
+from sqlalchemy.dialects import postgresql, sqlite  # noqa: E402
+
+from models.auth import User  # noqa: E402
+from models.meals import Food, FoodSource  # noqa: E402
+from services.db_runtime import create_engine  # noqa: E402
+from services.food_catalog import FOOD_FIELDS, FOOD_SEARCH_DDL  # noqa: E402
+
+# foods column -> dataset field
+PRESETS = {
+    "generic": {
+        "external_id": "id",
+        "name": "name",
+        "brand": "brand",
+        "description": "description",
+        "quantity": "quantity",
+        "quantity_unit": "quantity_unit",
+        "calories": "calories",
+        "protein": "protein",
+        "carbs": "carbs",
+        "fats": "fats",
+    },
+    # Open Food Facts CSV export; nutrients are per 100 g
+    "off": {
+        "external_id": "code",
+        "name": "product_name",
+        "brand": "brands",
+        "food_url": "url",
+        "calories": "energy-kcal_100g",
+        "protein": "proteins_100g",
+        "carbs": "carbohydrates_100g",
+        "fats": "fat_100g",
+    },
+}
+PRESET_DEFAULTS = {"off": {"quantity": 100.0, "quantity_unit": "g"}}
+
+NUMERIC_FIELDS = {"quantity", "calories", "protein", "carbs", "fats"}
+COLUMNS = ("source", "external_id", *FOOD_FIELDS, "fetched_at")
+
+STAGING_DDL = """
+CREATE TEMP TABLE IF NOT EXISTS foods_staging (
+    source text, external_id text, name text, brand text, description text,
+    quantity double precision, quantity_unit text, food_type text, food_url text,
+    calories double precision, protein double precision, carbs double precision,
+    fats double precision, fetched_at timestamp
+)
+"""
+
+# DISTINCT ON: a key may repeat inside one batch, and ON CONFLICT can't
+# touch the same row twice in one statement. Unchanged rows aren't rewritten.
+MERGE_SQL = f"""
+INSERT INTO foods ({", ".join(COLUMNS)})
+SELECT DISTINCT ON (source, external_id) {", ".join(COLUMNS)}
+FROM foods_staging
+ORDER BY source, external_id
+ON CONFLICT (source, external_id) DO UPDATE SET
+    {", ".join(f"{field} = EXCLUDED.{field}" for field in (*FOOD_FIELDS, "fetched_at"))}
+WHERE ({", ".join(f"foods.{field}" for field in FOOD_FIELDS)})
+    IS DISTINCT FROM ({", ".join(f"EXCLUDED.{field}" for field in FOOD_FIELDS)})
+"""
+
+
+def detect_format(path: str) -> str:
+    lowered = path.lower()
+    if lowered.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    if lowered.endswith(".json"):
+        return "json"
+    if lowered.endswith(".tsv"):
+        return "tsv"
+    if lowered.endswith(".csv"):
+        # The Open Food Facts "CSV" export is tab-separated
+        with open(path, encoding="utf-8", errors="replace") as file:
+            return "tsv" if "\t" in file.readline() else "csv"
+    raise ValueError(f"Can't tell the format of {path}; pass --format")
+
+
+def read_records(path: str, fmt: str) -> Iterator[dict]:
+    if fmt in ("csv", "tsv"):
+        csv.field_size_limit(sys.maxsize)
+        with open(path, newline="", encoding="utf-8", errors="replace") as file:
+            yield from csv.DictReader(file, delimiter="\t" if fmt == "tsv" else ",")
+    elif fmt == "jsonl":
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        # A JSON array has to be parsed whole; prefer JSON Lines for big files
+        with open(path, encoding="utf-8") as file:
+            yield from json.load(file)
+
+
+def _number(value) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if number == number and number >= 0 else None  # drop NaN/negatives
+
+
+def normalize_record(record: dict, mapping: dict, defaults: dict, source: str, now) -> Optional[tuple]:
+    row = dict(defaults)
+    for column, field in mapping.items():
+        value = record.get(field)
+        if column in NUMERIC_FIELDS:
+            value = _number(value)
+        elif value is not None:
+            value = str(value).strip() or None
+        if value is not None or column not in row:
+            row[column] = value
+
+    if not row.get("name") or row.get("calories") is None:
+        return None
+    row["name"] = row["name"][:500]
+    if row.get("brand"):
+        # Open Food Facts lists several brands comma-separated; keep the first
+        row["brand"] = row["brand"].split(",")[0].strip()
+    if not row.get("external_id"):
+        # Stable id so rows without one still upsert instead of duplicating
+        key = f"{row['name'].lower()}|{(row.get('brand') or '').lower()}"
+        row["external_id"] = hashlib.sha1(key.encode()).hexdigest()
+    row["food_type"] = row.get("food_type") or ("brand" if row.get("brand") else "generic")
+    row["source"] = source
+    row["fetched_at"] = now
+    return tuple(row.get(column) for column in COLUMNS)
+
+
+def batched(rows: Iterable[tuple], size: int) -> Iterator[List[tuple]]:
+    iterator = iter(rows)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+async def load_postgres(engine, batches: Iterable[List[tuple]]) -> int:
+    written = 0
+    async with engine.connect() as conn:
+        await conn.execute(text(STAGING_DDL))
+        await conn.commit()
+        raw = await conn.get_raw_connection()
+        for batch in batches:
+            async with conn.begin():
+                # Runs through SQLAlchemy first so the COPY joins its transaction
+                await conn.execute(text("TRUNCATE foods_staging"))
+                await raw.driver_connection.copy_records_to_table(
+                    "foods_staging", records=batch, columns=COLUMNS
+                )
+                result = await conn.execute(text(MERGE_SQL))
+                written += result.rowcount
+    return written
+
+
+async def load_generic(engine, batches: Iterable[List[tuple]]) -> int:
+    insert = postgresql.insert if engine.dialect.name == "postgresql" else sqlite.insert
+    stmt = insert(Food)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Food.source, Food.external_id],
+        set_={field: stmt.excluded[field] for field in (*FOOD_FIELDS, "fetched_at")},
+    )
+    written = 0
+    for batch in batches:
+        # Last occurrence wins, as with a sequential upsert
+        unique = {(row[0], row[1]): dict(zip(COLUMNS, row)) for row in batch}
+        async with engine.begin() as conn:
+            await conn.execute(stmt, list(unique.values()))
+        written += len(unique)
+    return written
+
+
+async def import_foods(
+    path: str,
+    dsn: Optional[str] = None,
+    fmt: Optional[str] = None,
+    preset: str = "generic",
+    source: str = FoodSource.IMPORT.value,
+    batch_size: int = 10_000,
+    create_tables: bool = False,
+) -> dict:
+    fmt = fmt or detect_format(path)
+    mapping, defaults = PRESETS[preset], PRESET_DEFAULTS.get(preset, {})
+    engine = create_engine(dsn)
+    try:
+        if create_tables:
+            async with engine.begin() as conn:
+                await conn.run_sync(Food.metadata.create_all, tables=[User.__table__, Food.__table__])
+
+        now = datetime.now()
+        stats = {"read": 0, "skipped": 0}
+
+        def rows():
+            for record in read_records(path, fmt):
+                stats["read"] += 1
+                row = normalize_record(record, mapping, defaults, source, now)
+                if row is None:
+                    stats["skipped"] += 1
+                else:
+                    yield row
+
+        started = time.perf_counter()
+        batches = batched(rows(), batch_size)
+        if engine.dialect.name == "postgresql" and engine.dialect.driver == "asyncpg":
+            stats["written"] = await load_postgres(engine, batches)
+            # Building the indexes after the load is much cheaper than
+            # maintaining them row by row during it
+            async with engine.begin() as conn:
+                for statement in FOOD_SEARCH_DDL:
+                    await conn.execute(text(statement))
+        else:
+            stats["written"] = await load_generic(engine, batches)
+        stats["seconds"] = time.perf_counter() - started
+        return stats
+    finally:
+        await engine.dispose()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("path")
+    parser.add_argument("--dsn", default=None, help="defaults to the app database")
+    parser.add_argument("--format", choices=("csv", "tsv", "jsonl", "json"), default=None)
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="generic")
+    parser.add_argument("--source", default=FoodSource.IMPORT.value)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--create-tables", action="store_true")
+    args = parser.parse_args()
+
+    stats = await import_foods(
+        args.path,
+        dsn=args.dsn,
+        fmt=args.format,
+        preset=args.preset,
+        source=args.source,
+        batch_size=args.batch_size,
+        create_tables=args.create_tables,
+    )
+    print(
+        f"read {stats['read']} records, skipped {stats['skipped']}, "
+        f"wrote {stats['written']} rows in {stats['seconds']:.1f}s "
+        f"({stats['read'] / max(stats['seconds'], 1e-9):,.0f} records/s)"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,98 @@
+"""
+Local stand-in for Redis pub/sub.
+
+Implements just enough of the Redis protocol (PUBLISH, SUBSCRIBE,
+UNSUBSCRIBE, PING) for services.realtime.BrokerPubSub, so several uvicorn
+workers can share WebSocket fan-out on a dev machine without installing
+Redis. Point the API at it with REALTIME_BACKEND=broker.
+
+    python scripts/realtime_broker.py --port 6379
+"""
+
+import argparse
+import asyncio
+from collections import defaultdict
+
+
+def _bulk(value: str) -> bytes:
+    data = value.encode()
+    return b"$%d\r\n%s\r\n" % (len(data), data)
+
+
+def _array(*values: str) -> bytes:
+    return b"*%d\r\n" % len(values) + b"".join(_bulk(v) for v in values)
+
+
+class Broker:
+    def __init__(self):
+        self.subscribers = defaultdict(set)  # channel -> writers
+
+    async def read_command(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.decode().split()  # inline command, e.g. from telnet
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int((await reader.readline())[1:-2])
+            args.append((await reader.readexactly(length + 2))[:-2].decode())
+        return args
+
+    async def handle(self, reader, writer):
+        channels = set()
+        try:
+            while (command := await self.read_command(reader)) is not None:
+                if not command:
+                    continue
+                name, args = command[0].upper(), command[1:]
+                if name == "PUBLISH" and len(args) == 2:
+                    channel, payload = args
+                    receivers = list(self.subscribers.get(channel, ()))
+                    message = _array("message", channel, payload)
+                    for subscriber in receivers:
+                        subscriber.write(message)
+                    writer.write(b":%d\r\n" % len(receivers))
+                elif name == "SUBSCRIBE":
+                    for channel in args:
+                        self.subscribers[channel].add(writer)
+                        channels.add(channel)
+                        writer.write(
+                            b"*3\r\n" + _bulk("subscribe") + _bulk(channel) + b":%d\r\n" % len(channels)
+                        )
+                elif name == "UNSUBSCRIBE":
+                    for channel in args or list(channels):
+                        self.subscribers[channel].discard(writer)
+                        channels.discard(channel)
+                        writer.write(
+                            b"*3\r\n" + _bulk("unsubscribe") + _bulk(channel) + b":%d\r\n" % len(channels)
+                        )
+                elif name == "PING":
+                    writer.write(b"+PONG\r\n")
+                else:
+                    writer.write(f"-ERR unknown command '{name}'\r\n".encode())
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for channel in channels:
+                self.subscribers[channel].discard(writer)
+                if not self.subscribers[channel]:
+                    del self.subscribers[channel]
+            writer.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    args = parser.parse_args()
+
+    server = await asyncio.start_server(Broker().handle, args.host, args.port)
+    print(f"realtime broker listening on {args.host}:{args.port}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,64 @@
+"""
+Reconcile the daily nutrition and energy ledger with the raw rows.
+
+The per-day totals on `days` are maintained incrementally as meals are
+logged, edited or deleted and sessions are finished. This recomputes them
+from logged meals and finished sessions, prints every day that drifted and
+writes the exact values back (nothing is written with --dry-run). Safe to run
+on a schedule; days that match are left untouched. Dashboards the app has
+cached keep the old totals until DASHBOARD_CACHE_TTL_SECONDS runs out.
+
+    python scripts/rebuild_ledger.py
+    python scripts/rebuild_ledger.py --user 42 --since 2024-01-01 --dry-run
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sqlalchemy.ext.asyncio import AsyncSession  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+import models.activity  # noqa: E402,F401
+import models.auth  # noqa: E402,F401
+from services.daily_ledger import reconcile  # noqa: E402
+from services.db_runtime import create_engine  # noqa: E402
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dsn", default=None, help="defaults to the app database")
+    parser.add_argument("--user", type=int, default=None, help="only this user id")
+    parser.add_argument("--since", type=date.fromisoformat, default=None)
+    parser.add_argument("--until", type=date.fromisoformat, default=None)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    engine = create_engine(args.dsn)
+    session_factory = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    started = time.perf_counter()
+    try:
+        async with session_factory() as db:
+            drifted = await reconcile(
+                db, user_id=args.user, start=args.since, end=args.until, dry_run=args.dry_run
+            )
+    finally:
+        await engine.dispose()
+
+    for row in sorted(drifted, key=lambda r: (r["user_id"], r["date"])):
+        changes = ", ".join(
+            f"{field} {stored} -> {expected}"
+            for field, (stored, expected) in row.items()
+            if field not in ("user_id", "date")
+        )
+        print(f"user {row['user_id']} {row['date']}: {changes}")
+    action = "would fix" if args.dry_run else "fixed"
+    print(f"{action} {len(drifted)} drifted days in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,98 @@
+"""
+Recompute calories burnt for finished workout sessions.
+
+Walks finished sessions in keyset batches, loads each batch's sets with one
+query and the owners' body weights with another, computes every session's
+calories in one vectorised pass (services.calories) and writes them back with
+a bulk UPDATE by primary key. The daily ledger's burned calories come from
+these values, so it is reconciled for the affected users afterwards.
+
+    python scripts/recompute_calories.py
+    python scripts/recompute_calories.py --user 42 --dry-run
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sqlalchemy import select, update  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+import models.auth  # noqa: E402,F401
+from models.workout import WorkoutSessions  # noqa: E402
+from services import daily_ledger  # noqa: E402
+from services.calories import calorie_engine  # noqa: E402
+from services.db_runtime import create_engine  # noqa: E402
+
+
+async def recompute(db: AsyncSession, user_id=None, batch_size: int = 2000, dry_run: bool = False) -> dict:
+    stats = {"sessions": 0, "changed": 0, "users": set()}
+    last_id = None
+    while True:
+        query = (
+            select(WorkoutSessions.id, WorkoutSessions.user_id, WorkoutSessions.calories_burnt)
+            .where(WorkoutSessions.status == "finished")
+            .order_by(WorkoutSessions.id)
+            .limit(batch_size)
+        )
+        if user_id is not None:
+            query = query.where(WorkoutSessions.user_id == user_id)
+        if last_id is not None:
+            query = query.where(WorkoutSessions.id > last_id)
+        sessions = (await db.execute(query)).all()
+        if not sessions:
+            break
+        last_id = sessions[-1].id
+
+        calories = await calorie_engine.sessions_calories(db, sessions)
+        changes = [
+            {"id": session.id, "calories_burnt": calories[session.id]}
+            for session in sessions
+            if session.calories_burnt is None
+            or abs(session.calories_burnt - calories[session.id]) > 0.05
+        ]
+        stats["sessions"] += len(sessions)
+        stats["changed"] += len(changes)
+        stats["users"].update(session.user_id for session in sessions)
+        if changes and not dry_run:
+            await db.execute(update(WorkoutSessions), changes)
+            await db.commit()
+    return stats
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dsn", default=None, help="defaults to the app database")
+    parser.add_argument("--user", type=int, default=None, help="only this user id")
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--skip-ledger", action="store_true", help="do not reconcile the daily ledger")
+    args = parser.parse_args()
+
+    engine = create_engine(args.dsn)
+    session_factory = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    started = time.perf_counter()
+    try:
+        async with session_factory() as db:
+            stats = await recompute(db, args.user, args.batch_size, args.dry_run)
+            seconds = time.perf_counter() - started
+            print(
+                f"{stats['sessions']} sessions in {seconds:.1f}s "
+                f"({stats['sessions'] / max(seconds, 1e-9):,.0f}/s), "
+                f"{stats['changed']} {'would change' if args.dry_run else 'updated'}"
+            )
+            if stats["changed"] and not (args.dry_run or args.skip_ledger):
+                drifted = 0
+                for user_id in sorted(stats["users"]):
+                    drifted += len(await daily_ledger.reconcile(db, user_id=user_id))
+                print(f"daily ledger: {drifted} days corrected")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
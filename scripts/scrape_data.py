@@ -1,68 +1,68 @@
-import os
+"""
+Scrape the exercise library into fitness.db and an exercises/ folder.
+
+Listing and exercise pages are loaded by a bounded pool of browser workers
+(one headless Chrome per worker thread, or plain HTTP with --browser http)
+and parsed with BeautifulSoup, so pages for different exercises load in
+parallel. Images go through one async HTTP client that reuses connections and
+retries with exponential backoff. Parsed exercises are written to SQLite in
+batches, one transaction per batch, and only then recorded in the checkpoint
+file, so a crashed or interrupted run picks up where it stopped: finished
+listings and exercises are skipped, existing images are not downloaded again.
+
+    python scripts/scrape_data.py --workers 4
+    python scripts/scrape_data.py --browser http --base-url http://localhost:8765
+    python scripts/scrape_data.py --fresh  # drop the table and the checkpoint
+"""
+
+import argparse
+import asyncio
 import json
-import time
-import requests
+import os
+import random
 import sqlite3
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-
-
-# Set up Chrome options
-chrome_options = Options()
-chrome_options.add_argument("--headless")  # Run in headless mode
-chrome_options.add_argument("--disable-gpu")  # Disable GPU acceleration
-chrome_options.add_argument("--no-sandbox")  # Bypass OS security model
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urljoin
 
-# Path to your ChromeDriver
-chrome_driver_path = "/usr/local/bin/chromedriver"  # Replace with the path to your chromedriver
+import httpx
+from bs4 import BeautifulSoup
 
-# Set up the WebDriver
-service = Service(chrome_driver_path)
-driver = webdriver.Chrome(service=service, options=chrome_options)
+BASE_URL = "https://www.muscleandstrength.com"
+CHROME_DRIVER_PATH = "/usr/local/bin/chromedriver"
 
 headers = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
     "Accept-Language": "en-US,en;q=0.5",
-    "Accept-Encoding": "gzip, deflate, br",
+    "Accept-Encoding": "gzip, deflate",
     "Connection": "keep-alive",
     "Referer": "https://www.muscleandstrength.com/",
 }
 
 # Database setup
 DATABASE_NAME = "fitness.db"
+CHECKPOINT_NAME = ".scrape_checkpoint.json"
 
-def download_image(url, path, retries=3):
-    for i in range(retries):
-        try:
-            response = requests.get(url, headers=headers, stream=True)
-            if response.status_code == 200:
-                with open(path, "wb") as image_file:
-                    for chunk in response.iter_content(1024):
-                      image_file.write(chunk)
-                return True
-            else:
-                print(f"Failed to download image (attempt {i + 1}): {url}")
-        except Exception as e:
-            print(f"Error downloading image (attempt {i + 1}): {e}")
-        time.sleep(2)  # Wait before retrying
-    return False
-
+ACTIVITY_COLUMNS = (
+    "id", "name", "target_muscle_group", "activity_type", "mechanics", "force_type",
+    "experience_level", "secondary_muscles", "equipment", "overview", "instructions",
+    "tips", "image_url", "video_url", "muscle_group_image_url", "calories_125lbs",
+    "calories_155lbs", "calories_185lbs", "data_links",
+)
 
-def create_activities_table():
-    """Create the `activities` table if it doesn't exist."""
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
+# Selectors the pages are parsed with, and the element each page waits for
+LISTING_READY = "div.taxonomy-body"
+EXERCISE_READY = "div.node-stats-block"
 
-    # Delete table if already exists
-    cursor.execute("DROP TABLE IF EXISTS activities")
 
-    # Create activities table
-    cursor.execute("""
+def create_activities_table(conn: sqlite3.Connection, fresh: bool = False) -> None:
+    """Create the `activities` table if it doesn't exist (dropping it first with `fresh`)."""
+    if fresh:
+        conn.execute("DROP TABLE IF EXISTS activities")
+    conn.execute("""
         CREATE TABLE IF NOT EXISTS activities (
             id TEXT PRIMARY KEY,
             name TEXT,
@@ -85,23 +85,313 @@ def create_activities_table():
             data_links TEXT DEFAULT NULL
         )
     """)
-
     conn.commit()
-    conn.close()
-
-def save_to_database(exercise_data):
-    """Save exercise data to the `activities` table and update `items` with activity IDs."""
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
-
-    # Insert or replace activity data
-    cursor.execute("""
-        INSERT OR REPLACE INTO activities (
-            id, name, target_muscle_group, activity_type, mechanics, force_type,
-            experience_level, secondary_muscles, equipment, overview, instructions,
-            tips, image_url, video_url, muscle_group_image_url, calories_125lbs, calories_155lbs, calories_185lbs, data_links
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
+
+
+def folder_name(name: str) -> str:
+    return name.lower().replace(" ", "-")
+
+
+# Parsing
+def _text(node) -> Optional[str]:
+    return node.get_text("\n", strip=True) if node else None
+
+
+def parse_listing(html: str, page_url: str) -> Tuple[List[dict], Optional[str]]:
+    """Exercises on one listing page and the URL of the next page, if any."""
+    soup = BeautifulSoup(html, "html.parser")
+    exercises = []
+    for cell in soup.select("div.taxonomy-body div.cell.small-12.bp600-6"):
+        link = cell.select_one("div.node-title a[href]")
+        thumbnail = cell.select_one("div.node-image img[src]")
+        if not link or not thumbnail:
+            print(f"Skipping exercise cell without a link or thumbnail on {page_url}")
+            continue
+        meta = [box.get_text(strip=True) for box in cell.select("div.exercise-meta div.meta-box")]
+        exercises.append({
+            "url": urljoin(page_url, link["href"]),
+            "name": link.get_text(strip=True),
+            "metadata": dict(zip(("type", "equipment", "mechanics", "experience_level"), meta)),
+            "image_url": urljoin(page_url, thumbnail["src"]),
+        })
+
+    next_link = soup.select_one("li.pager-next > a[href]")
+    if next_link is None or "disabled" in (next_link.get("class") or []):
+        return exercises, None
+    return exercises, urljoin(page_url, next_link["href"])
+
+
+def parse_exercise(html: str, exercise_url: str, exercise_image: str, exercise_name: str) -> dict:
+    """Detailed exercise data from an exercise page."""
+    soup = BeautifulSoup(html, "html.parser")
+    video = soup.select_one("div.video-wrap iframe")
+    muscle_group_img = soup.select_one("div.target-muscles img")
+    exercise_data = {
+        "media-links": {
+            "video": video.get("src") if video else None,
+            "exercise": exercise_image,
+            "muscle-group": urljoin(exercise_url, muscle_group_img["src"]) if muscle_group_img else None,
+        }
+    }
+
+    # Metadata from the exercise profile
+    for item in soup.select("div.node-stats-block ul li"):
+        label_node = item.select_one("span.row-label")
+        if label_node is None:
+            continue
+        label = label_node.get_text(strip=True)
+        value = item.get_text(" ", strip=True).replace(label, "", 1).strip()
+        if label == "Target Muscle Group":
+            link = item.select_one("a")
+            exercise_data["target_muscle_group"] = link.get_text(strip=True) if link else value
+        elif label == "Exercise Type":
+            exercise_data["activity_type"] = value
+        elif label == "Equipment Required":
+            exercise_data["equipment"] = value
+        elif label == "Mechanics":
+            exercise_data["mechanics"] = value
+        elif label == "Force Type":
+            exercise_data["force_type"] = value
+        elif label == "Experience Level":
+            exercise_data["experience_level"] = value
+        elif label == "Secondary Muscles":
+            exercise_data["secondary_muscles"] = _text(item.select_one("div.field-type-list-text"))
+
+    exercise_data["overview"] = _text(soup.select_one("div.field-name-field-exercise-overview"))
+    exercise_data["instructions"] = _text(soup.select_one("div.field-name-body"))
+    exercise_data["tips"] = _text(soup.select_one("div.field-name-field-exercise-tips"))
+    exercise_data["data-links"] = [exercise_url]
+    exercise_data["id"] = exercise_url.rstrip("/").split("/")[-1].replace(".html", "")
+    exercise_data["name"] = exercise_name
+    return exercise_data
+
+
+# Browsers
+def chrome_browser() -> Tuple[Callable, Callable]:
+    """A headless Chrome; returns (fetch(url, wait_for) -> html, close)."""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")  # Run in headless mode
+    chrome_options.add_argument("--disable-gpu")  # Disable GPU acceleration
+    chrome_options.add_argument("--no-sandbox")  # Bypass OS security model
+    driver = webdriver.Chrome(service=Service(CHROME_DRIVER_PATH), options=chrome_options)
+
+    def fetch(url: str, wait_for: Optional[str] = None) -> str:
+        driver.get(url)
+        if wait_for:
+            WebDriverWait(driver, 10).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, wait_for))
+            )
+        return driver.page_source
+
+    return fetch, driver.quit
+
+
+def http_browser() -> Tuple[Callable, Callable]:
+    """Plain HTTP for server-rendered pages; one keep-alive client per worker."""
+    client = httpx.Client(headers=headers, timeout=20, follow_redirects=True)
+
+    def fetch(url: str, wait_for: Optional[str] = None) -> str:
+        response = client.get(url)
+        response.raise_for_status()
+        return response.text
+
+    return fetch, client.close
+
+
+BROWSERS = {"chrome": chrome_browser, "http": http_browser}
+
+
+class BrowserPool:
+    """
+    `size` worker threads, each lazily starting its own browser. Blocking
+    page loads run on the pool so the event loop keeps the other workers,
+    the image downloads and the database writes moving. A browser that
+    fails is closed and replaced on its thread's next page.
+    """
+
+    def __init__(self, size: int, factory: Callable):
+        self.factory = factory
+        self.executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="browser")
+        self._local = threading.local()
+        self._closers: Dict[int, Callable] = {}
+        self._lock = threading.Lock()
+
+    def _fetch(self, url: str, wait_for: Optional[str]) -> str:
+        browser = getattr(self._local, "browser", None)
+        if browser is None:
+            browser = self._local.browser = self.factory()
+            with self._lock:
+                self._closers[threading.get_ident()] = browser[1]
+        try:
+            return browser[0](url, wait_for)
+        except Exception:
+            self._local.browser = None
+            with self._lock:
+                self._closers.pop(threading.get_ident(), None)
+            try:
+                browser[1]()
+            except Exception:
+                pass
+            raise
+
+    async def fetch(self, url: str, wait_for: Optional[str] = None) -> str:
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self._fetch, url, wait_for)
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+        for close in self._closers.values():
+            try:
+                close()
+            except Exception:
+                pass
+        self._closers.clear()
+
+
+class ImageDownloader:
+    """
+    Downloads images over one pooled async client, at most `concurrency` at
+    a time. Timeouts, connection errors, 429 and 5xx are retried with
+    exponential backoff and jitter (honouring Retry-After); other errors fail
+    at once. Files that already exist are skipped, and a download only
+    appears under its final name once complete.
+    """
+
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(self, concurrency: int = 16, retries: int = 4, backoff: float = 0.5):
+        self.retries = retries
+        self.backoff = backoff
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.client = httpx.AsyncClient(
+            headers=headers,
+            timeout=30,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        )
+        self.stats = {"downloaded": 0, "skipped": 0, "failed": 0, "retries": 0}
+
+    async def download(self, url: Optional[str], path: str) -> bool:
+        if not url:
+            return False
+        if os.path.exists(path):
+            self.stats["skipped"] += 1
+            return True
+        async with self.semaphore:
+            for attempt in range(self.retries + 1):
+                delay = None
+                try:
+                    async with self.client.stream("GET", url) as response:
+                        if response.status_code == 200:
+                            partial = path + ".part"
+                            with open(partial, "wb") as image_file:
+                                async for chunk in response.aiter_bytes(64 * 1024):
+                                    image_file.write(chunk)
+                            os.replace(partial, path)
+                            self.stats["downloaded"] += 1
+                            return True
+                        if response.status_code not in self.RETRY_STATUSES:
+                            print(f"Failed to download image ({response.status_code}): {url}")
+                            break
+                        retry_after = response.headers.get("Retry-After", "")
+                        delay = float(retry_after) if retry_after.isdigit() else None
+                except (httpx.TransportError, OSError) as e:
+                    print(f"Error downloading image (attempt {attempt + 1}): {e}")
+                if attempt < self.retries:
+                    self.stats["retries"] += 1
+                    await asyncio.sleep(delay or self.backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+            self.stats["failed"] += 1
+            return False
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class Checkpoint:
+    """
+    Progress on disk: listing results per category item and the exercises
+    already committed to the database. Rewritten atomically on every change.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.listings: Dict[str, List[dict]] = {}
+        self.done: set = set()
+        if os.path.exists(path):
+            with open(path) as file:
+                state = json.load(file)
+            self.listings = state.get("listings", {})
+            self.done = set(state.get("done", []))
+
+    def save(self) -> None:
+        partial = self.path + ".tmp"
+        with open(partial, "w") as file:
+            json.dump({"listings": self.listings, "done": sorted(self.done)}, file)
+        os.replace(partial, self.path)
+
+    def reset(self) -> None:
+        self.listings, self.done = {}, set()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class DatabaseWriter:
+    """
+    Buffers scraped exercises and writes them `batch_size` at a time with
+    executemany in a single transaction on one connection. The checkpoint
+    is updated after each commit, never before.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, checkpoint: Checkpoint, batch_size: int = 50):
+        self.conn = conn
+        self.checkpoint = checkpoint
+        self.batch_size = batch_size
+        self.pending: List[Tuple[str, dict]] = []
+        self.lock = asyncio.Lock()
+        self.written = 0
+        self.has_items = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'items'"
+        ).fetchone() is not None
+
+    async def add(self, url: str, exercise_data: dict) -> None:
+        self.pending.append((url, exercise_data))
+        if len(self.pending) >= self.batch_size:
+            await self.flush()
+
+    def _write(self, batch: List[Tuple[str, dict]]) -> None:
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO activities ({', '.join(ACTIVITY_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(ACTIVITY_COLUMNS))})",
+                [activity_row(data) for _, data in batch],
+            )
+            if self.has_items:
+                # `items.name` matches the exercise's target muscle group
+                self.conn.executemany(
+                    "UPDATE items SET activity_ids = ? WHERE name = ?",
+                    [(data["id"], data.get("target_muscle_group")) for _, data in batch],
+                )
+
+    async def flush(self) -> None:
+        async with self.lock:
+            batch, self.pending = self.pending, []
+            if not batch:
+                return
+            await asyncio.to_thread(self._write, batch)
+            self.written += len(batch)
+            self.checkpoint.done.update(url for url, _ in batch)
+            self.checkpoint.save()
+
+
+def activity_row(exercise_data: dict) -> tuple:
+    media = exercise_data.get("media-links", {})
+    return (
         exercise_data.get("id"),
         exercise_data.get("name"),
         exercise_data.get("target_muscle_group", ""),
@@ -114,258 +404,186 @@ def save_to_database(exercise_data):
         exercise_data.get("overview", ""),
         exercise_data.get("instructions", ""),
         exercise_data.get("tips", ""),
-        exercise_data.get("media-links", {}).get("exercise", ""),
-        exercise_data.get("media-links", {}).get("video", ""),
-        exercise_data.get("media-links", {}).get("muscle-group", ""),
+        media.get("exercise", ""),
+        media.get("video", ""),
+        media.get("muscle-group", ""),
         exercise_data.get("calories_125lbs", 0),
         exercise_data.get("calories_155lbs", 0),
         exercise_data.get("calories_185lbs", 0),
-        json.dumps(exercise_data.get("data-links"))
-    ))
-
-    # Update the `items` table with the activity ID
-    cursor.execute("""
-        UPDATE items
-        SET activity_ids = ?
-        WHERE name = ?
-    """, (
-        exercise_data["id"],
-        exercise_data.get("target_muscle_group")  # Assuming `items.name` matches `target_muscle_group`
-    ))
-
-    conn.commit()
-    conn.close()
-
-
-
-def scrape_exercise_links(driver, muscle_group_url, category_name):
-    """Scrape exercise links and metadata from a muscle group page."""
-    driver.get(muscle_group_url)
-    exercise_links = []
-
-    # Create the base folder for the category
-    base_folder = os.path.join("exercises", category_name.lower().replace(" ", "-"))
-    os.makedirs(base_folder, exist_ok=True)
-
-    while True:
-        # Wait for the exercise cells to load
-        wait = WebDriverWait(driver, 10)
-        exercise_cells = wait.until(
-            EC.presence_of_all_elements_located((By.CSS_SELECTOR, "div.taxonomy-body div.cell.small-12.bp600-6"))
-        )
+        json.dumps(exercise_data.get("data-links")),
+    )
+
+
+async def crawl_listing(pool: BrowserPool, checkpoint: Checkpoint, item: dict, stats: dict) -> List[dict]:
+    """Every exercise of one category item, following the pager."""
+    if item["url"] in checkpoint.listings:
+        return checkpoint.listings[item["url"]]
+    exercises, url = [], item["url"]
+    while url:
+        html = await pool.fetch(url, LISTING_READY)
+        stats["listing_pages"] += 1
+        page, url = parse_listing(html, url)
+        exercises.extend(page)
+    print(f"Found {len(exercises)} Exercises for {item['name']}")
+    checkpoint.listings[item["url"]] = exercises
+    checkpoint.save()
+    return exercises
+
+
+async def scrape_exercise(pool, images, writer, output_dir, item_name, exercise, stats) -> None:
+    html = await pool.fetch(exercise["url"], EXERCISE_READY)
+    stats["pages"] += 1
+    exercise_data = parse_exercise(html, exercise["url"], exercise["image_url"], exercise["name"])
+
+    exercise_folder = os.path.join(output_dir, folder_name(item_name), exercise_data["id"])
+    os.makedirs(exercise_folder, exist_ok=True)
+    thumbnail_path = os.path.join(exercise_folder, "thumbnail.jpg")
+    muscle_group_url = exercise_data["media-links"]["muscle-group"]
+    muscle_group_path = os.path.join(exercise_folder, "muscle-group.jpg")
+    await asyncio.gather(
+        images.download(exercise["image_url"], thumbnail_path),
+        images.download(muscle_group_url, muscle_group_path),
+    )
+
+    # Save exercise metadata and image paths to a JSON file
+    metadata = {
+        "name": exercise_data.get("name"),
+        "target_muscle_group": exercise_data.get("target_muscle_group"),
+        "activity_type": exercise_data.get("activity_type"),
+        "mechanics": exercise_data.get("mechanics"),
+        "force_type": exercise_data.get("force_type"),
+        "experience_level": exercise_data.get("experience_level"),
+        "secondary_muscles": exercise_data.get("secondary_muscles"),
+        "equipment": exercise_data.get("equipment"),
+        "image_paths": {
+            "thumbnail": thumbnail_path,
+            "muscle_group": muscle_group_path if muscle_group_url else None,
+        },
+    }
+    with open(os.path.join(exercise_folder, f"{exercise_data['id']}.json"), "w") as json_file:
+        json.dump(metadata, json_file, indent=4)
+    await writer.add(exercise["url"], exercise_data)
+
+
+async def scrape(
+    categories: List[dict],
+    database: str = DATABASE_NAME,
+    output_dir: str = "exercises",
+    checkpoint_path: str = CHECKPOINT_NAME,
+    browser: str = "chrome",
+    workers: int = 4,
+    image_concurrency: int = 16,
+    batch_size: int = 50,
+    base_url: Optional[str] = None,
+    fresh: bool = False,
+) -> dict:
+    """
+    Runs the pipeline: listings are crawled on the browser pool, exercises
+    flow through a bounded queue to `workers` consumers, and everything
+    already in the checkpoint is skipped. Returns run statistics.
+    """
+    started = time.perf_counter()
+    checkpoint = Checkpoint(checkpoint_path)
+    conn = sqlite3.connect(database, check_same_thread=False)
+    if fresh:
+        checkpoint.reset()
+    create_activities_table(conn, fresh)
+
+    items = [
+        {**item, "url": urljoin(base_url or BASE_URL, item["url"])}
+        for category in categories
+        for item in category["items"]
+    ]
+    stats = {"listing_pages": 0, "pages": 0, "skipped": 0, "failed": 0}
+    pool = BrowserPool(workers, BROWSERS[browser])
+    images = ImageDownloader(image_concurrency)
+    writer = DatabaseWriter(conn, checkpoint, batch_size)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=workers * 4)
+
+    async def produce(item):
+        print(f"Scraping exercises from: {item['name']} - {item['url']}")
+        try:
+            exercises = await crawl_listing(pool, checkpoint, item, stats)
+        except Exception as e:
+            print(f"Error scraping listing {item['url']}: {e}")
+            stats["failed"] += 1
+            return
+        for exercise in exercises:
+            if exercise["url"] in checkpoint.done:
+                stats["skipped"] += 1
+            else:
+                await queue.put((item["name"], exercise))
 
-        # Extract exercise links and metadata
-        for cell in exercise_cells:
+    async def consume():
+        while (job := await queue.get()) is not None:
+            item_name, exercise = job
             try:
-                # Extract the exercise URL
-                link_tag = cell.find_element(By.CSS_SELECTOR, "div.node-title a[href]")
-                exercise_url = link_tag.get_attribute("href")
-                if not exercise_url.startswith("https://www.muscleandstrength.com"):
-                  exercise_url = "https://www.muscleandstrength.com" + exercise_url
-
-                # Extract metadata (type, equipment, mechanics, experience level)
-                meta_boxes = cell.find_elements(By.CSS_SELECTOR, "div.exercise-meta div.meta-box")
-                metadata = {
-                    "type": meta_boxes[0].text.strip() if len(meta_boxes) > 0 else None,
-                    "equipment": meta_boxes[1].text.strip() if len(meta_boxes) > 1 else None,
-                    "mechanics": meta_boxes[2].text.strip() if len(meta_boxes) > 2 else None,
-                    "experience_level": meta_boxes[3].text.strip() if len(meta_boxes) > 3 else None,
-                }
-
-                # Extract the thumbnail image URL
-                thumbnail_tag = cell.find_element(By.CSS_SELECTOR, "div.node-image img[src]")
-                thumbnail_url = thumbnail_tag.get_attribute("src")
-
-                # Download the thumbnail image
-                exercise_name = link_tag.text.strip().lower().replace(" ", "-")
-                image_filename = f"{exercise_name}.jpg"
-                image_path = os.path.join(base_folder, image_filename)
-
-                download_image(thumbnail_url, image_path)
-
-                # Add the exercise URL, metadata, and image path to the list
-                exercise_links.append({
-                    "url": exercise_url,
-                    "name": link_tag.text.strip(),
-                    "metadata": metadata,
-                    "image_path": image_path,
-                    "image_url": thumbnail_url
-                })
+                await scrape_exercise(pool, images, writer, output_dir, item_name, exercise, stats)
             except Exception as e:
-                print(f"Error extracting exercise data: {e}")
-                continue
-
-        # Check for a "Next" button and click it if it exists
-        try:
-            next_button = driver.find_element(By.CSS_SELECTOR, "li.pager-next > a[href]")
-            if "disabled" in next_button.get_attribute("class"):
-                break  # Exit if there's no next page
-            next_button.click()
-            time.sleep(2)  # Wait for the next page to load
-        except:
-            print("No more pages to load.")
-            print(f"Found {len(exercise_links)} Exercises for {category_name} ")
-            break  # Exit if no "Next" button is found
-
-    return exercise_links
-
-def scrape_exercise_data(driver, exercise_url, exercise_image, exercise_name):
-    """Scrape detailed exercise data from an exercise page."""
-    driver.get(exercise_url)
-    exercise_data = {}
+                print(f"Error scraping {exercise['url']}: {e}")
+                stats["failed"] += 1
 
+    consumers = [asyncio.create_task(consume()) for _ in range(workers)]
     try:
-        # Wait for the page to load
-        wait = WebDriverWait(driver, 10)
-
-        # Extract the YouTube video link
-        try:
-            video_iframe = driver.find_element(By.CSS_SELECTOR, "div.video-wrap iframe")
-            video_url = video_iframe.get_attribute("src")
-        except:
-            video_url = None
-        exercise_data["media-links"] = {
-            "video": video_url
-        }
-        exercise_data["media-links"]["exercise"] = exercise_image
-
-        # Extract metadata from the exercise profile
-        metadata = {}
-        profile_items = driver.find_elements(By.CSS_SELECTOR, "div.node-stats-block ul li")
-        for item in profile_items:
-            label = item.find_element(By.CSS_SELECTOR, "span.row-label").text.strip()
-            if label == "Target Muscle Group":
-                metadata["target_muscle_group"] = item.find_element(By.CSS_SELECTOR, "a").text.strip()
-            elif label == "Exercise Type":
-                metadata["activity_type"] = item.text.replace(label, "").strip()
-            elif label == "Equipment Required":
-                metadata["equipment"] = item.text.replace(label, "").strip()
-            elif label == "Mechanics":
-                metadata["mechanics"] = item.text.replace(label, "").strip()
-            elif label == "Force Type":
-                metadata["force_type"] = item.text.replace(label, "").strip()
-            elif label == "Experience Level":
-                metadata["experience_level"] = item.text.replace(label, "").strip()
-            elif label == "Secondary Muscles":
-                metadata["secondary_muscles"] = item.find_element(By.CSS_SELECTOR, "div.field-type-list-text").text.strip()
-
-        exercise_data.update(metadata)
-
-        # Extract the muscle group image
-        try:
-            muscle_group_img = driver.find_element(By.CSS_SELECTOR, "div.target-muscles img")
-            muscle_group_img_url = muscle_group_img.get_attribute("src")
-            exercise_data["media-links"]["muscle-group"] = muscle_group_img_url
-        except:
-            exercise_data["media-links"]["muscle-group"] = None
-
-        # Extract the exercise overview
-        try:
-            overview = driver.find_element(By.CSS_SELECTOR, "div.field-name-field-exercise-overview")
-            exercise_data["overview"] = overview.text.strip()
-        except:
-            exercise_data["overview"] = None
-
-        # Extract the exercise instructions
-        try:
-            instructions = driver.find_element(By.CSS_SELECTOR, "div.field-name-body")
-            exercise_data["instructions"] = instructions.text.strip()
-        except:
-            exercise_data["instructions"] = None
-
-        # Extract the exercise tips
-        try:
-            tips = driver.find_element(By.CSS_SELECTOR, "div.field-name-field-exercise-tips")
-            exercise_data["tips"] = tips.text.strip()
-        except:
-            exercise_data["tips"] = None
+        await asyncio.gather(*(produce(item) for item in items))
+        for _ in consumers:
+            await queue.put(None)
+        await asyncio.gather(*consumers)
+        await writer.flush()
+    finally:
+        for task in consumers:
+            task.cancel()
+        await images.close()
+        await asyncio.to_thread(pool.close)
+        conn.close()
+
+    seconds = time.perf_counter() - started
+    return {
+        **stats,
+        "written": writer.written,
+        "images": images.stats,
+        "seconds": seconds,
+        "pages_per_minute": (stats["pages"] + stats["listing_pages"]) / seconds * 60,
+    }
 
-        # Add the exercise URL
-        exercise_data["data-links"] = [exercise_url]
-
-        # Add a placeholder ID (you can generate a unique ID if needed)
-        exercise_data["id"] = exercise_url.split("/")[-1].replace(".html", "")
-        exercise_data["name"] = exercise_name
-
-    except Exception as e:
-        print(f"Error scraping {exercise_url}: {e}")
-        return None
-    
-    print("Scraped exercise data: ", exercise_data["name"])
-
-    return exercise_data
 
 def main():
-    # Create the database and tables
-    create_activities_table()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--categories", default="categories.json")
+    parser.add_argument("--database", default=DATABASE_NAME)
+    parser.add_argument("--output", default="exercises")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_NAME)
+    parser.add_argument("--browser", choices=sorted(BROWSERS), default="chrome")
+    parser.add_argument("--workers", type=int, default=4, help="browser instances")
+    parser.add_argument("--image-concurrency", type=int, default=16)
+    parser.add_argument("--batch-size", type=int, default=50, help="exercises per DB transaction")
+    parser.add_argument("--base-url", default=BASE_URL, help="resolve relative category URLs against this")
+    parser.add_argument("--fresh", action="store_true", help="drop the table and checkpoint first")
+    args = parser.parse_args()
 
     # Load categories from the JSON file
-    with open('categories.json', 'r') as file:
-        data = json.load(file)
-    
-    categories = data['categories']
-
-    # Iterate through each category and its items
-    for category in categories:
-        for item in category['items']:
-            print(f"Scraping exercises from: {item['name']} - {item['url']}")
-
-            # Scrape exercise links and thumbnails
-            exercise_links = scrape_exercise_links(driver, item['url'], item['name'])
-
-            # Scrape detailed data for each exercise
-            for exercise in exercise_links:
-                print(f"Scraping exercise: {exercise['url']}")
-                exercise_data = scrape_exercise_data(driver, exercise["url"], exercise["image_url"], exercise['name'])
-
-                if exercise_data:
-                    # Save exercise data to the database
-                    save_to_database(exercise_data)
-
-                    # Create a folder for the exercise
-                    exercise_folder = os.path.join("exercises", item['name'].lower().replace(" ", "-"), exercise_data["id"])
-                    os.makedirs(exercise_folder, exist_ok=True)
-
-                    # Save the thumbnail image
-                    try:
-                      thumbnail_path = os.path.join(exercise_folder, "thumbnail.jpg")
-                      if not download_image(exercise["image_url"], thumbnail_path):
-                          print(f"Failed to download thumbnail: {exercise['image_url']}")
-
-                      # Save the muscle group image (if available)
-                      if exercise_data["media-links"]["muscle-group"]:
-                          muscle_group_image_url = exercise_data["media-links"]["muscle-group"]
-                          muscle_group_image_path = os.path.join(exercise_folder, "muscle-group.jpg")
-                          if not download_image(muscle_group_image_url, muscle_group_image_path):
-                              print(f"Failed to download muscle group image: {muscle_group_image_url}")
-
-                      # Save exercise metadata and image paths to a JSON file
-                      metadata = {
-                          "name": exercise_data.get("name"),
-                          "target_muscle_group": exercise_data.get("target_muscle_group"),
-                          "activity_type": exercise_data.get("activity_type"),
-                          "mechanics": exercise_data.get("mechanics"),
-                          "force_type": exercise_data.get("force_type"),
-                          "experience_level": exercise_data.get("experience_level"),
-                          "secondary_muscles": exercise_data.get("secondary_muscles"),
-                          "equipment": exercise_data.get("equipment"),
-                          "image_paths": {
-                              "thumbnail": thumbnail_path,
-                              "muscle_group": muscle_group_image_path if exercise_data.get("media-links").get("muscle-group") else None
-                          }
-                      }
-
-                      json_filename = f"{exercise_data['id']}.json"
-                      json_path = os.path.join(exercise_folder, json_filename)
-                      with open(json_path, "w") as json_file:
-                          json.dump(metadata, json_file, indent=4)
-
-                      print(f"Saved exercise data: {json_path}")
-                    except Exception as e:
-                      print(f"Error saving exercise data: {e}")
-
-    # Close the browser
-    driver.quit()
+    with open(args.categories, "r") as file:
+        categories = json.load(file)["categories"]
+
+    stats = asyncio.run(
+        scrape(
+            categories,
+            database=args.database,
+            output_dir=args.output,
+            checkpoint_path=args.checkpoint,
+            browser=args.browser,
+            workers=args.workers,
+            image_concurrency=args.image_concurrency,
+            batch_size=args.batch_size,
+            base_url=args.base_url,
+            fresh=args.fresh,
+        )
+    )
+    print(
+        f"saved {stats['written']} exercises ({stats['skipped']} already done, {stats['failed']} failed) "
+        f"in {stats['seconds']:.1f}s, {stats['pages_per_minute']:.0f} pages/min; images {stats['images']}"
+    )
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,245 @@
+import asyncio
+import hashlib
+import logging
+import time
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from models.activity import Activity, CatalogVersion
+from services.activity_facets import FacetIndex, FilterClause
+from services.activity_search import search_index
+from services.pagination import Page, build_offset_page, build_page, decode_cursor
+
+logger = logging.getLogger(__name__)
+
+CATALOG_FIELDS = [column.name for column in Activity.__table__.columns]
+
+
+class CatalogEntry(NamedTuple):
+    id: str
+    name: str
+    force: str
+    level: str
+    mechanic: str
+    equipment: str
+    primary_muscles: Tuple[str, ...]
+    secondary_muscles: Tuple[str, ...]
+    instructions: Tuple[str, ...]
+    category: str
+    images: Tuple[str, ...]
+
+
+def _freeze(value):
+    return tuple(value) if isinstance(value, list) else value
+
+
+class CatalogSnapshot:
+    """An immutable copy of the catalog at one version."""
+
+    def __init__(self, version: int, entries: List[CatalogEntry]):
+        self.version = version
+        self.entries = tuple(sorted(entries, key=lambda e: e.id))
+        self.by_id: Dict[str, CatalogEntry] = {e.id: e for e in self.entries}
+        self.facets = FacetIndex(self.entries)
+        self.loaded_at = time.time()
+        # (field -> (entries sorted by (field, id), their sort keys)), built on demand
+        self._orders: Dict[str, Tuple[tuple, list]] = {}
+
+    def ordered(self, field: str):
+        if field not in self._orders:
+            ordered = tuple(
+                sorted(self.entries, key=lambda e: (getattr(e, field), e.id))
+            )
+            keys = [(getattr(e, field), e.id) for e in ordered]
+            self._orders[field] = (ordered, keys)
+        return self._orders[field]
+
+
+class ActivityCatalog:
+    """
+    Read-through cache of the exercise catalog.
+
+    The activities table only changes when import_catalog.py re-imports it,
+    and an import that changes anything bumps the `catalog_version` row. The cache checks that row at most
+    once per `check_interval` seconds and reloads the whole catalog when it
+    moves, so every other request is answered from memory.
+    """
+
+    def __init__(self, check_interval: float = 30):
+        self.check_interval = check_interval
+        self.snapshot: Optional[CatalogSnapshot] = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self.snapshot is not None
+
+    @property
+    def version(self) -> Optional[int]:
+        return self.snapshot.version if self.snapshot else None
+
+    async def ensure_fresh(self, db: AsyncSession) -> CatalogSnapshot:
+        if self.snapshot and time.monotonic() - self._checked_at < self.check_interval:
+            return self.snapshot
+
+        async with self._lock:
+            # Another request may have refreshed while we waited
+            if self.snapshot and time.monotonic() - self._checked_at < self.check_interval:
+                return self.snapshot
+
+            version = await self._read_version(db)
+            if self.snapshot is None or self.snapshot.version != version:
+                await self.load(db, version)
+            self._checked_at = time.monotonic()
+            return self.snapshot
+
+    async def _read_version(self, db: AsyncSession) -> int:
+        """
+        The catalog_version row, or 0 while there is none. Databases that
+        predate the table (it is created by import_catalog.py --create-tables)
+        count as 0 too, so the catalog keeps loading from the activities
+        table; the savepoint keeps the failed read from aborting the caller's
+        transaction.
+        """
+        try:
+            async with db.begin_nested():
+                version = await db.scalar(
+                    select(CatalogVersion.version).where(CatalogVersion.id == 1)
+                )
+        except DBAPIError as exc:
+            if self.snapshot is None:
+                logger.warning("Can't read catalog_version, treating the catalog as version 0: %s", exc.orig)
+                return 0
+            # Keep what is loaded rather than reloading on a passing error
+            return self.snapshot.version
+        return version or 0
+
+    async def load(self, db: AsyncSession, version: int) -> CatalogSnapshot:
+        result = await db.execute(Activity.__table__.select())
+        entries = [
+            CatalogEntry(*(_freeze(getattr(row, field)) for field in CATALOG_FIELDS))
+            for row in result.all()
+        ]
+        snapshot = CatalogSnapshot(version, entries)
+        search_index.build(snapshot.entries)
+        self.snapshot = snapshot
+        return snapshot
+
+    def invalidate(self) -> None:
+        self._checked_at = 0.0
+
+    def etag(self, *parts) -> str:
+        digest = hashlib.sha1(
+            "|".join(str(part) for part in (self.version, *parts)).encode()
+        ).hexdigest()[:16]
+        return f'W/"{self.version}-{digest}"'
+
+    def get(self, activity_id: str) -> Optional[CatalogEntry]:
+        return self.snapshot.by_id.get(activity_id)
+
+    def list(
+        self,
+        page: int = 1,
+        limit: int = 10,
+        keyword: Optional[str] = None,
+        sort: Optional[str] = None,
+        filters: Optional[List[FilterClause]] = None,
+        cursor: Optional[str] = None,
+    ) -> Page:
+        """In-memory equivalent of controllers.activity.get_activities; cursors are interchangeable."""
+        snapshot = self.snapshot
+        offset = (page - 1) * limit
+
+        ranked_ids = None
+        if keyword:
+            ranked_ids = [activity_id for activity_id, _ in search_index.search(keyword)]
+            if not ranked_ids:
+                return Page([])
+
+        allowed = snapshot.facets.match(filters or [])
+        if ranked_ids is not None:
+            allowed &= snapshot.facets.bits_for_ids(ranked_ids)
+
+        def matches(entry):
+            return snapshot.facets.contains(allowed, entry.id)
+
+        if keyword and not sort:
+            key = "activities:relevance"
+            if cursor:
+                offset = decode_cursor(cursor, key)["o"]
+            rows = [snapshot.by_id[i] for i in ranked_ids if i in snapshot.by_id]
+            rows = [e for e in rows if matches(e)][offset : offset + limit + 1]
+            return build_offset_page(rows, limit, key, offset)
+
+        sort_field = sort.lstrip("-") if sort else "id"
+        if sort_field not in CATALOG_FIELDS:
+            sort_field = "id"
+        descending = bool(sort) and sort.startswith("-")
+        key = f"activities:{'-' if descending else ''}{sort_field}"
+
+        ordered, keys = snapshot.ordered(sort_field)
+        values = decode_cursor(cursor, key, 1 if sort_field == "id" else 2)["v"] if cursor else None
+        if values is not None:
+            if sort_field == "id":
+                position = (values[0], values[0])
+            else:
+                position = (_freeze(values[0]), values[1])
+            if descending:
+                candidates = reversed(ordered[: bisect_left(keys, position)])
+            else:
+                candidates = iter(ordered[bisect_right(keys, position) :])
+            skip = 0
+        else:
+            candidates = reversed(ordered) if descending else iter(ordered)
+            skip = offset
+
+        rows = []
+        for entry in candidates:
+            if not matches(entry):
+                continue
+            if skip:
+                skip -= 1
+                continue
+            rows.append(entry)
+            if len(rows) > limit:
+                break
+
+        return build_page(
+            rows,
+            limit,
+            key,
+            lambda e: [_thaw(getattr(e, sort_field)), e.id]
+            if sort_field != "id"
+            else [e.id],
+        )
+
+    def facet_counts(
+        self, keyword: Optional[str] = None, filters: Optional[List[FilterClause]] = None
+    ):
+        facets = self.snapshot.facets
+        within = None
+        if keyword:
+            within = facets.bits_for_ids(
+                activity_id for activity_id, _ in search_index.search(keyword)
+            )
+        return facets.counts(filters or [], within=within)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+def _thaw(value):
+    return list(value) if isinstance(value, tuple) else value
+
+
+catalog = ActivityCatalog(check_interval=settings.CATALOG_VERSION_CHECK_SECONDS)
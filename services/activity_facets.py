@@ -0,0 +1,127 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+FACET_FIELDS = [
+    "category",
+    "equipment",
+    "level",
+    "force",
+    "mechanic",
+    "primary_muscles",
+    "secondary_muscles",
+]
+MULTI_VALUE_FIELDS = {"primary_muscles", "secondary_muscles"}
+
+# A filter clause is (field, values): values are OR'ed, clauses are AND'ed
+FilterClause = Tuple[str, List[str]]
+
+
+def parse_filters(params: Optional[Sequence[str]]) -> List[FilterClause]:
+    """
+    Parse repeated `field:value[,value...]` query parameters. Values inside one
+    parameter are alternatives; repeating a field requires both to match, e.g.
+    `primary_muscles:glutes,hamstrings&filter=equipment:dumbbell`.
+    """
+    clauses = []
+    for param in params or []:
+        field, sep, raw_values = param.partition(":")
+        values = [v.strip() for v in raw_values.split(",") if v.strip()]
+        if not sep or not values:
+            raise ValueError("Invalid filter format. Use 'column_name:value[,value...]'.")
+        if field not in FACET_FIELDS:
+            raise ValueError(
+                f"Cannot filter on '{field}'. Filterable columns: {', '.join(FACET_FIELDS)}"
+            )
+        clauses.append((field, values))
+    return clauses
+
+
+def _values(entry, field) -> Iterable[str]:
+    value = getattr(entry, field)
+    if field in MULTI_VALUE_FIELDS:
+        return value or ()
+    return () if value is None else (value,)
+
+
+class FacetIndex:
+    """
+    Inverted bitset index over the catalog facets.
+
+    Each (field, value) pair maps to a Python int whose bit i is set when the
+    i-th catalog entry has that value, so AND/OR filters are big-int `&`/`|`
+    and a facet count is a popcount.
+    """
+
+    def __init__(self, entries: Sequence):
+        self.ids = [entry.id for entry in entries]
+        self.positions = {activity_id: i for i, activity_id in enumerate(self.ids)}
+        self.all_bits = (1 << len(self.ids)) - 1
+        self.bitsets: Dict[str, Dict[str, int]] = {f: defaultdict(int) for f in FACET_FIELDS}
+        self.labels: Dict[str, Dict[str, str]] = {f: {} for f in FACET_FIELDS}
+
+        for i, entry in enumerate(entries):
+            bit = 1 << i
+            for field in FACET_FIELDS:
+                for value in _values(entry, field):
+                    key = str(value).lower()
+                    self.bitsets[field][key] |= bit
+                    self.labels[field].setdefault(key, value)
+
+        self.bitsets = {f: dict(values) for f, values in self.bitsets.items()}
+
+    def match(self, clauses: List[FilterClause], skip_field: Optional[str] = None) -> int:
+        bits = self.all_bits
+        for field, values in clauses:
+            if field == skip_field:
+                continue
+            field_bits = self.bitsets[field]
+            alternatives = 0
+            for value in values:
+                alternatives |= field_bits.get(value.lower(), 0)
+            bits &= alternatives
+            if not bits:
+                break
+        return bits
+
+    def bits_for_ids(self, activity_ids: Iterable[str]) -> int:
+        bits = 0
+        for activity_id in activity_ids:
+            position = self.positions.get(activity_id)
+            if position is not None:
+                bits |= 1 << position
+        return bits
+
+    def contains(self, bits: int, activity_id: str) -> bool:
+        return bool(bits >> self.positions[activity_id] & 1)
+
+    def counts(
+        self,
+        clauses: List[FilterClause],
+        within: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Tuple[int, Dict[str, Dict[str, int]]]:
+        """
+        Total matches and per-value counts for each facet. A field's own clause
+        is left out when counting that field, so a multi-select UI still shows
+        the alternatives it can OR in ("Glutes: 42, Hamstrings: 31").
+        """
+        base = self.all_bits if within is None else within
+        total = (self.match(clauses) & base).bit_count()
+        filtered_fields = {field for field, _ in clauses}
+
+        facets = {}
+        for field in fields or FACET_FIELDS:
+            bits = base & (
+                self.match(clauses, skip_field=field)
+                if field in filtered_fields
+                else self.match(clauses)
+            )
+            field_counts = {}
+            for key, value_bits in self.bitsets[field].items():
+                count = (bits & value_bits).bit_count()
+                if count:
+                    field_counts[self.labels[field][key]] = count
+            facets[field] = dict(
+                sorted(field_counts.items(), key=lambda item: (-item[1], item[0]))
+            )
+        return total, facets
@@ -0,0 +1,280 @@
+import math
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, literal_column, or_, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.activity import Activity
+
+# Relative importance of each searchable field. A hit in the name outranks a
+# hit in the muscles, which outranks a hit somewhere in the instructions.
+FIELD_WEIGHTS = {
+    "name": 4.0,
+    "primary_muscles": 2.5,
+    "category": 1.5,
+    "equipment": 1.5,
+    "secondary_muscles": 1.0,
+    "instructions": 0.3,
+}
+
+STOPWORDS = {"a", "an", "and", "the", "of", "on", "in", "to", "with", "your", "you"}
+
+# Minimum trigram similarity for a query term to match a misspelled vocabulary
+# term ("dumbell" -> "dumbbell", "sqat" -> "squat").
+FUZZY_THRESHOLD = 0.35
+PREFIX_MIN_LENGTH = 2
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(value) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        value = " ".join(str(v) for v in value)
+    tokens = []
+    for token in _TOKEN_RE.findall(str(value).lower()):
+        if token in STOPWORDS:
+            continue
+        # Cheap plural folding so "curls" and "curl" share a posting list
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def trigrams(term: str) -> set:
+    padded = f"  {term} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class ActivitySearchIndex:
+    """
+    In-process inverted index over the exercise catalog.
+
+    Used directly when the database has no trigram/full-text support (SQLite,
+    tests) and as the ranking engine for the in-memory catalog. Documents can
+    be added or removed one at a time, so the index is refreshed incrementally
+    instead of being rebuilt whenever a row changes.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self._doc_terms: Dict[str, set] = {}
+        self._names: Dict[str, str] = {}
+        self._trigram_terms: Dict[str, set] = defaultdict(set)
+        self._vocabulary: List[str] = []
+        self._vocabulary_dirty = False
+
+    def __len__(self):
+        return len(self._doc_terms)
+
+    def __contains__(self, activity_id: str):
+        return activity_id in self._doc_terms
+
+    def build(self, activities: Iterable) -> "ActivitySearchIndex":
+        self.clear()
+        for activity in activities:
+            self.upsert(activity)
+        return self
+
+    def clear(self) -> None:
+        self._postings.clear()
+        self._doc_terms.clear()
+        self._names.clear()
+        self._trigram_terms.clear()
+        self._vocabulary = []
+        self._vocabulary_dirty = False
+
+    def upsert(self, activity) -> None:
+        activity_id = activity.id
+        if activity_id in self._doc_terms:
+            self.remove(activity_id)
+
+        weights: Dict[str, float] = defaultdict(float)
+        for field, field_weight in FIELD_WEIGHTS.items():
+            counts: Dict[str, int] = defaultdict(int)
+            for token in tokenize(getattr(activity, field, None)):
+                counts[token] += 1
+            for token, count in counts.items():
+                weights[token] += field_weight * (1 + math.log(count))
+
+        for token, weight in weights.items():
+            if token not in self._postings:
+                for gram in trigrams(token):
+                    self._trigram_terms[gram].add(token)
+                self._vocabulary_dirty = True
+            self._postings[token][activity_id] = weight
+
+        self._doc_terms[activity_id] = set(weights)
+        self._names[activity_id] = (activity.name or "").lower()
+
+    def remove(self, activity_id: str) -> None:
+        for token in self._doc_terms.pop(activity_id, ()):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(activity_id, None)
+            if not postings:
+                del self._postings[token]
+                for gram in trigrams(token):
+                    self._trigram_terms[gram].discard(token)
+                self._vocabulary_dirty = True
+        self._names.pop(activity_id, None)
+
+    def _expand(self, token: str, is_last: bool) -> List[Tuple[str, float]]:
+        """Vocabulary terms matching a query token, with a match quality in (0, 1]."""
+        candidates: Dict[str, float] = {}
+        if token in self._postings:
+            candidates[token] = 1.0
+
+        # The last token is still being typed, so treat it as a prefix
+        if is_last and len(token) >= PREFIX_MIN_LENGTH:
+            if self._vocabulary_dirty:
+                self._vocabulary = sorted(self._postings)
+                self._vocabulary_dirty = False
+            position = bisect_left(self._vocabulary, token)
+            while position < len(self._vocabulary):
+                term = self._vocabulary[position]
+                if not term.startswith(token):
+                    break
+                candidates.setdefault(term, 0.9 * len(token) / len(term))
+                position += 1
+
+        # Typo tolerance: terms sharing enough trigrams with the query token
+        if not candidates or len(token) > 3:
+            query_grams = trigrams(token)
+            overlap: Dict[str, int] = defaultdict(int)
+            for gram in query_grams:
+                for term in self._trigram_terms.get(gram, ()):
+                    overlap[term] += 1
+            for term, shared in overlap.items():
+                similarity = shared / (len(query_grams) + len(trigrams(term)) - shared)
+                if similarity >= FUZZY_THRESHOLD:
+                    candidates[term] = max(candidates.get(term, 0.0), 0.8 * similarity)
+
+        return list(candidates.items())
+
+    def search(
+        self, query: str, limit: Optional[int] = None
+    ) -> List[Tuple[str, float]]:
+        """Return (activity_id, score) pairs ordered by descending relevance."""
+        tokens = tokenize(query)
+        if not tokens or not self._doc_terms:
+            return []
+
+        total_docs = len(self._doc_terms)
+        scores: Dict[str, float] = defaultdict(float)
+        matched: Dict[str, int] = defaultdict(int)
+
+        for position, token in enumerate(tokens):
+            best: Dict[str, float] = {}
+            for term, quality in self._expand(token, position == len(tokens) - 1):
+                postings = self._postings[term]
+                idf = math.log(1 + total_docs / len(postings))
+                for activity_id, weight in postings.items():
+                    score = quality * idf * weight
+                    if score > best.get(activity_id, 0.0):
+                        best[activity_id] = score
+            for activity_id, score in best.items():
+                scores[activity_id] += score
+                matched[activity_id] += 1
+
+        phrase = " ".join(tokens)
+        ranked = []
+        for activity_id, score in scores.items():
+            # Favour documents that match every query token
+            score *= (matched[activity_id] / len(tokens)) ** 2
+            name = self._names[activity_id]
+            if name.startswith(phrase):
+                score *= 1.5
+            elif phrase in name:
+                score *= 1.2
+            ranked.append((activity_id, score))
+
+        ranked.sort(key=lambda item: (-item[1], item[0]))
+        return ranked[:limit] if limit else ranked
+
+
+# Shared fallback index, built lazily from the activities table
+search_index = ActivitySearchIndex()
+
+
+# Postgres: a weighted tsvector for ranked full-text search plus a trigram index
+# on the name for typo-tolerant matching. Both are maintained by Postgres on
+# every write, so a re-import of the catalog keeps them current.
+SEARCH_VECTOR = literal_column("activities.search_vector")
+
+SEARCH_INDEX_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    ALTER TABLE activities ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(primary_muscles::text, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(category, '') || ' ' || coalesce(equipment, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(secondary_muscles::text, '')), 'C') ||
+        setweight(to_tsvector('english', coalesce(instructions::text, '')), 'D')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_activities_search_vector ON activities USING gin (search_vector)",
+    "CREATE INDEX IF NOT EXISTS ix_activities_name_trgm ON activities USING gin (lower(name) gin_trgm_ops)",
+]
+
+
+def supports_native_search(db: AsyncSession) -> bool:
+    return db.bind is not None and db.bind.dialect.name == "postgresql"
+
+
+async def create_search_indexes(db: AsyncSession) -> None:
+    for statement in SEARCH_INDEX_DDL:
+        await db.execute(text(statement))
+    await db.commit()
+
+
+async def refresh_search_index(db: AsyncSession, activity_ids: Optional[List[str]] = None):
+    """
+    Rebuild (or, given ids, incrementally refresh) the in-process index.
+    Ids that no longer exist in the table are dropped from the index.
+    """
+    query = Activity.__table__.select()
+    if activity_ids is not None:
+        query = query.where(Activity.id.in_(activity_ids))
+    rows = (await db.execute(query)).all()
+
+    if activity_ids is None:
+        search_index.build(rows)
+        return search_index
+
+    found = set()
+    for row in rows:
+        search_index.upsert(row)
+        found.add(row.id)
+    for activity_id in set(activity_ids) - found:
+        search_index.remove(activity_id)
+    return search_index
+
+
+def native_search_clauses(keyword: str):
+    """Return (where_clause, rank_expression) for a Postgres keyword search."""
+    ts_query = func.websearch_to_tsquery("english", keyword)
+    lowered = keyword.lower()
+    where_clause = or_(
+        SEARCH_VECTOR.op("@@")(ts_query),
+        # word_similarity operator, served by the trigram index
+        func.lower(Activity.name).op("%>")(lowered),
+    )
+    rank = func.ts_rank_cd(SEARCH_VECTOR, ts_query) + func.word_similarity(
+        lowered, func.lower(Activity.name)
+    )
+    return where_clause, rank
+
+
+async def ranked_activity_ids(db: AsyncSession, keyword: str) -> List[str]:
+    """Ids of activities matching `keyword`, best match first (fallback path)."""
+    if not len(search_index):
+        await refresh_search_index(db)
+    return [activity_id for activity_id, _ in search_index.search(keyword)]
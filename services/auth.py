@@ -1,31 +1,35 @@
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from models.auth import PasswordResetOTP
 from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
+from services.password_hashing import password_hasher
 import os
+import time
 
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+async def hash_password(password: str):
+    return await password_hasher.hash(password)
 
-def hash_password(password: str):
-    return pwd_context.hash(password)
 
+async def verify_password(plain_password: str, hashed_password: str):
+    return await password_hasher.verify(plain_password, hashed_password)
 
-def verify_password(plain_password: str, hashed_password: str):
-    return pwd_context.verify(plain_password, hashed_password)
+
+def access_token_claims(user) -> dict:
+    # uid/plan let get_current_user skip the user lookup for fresh tokens
+    return {"sub": user.email, "uid": user.id, "plan": user.plan}
 
 
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.now() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode |= {"exp": expire, "type": "access"}
+    to_encode |= {"exp": expire, "iat": int(time.time()), "type": "access"}
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
@@ -43,12 +47,12 @@ def decode_token(token: str):
         return None
 
 
-def hash_otp(otp: str):
-    return pwd_context.hash(otp)
+async def hash_otp(otp: str):
+    return await password_hasher.hash(otp)
 
 
-def verify_otp(plain_otp: str, hashed_otp: str):
-    return pwd_context.verify(plain_otp, hashed_otp)
+async def verify_otp(plain_otp: str, hashed_otp: str):
+    return await password_hasher.verify(plain_otp, hashed_otp)
 
 
 async def create_reset_otp(db: AsyncSession, user_id: int, expiry_minutes: int = 15):
@@ -61,7 +65,7 @@ async def create_reset_otp(db: AsyncSession, user_id: int, expiry_minutes: int =
 
     raw_otp, expires_at = PasswordResetOTP.generate_otp(expiry_minutes)
     otp_record = PasswordResetOTP(
-        user_id=user_id, otp_code=hash_otp(raw_otp), expires_at=expires_at
+        user_id=user_id, otp_code=await hash_otp(raw_otp), expires_at=expires_at
     )
 
     db.add(otp_record)
@@ -1,2 +1,262 @@
-def get_calories_burnt(workout):
-    return 300
+import asyncio
+import re
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.activity import Activity, ActivityEnergy
+from models.auth import UserProfile
+from models.workout import ActivitySets, WorkoutSessionActivities
+
+LB_TO_KG = 0.45359237
+
+# UserProfile.weight is in kilograms; users without a profile get this
+DEFAULT_WEIGHT_KG = 70.0
+# Compendium of Physical Activities METs for activities with no table row,
+# by catalog category
+CATEGORY_METS = {
+    "strength": 5.0,
+    "powerlifting": 6.0,
+    "olympic weightlifting": 6.0,
+    "strongman": 6.0,
+    "plyometrics": 8.0,
+    "cardio": 7.0,
+    "stretching": 2.3,
+}
+DEFAULT_MET = 3.5
+REST_MET = 1.3  # standing quietly between sets
+
+# Set timing when the set itself does not say
+SECONDS_PER_REP = 3.0
+DEFAULT_SET_SECONDS = 30.0
+DEFAULT_REST_SECONDS = 60.0
+MAX_SET_SECONDS = 4 * 3600.0
+
+# Every curve is resampled onto this grid (kg) once, so a batch lookup is two
+# gathers and a lerp instead of one np.interp per activity
+WEIGHT_GRID = np.arange(30.0, 201.0, 1.0)
+
+
+def normalize_name(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", (name or "").lower()).strip()
+
+
+def met_curve(weights_kg: Sequence[float], kcal_per_hour: Sequence[float]) -> np.ndarray:
+    """
+    MET of one table row on WEIGHT_GRID. kcal/h divided by body mass is the
+    MET at each tabulated weight; between them it is interpolated and outside
+    them held at the nearest value, so calories keep scaling with body mass.
+    """
+    weights = np.asarray(weights_kg, dtype=float)
+    order = np.argsort(weights)
+    mets = np.asarray(kcal_per_hour, dtype=float)[order] / weights[order]
+    return np.interp(WEIGHT_GRID, weights[order], mets)
+
+
+class EnergyTable:
+    """MET curves for every known activity plus flat per-category defaults."""
+
+    def __init__(self, rows: Iterable[ActivityEnergy] = ()):
+        curves: List[np.ndarray] = []
+        self.by_activity: Dict[str, int] = {}
+        self.by_name: Dict[str, int] = {}
+        for row in rows:
+            if not row.weights_kg or len(row.weights_kg) != len(row.kcal_per_hour or ()):
+                continue
+            index = len(curves)
+            curves.append(met_curve(row.weights_kg, row.kcal_per_hour))
+            self.by_name[normalize_name(row.name)] = index
+            if row.activity_id:
+                self.by_activity[row.activity_id] = index
+        self.by_category: Dict[str, int] = {}
+        for category, met in CATEGORY_METS.items():
+            self.by_category[category] = len(curves)
+            curves.append(np.full(WEIGHT_GRID.shape, met))
+        self.default_index = len(curves)
+        curves.append(np.full(WEIGHT_GRID.shape, DEFAULT_MET))
+        self.mets = np.vstack(curves)
+        self._resolved: Dict[tuple, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.by_name)
+
+    def resolve(self, activity_id: str, name: Optional[str] = None, category: Optional[str] = None) -> int:
+        """Row for an activity: its own table entry, one with the same name, its category, or the default."""
+        key = (activity_id, name, category)
+        index = self._resolved.get(key)
+        if index is None:
+            index = self.by_activity.get(activity_id)
+            if index is None and name:
+                index = self.by_name.get(normalize_name(name))
+            if index is None:
+                index = self.by_category.get((category or "").lower(), self.default_index)
+            self._resolved[key] = index
+        return index
+
+    def met(self, rows: np.ndarray, weights_kg: np.ndarray) -> np.ndarray:
+        """Vectorised MET lookup for parallel arrays of table rows and body weights."""
+        position = np.clip(weights_kg - WEIGHT_GRID[0], 0, len(WEIGHT_GRID) - 1)
+        low = np.minimum(position.astype(np.int64), len(WEIGHT_GRID) - 2)
+        fraction = position - low
+        return self.mets[rows, low] * (1 - fraction) + self.mets[rows, low + 1] * fraction
+
+
+def set_seconds(
+    duration: np.ndarray,
+    elapsed: np.ndarray,
+    reps: np.ndarray,
+    rest_after: np.ndarray,
+    last_in_session: np.ndarray,
+):
+    """
+    Active and rest seconds per set. Arrays hold NaN where a value is missing.
+    Active time is the logged duration, else the set's start/end timestamps,
+    else reps at SECONDS_PER_REP, else DEFAULT_SET_SECONDS. Rest is the logged
+    rest, else DEFAULT_REST_SECONDS, except after a session's last set.
+    """
+    active = np.where(np.isnan(duration), elapsed, duration)
+    active = np.where(np.isnan(active), reps * SECONDS_PER_REP, active)
+    active = np.clip(np.where(np.isnan(active), DEFAULT_SET_SECONDS, active), 0, MAX_SET_SECONDS)
+    rest = np.where(np.isnan(rest_after), DEFAULT_REST_SECONDS, rest_after)
+    rest = np.where(last_in_session, np.where(np.isnan(rest_after), 0, rest_after), rest)
+    return active, np.clip(rest, 0, MAX_SET_SECONDS)
+
+
+def batch_calories(
+    table: EnergyTable,
+    session_index: np.ndarray,
+    rows: np.ndarray,
+    weights_kg: np.ndarray,
+    active_seconds: np.ndarray,
+    rest_seconds: np.ndarray,
+    sessions: int,
+) -> np.ndarray:
+    """
+    kcal per session for a flat batch of sets: MET x kg x hours for the
+    active part plus REST_MET for the rest, summed per session with bincount.
+    """
+    active_kcal = table.met(rows, weights_kg) * weights_kg * active_seconds / 3600
+    rest_kcal = REST_MET * weights_kg * rest_seconds / 3600
+    return np.bincount(session_index, weights=active_kcal + rest_kcal, minlength=sessions)
+
+
+# Columns the set query returns, in the order the batch builder expects
+SET_COLUMNS = (
+    WorkoutSessionActivities.session_id,
+    WorkoutSessionActivities.activity_id,
+    Activity.name,
+    Activity.category,
+    ActivitySets.duration,
+    ActivitySets.started_at,
+    ActivitySets.ended_at,
+    ActivitySets.reps,
+    ActivitySets.rest_after_set,
+)
+
+
+def sets_query(session_ids):
+    """Sets of the given sessions in workout order, with their activity's name and category."""
+    return (
+        select(*SET_COLUMNS)
+        .join(WorkoutSessionActivities, ActivitySets.session_activity_id == WorkoutSessionActivities.id)
+        .outerjoin(Activity, Activity.id == WorkoutSessionActivities.activity_id)
+        .where(WorkoutSessionActivities.session_id.in_(session_ids))
+        .order_by(
+            WorkoutSessionActivities.session_id,
+            WorkoutSessionActivities.order,
+            ActivitySets.set_number,
+        )
+    )
+
+
+def _column(values) -> np.ndarray:
+    return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+
+def calories_for_sets(table: EnergyTable, sessions: Sequence, set_rows: Sequence, weight_of) -> Dict:
+    """
+    kcal per session id from rows shaped like SET_COLUMNS (ordered by session).
+    `weight_of(session_id)` gives the body weight to use for that session.
+    """
+    position = {session_id: i for i, session_id in enumerate(sessions)}
+    result = dict.fromkeys(sessions, 0.0)
+    if not set_rows:
+        return result
+    (session_ids, activity_ids, names, categories, duration,
+     started_at, ended_at, reps, rest_after) = zip(*set_rows)
+    session_index = np.fromiter((position[s] for s in session_ids), dtype=np.int64, count=len(set_rows))
+    rows = np.fromiter(
+        (table.resolve(*key) for key in zip(activity_ids, names, categories)),
+        dtype=np.int64,
+        count=len(set_rows),
+    )
+    weights = np.array([weight_of(s) for s in sessions], dtype=float)[session_index]
+    elapsed = _column(
+        (end - start).total_seconds() if start and end else None
+        for start, end in zip(started_at, ended_at)
+    )
+    last = np.r_[session_index[1:] != session_index[:-1], True]
+    active, rest = set_seconds(_column(duration), elapsed, _column(reps), _column(rest_after), last)
+    totals = batch_calories(table, session_index, rows, weights, active, rest, len(sessions))
+    for session_id, kcal in zip(sessions, totals):
+        result[session_id] = round(float(kcal), 1)
+    return result
+
+
+class CalorieEngine:
+    """
+    Holds the energy table in memory. It is read from activity_energy on
+    first use and again every `refresh_interval` seconds, so a re-import is
+    picked up without a restart.
+    """
+
+    def __init__(self, refresh_interval: float = 600):
+        self.refresh_interval = refresh_interval
+        self.table: Optional[EnergyTable] = None
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def ensure_loaded(self, db: AsyncSession) -> EnergyTable:
+        if self.table is not None and time.monotonic() - self._loaded_at < self.refresh_interval:
+            return self.table
+        async with self._lock:
+            if self.table is None or time.monotonic() - self._loaded_at >= self.refresh_interval:
+                rows = (await db.execute(select(ActivityEnergy))).scalars().all()
+                self.table = EnergyTable(rows)
+                self._loaded_at = time.monotonic()
+        return self.table
+
+    def invalidate(self) -> None:
+        self._loaded_at = 0.0
+
+    async def user_weights(self, db: AsyncSession, user_ids: Iterable[int]) -> Dict[int, float]:
+        result = await db.execute(
+            select(UserProfile.user_id, UserProfile.weight).where(UserProfile.user_id.in_(set(user_ids)))
+        )
+        return {user_id: weight for user_id, weight in result.all() if weight and weight > 0}
+
+    async def sessions_calories(self, db: AsyncSession, sessions: Sequence) -> Dict:
+        """kcal for each WorkoutSessions row (anything with .id and .user_id), keyed by session id."""
+        if not sessions:
+            return {}
+        table = await self.ensure_loaded(db)
+        weights = await self.user_weights(db, {s.user_id for s in sessions})
+        owner = {s.id: s.user_id for s in sessions}
+        set_rows = (await db.execute(sets_query(list(owner)))).all()
+        return calories_for_sets(
+            table,
+            list(owner),
+            set_rows,
+            lambda session_id: weights.get(owner[session_id], DEFAULT_WEIGHT_KG),
+        )
+
+
+calorie_engine = CalorieEngine()
+
+
+async def get_calories_burnt(db: AsyncSession, workout) -> float:
+    """Estimated kcal for one session from its sets and the user's body weight."""
+    return (await calorie_engine.sessions_calories(db, [workout]))[workout.id]
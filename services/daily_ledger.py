@@ -0,0 +1,247 @@
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.meals import Day, Food, Meal, MealFood
+from models.workout import WorkoutSessions
+
+# Ledger columns on `days` and the food column each nutrition total sums
+LEDGER_FIELDS = (
+    "total_calories_consumed",
+    "total_protein",
+    "total_carbs",
+    "total_fats",
+    "meals_logged",
+    "total_calories_burned",
+    "workouts_completed",
+)
+FOOD_TOTALS = {
+    "total_calories_consumed": "calories",
+    "total_protein": "protein",
+    "total_carbs": "carbs",
+    "total_fats": "fats",
+}
+
+# (meal's day date, {ledger field: contribution})
+MealEntry = Tuple[date, Dict[str, float]]
+Deltas = Dict[date, Dict[str, float]]
+
+
+def meal_totals(meal: Meal) -> Dict[str, float]:
+    """What one logged meal adds to its day; `meal.foods` must be loaded."""
+    totals = {
+        field: sum(getattr(food, column) or 0 for food in meal.foods)
+        for field, column in FOOD_TOTALS.items()
+    }
+    totals["meals_logged"] = 1
+    return totals
+
+
+async def meal_entries(db: AsyncSession, meals: Iterable[Meal]) -> Dict[int, MealEntry]:
+    """
+    Contribution of each logged meal that belongs to a day, keyed by meal id.
+    Taken before and after a change; `diff` of the two is what the ledger
+    has to absorb. Day dates are read in one query.
+    """
+    logged = [meal for meal in meals if meal.logged_at is not None and meal.day_id is not None]
+    if not logged:
+        return {}
+    day_ids = {meal.day_id for meal in logged}
+    result = await db.execute(select(Day.id, Day.date).where(Day.id.in_(day_ids)))
+    dates = dict(result.all())
+    return {
+        meal.id: (dates[meal.day_id], meal_totals(meal))
+        for meal in logged
+        if meal.day_id in dates
+    }
+
+
+def diff(before: Dict[int, MealEntry], after: Dict[int, MealEntry]) -> Deltas:
+    deltas: Deltas = defaultdict(lambda: defaultdict(float))
+    for entries, sign in ((before, -1), (after, 1)):
+        for day, totals in entries.values():
+            for field, value in totals.items():
+                deltas[day][field] += sign * value
+    return {
+        day: dict(fields)
+        for day, fields in deltas.items()
+        if any(abs(value) > 1e-9 for value in fields.values())
+    }
+
+
+def _insert(dialect_name: str):
+    return postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+
+
+async def apply(db: AsyncSession, user_id: int, deltas: Deltas) -> Dict[date, int]:
+    """
+    Adds `deltas` to the user's day rows with one multi-row
+    INSERT ... ON CONFLICT (user_id, date) DO UPDATE, creating missing days.
+    Returns {date: day id}. The caller owns the commit.
+    """
+    if not deltas:
+        return {}
+    now = datetime.now()
+    rows = [
+        {
+            "user_id": user_id,
+            "date": day,
+            "updated_at": now,
+            **{field: fields.get(field, 0) for field in LEDGER_FIELDS},
+        }
+        for day, fields in deltas.items()
+    ]
+    table = Day.__table__
+    stmt = _insert(db.bind.dialect.name)(Day).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.date],
+        set_={
+            **{
+                field: func.coalesce(table.c[field], 0) + stmt.excluded[field]
+                for field in LEDGER_FIELDS
+            },
+            "updated_at": stmt.excluded.updated_at,
+        },
+    ).returning(table.c.date, table.c.id)
+    result = await db.execute(stmt)
+    return {_as_date(day): day_id for day, day_id in result.all()}
+
+
+async def ensure_day(db: AsyncSession, user_id: int, day: date) -> int:
+    """Id of the user's row for `day`, created if needed."""
+    return (await apply(db, user_id, {day: {"meals_logged": 0}}))[day]
+
+
+async def record_workout(db: AsyncSession, user_id: int, day: date, calories_burned: float) -> None:
+    await apply(
+        db,
+        user_id,
+        {day: {"total_calories_burned": calories_burned or 0, "workouts_completed": 1}},
+    )
+
+
+def _as_date(value) -> date:
+    # SQLite hands back ISO strings from func.date()
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def expected_totals_queries(user_id: Optional[int], start: Optional[date], end: Optional[date]):
+    """Aggregates over the raw rows: logged meals per day, finished sessions per date."""
+    meals = (
+        select(
+            Meal.user_id,
+            Day.date,
+            *(
+                func.coalesce(func.sum(getattr(Food, column)), 0).label(field)
+                for field, column in FOOD_TOTALS.items()
+            ),
+            func.count(func.distinct(Meal.id)).label("meals_logged"),
+        )
+        .join(Day, Day.id == Meal.day_id)
+        .outerjoin(MealFood, MealFood.meal_id == Meal.id)
+        .outerjoin(Food, Food.id == MealFood.food_id)
+        .where(Meal.logged_at.is_not(None))
+        .group_by(Meal.user_id, Day.date)
+    )
+    session_date = func.date(WorkoutSessions.ended_at)
+    sessions = (
+        select(
+            WorkoutSessions.user_id,
+            session_date.label("date"),
+            func.coalesce(func.sum(WorkoutSessions.calories_burnt), 0).label(
+                "total_calories_burned"
+            ),
+            func.count().label("workouts_completed"),
+        )
+        .where(WorkoutSessions.status == "finished", WorkoutSessions.ended_at.is_not(None))
+        .group_by(WorkoutSessions.user_id, session_date)
+    )
+    if user_id is not None:
+        meals = meals.where(Meal.user_id == user_id)
+        sessions = sessions.where(WorkoutSessions.user_id == user_id)
+    if start is not None:
+        meals = meals.where(Day.date >= start)
+        sessions = sessions.where(WorkoutSessions.ended_at >= datetime.combine(start, datetime.min.time()))
+    if end is not None:
+        meals = meals.where(Day.date <= end)
+        sessions = sessions.where(WorkoutSessions.ended_at < datetime.combine(end, datetime.max.time()))
+    return meals, sessions
+
+
+async def reconcile(
+    db: AsyncSession,
+    user_id: Optional[int] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    dry_run: bool = False,
+) -> List[dict]:
+    """
+    Recomputes the ledger from meals and sessions and corrects every day
+    whose stored totals drifted (missed update, manual edit, a bug). Only
+    drifted rows are written, with one upsert of exact values. Returns the
+    drifted days as {user_id, date, field: (stored, expected)}.
+    """
+    expected: Dict[Tuple[int, date], Dict[str, float]] = defaultdict(
+        lambda: {field: 0 for field in LEDGER_FIELDS}
+    )
+    for query in expected_totals_queries(user_id, start, end):
+        for row in (await db.execute(query)).mappings():
+            key = (row["user_id"], _as_date(row["date"]))
+            for field in LEDGER_FIELDS:
+                if field in row:
+                    expected[key][field] = row[field] or 0
+
+    stored_query = select(Day.user_id, Day.date, *(Day.__table__.c[f] for f in LEDGER_FIELDS))
+    if user_id is not None:
+        stored_query = stored_query.where(Day.user_id == user_id)
+    if start is not None:
+        stored_query = stored_query.where(Day.date >= start)
+    if end is not None:
+        stored_query = stored_query.where(Day.date <= end)
+    stored = {
+        (row["user_id"], _as_date(row["date"])): {f: row[f] or 0 for f in LEDGER_FIELDS}
+        for row in (await db.execute(stored_query)).mappings()
+    }
+
+    drifted = []
+    corrections = []
+    zero = {field: 0 for field in LEDGER_FIELDS}
+    for key in expected.keys() | stored.keys():
+        want = expected.get(key, zero)
+        have = stored.get(key, zero)
+        changes = {
+            field: (have[field], want[field])
+            for field in LEDGER_FIELDS
+            if abs((have[field] or 0) - (want[field] or 0)) > 1e-6
+        }
+        if key not in stored and key in expected:
+            changes = changes or {"meals_logged": (None, want["meals_logged"])}
+        if changes:
+            drifted.append({"user_id": key[0], "date": key[1], **changes})
+            corrections.append({"user_id": key[0], "date": key[1], "updated_at": datetime.now(), **want})
+
+    if corrections and not dry_run:
+        table = Day.__table__
+        stmt = _insert(db.bind.dialect.name)(Day)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.date],
+            set_={field: stmt.excluded[field] for field in (*LEDGER_FIELDS, "updated_at")},
+        )
+        await db.execute(stmt, corrections)
+        await db.commit()
+    return drifted
+
+
+async def get_range(db: AsyncSession, user_id: int, start: date, end: date) -> List[Day]:
+    """Ledger rows for a date range; one index range scan on (user_id, date)."""
+    result = await db.execute(
+        select(Day)
+        .where(and_(Day.user_id == user_id, Day.date >= start, Day.date <= end))
+        .order_by(Day.date)
+        .execution_options(populate_existing=True)
+    )
+    return list(result.scalars())
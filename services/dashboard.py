@@ -0,0 +1,248 @@
+"""
+Monthly dashboard: the calendar grid and the brief views beside it.
+
+The grid has a cell per day of the month with the finished sessions and the
+calories burned and consumed (from the daily ledger) and the workouts the
+active plan schedules that day and how many of them are completed. Plan day
+N falls on the plan's start date + N - 1. Recent sessions, routines and
+meals come alongside. Each part is one set-based query and they run
+concurrently, each on its own pooled connection, so a dashboard takes about
+as long as its slowest query.
+
+Dashboards are cached per (user, month) for a short TTL. Writes that change
+what they show call `dashboard_cache.invalidate` after committing; writes
+from other processes (other workers, scripts/rebuild_ledger.py) show up
+once the TTL runs out.
+"""
+
+import asyncio
+import calendar
+import itertools
+from datetime import date, timedelta
+from typing import Callable, Hashable, List, Optional, Tuple
+
+from sqlalchemy import case, func, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from models.meals import Day, Meal
+from models.workout import WorkoutSessions, WorkoutTemplates
+from models.workout_plan import PlanDay, ScheduledWorkout, WorkoutPlan
+from services.cache import TTLCache
+from services.metrics import registry
+
+RECENT_LIMIT = 5
+GRID_FIELDS = ("sessions", "calories_burned", "calories_consumed", "meals_logged", "scheduled", "completed")
+
+dashboard_requests = registry.counter(
+    "dashboard_requests_total",
+    "Dashboard reads by outcome (hit: cache, miss: database)",
+    ("result",),
+)
+
+
+def month_bounds(day: date) -> Tuple[date, date]:
+    first = day.replace(day=1)
+    return first, first.replace(day=calendar.monthrange(first.year, first.month)[1])
+
+
+def _as_date(value) -> date:
+    # SQLite hands back ISO strings for dates
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def ledger_query(user_id: int, first: date, last: date):
+    return select(
+        Day.date,
+        Day.workouts_completed,
+        Day.total_calories_burned,
+        Day.total_calories_consumed,
+        Day.meals_logged,
+    ).where(Day.user_id == user_id, Day.date >= first, Day.date <= last)
+
+
+def schedule_query(user_id: int):
+    """Scheduled and completed workouts per day of the active plan (one row if it has no days)."""
+    return (
+        select(
+            WorkoutPlan.id,
+            WorkoutPlan.name,
+            WorkoutPlan.start_date,
+            WorkoutPlan.end_date,
+            PlanDay.day_number,
+            func.count(ScheduledWorkout.id).label("scheduled"),
+            func.coalesce(func.sum(case((ScheduledWorkout.is_completed == true(), 1), else_=0)), 0).label(
+                "completed"
+            ),
+        )
+        .select_from(WorkoutPlan)
+        .outerjoin(PlanDay, PlanDay.plan_id == WorkoutPlan.id)
+        .outerjoin(ScheduledWorkout, ScheduledWorkout.day_id == PlanDay.id)
+        .where(WorkoutPlan.user_id == user_id, WorkoutPlan.is_active == true())
+        .group_by(WorkoutPlan.id, WorkoutPlan.name, WorkoutPlan.start_date, WorkoutPlan.end_date, PlanDay.day_number)
+    )
+
+
+def recent_sessions_query(user_id: int, limit: int = RECENT_LIMIT):
+    return (
+        select(
+            WorkoutSessions.id,
+            WorkoutSessions.name,
+            WorkoutSessions.started_at,
+            WorkoutSessions.ended_at,
+            WorkoutSessions.calories_burnt,
+        )
+        .where(WorkoutSessions.user_id == user_id, WorkoutSessions.status == "finished")
+        .order_by(WorkoutSessions.ended_at.desc())
+        .limit(limit)
+    )
+
+
+def routines_query(user_id: int, limit: int = RECENT_LIMIT):
+    """Most recently changed templates, each row carrying the user's template count."""
+    changed = func.coalesce(WorkoutTemplates.updated_at, WorkoutTemplates.created_at)
+    return (
+        select(
+            WorkoutTemplates.id,
+            WorkoutTemplates.name,
+            changed.label("updated_at"),
+            func.count().over().label("total"),
+        )
+        .where(WorkoutTemplates.user_id == user_id)
+        .order_by(changed.desc(), WorkoutTemplates.id.desc())
+        .limit(limit)
+    )
+
+
+def recent_meals_query(user_id: int, limit: int = RECENT_LIMIT):
+    return (
+        select(Meal.id, Meal.meal_type, Meal.timestamp, Meal.logged_at)
+        .where(Meal.user_id == user_id)
+        .order_by(Meal.id.desc())
+        .limit(limit)
+    )
+
+
+def build_grid(first: date, last: date, ledger_rows, schedule_rows) -> List[dict]:
+    days = {
+        first + timedelta(days=n): {"date": first + timedelta(days=n), **{f: 0 for f in GRID_FIELDS}}
+        for n in range((last - first).days + 1)
+    }
+    for row in ledger_rows:
+        cell = days[_as_date(row.date)]
+        cell["sessions"] = row.workouts_completed or 0
+        cell["calories_burned"] = round(row.total_calories_burned or 0, 2)
+        cell["calories_consumed"] = round(row.total_calories_consumed or 0, 2)
+        cell["meals_logged"] = row.meals_logged or 0
+    for row in schedule_rows:
+        if row.day_number is None:
+            continue
+        day = _as_date(row.start_date) + timedelta(days=row.day_number - 1)
+        if day in days and day <= _as_date(row.end_date):
+            days[day]["scheduled"] += row.scheduled
+            days[day]["completed"] += row.completed
+    return list(days.values())
+
+
+def build(month: date, ledger_rows, schedule_rows, session_rows, routine_rows, meal_rows) -> dict:
+    first, last = month_bounds(month)
+    grid = build_grid(first, last, ledger_rows, schedule_rows)
+    plan = schedule_rows[0] if schedule_rows else None
+    return {
+        "month": first,
+        "days": grid,
+        "totals": {f: round(sum(day[f] for day in grid), 2) for f in GRID_FIELDS},
+        "recent_sessions": [dict(row._mapping) for row in session_rows],
+        "routines": {
+            "templates": routine_rows[0].total if routine_rows else 0,
+            "recent": [{"id": r.id, "name": r.name, "updated_at": r.updated_at} for r in routine_rows],
+            "active_plan": (
+                {
+                    "id": plan.id,
+                    "name": plan.name,
+                    "start_date": _as_date(plan.start_date),
+                    "end_date": _as_date(plan.end_date),
+                }
+                if plan
+                else None
+            ),
+        },
+        "recent_meals": [dict(row._mapping) for row in meal_rows],
+    }
+
+
+async def _rows(session_factory: Callable[[], AsyncSession], query) -> list:
+    async with session_factory() as db:
+        return (await db.execute(query)).all()
+
+
+async def load(session_factory: Callable[[], AsyncSession], user_id: int, month: date) -> dict:
+    """Runs the dashboard's queries concurrently, one session (connection) each."""
+    first, last = month_bounds(month)
+    queries = (
+        ledger_query(user_id, first, last),
+        schedule_query(user_id),
+        recent_sessions_query(user_id),
+        routines_query(user_id),
+        recent_meals_query(user_id),
+    )
+    return build(month, *await asyncio.gather(*(_rows(session_factory, q) for q in queries)))
+
+
+class DashboardCache:
+    """
+    Dashboards per (user, month) for `ttl` seconds.
+
+    Keys carry the user's generation, which `invalidate` replaces with a new
+    one: every cached month of the user is missed from then on without
+    having to find them, and the old entries age out. Readers take the key
+    before querying, so a dashboard computed while a write commits is stored
+    under the old generation and never served. Generations are never
+    reused: a user whose generation expired or was evicted gets a new one,
+    which only costs a miss.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self._dashboards = TTLCache(max_size=max_size, ttl=ttl)
+        self._generations = TTLCache(max_size=max_size, ttl=ttl * 2)
+        self._counter = itertools.count(1)
+
+    def __len__(self):
+        return len(self._dashboards)
+
+    def key(self, user_id: int, month: date) -> Hashable:
+        generation = self._generations.get(user_id, count=False)
+        if generation is None:
+            generation = next(self._counter)
+            self._generations.set(user_id, generation)
+        return user_id, generation, month_bounds(month)[0]
+
+    def get(self, key: Hashable) -> Optional[dict]:
+        return self._dashboards.get(key)
+
+    def put(self, key: Hashable, dashboard: dict) -> None:
+        self._dashboards.set(key, dashboard)
+
+    def invalidate(self, user_id: int) -> None:
+        self._generations.set(user_id, next(self._counter))
+
+    def clear(self) -> None:
+        self._dashboards.clear()
+        self._generations.clear()
+
+
+dashboard_cache = DashboardCache(
+    max_size=settings.DASHBOARD_CACHE_MAX_SIZE, ttl=settings.DASHBOARD_CACHE_TTL_SECONDS
+)
+
+
+async def get(session_factory: Callable[[], AsyncSession], user_id: int, month: date) -> dict:
+    key = dashboard_cache.key(user_id, month)
+    dashboard = dashboard_cache.get(key)
+    if dashboard is not None:
+        dashboard_requests.inc(result="hit")
+        return dashboard
+    dashboard_requests.inc(result="miss")
+    dashboard = await load(session_factory, user_id, month)
+    dashboard_cache.put(key, dashboard)
+    return dashboard
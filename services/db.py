@@ -1,12 +1,13 @@
 # dependencies.py
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker
-from config import settings
 from sqlalchemy.ext.declarative import declarative_base
+from services.db_runtime import create_engine
 
 Base = declarative_base()
 
-engine = create_async_engine(settings.DATABASE_URL, echo=True)
+# Pool sizing, timeouts and query instrumentation come from DB_* settings
+engine = create_engine()
 async_session = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
 
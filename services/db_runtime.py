@@ -0,0 +1,117 @@
+import logging
+import time
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from config import settings
+from services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+statement_seconds = registry.histogram(
+    "db_statement_duration_seconds",
+    "SQL statement latency by operation (SELECT, INSERT, ...)",
+    ("operation",),
+)
+pool_wait_seconds = registry.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+statement_errors = registry.counter(
+    "db_statement_errors_total", "SQL statements that raised", ("operation",)
+)
+
+# Pools of instrumented engines, summed by the gauges below
+_pools = []
+registry.gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out",
+    callback=lambda: sum(pool.checkedout() for pool in _pools),
+)
+registry.gauge(
+    "db_pool_size", "Configured pool size", callback=lambda: sum(pool.size() for pool in _pools)
+)
+registry.gauge(
+    "db_pool_overflow",
+    "Connections open beyond pool_size",
+    callback=lambda: sum(max(pool.overflow(), 0) for pool in _pools),
+)
+
+OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "BEGIN", "COMMIT", "ROLLBACK"}
+
+
+def _operation(statement: str) -> str:
+    keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return keyword if keyword in OPERATIONS else "OTHER"
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_wait_seconds.observe(time.perf_counter() - started)
+
+
+def engine_options(url: str) -> dict:
+    """Keyword arguments for create_async_engine built from DB_* settings."""
+    options = {"echo": settings.DB_ECHO}
+    if url.startswith("sqlite"):
+        return options  # SQLite uses its own single-connection pools
+
+    options.update(
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    if settings.DB_STATEMENT_TIMEOUT_MS and url.startswith("postgresql+asyncpg"):
+        # Applied per connection by the server, so runaway queries are
+        # cancelled even if the client stops waiting
+        options["connect_args"] = {
+            "server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}
+        }
+    return options
+
+
+def instrument(engine: AsyncEngine) -> AsyncEngine:
+    """Attach statement timing and pool gauges to an engine."""
+    sync_engine = engine.sync_engine
+    slow_seconds = settings.DB_SLOW_QUERY_MS / 1000
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        statement_seconds.observe(elapsed, operation=_operation(statement))
+        if slow_seconds and elapsed > slow_seconds:
+            logger.warning("Slow query (%.0f ms): %s", elapsed * 1000, statement[:500])
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _record_error(context):
+        statement = context.statement or ""
+        statement_errors.inc(operation=_operation(statement))
+        started = context.connection.info.get("query_started") if context.connection else None
+        if started:
+            started.pop()
+
+    if isinstance(sync_engine.pool, InstrumentedQueuePool):
+        _pools.append(sync_engine.pool)
+    return engine
+
+
+def create_engine(url: Optional[str] = None) -> AsyncEngine:
+    url = url or settings.DATABASE_URL
+    return instrument(create_async_engine(url, **engine_options(url)))
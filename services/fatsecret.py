@@ -0,0 +1,292 @@
+import asyncio
+import logging
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+from fastapi import HTTPException, status
+
+from config import settings
+from services.cache import TTLCache
+from services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+provider_requests = registry.counter(
+    "fatsecret_requests_total", "Calls to the FatSecret API by endpoint and outcome", ("endpoint", "outcome")
+)
+provider_lookups = registry.counter(
+    "fatsecret_lookups_total",
+    "Client lookups by how they were served (cache, coalesced, remote)",
+    ("result",),
+)
+
+# "Per 100g - Calories: 52kcal | Fat: 0.17g | Carbs: 13.81g | Protein: 0.26g"
+_DESCRIPTION = re.compile(
+    r"^\s*(?P<quantity>.+?)\s+-\s+"
+    r"Calories:\s*(?P<calories>[\d.]+)\s*kcal\s*\|\s*"
+    r"Fat:\s*(?P<fat>[\d.]+)\s*g\s*\|\s*"
+    r"Carbs:\s*(?P<carbohydrate>[\d.]+)\s*g\s*\|\s*"
+    r"Protein:\s*(?P<protein>[\d.]+)\s*g",
+    re.IGNORECASE,
+)
+NUTRIENTS = ("calories", "fat", "carbohydrate", "protein")
+# FatSecret error code for an invalid or expired access token
+TOKEN_ERRORS = {"13"}
+
+
+def parse_food_description(description: Optional[str]) -> Dict[str, Any]:
+    """Split FatSecret's one-line food_description into a quantity and macros."""
+    match = _DESCRIPTION.match(description or "")
+    if match is None:
+        return {"quantity": None, **{nutrient: None for nutrient in NUTRIENTS}}
+    return {
+        "quantity": match["quantity"],
+        **{nutrient: float(match[nutrient]) for nutrient in NUTRIENTS},
+    }
+
+
+def normalize_food(food: dict) -> dict:
+    return {
+        "id": food.get("food_id"),
+        "name": food.get("food_name"),
+        "description": food.get("food_description"),
+        "brand": food.get("brand_name"),
+        "type": food.get("food_type"),
+        "url": food.get("food_url"),
+        **parse_food_description(food.get("food_description")),
+    }
+
+
+def _as_list(value) -> list:
+    # FatSecret returns a bare object instead of a one-element list
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+class FatSecretClient:
+    """
+    Async FatSecret client shared by all requests in a worker.
+
+    - one pooled httpx.AsyncClient (keep-alive, bounded connections)
+    - the OAuth2 client-credentials token is reused until shortly before it
+      expires, and refreshed by a single caller while others wait
+    - identical concurrent lookups share one upstream call
+    - successful responses are kept in a TTL + LRU cache
+    """
+
+    # Refresh this long before the provider's expiry to avoid racing it
+    TOKEN_MARGIN_SECONDS = 60
+
+    def __init__(
+        self,
+        api_url: str,
+        token_url: str,
+        client_id: str,
+        client_secret: str,
+        timeout: float = 10,
+        max_connections: int = 20,
+        cache_size: int = 2048,
+        cache_ttl: float = 3600,
+    ):
+        self.api_url = api_url.rstrip("/")
+        self.token_url = token_url
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.cache = TTLCache(max_size=cache_size, ttl=cache_ttl)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._token: Optional[str] = None
+        self._token_expires_at = 0.0
+        self._token_lock = asyncio.Lock()
+        self._inflight: Dict[tuple, asyncio.Task] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self._client
+
+    async def token(self, force: bool = False) -> str:
+        if not force and self._token and time.monotonic() < self._token_expires_at:
+            return self._token
+        stale = self._token
+        async with self._token_lock:
+            # Someone else may have refreshed it while we waited for the lock
+            if self._token and self._token != stale and time.monotonic() < self._token_expires_at:
+                return self._token
+            if not self.client_id:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Food search provider is not configured",
+                )
+            try:
+                response = await self.client.post(
+                    self.token_url,
+                    data={"grant_type": "client_credentials", "scope": "basic"},
+                    auth=(self.client_id, self.client_secret),
+                )
+            except httpx.HTTPError as exc:
+                provider_requests.inc(endpoint="token", outcome="error")
+                raise self._unavailable(exc)
+            data = self._json(response) if response.status_code == 200 else None
+            if data is None or "access_token" not in data:
+                provider_requests.inc(endpoint="token", outcome="error")
+                logger.error("FatSecret token request failed: %s", response.text[:500])
+                raise HTTPException(
+                    status_code=status.HTTP_502_BAD_GATEWAY,
+                    detail="Food search provider rejected our credentials",
+                )
+            provider_requests.inc(endpoint="token", outcome="ok")
+            self._token = data["access_token"]
+            lifetime = float(data.get("expires_in", 3600))
+            self._token_expires_at = time.monotonic() + max(lifetime - self.TOKEN_MARGIN_SECONDS, 0)
+            return self._token
+
+    @staticmethod
+    def _json(response: httpx.Response) -> Optional[dict]:
+        """The body as a JSON object, or None when it isn't one (proxy error pages, truncation)."""
+        try:
+            data = response.json()
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+
+    @staticmethod
+    def _unavailable(exc: Exception) -> HTTPException:
+        logger.warning("FatSecret request failed: %s", exc)
+        if isinstance(exc, httpx.TimeoutException):
+            return HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Food search provider timed out"
+            )
+        return HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY, detail="Food search provider unavailable"
+        )
+
+    async def _get(self, endpoint: str, params: dict) -> dict:
+        params = {key: value for key, value in params.items() if value is not None}
+        params["format"] = "json"
+        for attempt in range(2):
+            token = await self.token(force=attempt > 0)
+            try:
+                response = await self.client.get(
+                    f"{self.api_url}/{endpoint}",
+                    params=params,
+                    headers={"Authorization": f"Bearer {token}"},
+                )
+            except httpx.HTTPError as exc:
+                provider_requests.inc(endpoint=endpoint, outcome="error")
+                raise self._unavailable(exc)
+            data = self._json(response) if response.status_code == 200 else None
+            # FatSecret reports most failures as 200 with an "error" object
+            error = (data or {}).get("error") or {}
+            token_rejected = response.status_code == 401 or str(error.get("code")) in TOKEN_ERRORS
+            if not (token_rejected and attempt == 0):
+                break
+            # Token revoked or expired early; refresh once and retry
+            provider_requests.inc(endpoint=endpoint, outcome="token_rejected")
+
+        if data is None or error:
+            provider_requests.inc(endpoint=endpoint, outcome="error")
+            logger.error("FatSecret %s failed: %s", endpoint, response.text[:500])
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY, detail="Food search provider error"
+            )
+        provider_requests.inc(endpoint=endpoint, outcome="ok")
+        return data
+
+    async def _cached(self, key: tuple, endpoint: str, params: dict, transform) -> Any:
+        cached = self.cache.get(key)
+        if cached is not None:
+            provider_lookups.inc(result="cache")
+            return cached
+
+        task = self._inflight.get(key)
+        if task is not None:
+            provider_lookups.inc(result="coalesced")
+        else:
+            provider_lookups.inc(result="remote")
+            task = asyncio.create_task(self._fetch(key, endpoint, params, transform))
+            self._inflight[key] = task
+        # Shielded so a caller that disconnects doesn't cancel the lookup for the others
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key: tuple, endpoint: str, params: dict, transform) -> Any:
+        try:
+            result = transform(await self._get(endpoint, params))
+            self.cache.set(key, result)
+            return result
+        finally:
+            del self._inflight[key]
+
+    async def search_foods(
+        self,
+        query: str,
+        region: str = "EN",
+        language: str = "en",
+        max_results: int = 20,
+        page_number: Optional[int] = None,
+    ) -> List[dict]:
+        query = " ".join(query.lower().split())
+        key = ("foods.search", query, region, language, max_results, page_number)
+        params = {
+            "method": "foods.search",
+            "search_expression": query,
+            "region": region,
+            "language": language,
+            "max_results": max_results,
+            "page_number": page_number,
+        }
+
+        def transform(data):
+            foods = (data.get("foods") or {}).get("food")
+            return [normalize_food(food) for food in _as_list(foods)]
+
+        return await self._cached(key, "foods/search/v1", params, transform)
+
+    async def get_food(self, food_id: str) -> dict:
+        def transform(data):
+            food = data.get("food") or {}
+            servings = _as_list((food.get("servings") or {}).get("serving"))
+            return {**normalize_food(food), "servings": servings}
+
+        return await self._cached(("food.get", str(food_id)), "food/v4", {"food_id": food_id}, transform)
+
+    async def search_recipes(self, query: str, max_results: int = 20) -> List[dict]:
+        query = " ".join(query.lower().split())
+
+        def transform(data):
+            return _as_list((data.get("recipes") or {}).get("recipe"))
+
+        return await self._cached(
+            ("recipes.search", query, max_results),
+            "recipes/search/v3",
+            {"search_expression": query, "max_results": max_results},
+            transform,
+        )
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+fatsecret = FatSecretClient(
+    api_url=settings.FATSECRET_API_URL,
+    token_url=settings.FATSECRET_TOKEN_URL,
+    client_id=settings.FATSECRET_CLIENT_ID,
+    client_secret=settings.FATSECRET_CLIENT_SECRET,
+    timeout=settings.FATSECRET_TIMEOUT_SECONDS,
+    max_connections=settings.FATSECRET_MAX_CONNECTIONS,
+    cache_size=settings.FATSECRET_CACHE_SIZE,
+    cache_ttl=settings.FATSECRET_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,228 @@
+import re
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import case, func, or_, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from models.meals import Food, FoodSource
+from services.activity_search import supports_native_search, trigrams
+from services.cache import TTLCache
+from services.fatsecret import FatSecretClient, fatsecret
+from services.metrics import registry
+
+food_searches = registry.counter(
+    "food_search_requests_total",
+    "Food searches by the tier that answered (local, remote, degraded: provider failed)",
+    ("tier",),
+)
+
+# Nutrition columns refreshed when a provider or import row is seen again
+FOOD_FIELDS = (
+    "name",
+    "brand",
+    "description",
+    "quantity",
+    "quantity_unit",
+    "food_type",
+    "food_url",
+    "calories",
+    "protein",
+    "carbs",
+    "fats",
+)
+
+# Prefix matches on the name are served by the text_pattern_ops index,
+# typo-tolerant matches by the trigram index.
+FOOD_SEARCH_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_foods_name_trgm ON foods USING gin (lower(name) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_foods_name_prefix ON foods (lower(name) text_pattern_ops)",
+]
+
+# Candidate rows ranked in Python when the database has no trigram support
+FALLBACK_CANDIDATES = 500
+
+_QUANTITY_RE = re.compile(r"^per\s+([\d.]+)\s*(.*)$", re.IGNORECASE)
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def parse_quantity(quantity: Optional[str]) -> Tuple[Optional[float], Optional[str]]:
+    """'Per 100g' -> (100.0, 'g'); 'Per 1 cup' -> (1.0, 'cup')."""
+    match = _QUANTITY_RE.match((quantity or "").strip())
+    if match is None:
+        return None, quantity or None
+    try:
+        return float(match[1]), match[2].strip() or None
+    except ValueError:
+        return None, quantity
+
+
+def provider_row(food: dict) -> dict:
+    """Map a services.fatsecret search result onto foods columns."""
+    amount, unit = parse_quantity(food.get("quantity"))
+    return {
+        "source": FoodSource.FATSECRET.value,
+        "external_id": str(food["id"]),
+        "name": food["name"],
+        "brand": food.get("brand"),
+        "description": food.get("description"),
+        "quantity": amount,
+        "quantity_unit": unit,
+        "food_type": (food.get("type") or "generic").lower(),
+        "food_url": food.get("url"),
+        "calories": food["calories"],
+        "protein": food.get("protein"),
+        "carbs": food.get("carbohydrate"),
+        "fats": food.get("fat"),
+        "fetched_at": datetime.now(),
+    }
+
+
+def upsert_statement(dialect_name: str, rows: List[dict]):
+    """INSERT ... ON CONFLICT (source, external_id) DO UPDATE, returning the row ids."""
+    insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    stmt = insert(Food).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[Food.source, Food.external_id],
+        set_={field: stmt.excluded[field] for field in (*FOOD_FIELDS, "fetched_at")},
+    ).returning(Food.id, Food.external_id)
+
+
+async def save_provider_foods(db: AsyncSession, foods: Iterable[dict]) -> List[int]:
+    """
+    Persists provider results into foods and returns their local ids in the
+    provider's order. Results without calories are skipped. The caller owns
+    the commit.
+    """
+    rows: Dict[str, dict] = {}
+    for food in foods:
+        if food.get("id") is not None and food.get("calories") is not None:
+            rows.setdefault(str(food["id"]), provider_row(food))
+    if not rows:
+        return []
+    result = await db.execute(upsert_statement(db.bind.dialect.name, list(rows.values())))
+    ids = {external_id: food_id for food_id, external_id in result.all()}
+    return [ids[external_id] for external_id in rows if external_id in ids]
+
+
+def _similarity(query: str, name: str) -> float:
+    query_grams, name_grams = trigrams(query), trigrams(name)
+    shared = len(query_grams & name_grams)
+    return shared / (len(query_grams) + len(name_grams) - shared)
+
+
+async def search_local(db: AsyncSession, query: str, limit: int = 20, offset: int = 0) -> List[Food]:
+    """
+    Ranked search over the foods table: names starting with the query come
+    first, then the closest trigram matches; shorter names win ties.
+    """
+    query = normalize_query(query)
+    if not query:
+        return []
+    name = func.lower(Food.name)
+    pattern = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+    if supports_native_search(db):
+        prefix = name.like(pattern, escape="\\")
+        rank = case((prefix, 1.0), else_=0.0) + func.word_similarity(query, name)
+        result = await db.execute(
+            select(Food)
+            # word_similarity operator, served by the trigram index
+            .where(or_(prefix, name.op("%>")(query)))
+            .order_by(rank.desc(), func.length(Food.name), Food.id)
+            .offset(offset)
+            .limit(limit)
+        )
+        return list(result.scalars())
+
+    # SQLite/dev: substring candidates per token, ranked here (no typo tolerance)
+    candidates = select(Food).limit(FALLBACK_CANDIDATES)
+    for token in query.split():
+        candidates = candidates.where(name.contains(token, autoescape=True))
+    foods = (await db.execute(candidates)).scalars().all()
+    ranked = sorted(
+        foods,
+        key=lambda food: (
+            -(food.name.lower().startswith(query) + _similarity(query, food.name.lower())),
+            len(food.name),
+            food.id,
+        ),
+    )
+    return ranked[offset : offset + limit]
+
+
+class FoodCatalog:
+    """
+    Local-first food search. The foods table answers whenever it has enough
+    matches; otherwise the provider is asked, its results are stored in
+    foods (so they get local ids usable in meals, and answer the next
+    search), and the query is remembered so it isn't sent upstream again
+    for `sync_ttl` seconds.
+    """
+
+    def __init__(
+        self,
+        provider: FatSecretClient,
+        min_local_results: int = 5,
+        sync_ttl: float = 86400,
+        max_synced: int = 10_000,
+    ):
+        self.provider = provider
+        self.min_local_results = min_local_results
+        self._synced = TTLCache(max_size=max_synced, ttl=sync_ttl)
+
+    async def search(
+        self, db: AsyncSession, query: str, limit: int = 20, page_number: int = 0
+    ) -> List[Food]:
+        query = normalize_query(query)
+        if not query:
+            return []
+        local = await search_local(db, query, limit=limit, offset=page_number * limit)
+        key = (query, limit, page_number)
+        if len(local) >= min(limit, self.min_local_results) or key in self._synced:
+            food_searches.inc(tier="local")
+            return local
+
+        try:
+            remote = await self.provider.search_foods(
+                query, max_results=limit, page_number=page_number
+            )
+        except HTTPException:
+            if local:
+                food_searches.inc(tier="degraded")
+                return local
+            raise
+
+        food_ids = await save_provider_foods(db, remote)
+        await db.commit()
+        self._synced.set(key, True)
+        food_searches.inc(tier="remote")
+
+        # Local matches keep their rank; provider results follow in its order
+        seen = {food.id for food in local}
+        missing = [food_id for food_id in food_ids if food_id not in seen]
+        if missing:
+            rows = await db.execute(select(Food).where(Food.id.in_(missing)))
+            by_id = {food.id: food for food in rows.scalars()}
+            local.extend(by_id[food_id] for food_id in missing if food_id in by_id)
+        return local[:limit]
+
+
+async def create_search_indexes(db: AsyncSession) -> None:
+    for statement in FOOD_SEARCH_DDL:
+        await db.execute(text(statement))
+    await db.commit()
+
+
+food_catalog = FoodCatalog(
+    fatsecret,
+    min_local_results=settings.FOOD_SEARCH_MIN_LOCAL_RESULTS,
+    sync_ttl=settings.FOOD_SEARCH_SYNC_TTL_SECONDS,
+)
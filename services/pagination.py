@@ -0,0 +1,123 @@
+import base64
+import json
+import uuid
+from datetime import date, datetime
+from typing import Any, Callable, List, NamedTuple, Optional, Sequence
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class Page(NamedTuple):
+    items: list
+    next_cursor: Optional[str] = None
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"$d": value.isoformat()}
+    if isinstance(value, uuid.UUID):
+        return {"$u": str(value)}
+    return str(value)
+
+
+def _object_hook(obj):
+    if "$dt" in obj:
+        return datetime.fromisoformat(obj["$dt"])
+    if "$d" in obj:
+        return date.fromisoformat(obj["$d"])
+    if "$u" in obj:
+        return uuid.UUID(obj["$u"])
+    return obj
+
+
+def encode_cursor(key: str, values: Optional[Sequence[Any]] = None, offset: int = None) -> str:
+    """
+    Opaque cursor for the row after the given position. `key` identifies the
+    ordering the cursor belongs to, so a cursor can't be replayed against a
+    different sort. Orderings that aren't keyset-able (search relevance) store
+    an offset instead of column values.
+    """
+    payload = {"k": key}
+    if values is not None:
+        payload["v"] = list(values)
+    else:
+        payload["o"] = offset
+    raw = json.dumps(payload, default=_default, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _invalid_cursor(detail: str = "Invalid cursor") -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+def decode_cursor(cursor: str, key: str, size: Optional[int] = None) -> dict:
+    """
+    The payload of a cursor issued for `key`. Keyset cursors (`size` given,
+    the number of ordering columns) must carry that many scalar values;
+    offset cursors a non-negative offset. Anything else is a 400.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw, object_hook=_object_hook)
+    except (ValueError, TypeError) as e:
+        raise _invalid_cursor() from e
+
+    if not isinstance(payload, dict) or payload.get("k") != key:
+        raise _invalid_cursor("Cursor does not match the requested ordering")
+    if size is not None:
+        values = payload.get("v")
+        if (
+            not isinstance(values, list)
+            or len(values) != size
+            or any(isinstance(value, (list, dict)) for value in values)
+        ):
+            raise _invalid_cursor()
+    else:
+        offset = payload.get("o")
+        if not isinstance(offset, int) or isinstance(offset, bool) or offset < 0:
+            raise _invalid_cursor()
+    return payload
+
+
+def apply_keyset(query, columns: List, descending: bool, values: Optional[list], limit: int):
+    """
+    Order `query` by `columns` (the sort column(s) followed by the primary key
+    as tie-breaker), seek past `values` and fetch one extra row so the caller
+    can tell whether another page exists.
+    """
+    if values is not None:
+        position = tuple_(*columns)
+        # A plain tuple lets each value pick up its column's bind type
+        after = tuple(values)
+        query = query.where(position < after if descending else position > after)
+    order = [column.desc() if descending else column.asc() for column in columns]
+    return query.order_by(*order).limit(limit + 1)
+
+
+def build_page(
+    rows: Sequence, limit: int, key: str, position: Callable[[Any], Sequence[Any]]
+) -> Page:
+    """Trim the look-ahead row and derive the next cursor from the last item."""
+    items = list(rows[:limit])
+    if len(rows) <= limit or not items:
+        return Page(items)
+    return Page(items, encode_cursor(key, position(items[-1])))
+
+
+def build_offset_page(rows: Sequence, limit: int, key: str, offset: int) -> Page:
+    items = list(rows[:limit])
+    if len(rows) <= limit:
+        return Page(items)
+    return Page(items, encode_cursor(key, offset=offset + limit))
+
+
+def set_next_cursor(response: Response, page: Page) -> list:
+    """Expose the cursor as a header so the list response body stays unchanged."""
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
@@ -0,0 +1,97 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from config import settings
+from services.metrics import registry
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+hash_operations = registry.counter(
+    "password_hash_operations_total", "bcrypt hash/verify calls by operation", ("operation",)
+)
+hash_rejections = registry.counter(
+    "password_hash_rejected_total", "bcrypt calls rejected because the pool queue was full"
+)
+
+
+# Module-level so process pool workers can unpickle them
+def _hash(secret: str) -> str:
+    return pwd_context.hash(secret)
+
+
+def _verify(secret: str, hashed: str) -> bool:
+    return pwd_context.verify(secret, hashed)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt off the event loop on a bounded pool.
+
+    bcrypt releases the GIL, so a thread pool gives real parallelism; a process
+    pool is available for backends that don't. At most `max_pending` calls may
+    be queued or running; beyond that callers get a 429 instead of piling up
+    behind a login spike.
+    """
+
+    def __init__(self, workers: int, max_pending: int, executor: str = "thread"):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.executor_kind = executor
+        self.pending = 0
+        self._executor: Optional[Executor] = None
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="bcrypt"
+                )
+        return self._executor
+
+    async def _run(self, operation: str, fn, *args):
+        if self.pending >= self.max_pending:
+            hash_rejections.inc()
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many authentication requests, please retry shortly",
+                headers={"Retry-After": "1"},
+            )
+
+        self.pending += 1
+        try:
+            hash_operations.inc(operation=operation)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, fn, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, secret: str) -> str:
+        return await self._run("hash", _hash, secret)
+
+    async def verify(self, secret: str, hashed: str) -> bool:
+        return await self._run("verify", _verify, secret, hashed)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    executor=settings.PASSWORD_HASH_EXECUTOR,
+)
+
+registry.gauge(
+    "password_hash_pending",
+    "bcrypt calls queued or running on the pool",
+    callback=lambda: password_hasher.pending,
+)
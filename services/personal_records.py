@@ -0,0 +1,113 @@
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import case, false, func, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models.activity import ActivityRecords
+from models.workout import ActivitySets, WorkoutSessionActivities
+
+# Columns that keep the best value seen across all of a user's sessions
+RECORD_FIELDS = (
+    "max_weight",
+    "max_reps",
+    "max_duration",
+    "max_rpe",
+    "max_heart_rate",
+    "max_pace",
+    "max_estimated_1rm",
+    "max_session_volume",
+)
+
+
+def estimated_1rm(weight, reps):
+    """Epley estimate; a single rep is taken at face value."""
+    return case(
+        (reps == 1, weight),
+        (reps > 1, weight * (1 + reps / 30.0)),
+        else_=None,
+    )
+
+
+def session_aggregates(session_id):
+    """
+    One row per activity in the session with its best values. Warm-up sets
+    count towards plain maxima but not towards 1RM or volume.
+    """
+    working = func.coalesce(ActivitySets.is_warmup, false()) == false()
+    return (
+        select(
+            WorkoutSessionActivities.activity_id,
+            func.max(ActivitySets.weight).label("max_weight"),
+            func.max(ActivitySets.reps).label("max_reps"),
+            func.max(ActivitySets.duration).label("max_duration"),
+            func.max(ActivitySets.rpe).label("max_rpe"),
+            func.max(ActivitySets.heart_rate).label("max_heart_rate"),
+            func.max(ActivitySets.pace).label("max_pace"),
+            func.max(
+                case((working, estimated_1rm(ActivitySets.weight, ActivitySets.reps)))
+            ).label("max_estimated_1rm"),
+            func.sum(
+                case((working, ActivitySets.weight * ActivitySets.reps))
+            ).label("max_session_volume"),
+        )
+        .select_from(WorkoutSessionActivities)
+        .join(
+            ActivitySets,
+            ActivitySets.session_activity_id == WorkoutSessionActivities.id,
+        )
+        .where(WorkoutSessionActivities.session_id == session_id)
+        .group_by(WorkoutSessionActivities.activity_id)
+    )
+
+
+def _greatest(dialect_name, current, incoming):
+    # NULL means "no record yet" and must never win
+    if dialect_name == "postgresql":
+        return func.greatest(current, incoming)
+    return func.max(
+        func.coalesce(current, incoming), func.coalesce(incoming, current)
+    )
+
+
+def upsert_statement(dialect_name: str, session_id, user_id: int):
+    """
+    INSERT ... SELECT ... ON CONFLICT (user_id, activity_id): the whole
+    session is folded into activity_records in a single statement.
+    """
+    insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    aggregates = session_aggregates(session_id).subquery()
+    columns = ["user_id", "activity_id", *RECORD_FIELDS, "times_performed", "recorded_at"]
+
+    stmt = insert(ActivityRecords).from_select(
+        columns,
+        select(
+            literal(user_id, ActivityRecords.user_id.type),
+            aggregates.c.activity_id,
+            *(aggregates.c[field] for field in RECORD_FIELDS),
+            literal(1),
+            literal(datetime.now().isoformat()),
+        ).where(aggregates.c.activity_id.is_not(None)),
+    )
+    table = ActivityRecords.__table__
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.activity_id],
+        set_={
+            **{
+                field: _greatest(dialect_name, table.c[field], stmt.excluded[field])
+                for field in RECORD_FIELDS
+            },
+            "times_performed": func.coalesce(table.c.times_performed, 0) + 1,
+            "recorded_at": stmt.excluded.recorded_at,
+        },
+    ).returning(table.c.activity_id)
+
+
+async def record_session(db, session_id, user_id: int) -> List[str]:
+    """
+    Folds a finished session into the user's personal records. Returns the
+    activity ids whose records were touched; the caller owns the commit.
+    """
+    dialect_name = db.bind.dialect.name
+    result = await db.execute(upsert_statement(dialect_name, session_id, user_id))
+    return list(result.scalars())
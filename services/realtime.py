@@ -1,18 +1,379 @@
-from fastapi import WebSocket
+import abc
+import asyncio
+import json
+import logging
+import time
 from collections import defaultdict
+from typing import Awaitable, Callable, Dict, List, Optional, Set
 
+from fastapi import WebSocket, status
+
+from config import settings
+from services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Callback invoked with (channel, serialized message) for every published message
+Listener = Callable[[str, str], None]
+
+messages_published = registry.counter(
+    "realtime_messages_published_total", "Messages published to the pub/sub backend"
+)
+messages_sent = registry.counter(
+    "realtime_messages_sent_total", "Messages written to WebSocket clients"
+)
+evictions = registry.counter(
+    "realtime_evictions_total", "Connections closed by the hub", ("reason",)
+)
+publish_failures = registry.counter(
+    "realtime_publish_failures_total", "Broadcasts dropped because the backend failed"
+)
+
+# What a lost or misbehaving broker connection raises
+BROKER_ERRORS = (ConnectionError, OSError, asyncio.IncompleteReadError)
+
+
+class PubSubBackend(abc.ABC):
+    """
+    Fan-out transport between hub instances. Every worker process subscribes
+    to the channels of its locally connected users and publishes to the
+    backend; messages only reach sockets through a subscription, so a
+    message is delivered once per worker no matter which worker sent it.
+    """
+
+    @abc.abstractmethod
+    async def publish(self, channel: str, payload: str) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def subscribe(self, channel: str, listener: Listener) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def unsubscribe(self, channel: str, listener: Listener) -> None:
+        ...
+
+    async def close(self) -> None:
+        pass
+
+
+class InMemoryPubSub(PubSubBackend):
+    """Single-process backend; enough for one uvicorn worker and for tests."""
 
-class ConnectionManager:
     def __init__(self):
-        self.active_connections = defaultdict(list)
+        self._listeners: Dict[str, Set[Listener]] = defaultdict(set)
+
+    async def publish(self, channel, payload):
+        for listener in list(self._listeners.get(channel, ())):
+            listener(channel, payload)
+
+    async def subscribe(self, channel, listener):
+        self._listeners[channel].add(listener)
+
+    async def unsubscribe(self, channel, listener):
+        listeners = self._listeners.get(channel)
+        if listeners is not None:
+            listeners.discard(listener)
+            if not listeners:
+                del self._listeners[channel]
+
+
+def _encode_command(*args: str) -> bytes:
+    parts = [f"*{len(args)}\r\n".encode()]
+    for arg in args:
+        data = arg.encode() if isinstance(arg, str) else arg
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+async def _read_reply(reader: asyncio.StreamReader):
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("broker closed the connection")
+    kind, body = line[:1], line[1:-2]
+    if kind == b"+":
+        return body.decode()
+    if kind == b"-":
+        raise ConnectionError(body.decode())
+    if kind == b":":
+        return int(body)
+    if kind == b"$":
+        length = int(body)
+        if length < 0:
+            return None
+        data = await reader.readexactly(length + 2)
+        return data[:-2].decode()
+    if kind == b"*":
+        return [await _read_reply(reader) for _ in range(int(body))]
+    raise ConnectionError(f"unexpected reply {line!r}")
+
+
+class BrokerPubSub(PubSubBackend):
+    """
+    Backend speaking the PUBLISH/SUBSCRIBE subset of the Redis protocol, so it
+    works against Redis itself or the stand-in in scripts/realtime_broker.py.
+    Publishing and subscribing use separate connections, as Redis requires;
+    the subscriber reconnects and resubscribes if the broker goes away.
+    """
+
+    def __init__(self, host: str, port: int, reconnect_delay: float = 1.0):
+        self.host = host
+        self.port = port
+        self.reconnect_delay = reconnect_delay
+        self._listeners: Dict[str, Set[Listener]] = defaultdict(set)
+        self._publisher: Optional[tuple] = None
+        self._publish_lock = asyncio.Lock()
+        self._subscriber: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+
+    async def publish(self, channel, payload):
+        async with self._publish_lock:
+            for attempt in range(2):
+                try:
+                    if self._publisher is None:
+                        self._publisher = await asyncio.open_connection(self.host, self.port)
+                    reader, writer = self._publisher
+                    writer.write(_encode_command("PUBLISH", channel, payload))
+                    await writer.drain()
+                    await _read_reply(reader)
+                    return
+                except BROKER_ERRORS:
+                    if self._publisher is not None:
+                        self._publisher[1].close()
+                    self._publisher = None
+                    if attempt:
+                        raise
+
+    async def subscribe(self, channel, listener):
+        first = not self._listeners.get(channel)
+        self._listeners[channel].add(listener)
+        if self._reader_task is None:
+            self._reader_task = asyncio.create_task(self._read_messages())
+        if first:
+            await self._send_subscription("SUBSCRIBE", channel)
+
+    async def unsubscribe(self, channel, listener):
+        listeners = self._listeners.get(channel)
+        if not listeners:
+            return
+        listeners.discard(listener)
+        if not listeners:
+            del self._listeners[channel]
+            await self._send_subscription("UNSUBSCRIBE", channel)
+
+    async def _send_subscription(self, command, channel):
+        if self._subscriber is None:
+            return  # the reader resubscribes everything on reconnect
+        try:
+            self._subscriber.write(_encode_command(command, channel))
+            await self._subscriber.drain()
+        except (ConnectionError, OSError):
+            pass
 
-    async def connect(self, websocket: WebSocket, user_id: str):
+    async def _read_messages(self):
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+            except OSError as exc:
+                logger.warning("Realtime broker unavailable: %s", exc)
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+
+            self._subscriber = writer
+            if self._listeners:
+                writer.write(_encode_command("SUBSCRIBE", *self._listeners))
+            try:
+                while True:
+                    reply = await _read_reply(reader)
+                    if isinstance(reply, list) and reply and reply[0] == "message":
+                        _, channel, payload = reply
+                        for listener in list(self._listeners.get(channel, ())):
+                            listener(channel, payload)
+            except BROKER_ERRORS as exc:
+                logger.warning("Realtime broker connection lost: %s", exc)
+            finally:
+                self._subscriber = None
+                writer.close()
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def close(self):
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            self._reader_task = None
+        if self._subscriber is not None:
+            self._subscriber.close()
+            self._subscriber = None
+        if self._publisher is not None:
+            self._publisher[1].close()
+            self._publisher = None
+
+
+class Connection:
+    """One client socket with its own bounded outbox drained by a sender task."""
+
+    def __init__(self, websocket: WebSocket, user_id, queue_size: int):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.outbox: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.last_seen = time.monotonic()
+        self.closed = False
+        self.sender: Optional[asyncio.Task] = None
+
+    def touch(self) -> None:
+        self.last_seen = time.monotonic()
+
+    def offer(self, payload: str) -> bool:
+        """Queue a message without waiting; False means the client is too slow."""
+        if self.closed:
+            return True
+        try:
+            self.outbox.put_nowait(payload)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def _drain(self, on_error: Callable[["Connection", str], Awaitable[None]]):
+        try:
+            while True:
+                payload = await self.outbox.get()
+                await self.websocket.send_text(payload)
+                messages_sent.inc()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            await on_error(self, "send_failed")
+
+
+class RealtimeHub:
+    """
+    Per-user WebSocket fan-out. Each connection gets its own sender task and a
+    bounded queue, so one slow phone fills its own buffer (and is then
+    evicted) instead of stalling delivery to the user's other devices.
+    Clients are pinged every `heartbeat_interval` seconds and dropped after
+    `heartbeat_timeout` seconds without any inbound message.
+    """
+
+    def __init__(
+        self,
+        backend: PubSubBackend,
+        send_queue_size: int = 64,
+        heartbeat_interval: float = 20,
+        heartbeat_timeout: float = 60,
+    ):
+        self.backend = backend
+        self.send_queue_size = send_queue_size
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.connections: Dict[str, List[Connection]] = defaultdict(list)
+        self._heartbeat_task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def channel(user_id) -> str:
+        return f"user:{user_id}"
+
+    def __len__(self):
+        return sum(len(connections) for connections in self.connections.values())
+
+    async def connect(self, websocket: WebSocket, user_id) -> Connection:
         await websocket.accept()
-        self.active_connections[user_id].append(websocket)
+        connection = Connection(websocket, user_id, self.send_queue_size)
+        connection.sender = asyncio.create_task(connection._drain(self.evict))
+
+        channel = self.channel(user_id)
+        self.connections[channel].append(connection)
+        if len(self.connections[channel]) == 1:
+            await self.backend.subscribe(channel, self._deliver)
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        return connection
+
+    async def disconnect(self, connection: Connection) -> None:
+        if connection.closed:
+            return
+        connection.closed = True
+        # A failed send evicts from the sender task itself; cancelling it
+        # there would interrupt the close that follows
+        if connection.sender is not None and connection.sender is not asyncio.current_task():
+            connection.sender.cancel()
+
+        channel = self.channel(connection.user_id)
+        connections = self.connections.get(channel, [])
+        if connection in connections:
+            connections.remove(connection)
+        if not connections:
+            self.connections.pop(channel, None)
+            await self.backend.unsubscribe(channel, self._deliver)
+
+    async def evict(self, connection: Connection, reason: str) -> None:
+        if connection.closed:
+            return
+        evictions.inc(reason=reason)
+        await self.disconnect(connection)
+        try:
+            # A stuck client must not hold up the hub while we say goodbye
+            await asyncio.wait_for(
+                connection.websocket.close(code=status.WS_1013_TRY_AGAIN_LATER), timeout=1
+            )
+        except Exception:
+            pass
+
+    async def broadcast(self, message: dict, user_id) -> None:
+        """
+        Publishes to every connection of the user. Fan-out is best effort: a
+        broker failure drops the message (logged and counted) rather than
+        tearing down the sender's socket.
+        """
+        messages_published.inc()
+        try:
+            await self.backend.publish(self.channel(user_id), json.dumps(message, default=str))
+        except BROKER_ERRORS as exc:
+            publish_failures.inc()
+            logger.warning("Realtime broadcast to user %s dropped: %s", user_id, exc)
+
+    def send(self, connection: Connection, message: dict) -> None:
+        """Reply to a single connection (e.g. pong) without going through the backend."""
+        if not connection.offer(json.dumps(message, default=str)):
+            asyncio.create_task(self.evict(connection, "slow_consumer"))
+
+    def _deliver(self, channel: str, payload: str) -> None:
+        for connection in list(self.connections.get(channel, ())):
+            if not connection.offer(payload):
+                asyncio.create_task(self.evict(connection, "slow_consumer"))
+
+    async def _heartbeat(self) -> None:
+        ping = json.dumps({"type": "ping"})
+        while self.connections:
+            await asyncio.sleep(self.heartbeat_interval)
+            now = time.monotonic()
+            for connections in list(self.connections.values()):
+                for connection in list(connections):
+                    if now - connection.last_seen > self.heartbeat_timeout:
+                        await self.evict(connection, "heartbeat_timeout")
+                    elif not connection.offer(ping):
+                        await self.evict(connection, "slow_consumer")
+
+    async def close(self) -> None:
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+        for connections in list(self.connections.values()):
+            for connection in list(connections):
+                await self.disconnect(connection)
+        await self.backend.close()
+
+
+def create_backend() -> PubSubBackend:
+    if settings.REALTIME_BACKEND == "broker":
+        return BrokerPubSub(settings.REALTIME_BROKER_HOST, settings.REALTIME_BROKER_PORT)
+    return InMemoryPubSub()
+
 
-    def disconnect(self, websocket: WebSocket, user_id: str):
-        self.active_connections[user_id].remove(websocket)
+hub = RealtimeHub(
+    create_backend(),
+    send_queue_size=settings.REALTIME_SEND_QUEUE_SIZE,
+    heartbeat_interval=settings.REALTIME_HEARTBEAT_SECONDS,
+    heartbeat_timeout=settings.REALTIME_HEARTBEAT_TIMEOUT_SECONDS,
+)
 
-    async def broadcast(self, message: dict, user_id: str):
-        for connection in self.active_connections.get(user_id, []):
-            await connection.send_json(message)
+registry.gauge(
+    "realtime_connections", "WebSocket connections held by this worker", callback=lambda: len(hub)
+)
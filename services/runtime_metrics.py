@@ -0,0 +1,85 @@
+import asyncio
+import gc
+import time
+from typing import Optional
+
+from services.metrics import registry
+
+gc_pause_seconds = registry.histogram(
+    "python_gc_pause_seconds",
+    "Stop-the-world time spent in each garbage collection",
+    ("generation",),
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1),
+)
+gc_last_pause = registry.gauge(
+    "python_gc_last_pause_seconds", "Duration of the most recent collection", ("generation",)
+)
+loop_lag = registry.gauge(
+    "event_loop_lag_seconds", "How late the last event-loop probe woke up"
+)
+loop_lag_max = registry.gauge(
+    "event_loop_lag_max_seconds", "Worst probe delay over the current one-minute window"
+)
+loop_lag_seconds = registry.histogram(
+    "event_loop_lag_distribution_seconds",
+    "Event-loop probe delays",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+
+
+class RuntimeMonitor:
+    """
+    Process-level health gauges: event-loop lag (a probe task sleeps for
+    `interval` and records how late it wakes up, i.e. how long something
+    blocked the loop) and GC pauses (timed through gc.callbacks).
+    """
+
+    def __init__(self, interval: float = 0.5, window: int = 120):
+        self.interval = interval
+        self.window = window  # probes per loop_lag_max window
+        self._task: Optional[asyncio.Task] = None
+        self._gc_started: Optional[float] = None
+
+    def _on_gc(self, phase, info):
+        if phase == "start":
+            self._gc_started = time.perf_counter()
+        elif self._gc_started is not None:
+            pause = time.perf_counter() - self._gc_started
+            self._gc_started = None
+            generation = info.get("generation", "")
+            gc_pause_seconds.observe(pause, generation=generation)
+            gc_last_pause.set(pause, generation=generation)
+
+    async def _probe(self):
+        worst, probes = 0.0, 0
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(time.perf_counter() - expected, 0.0)
+            loop_lag.set(lag)
+            loop_lag_seconds.observe(lag)
+            worst = max(worst, lag)
+            probes += 1
+            loop_lag_max.set(worst)
+            if probes >= self.window:
+                worst, probes = 0.0, 0
+
+    def start(self) -> None:
+        if self._on_gc not in gc.callbacks:
+            gc.callbacks.append(self._on_gc)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._probe())
+
+    async def stop(self) -> None:
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+runtime_monitor = RuntimeMonitor()
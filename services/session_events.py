@@ -0,0 +1,617 @@
+import asyncio
+import fcntl
+import glob
+import json
+import logging
+import os
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Optional
+
+from fastapi import status
+from pydantic import ValidationError
+from sqlalchemy import insert, select, update
+
+from config import settings
+from errors.websocket import WebSocketError
+from models.workout import ActivitySets, WorkoutSessionActivities, WorkoutSessions
+from schemas.workout import ExerciseStart, SetComplete, SetStart
+from services.db import async_session
+from services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+events_recorded = registry.counter(
+    "session_events_recorded_total", "Live workout events accepted", ("type",)
+)
+rows_flushed = registry.counter(
+    "session_events_rows_flushed_total", "Rows written by write-behind flushes", ("table",)
+)
+flush_failures = registry.counter(
+    "session_events_flush_failures_total", "Flushes that failed and were retried later"
+)
+
+# Row kinds kept in a session's event log, keyed by the model they flush to
+MODELS = {
+    "session": WorkoutSessions,
+    "activity": WorkoutSessionActivities,
+    "set": ActivitySets,
+}
+_DATETIME_FIELDS = {"started_at", "ended_at"}
+_UUID_FIELDS = {"session_activity_id", "session_id"}
+
+
+def _encode(values: dict) -> dict:
+    encoded = {}
+    for key, value in values.items():
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, uuid.UUID):
+            value = str(value)
+        encoded[key] = value
+    return encoded
+
+
+def _decode(values: dict) -> dict:
+    decoded = {}
+    for key, value in values.items():
+        if value is not None and key in _DATETIME_FIELDS:
+            value = datetime.fromisoformat(value)
+        elif value is not None and key in _UUID_FIELDS:
+            value = uuid.UUID(value)
+        decoded[key] = value
+    return decoded
+
+
+class SessionEventLog:
+    """
+    In-memory state of one live session plus the changes not yet written.
+
+    Events mutate rows here and are acknowledged immediately; repeated
+    updates to the same row coalesce into one pending write. Every mutation
+    is appended to a journal segment first, so a crash before the next
+    flush is recovered by replaying the journal.
+    """
+
+    def __init__(
+        self, session_id: uuid.UUID, journal_dir: str, instance: str, fsync: bool = False
+    ):
+        self.session_id = session_id
+        self.rows: Dict[str, Dict[uuid.UUID, dict]] = {kind: {} for kind in MODELS}
+        self.persisted: Dict[str, set] = {kind: set() for kind in MODELS}
+        self.dirty: Dict[str, Dict[uuid.UUID, dict]] = {kind: {} for kind in MODELS}
+        self.pending_events = 0
+        self.current_activity_id: Optional[uuid.UUID] = None
+        self.flush_lock = asyncio.Lock()
+
+        self.journal_dir = journal_dir
+        self.instance = instance
+        self.fsync = fsync
+        self.segment = 0
+        self._journal = None
+
+    # -- state ------------------------------------------------------------
+
+    def load(self, session_row: dict, activities, sets) -> None:
+        """Seed from what the database already holds for the session."""
+        self.rows["session"][self.session_id] = session_row
+        self.persisted["session"].add(self.session_id)
+        for row in activities:
+            self.rows["activity"][row["id"]] = row
+            self.persisted["activity"].add(row["id"])
+            if row["started_at"] and not row["ended_at"]:
+                self.current_activity_id = row["id"]
+        for row in sets:
+            self.rows["set"][row["id"]] = row
+            self.persisted["set"].add(row["id"])
+
+    def mutate(self, kind: str, row_id: uuid.UUID, values: dict, journal: bool = True) -> None:
+        if journal:
+            self._append({"kind": kind, "id": str(row_id), "values": _encode(values)})
+        self.rows[kind].setdefault(row_id, {"id": row_id}).update(values)
+        self.dirty[kind].setdefault(row_id, {}).update(values)
+        if kind == "activity" and values.get("is_active"):
+            self.current_activity_id = row_id
+
+    def _activity_sets(self, activity_id):
+        return sorted(
+            (s for s in self.rows["set"].values() if s.get("session_activity_id") == activity_id),
+            key=lambda s: s["set_number"],
+        )
+
+    # -- events -----------------------------------------------------------
+
+    def apply(self, message: dict) -> dict:
+        """Apply one client event and return the acknowledgement payload."""
+        update_type = message.get("type")
+        try:
+            data = message.get("data", {})
+            if update_type == "exercise_start":
+                ack = self._exercise_start(ExerciseStart(**data))
+            elif update_type == "set_start":
+                ack = self._set_start(SetStart(**data))
+            elif update_type == "set_complete":
+                ack = self._set_complete(SetComplete(**data))
+            else:
+                raise WebSocketError(
+                    code=status.WS_1003_UNSUPPORTED_DATA, reason=f"Unknown event '{update_type}'"
+                )
+        except ValidationError as exc:
+            raise WebSocketError(code=status.WS_1003_UNSUPPORTED_DATA, reason=str(exc)) from exc
+
+        session = self.rows["session"][self.session_id]
+        if session.get("status") == "draft":
+            self.mutate("session", self.session_id, {"status": "active"})
+        self.pending_events += 1
+        events_recorded.inc(type=update_type)
+        return ack
+
+    def _exercise_start(self, data: ExerciseStart) -> dict:
+        now = datetime.now()
+        if self.current_activity_id is not None:
+            self.mutate("activity", self.current_activity_id, {"is_active": False, "ended_at": now})
+
+        activities = sorted(self.rows["activity"].values(), key=lambda a: a["order"])
+        # Start the matching activity planned by the template before adding one
+        planned = next(
+            (
+                a
+                for a in activities
+                if a["activity_id"] == data.activity_id and not a.get("started_at")
+            ),
+            None,
+        )
+        values = {"is_active": True, "started_at": now}
+        if planned is not None:
+            activity_id = planned["id"]
+        else:
+            activity_id = uuid.uuid4()
+            values.update(
+                session_id=self.session_id,
+                activity_id=data.activity_id,
+                order=activities[-1]["order"] + 1 if activities else 1,
+            )
+        self.mutate("activity", activity_id, values)
+        return {"session_activity_id": str(activity_id)}
+
+    def _set_start(self, data: SetStart) -> dict:
+        if self.current_activity_id is None:
+            raise WebSocketError(code=status.WS_1003_UNSUPPORTED_DATA, reason="No active exercise")
+
+        now = datetime.now()
+        sets = self._activity_sets(self.current_activity_id)
+        previous = [s for s in sets if s.get("ended_at")]
+        if previous:
+            last = previous[-1]
+            self.mutate("set", last["id"], {"rest_after_set": (now - last["ended_at"]).total_seconds()})
+
+        values = {
+            "weight": data.weight,
+            "reps": data.reps,
+            "is_warmup": data.is_warmup,
+            "is_active": True,
+            "started_at": now,
+        }
+        # Start the next planned set (copied from the template) before adding one
+        planned = next((s for s in sets if not s.get("started_at")), None)
+        if planned is not None:
+            set_id, set_number = planned["id"], planned["set_number"]
+        else:
+            set_id = uuid.uuid4()
+            set_number = len(sets) + 1
+            values.update(session_activity_id=self.current_activity_id, set_number=set_number)
+        self.mutate("set", set_id, values)
+        return {"set_id": str(set_id), "set_number": set_number}
+
+    def _set_complete(self, data: SetComplete) -> dict:
+        running = [
+            s
+            for s in self._activity_sets(self.current_activity_id)
+            if s.get("started_at") and not s.get("ended_at")
+        ]
+        if not running:
+            raise WebSocketError(code=status.WS_1003_UNSUPPORTED_DATA, reason="No sets started")
+
+        current = running[-1]
+        now = datetime.now()
+        self.mutate(
+            "set",
+            current["id"],
+            {
+                "ended_at": now,
+                "is_active": False,
+                "rpe": data.rpe,
+                "notes": data.notes,
+                "duration": (now - current["started_at"]).total_seconds(),
+            },
+        )
+        return {"set_id": str(current["id"])}
+
+    # -- journal ----------------------------------------------------------
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(
+            self.journal_dir, f"{self.session_id}.{self.instance}.{segment:06d}.jsonl"
+        )
+
+    def _append(self, entry: dict) -> None:
+        if self._journal is None:
+            os.makedirs(self.journal_dir, exist_ok=True)
+            self._journal = open(self._segment_path(self.segment), "a", encoding="utf-8")
+        self._journal.write(json.dumps(entry) + "\n")
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+
+    def _rotate(self) -> int:
+        """Seal the current segment; later events go to a new one."""
+        sealed = self.segment
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        self.segment += 1
+        return sealed
+
+    def _discard_segments(self, up_to: int) -> None:
+        for segment in range(up_to + 1):
+            try:
+                os.remove(self._segment_path(segment))
+            except FileNotFoundError:
+                pass
+
+    def close_journal(self) -> None:
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    # -- flushing ---------------------------------------------------------
+
+    async def flush(self, db) -> int:
+        """Write pending changes in one transaction; returns rows written."""
+        async with self.flush_lock:
+            if not any(self.dirty.values()):
+                return 0
+            dirty, self.dirty = self.dirty, {kind: {} for kind in MODELS}
+            pending, self.pending_events = self.pending_events, 0
+            sealed = self._rotate()
+
+            written = 0
+            try:
+                for kind, model in MODELS.items():
+                    changes = dirty[kind]
+                    inserts = [
+                        self.rows[kind][row_id]
+                        for row_id in changes
+                        if row_id not in self.persisted[kind]
+                    ]
+                    updates = [
+                        {"id": row_id, **values}
+                        for row_id, values in changes.items()
+                        if row_id in self.persisted[kind]
+                    ]
+                    if inserts:
+                        await db.execute(insert(model), [dict(row) for row in inserts])
+                    # Bulk UPDATE groups rows by the columns they set
+                    by_columns = defaultdict(list)
+                    for row in updates:
+                        by_columns[frozenset(row)].append(row)
+                    for rows in by_columns.values():
+                        await db.execute(update(model), rows)
+                    rows_flushed.inc(len(inserts) + len(updates), table=kind)
+                    written += len(inserts) + len(updates)
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                flush_failures.inc()
+                # Put the changes back under anything recorded meanwhile
+                for kind in MODELS:
+                    for row_id, values in dirty[kind].items():
+                        self.dirty[kind][row_id] = {**values, **self.dirty[kind].get(row_id, {})}
+                self.pending_events += pending
+                raise
+
+            for kind in MODELS:
+                self.persisted[kind].update(dirty[kind])
+            self._discard_segments(sealed)
+            return written
+
+
+class SessionEventBuffer:
+    """
+    Write-behind buffer for live workout events, one SessionEventLog per
+    session. Logs are flushed every `flush_interval` seconds, as soon as one
+    holds `flush_max_events` unflushed events, and when the session is
+    finished or one of its sockets disconnects. After the last socket of a
+    session disconnects its log is dropped from memory.
+
+    Logs live in the worker that owns the socket: with several workers, route
+    a user's connections to one worker (sticky sessions). Workers on one host
+    share the journal directory, and a journal segment exists exactly while a
+    session has unflushed events, which is how `buffered_elsewhere` sees
+    another worker's pending events.
+    """
+
+    def __init__(
+        self,
+        journal_dir: str,
+        flush_interval: float = 5,
+        flush_max_events: int = 20,
+        fsync: bool = False,
+        session_factory=async_session,
+    ):
+        self.journal_dir = journal_dir
+        self.flush_interval = flush_interval
+        self.flush_max_events = flush_max_events
+        self.fsync = fsync
+        self.session_factory = session_factory
+        self.logs: Dict[uuid.UUID, SessionEventLog] = {}
+        # Open sockets per session; a log is dropped once its last one is gone
+        self.sockets: Dict[uuid.UUID, int] = {}
+        # Distinguishes this process's journal files from a crashed predecessor's
+        self.instance = uuid.uuid4().hex[:12]
+        self._load_lock = asyncio.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+        self._lock_file = None
+
+    def __len__(self):
+        return sum(log.pending_events for log in self.logs.values())
+
+    async def _load(self, session_id: uuid.UUID) -> SessionEventLog:
+        log = self.logs.get(session_id)
+        if log is not None:
+            return log
+        async with self._load_lock:
+            if session_id in self.logs:
+                return self.logs[session_id]
+            log = SessionEventLog(session_id, self.journal_dir, self.instance, self.fsync)
+            async with self.session_factory() as db:
+                session_row = (
+                    await db.execute(
+                        select(WorkoutSessions.id, WorkoutSessions.status).where(
+                            WorkoutSessions.id == session_id
+                        )
+                    )
+                ).mappings().one_or_none()
+                if session_row is None:
+                    raise WebSocketError(code=status.WS_1008_POLICY_VIOLATION, reason="Session not found")
+                activities = (
+                    await db.execute(
+                        select(
+                            WorkoutSessionActivities.id,
+                            WorkoutSessionActivities.activity_id,
+                            WorkoutSessionActivities.order,
+                            WorkoutSessionActivities.started_at,
+                            WorkoutSessionActivities.ended_at,
+                        ).where(WorkoutSessionActivities.session_id == session_id)
+                    )
+                ).mappings().all()
+                sets = (
+                    await db.execute(
+                        select(
+                            ActivitySets.id,
+                            ActivitySets.session_activity_id,
+                            ActivitySets.set_number,
+                            ActivitySets.started_at,
+                            ActivitySets.ended_at,
+                        )
+                        .join(
+                            WorkoutSessionActivities,
+                            ActivitySets.session_activity_id == WorkoutSessionActivities.id,
+                        )
+                        .where(WorkoutSessionActivities.session_id == session_id)
+                    )
+                ).mappings().all()
+            log.load(dict(session_row), [dict(a) for a in activities], [dict(s) for s in sets])
+            self.logs[session_id] = log
+            return log
+
+    async def record(self, session_id: uuid.UUID, message: dict) -> dict:
+        log = await self._load(session_id)
+        ack = log.apply(message)
+        if log.pending_events >= self.flush_max_events:
+            await self._flush_log(log)
+        return ack
+
+    async def _flush_log(self, log: SessionEventLog) -> int:
+        async with self.session_factory() as db:
+            return await log.flush(db)
+
+    async def flush(self, session_id: uuid.UUID) -> None:
+        log = self.logs.get(session_id)
+        if log is not None:
+            await self._flush_log(log)
+
+    def buffered_elsewhere(self, session_id: uuid.UUID) -> bool:
+        """Whether another live worker sharing the journal holds unflushed events for the session."""
+        for path in glob.glob(os.path.join(self.journal_dir, f"{session_id}.*.jsonl")):
+            instance = os.path.basename(path).split(".")[1]
+            if instance == self.instance:
+                continue
+            claim = self._claim(instance)
+            if claim is None:
+                # Its live owner, or a worker replaying it, still has events to write
+                return True
+            self._release(claim, remove=False)
+        return False
+
+    def open_session(self, session_id: uuid.UUID) -> None:
+        """Count a socket streaming events for the session."""
+        self.sockets[session_id] = self.sockets.get(session_id, 0) + 1
+
+    async def release_session(self, session_id: uuid.UUID) -> None:
+        """A socket of the session went away: flush, and drop the log after the last one."""
+        remaining = self.sockets.get(session_id, 1) - 1
+        if remaining > 0:
+            self.sockets[session_id] = remaining
+        else:
+            self.sockets.pop(session_id, None)
+        log = self.logs.get(session_id)
+        if log is None:
+            return
+        await self._flush_log(log)
+        self._drop_if_idle(log)
+
+    def _drop_if_idle(self, log: SessionEventLog) -> None:
+        # A socket may have (re)connected and recorded events while we flushed
+        if log.session_id in self.sockets or any(log.dirty.values()):
+            return
+        log.close_journal()
+        self.logs.pop(log.session_id, None)
+
+    async def close_session(self, session_id: uuid.UUID) -> None:
+        """Flush and forget a session, e.g. before it is finished."""
+        log = self.logs.get(session_id)
+        if log is None:
+            return
+        await self._flush_log(log)
+        log.close_journal()
+        self.logs.pop(session_id, None)
+
+    async def flush_all(self) -> None:
+        for log in list(self.logs.values()):
+            try:
+                await self._flush_log(log)
+            except Exception:
+                logger.exception("Flushing session %s failed", log.session_id)
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush_all()
+
+    def _hold_instance_lock(self) -> None:
+        # Held for the life of the process; replay skips journals of live owners
+        os.makedirs(self.journal_dir, exist_ok=True)
+        self._lock_file = open(os.path.join(self.journal_dir, f"{self.instance}.lock"), "w")
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _claim(self, instance: str):
+        """
+        The locked lock file of a dead instance, or None while its owner (or
+        another worker replaying it) holds the lock. The caller keeps it open
+        until it is done with the instance's journal.
+        """
+        path = os.path.join(self.journal_dir, f"{instance}.lock")
+        lock_file = open(path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            # A replayer that finished first removed the file we opened
+            if os.fstat(lock_file.fileno()).st_ino != os.stat(path).st_ino:
+                raise BlockingIOError
+        except (BlockingIOError, FileNotFoundError):
+            lock_file.close()
+            return None
+        return lock_file
+
+    def _release(self, lock_file, remove: bool) -> None:
+        if remove:
+            try:
+                os.remove(lock_file.name)
+            except FileNotFoundError:
+                pass
+        lock_file.close()
+
+    @staticmethod
+    def _read_segment(path: str) -> list:
+        """Entries of a journal segment; empty if another worker already took it."""
+        entries = []
+        try:
+            with open(path, encoding="utf-8") as journal:
+                for line in journal:
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        break  # torn final write
+        except FileNotFoundError:
+            pass
+        return entries
+
+    @staticmethod
+    def _remove_segments(paths) -> None:
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    async def replay(self) -> int:
+        """
+        Re-apply journals left behind by dead workers; returns sessions
+        recovered. A dead instance's lock is held for the whole of its replay,
+        so workers starting together never apply the same journal twice.
+        """
+        segments = defaultdict(list)
+        for path in glob.glob(os.path.join(self.journal_dir, "*.jsonl")):
+            session_id, instance, segment, _ = os.path.basename(path).split(".")
+            segments[instance].append((uuid.UUID(session_id), int(segment), path))
+
+        recovered = 0
+        for instance, files in segments.items():
+            if instance == self.instance:
+                continue
+            claim = self._claim(instance)
+            if claim is None:
+                continue
+            try:
+                by_session = defaultdict(list)
+                for session_id, segment, path in files:
+                    by_session[session_id].append((segment, path))
+
+                for session_id, paths in by_session.items():
+                    paths = [path for _, path in sorted(paths) if os.path.exists(path)]
+                    if not paths:
+                        continue
+                    try:
+                        log = await self._load(session_id)
+                    except WebSocketError:
+                        logger.warning("Dropping journal for unknown session %s", session_id)
+                        self._remove_segments(paths)
+                        continue
+                    for path in paths:
+                        for entry in self._read_segment(path):
+                            log.mutate(
+                                entry["kind"], uuid.UUID(entry["id"]), _decode(entry["values"])
+                            )
+                            log.pending_events += 1
+                    # The entries are now in this process's own journal
+                    self._remove_segments(paths)
+                    await self._flush_log(log)
+                    self._drop_if_idle(log)
+                    recovered += 1
+            finally:
+                self._release(claim, remove=True)
+        return recovered
+
+    async def start(self) -> None:
+        self._hold_instance_lock()
+        recovered = await self.replay()
+        if recovered:
+            logger.info("Recovered %d live sessions from the event journal", recovered)
+        self._flusher = asyncio.create_task(self._flush_periodically())
+
+    async def close(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        await self.flush_all()
+        for log in self.logs.values():
+            log.close_journal()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            os.remove(self._lock_file.name)
+            self._lock_file = None
+
+
+session_events = SessionEventBuffer(
+    settings.SESSION_JOURNAL_DIR,
+    flush_interval=settings.SESSION_EVENTS_FLUSH_SECONDS,
+    flush_max_events=settings.SESSION_EVENTS_FLUSH_MAX_EVENTS,
+    fsync=settings.SESSION_JOURNAL_FSYNC,
+)
+
+registry.gauge(
+    "session_events_pending",
+    "Live workout events accepted but not yet written to the database",
+    callback=lambda: len(session_events),
+)
@@ -0,0 +1,484 @@
+"""
+Per-user columnar training history for the analytics endpoints.
+
+A user's finished sessions are read once into flat NumPy arrays, one entry
+per set, sorted by time. Questions like "volume per week" or "best e1RM per
+exercise this year" then become a searchsorted for the window plus a few
+bincounts, instead of walking sessions -> activities -> sets as ORM objects.
+
+Histories are built lazily on first use, extended in place when a session
+finishes (controllers.workout_sessions.finish_session) and evicted least
+recently used once their combined size passes TRAINING_HISTORY_MEMORY_MB.
+Each worker process keeps its own store, so every read first compares the
+user's count of finished sessions in the database with the history's and
+reloads it when they differ (a session finished on another worker).
+Anything that rewrites past sets should call
+`training_history.invalidate(user_id)`.
+"""
+
+import asyncio
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from models.workout import ActivitySets, WorkoutSessionActivities, WorkoutSessions
+from services.metrics import registry
+
+history_requests = registry.counter(
+    "training_history_requests_total",
+    "History lookups by outcome (hit: in memory, miss: loaded from the database)",
+    ("result",),
+)
+history_evictions = registry.counter(
+    "training_history_evictions_total", "Histories dropped to stay under the memory budget"
+)
+
+# Set measurements kept as float32 columns, NaN where the set didn't log them
+MEASURES = ("reps", "weight", "duration", "rpe", "heart_rate", "pace")
+
+SECONDS_PER_DAY = 86400.0
+_EPOCH = np.datetime64("1970-01-01T00:00:00", "us")
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def to_timestamp(value) -> float:
+    """Seconds since 1970-01-01 for a naive datetime or a date (taken at midnight)."""
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, time.min)
+    return float((np.datetime64(value, "us") - _EPOCH) / np.timedelta64(1, "s"))
+
+
+def from_timestamp(value: float) -> datetime:
+    return datetime(1970, 1, 1) + timedelta(seconds=float(value))
+
+
+def day_numbers(timestamps: np.ndarray) -> np.ndarray:
+    """Days since 1970-01-01; `date.fromordinal(n + EPOCH_ORDINAL)` turns one back into a date."""
+    return np.floor_divide(timestamps, SECONDS_PER_DAY).astype(np.int64)
+
+
+class ActivityIndex:
+    """
+    Dense integer ids for catalog activity ids, shared by every history so
+    per-activity results are bincounts over one index space.
+    """
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def position(self, activity_id: str) -> int:
+        index = self._positions.get(activity_id)
+        if index is None:
+            index = self._positions[activity_id] = len(self.ids)
+            self.ids.append(activity_id)
+        return index
+
+    def get(self, activity_id: str) -> Optional[int]:
+        """Position of an activity already seen, without assigning one."""
+        return self._positions.get(activity_id)
+
+    def positions(self, activity_ids: Sequence[str]) -> np.ndarray:
+        return np.fromiter((self.position(a) for a in activity_ids), dtype=np.int32, count=len(activity_ids))
+
+
+activity_index = ActivityIndex()
+
+
+# Set timestamp: when the set ended, else started, else when its session did
+SET_TIME = func.coalesce(
+    ActivitySets.ended_at,
+    ActivitySets.started_at,
+    WorkoutSessions.ended_at,
+    WorkoutSessions.started_at,
+)
+# Columns the history query returns, in the order UserHistory.extend expects
+HISTORY_COLUMNS = (
+    WorkoutSessions.id,
+    func.coalesce(WorkoutSessions.ended_at, WorkoutSessions.started_at),
+    SET_TIME,
+    WorkoutSessionActivities.activity_id,
+    *(getattr(ActivitySets, name) for name in MEASURES),
+    ActivitySets.is_warmup,
+)
+
+
+def history_query(user_id: int, session_ids: Optional[Sequence] = None):
+    """Sets of the user's finished sessions (or just `session_ids`) in the order they were done."""
+    query = (
+        select(*HISTORY_COLUMNS)
+        .select_from(ActivitySets)
+        .join(WorkoutSessionActivities, ActivitySets.session_activity_id == WorkoutSessionActivities.id)
+        .join(WorkoutSessions, WorkoutSessionActivities.session_id == WorkoutSessions.id)
+        .where(WorkoutSessions.user_id == user_id, WorkoutSessions.status == "finished")
+        .order_by(
+            WorkoutSessions.ended_at,
+            WorkoutSessions.id,
+            WorkoutSessionActivities.order,
+            ActivitySets.set_number,
+        )
+    )
+    if session_ids is not None:
+        query = query.where(WorkoutSessions.id.in_(session_ids))
+    return query
+
+
+def finished_count_query(user_id: int):
+    """How many finished sessions the user has; a history is current while it has seen that many."""
+    return select(func.count()).select_from(WorkoutSessions).where(
+        WorkoutSessions.user_id == user_id, WorkoutSessions.status == "finished"
+    )
+
+
+def _timestamps(values) -> np.ndarray:
+    stamps = np.array(values, dtype="datetime64[us]")
+    return ((stamps - _EPOCH) / np.timedelta64(1, "s")).astype(np.float64)
+
+
+class UserHistory:
+    """
+    One user's sets as parallel arrays sorted by `timestamp`, with room to
+    grow: appends fill spare capacity and double it when it runs out.
+
+    Columns: timestamp (float64 seconds), activity (int32, ActivityIndex),
+    session (int32, position in `session_ids`), the MEASURES as float32 and
+    warmup (bool). Sessions have their own `session_time` (end, float64).
+
+    Structures computed from the columns (rollups) live in `derived` and
+    are brought up to date through `derive`, which tells them the earliest
+    timestamp touched since they last looked.
+    """
+
+    def __init__(self, user_id: int, capacity: int = 0):
+        self.user_id = user_id
+        self.size = 0
+        self.session_ids: List = []
+        self._session_positions: Dict = {}
+        self._session_time = np.empty(0, dtype=np.float64)
+        self._columns: Dict[str, np.ndarray] = {}
+        self._allocate(capacity)
+        # Earliest set timestamp added by each extend; its length is the revision
+        self._changes: List[float] = []
+        self.derived: Dict[str, object] = {}
+        # Finished sessions in the database that this history accounts for,
+        # sessions without sets included
+        self.finished_sessions = 0
+
+    def _allocate(self, capacity: int) -> None:
+        def grown(name, dtype):
+            column = np.empty(capacity, dtype=dtype)
+            if name in self._columns:
+                column[: self.size] = self._columns[name][: self.size]
+            return column
+
+        columns = {"timestamp": np.float64, "activity": np.int32, "session": np.int32, "warmup": np.bool_}
+        columns.update(dict.fromkeys(MEASURES, np.float32))
+        self._columns = {name: grown(name, dtype) for name, dtype in columns.items()}
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        columns = self.__dict__.get("_columns", {})
+        if name in columns:
+            return columns[name][: self.size]
+        raise AttributeError(name)
+
+    @property
+    def capacity(self) -> int:
+        return len(self._columns["timestamp"])
+
+    @property
+    def session_time(self) -> np.ndarray:
+        return self._session_time[: len(self.session_ids)]
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            sum(column.nbytes for column in self._columns.values())
+            + self._session_time.nbytes
+            + sum(getattr(value, "nbytes", 0) for value in self.derived.values())
+        )
+
+    @property
+    def revision(self) -> int:
+        return len(self._changes)
+
+    def has_session(self, session_id) -> bool:
+        return session_id in self._session_positions
+
+    def extend(self, rows: Sequence[tuple]) -> int:
+        """
+        Adds rows shaped like HISTORY_COLUMNS; sessions already present are
+        skipped. Returns the number of sets added.
+        """
+        rows = [row for row in rows if row[0] not in self._session_positions]
+        if not rows:
+            return 0
+        (session_ids, session_ends, set_times, activity_ids, *measures, warmups) = zip(*rows)
+
+        for session_id, ended_at in dict(zip(session_ids, session_ends)).items():
+            position = len(self.session_ids)
+            if position == len(self._session_time):
+                self._session_time = np.resize(self._session_time, max(16, 2 * position))
+            self._session_time[position] = to_timestamp(ended_at)
+            self._session_positions[session_id] = position
+            self.session_ids.append(session_id)
+
+        added, start = len(rows), self.size
+        if start + added > self.capacity:
+            self._allocate(max(start + added, 2 * self.capacity))
+        end = start + added
+        columns = self._columns
+        columns["timestamp"][start:end] = _timestamps(set_times)
+        columns["activity"][start:end] = activity_index.positions(activity_ids)
+        columns["session"][start:end] = [self._session_positions[s] for s in session_ids]
+        for name, values in zip(MEASURES, measures):
+            columns[name][start:end] = np.array(values, dtype=np.float32)
+        columns["warmup"][start:end] = np.array([bool(w) for w in warmups])
+        self.size = end
+        self._changes.append(float(columns["timestamp"][start:end].min()))
+
+        # Rows come per session; sets logged out of order are put back in time order
+        timestamps = columns["timestamp"][: self.size]
+        lower = max(start - 1, 0)
+        if np.any(np.diff(timestamps[lower:]) < 0):
+            order = np.argsort(timestamps, kind="stable")
+            for column in columns.values():
+                column[: self.size] = column[: self.size][order]
+        return added
+
+    def derive(self, name: str, factory):
+        """
+        The derived structure `name`, created with `factory()` on first use.
+        It must have a `revision` attribute and `sync(history, since)`, which
+        is called with the earliest timestamp changed since that revision
+        (None for a full build) and must bring it to `history.revision`.
+        """
+        value = self.derived.get(name)
+        if value is None:
+            value = self.derived[name] = factory()
+            value.sync(self, None)
+        elif value.revision != self.revision:
+            value.sync(self, min(self._changes[value.revision :]))
+        return value
+
+    def window(self, start: Optional[float] = None, end: Optional[float] = None) -> slice:
+        """Slice of the columns with start <= timestamp < end."""
+        timestamps = self.timestamp
+        low = 0 if start is None else int(np.searchsorted(timestamps, start, side="left"))
+        high = self.size if end is None else int(np.searchsorted(timestamps, end, side="left"))
+        return slice(low, max(low, high))
+
+
+def estimated_1rm(weight: np.ndarray, reps: np.ndarray) -> np.ndarray:
+    """Epley, as in services.personal_records: one rep at face value, NaN without reps."""
+    with np.errstate(invalid="ignore"):
+        return np.where(reps == 1, weight, np.where(reps > 1, weight * (1 + reps / 30.0), np.nan))
+
+
+def activity_summary(history: UserHistory, start: Optional[float] = None, end: Optional[float] = None) -> dict:
+    """
+    Totals and per-activity breakdown for sets in [start, end). Volume and
+    e1RM count working sets only, matching activity_records.
+    """
+    window = history.window(start, end)
+    activity = history.activity[window]
+    working = ~history.warmup[window]
+    reps = history.reps[window].astype(np.float64)
+    weight = history.weight[window].astype(np.float64)
+    duration = history.duration[window].astype(np.float64)
+    volume = np.where(working, np.nan_to_num(weight * reps), 0.0)
+    e1rm = np.where(working, estimated_1rm(weight, reps), np.nan)
+
+    present = np.unique(activity)
+    # Compact activity ids to 0..k-1 so the bincounts are sized by this window
+    slot = np.searchsorted(present, activity)
+    k = len(present)
+
+    def best(values):
+        result = np.full(k, -np.inf)
+        np.fmax.at(result, slot, values)
+        return np.where(np.isneginf(result), np.nan, result)
+
+    last = np.full(k, -np.inf)
+    np.maximum.at(last, slot, history.timestamp[window])
+    sessions = np.unique(history.session[window])
+    per_activity = {
+        "sets": np.bincount(slot, minlength=k),
+        "working_sets": np.bincount(slot, weights=working, minlength=k),
+        "reps": np.bincount(slot, weights=np.nan_to_num(reps), minlength=k),
+        "volume": np.bincount(slot, weights=volume, minlength=k),
+        "duration": np.bincount(slot, weights=np.nan_to_num(duration), minlength=k),
+        "max_weight": best(weight),
+        "max_estimated_1rm": best(e1rm),
+    }
+
+    def number(value):
+        return None if np.isnan(value) else round(float(value), 2)
+
+    return {
+        "sessions": int(len(sessions)),
+        "sets": int(len(activity)),
+        "working_sets": int(working.sum()),
+        "reps": int(np.nansum(reps)),
+        "volume": round(float(volume.sum()), 2),
+        "duration": round(float(np.nansum(duration)), 2),
+        "activities": [
+            {
+                "activity_id": activity_index.ids[present[i]],
+                "sets": int(per_activity["sets"][i]),
+                "working_sets": int(per_activity["working_sets"][i]),
+                "reps": int(per_activity["reps"][i]),
+                "volume": round(float(per_activity["volume"][i]), 2),
+                "duration": round(float(per_activity["duration"][i]), 2),
+                "max_weight": number(per_activity["max_weight"][i]),
+                "max_estimated_1rm": number(per_activity["max_estimated_1rm"][i]),
+                "last_performed": from_timestamp(last[i]),
+            }
+            for i in np.argsort(-per_activity["volume"], kind="stable")
+        ],
+    }
+
+
+class TrainingHistoryStore:
+    """
+    LRU of UserHistory objects bounded by their combined size, rollups
+    included. Sizes are re-read whenever a history is touched, so a rollup
+    built by one request counts towards the budget from the next.
+
+    Loads are single-flight per user. A session finished while that user's
+    history is being loaded marks the load stale, so it is served once but
+    not cached without the new session. A cached history whose count of
+    finished sessions no longer matches the database is reloaded.
+    """
+
+    def __init__(self, memory_budget_bytes: int):
+        self.memory_budget_bytes = memory_budget_bytes
+        self._histories: "OrderedDict[int, UserHistory]" = OrderedDict()
+        self._sizes: Dict[int, int] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+        # Requests holding or waiting for each lock; it is dropped at zero
+        self._lock_users: Dict[int, int] = {}
+        self._stale: set = set()
+        self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._histories)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._histories
+
+    async def get(self, db: AsyncSession, user_id: int) -> UserHistory:
+        history = self._touch(user_id)
+        if history is not None:
+            if history.finished_sessions == await db.scalar(finished_count_query(user_id)):
+                history_requests.inc(result="hit")
+                return history
+            self.invalidate(user_id)
+        lock = self._locks.setdefault(user_id, asyncio.Lock())
+        self._lock_users[user_id] = self._lock_users.get(user_id, 0) + 1
+        try:
+            async with lock:
+                # Another request may have loaded it while this one waited
+                history = self._touch(user_id)
+                if history is not None:
+                    history_requests.inc(result="hit")
+                    return history
+                history_requests.inc(result="miss")
+                self._stale.discard(user_id)
+                history = await self.load(db, user_id)
+                if user_id not in self._stale:
+                    self._histories.pop(user_id, None)
+                    self._histories[user_id] = history
+                    self._account(user_id)
+                return history
+        finally:
+            self._lock_users[user_id] -= 1
+            if not self._lock_users[user_id]:
+                del self._lock_users[user_id]
+                self._locks.pop(user_id, None)
+
+    @staticmethod
+    async def load(db: AsyncSession, user_id: int) -> UserHistory:
+        # Counted first: a session finishing in between makes the next read reload, not miss it
+        finished = await db.scalar(finished_count_query(user_id))
+        rows = (await db.execute(history_query(user_id))).all()
+        history = UserHistory(user_id, capacity=len(rows))
+        history.extend(rows)
+        history.finished_sessions = finished
+        return history
+
+    async def append_session(self, db: AsyncSession, user_id: int, session_id) -> None:
+        """Adds a just-finished session to the user's history if it is in memory."""
+        if user_id in self._locks:
+            self._stale.add(user_id)
+        history = self._histories.get(user_id)
+        if history is None or history.has_session(session_id):
+            return
+        history.extend((await db.execute(history_query(user_id, [session_id]))).all())
+        history.finished_sessions += 1
+        self._account(user_id)
+
+    def invalidate(self, user_id: int) -> None:
+        if self._histories.pop(user_id, None) is not None:
+            self.bytes -= self._sizes.pop(user_id)
+        if user_id in self._locks:
+            self._stale.add(user_id)
+
+    def clear(self) -> None:
+        self._histories.clear()
+        self._sizes.clear()
+        self.bytes = 0
+
+    def _touch(self, user_id: int) -> Optional[UserHistory]:
+        history = self._histories.get(user_id)
+        if history is not None:
+            self._histories.move_to_end(user_id)
+            self._account(user_id)
+        return history
+
+    def _account(self, user_id: int) -> None:
+        size = self._histories[user_id].nbytes
+        previous = self._sizes.get(user_id, 0)
+        if size != previous:
+            self.bytes += size - previous
+            self._sizes[user_id] = size
+            self._evict(keep=user_id)
+
+    def _evict(self, keep: int) -> None:
+        # The history being served stays even if it alone is over budget
+        while self.bytes > self.memory_budget_bytes and len(self._histories) > 1:
+            user_id = next(iter(self._histories))
+            if user_id == keep:
+                self._histories.move_to_end(user_id)
+                continue
+            del self._histories[user_id]
+            self.bytes -= self._sizes.pop(user_id)
+            history_evictions.inc()
+
+
+training_history = TrainingHistoryStore(settings.TRAINING_HISTORY_MEMORY_MB * 1024 * 1024)
+
+registry.gauge(
+    "training_history_bytes", "Memory held by cached training histories", callback=lambda: training_history.bytes
+)
+registry.gauge(
+    "training_history_users", "Users with a training history in memory", callback=lambda: len(training_history)
+)
+
+
+def window_bounds(start: Optional[date], end: Optional[date]) -> Tuple[Optional[float], Optional[float]]:
+    """Timestamps for an inclusive date range; either side may be open."""
+    return (
+        None if start is None else to_timestamp(start),
+        None if end is None else to_timestamp(end) + SECONDS_PER_DAY,
+    )
@@ -0,0 +1,295 @@
+"""
+Acute:chronic training load per user.
+
+A finished session's load is its duration in minutes times its RPE
+(Foster's session-RPE, in arbitrary units). Duration is the session's own
+start/end, or the time its sets and rests add up to when it has none. RPE
+is the mean of the working sets that logged one, else DEFAULT_SESSION_RPE.
+Daily loads feed two exponentially weighted averages (Williams et al. 2017):
+acute over 7 days and chronic over 28, with decay 2 / (N + 1). Monotony is
+the mean over sd of the last 7 days' loads, and strain is the 7-day total
+times monotony.
+
+Each user has a training_load row per day from their first session on.
+Finishing a session reads the latest row (and the six before it, for the
+weekly window) and writes the days since then. That is constant work per
+session however long the history is. The user's row is locked for the
+rest of the transaction first, so two sessions finishing at once are
+folded in one after the other instead of both extending the same latest
+row. scripts/backfill_training_load.py
+rebuilds every row from the sessions.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, replace
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import case, delete, false, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.auth import User
+from models.workout import ActivitySets, TrainingLoad, WorkoutSessionActivities, WorkoutSessions
+from services.calories import DEFAULT_REST_SECONDS, DEFAULT_SET_SECONDS, SECONDS_PER_REP
+
+ACUTE_DAYS = 7
+CHRONIC_DAYS = 28
+ACUTE_DECAY = 2 / (ACUTE_DAYS + 1)
+CHRONIC_DECAY = 2 / (CHRONIC_DAYS + 1)
+DEFAULT_SESSION_RPE = 5.0
+# Sessions left running (forgotten timers) count for at most this long
+MAX_SESSION_MINUTES = 240.0
+
+
+@dataclass(frozen=True)
+class LoadDay:
+    date: date
+    load: float
+    tonnage: float
+    sessions: int
+    acute: float
+    chronic: float
+    # Loads of the ACUTE_DAYS days ending on `date`, oldest first
+    week: Tuple[float, ...]
+
+    @property
+    def monotony(self) -> Optional[float]:
+        sd = float(np.std(self.week))
+        return float(np.mean(self.week)) / sd if sd > 1e-9 else None
+
+    @property
+    def strain(self) -> Optional[float]:
+        monotony = self.monotony
+        return sum(self.week) * monotony if monotony is not None else None
+
+    @property
+    def ratio(self) -> Optional[float]:
+        return self.acute / self.chronic if self.chronic > 1e-9 else None
+
+    def as_row(self, user_id: int, now: datetime) -> dict:
+        return {
+            "user_id": user_id,
+            "date": self.date,
+            "load": self.load,
+            "tonnage": self.tonnage,
+            "sessions": self.sessions,
+            "acute": self.acute,
+            "chronic": self.chronic,
+            "monotony": self.monotony,
+            "strain": self.strain,
+            "updated_at": now,
+        }
+
+
+def advance(
+    previous: Optional[LoadDay], day: date, load: float = 0.0, tonnage: float = 0.0, sessions: int = 0
+) -> List[LoadDay]:
+    """
+    The days after `previous` through `day`, with `load` added on `day`; idle
+    days in between only decay. When `day` is previous.date that one day is
+    returned with the load added (EWMAs are linear in today's load).
+    """
+    if previous is None:
+        previous = LoadDay(day - timedelta(days=1), 0.0, 0.0, 0, 0.0, 0.0, (0.0,) * ACUTE_DAYS)
+    if day < previous.date:
+        raise ValueError(f"{day} is before the latest snapshot ({previous.date})")
+    if day == previous.date:
+        return [
+            replace(
+                previous,
+                load=previous.load + load,
+                tonnage=previous.tonnage + tonnage,
+                sessions=previous.sessions + sessions,
+                acute=previous.acute + ACUTE_DECAY * load,
+                chronic=previous.chronic + CHRONIC_DECAY * load,
+                week=previous.week[:-1] + (previous.week[-1] + load,),
+            )
+        ]
+    days = []
+    current = previous
+    while current.date < day:
+        today = current.date + timedelta(days=1)
+        added = (load, tonnage, sessions) if today == day else (0.0, 0.0, 0)
+        current = LoadDay(
+            today,
+            *added,
+            acute=ACUTE_DECAY * added[0] + (1 - ACUTE_DECAY) * current.acute,
+            chronic=CHRONIC_DECAY * added[0] + (1 - CHRONIC_DECAY) * current.chronic,
+            week=current.week[1:] + (added[0],),
+        )
+        days.append(current)
+    return days
+
+
+def build_history(sessions: Iterable[Tuple[date, float, float]], until: Optional[date] = None) -> List[LoadDay]:
+    """Every day from the first session through `until` (default: the last session's day)."""
+    per_day: Dict[date, List[float]] = defaultdict(lambda: [0.0, 0.0, 0])
+    for day, load, tonnage in sessions:
+        totals = per_day[day]
+        totals[0] += load
+        totals[1] += tonnage
+        totals[2] += 1
+    days: List[LoadDay] = []
+    for day in sorted(per_day):
+        days.extend(advance(days[-1] if days else None, day, *per_day[day]))
+    if days and until is not None and until > days[-1].date:
+        days.extend(advance(days[-1], until))
+    return days
+
+
+def session_loads_query(session_ids: Optional[Sequence] = None, user_ids: Optional[Sequence[int]] = None):
+    """One row per finished session with what `session_load` needs; warm-ups don't count."""
+    working = func.coalesce(ActivitySets.is_warmup, false()) == false()
+    set_seconds = func.coalesce(
+        ActivitySets.duration, ActivitySets.reps * SECONDS_PER_REP, DEFAULT_SET_SECONDS
+    ) + func.coalesce(ActivitySets.rest_after_set, DEFAULT_REST_SECONDS)
+    query = (
+        select(
+            WorkoutSessions.id,
+            WorkoutSessions.user_id,
+            WorkoutSessions.started_at,
+            WorkoutSessions.ended_at,
+            func.avg(case((working, ActivitySets.rpe))).label("rpe"),
+            func.coalesce(func.sum(case((working, ActivitySets.weight * ActivitySets.reps))), 0).label("tonnage"),
+            func.coalesce(func.sum(case((ActivitySets.id.isnot(None), set_seconds))), 0).label("set_seconds"),
+        )
+        .select_from(WorkoutSessions)
+        .outerjoin(WorkoutSessionActivities, WorkoutSessionActivities.session_id == WorkoutSessions.id)
+        .outerjoin(ActivitySets, ActivitySets.session_activity_id == WorkoutSessionActivities.id)
+        .where(WorkoutSessions.status == "finished")
+        .group_by(
+            WorkoutSessions.id,
+            WorkoutSessions.user_id,
+            WorkoutSessions.started_at,
+            WorkoutSessions.ended_at,
+        )
+    )
+    if session_ids is not None:
+        query = query.where(WorkoutSessions.id.in_(session_ids))
+    if user_ids is not None:
+        query = query.where(WorkoutSessions.user_id.in_(user_ids))
+    return query
+
+
+def session_load(row) -> Tuple[date, float, float]:
+    """(day, load, tonnage) for a session_loads_query row."""
+    if row.started_at and row.ended_at and row.ended_at > row.started_at:
+        minutes = (row.ended_at - row.started_at).total_seconds() / 60
+    else:
+        minutes = (row.set_seconds or 0) / 60
+    minutes = min(minutes, MAX_SESSION_MINUTES)
+    rpe = row.rpe if row.rpe is not None else DEFAULT_SESSION_RPE
+    day = (row.ended_at or row.started_at).date()
+    return day, round(minutes * rpe, 2), float(row.tonnage or 0)
+
+
+def _insert(dialect_name: str):
+    return postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+
+
+def _as_date(value) -> date:
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+async def latest(db: AsyncSession, user_id: int) -> Optional[LoadDay]:
+    """The user's newest snapshot, with its weekly window rebuilt from the rows before it."""
+    rows = (
+        await db.execute(
+            select(TrainingLoad)
+            .where(TrainingLoad.user_id == user_id)
+            .order_by(TrainingLoad.date.desc())
+            .limit(ACUTE_DAYS)
+        )
+    ).scalars().all()
+    if not rows:
+        return None
+    newest = rows[0]
+    loads = {_as_date(row.date): row.load for row in rows}
+    last = _as_date(newest.date)
+    week = tuple(loads.get(last - timedelta(days=n), 0.0) for n in range(ACUTE_DAYS - 1, -1, -1))
+    return LoadDay(last, newest.load, newest.tonnage, newest.sessions, newest.acute, newest.chronic, week)
+
+
+async def save(db: AsyncSession, user_id: int, days: List[LoadDay]) -> None:
+    """Upserts the snapshots; the caller owns the commit."""
+    if not days:
+        return
+    now = datetime.now()
+    stmt = _insert(db.bind.dialect.name)(TrainingLoad)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TrainingLoad.user_id, TrainingLoad.date],
+        set_={
+            field: stmt.excluded[field]
+            for field in ("load", "tonnage", "sessions", "acute", "chronic", "monotony", "strain", "updated_at")
+        },
+    )
+    await db.execute(stmt, [day.as_row(user_id, now) for day in days])
+
+
+async def record_session(db: AsyncSession, user_id: int, session_id) -> None:
+    """
+    Folds a just-finished session into the user's snapshots. A session
+    dated before the latest snapshot (clock skew) is counted on that day.
+    """
+    row = (await db.execute(session_loads_query(session_ids=[session_id]))).one_or_none()
+    if row is None:
+        return
+    day, load, tonnage = session_load(row)
+    # Held until the caller commits; also covers a user with no snapshot row yet
+    await db.execute(select(User.id).where(User.id == user_id).with_for_update())
+    previous = await latest(db, user_id)
+    if previous is not None:
+        day = max(day, previous.date)
+    await save(db, user_id, advance(previous, day, load, tonnage, 1))
+
+
+async def rebuild(db: AsyncSession, user_ids: Sequence[int], until: date) -> Dict[int, int]:
+    """
+    Recomputes every snapshot of `user_ids` from their sessions through
+    `until`, replacing what was stored. Returns {user_id: days written}.
+    """
+    sessions: Dict[int, List[Tuple[date, float, float]]] = defaultdict(list)
+    for row in await db.execute(session_loads_query(user_ids=list(user_ids))):
+        sessions[row.user_id].append(session_load(row))
+    await db.execute(delete(TrainingLoad).where(TrainingLoad.user_id.in_(list(user_ids))))
+    written = {}
+    for user_id in user_ids:
+        days = build_history(sessions.get(user_id, ()), until)
+        await save(db, user_id, days)
+        written[user_id] = len(days)
+    await db.commit()
+    return written
+
+
+async def get_range(db: AsyncSession, user_id: int, start: date, end: date, today: date) -> List[LoadDay]:
+    """
+    Snapshots between start and end. Days after the latest snapshot, up to
+    `today`, are projected (loads decaying with no new sessions) but not
+    stored.
+    """
+    rows = (
+        await db.execute(
+            select(TrainingLoad)
+            .where(TrainingLoad.user_id == user_id, TrainingLoad.date >= start - timedelta(days=ACUTE_DAYS - 1))
+            .where(TrainingLoad.date <= end)
+            .order_by(TrainingLoad.date)
+        )
+    ).scalars().all()
+    days: List[LoadDay] = []
+    window: Dict[date, float] = {}
+    for row in rows:
+        day = _as_date(row.date)
+        window[day] = row.load
+        week = tuple(window.get(day - timedelta(days=n), 0.0) for n in range(ACUTE_DAYS - 1, -1, -1))
+        days.append(LoadDay(day, row.load, row.tonnage, row.sessions, row.acute, row.chronic, week))
+
+    horizon = min(end, today)
+    if days and days[-1].date < horizon:
+        days.extend(advance(days[-1], horizon))
+    elif not days:
+        previous = await latest(db, user_id)
+        if previous is not None and previous.date < horizon:
+            days = advance(previous, horizon)
+    return [day for day in days if start <= day.date <= end]
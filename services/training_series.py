@@ -0,0 +1,137 @@
+"""
+Per-activity progress series for charts, downsampled to a point budget.
+
+One point per session in which the user did the activity: the session's
+best weight, best estimated 1RM (working sets), best pace, most reps, or its
+tonnage or time. Series come from the user's in-memory training history, so
+a multi-year chart is a mask over the arrays and one grouped reduction.
+They are then thinned to the requested number of points:
+
+* "lttb": Largest-Triangle-Three-Buckets (Steinarsson 2013), which keeps the
+  points that shape the line;
+* "minmax": the lowest and highest point of each bucket, which keeps every
+  spike and every PR.
+"""
+
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from services.training_history import UserHistory, activity_index, estimated_1rm, from_timestamp
+
+# metric -> (per-set value, how a session's sets combine)
+METRICS = {
+    "max_weight": ("weight", "max"),
+    "estimated_1rm": ("estimated_1rm", "max"),
+    "max_reps": ("reps", "max"),
+    "pace": ("pace", "max"),
+    "volume": ("volume", "sum"),
+    "duration": ("duration", "sum"),
+}
+DOWNSAMPLERS = ("lttb", "minmax")
+
+
+def _set_values(history: UserHistory, window: np.ndarray, value: str) -> np.ndarray:
+    working = ~history.warmup[window]
+    if value == "estimated_1rm":
+        values = estimated_1rm(history.weight[window].astype(np.float64), history.reps[window].astype(np.float64))
+        return np.where(working, values, np.nan)
+    if value == "volume":
+        volume = history.weight[window].astype(np.float64) * history.reps[window]
+        return np.where(working, volume, np.nan)
+    return getattr(history, value)[window].astype(np.float64)
+
+
+def session_series(
+    history: UserHistory,
+    activity_id: str,
+    metric: str,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """(session end timestamps, values) in time order; sessions with no value are left out."""
+    empty = np.empty(0), np.empty(0)
+    position = activity_index.get(activity_id)
+    if position is None:
+        return empty
+    window = history.window(start, end)
+    rows = np.flatnonzero(history.activity[window] == position) + window.start
+    if not len(rows):
+        return empty
+
+    value, combine = METRICS[metric]
+    values = _set_values(history, rows, value)
+    sessions, slot = np.unique(history.session[rows], return_inverse=True)
+    if combine == "max":
+        combined = np.full(len(sessions), -np.inf)
+        np.fmax.at(combined, slot, values)
+        combined[np.isneginf(combined)] = np.nan
+    else:
+        combined = np.bincount(slot, weights=np.nan_to_num(values), minlength=len(sessions))
+        combined[np.bincount(slot, weights=~np.isnan(values), minlength=len(sessions)) == 0] = np.nan
+
+    times = history.session_time[sessions]
+    keep = ~np.isnan(combined)
+    order = np.argsort(times[keep], kind="stable")
+    return times[keep][order], combined[keep][order]
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of the points Largest-Triangle-Three-Buckets keeps; first and last always."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    every = (n - 2) / (threshold - 2)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        low, high = int(i * every) + 1, int((i + 1) * every) + 1
+        next_low, next_high = high, min(int((i + 2) * every) + 1, n)
+        avg_x, avg_y = x[next_low:next_high].mean(), y[next_low:next_high].mean()
+        # Twice the area of the triangle (a, candidate, next bucket's average)
+        area = np.abs((x[a] - avg_x) * (y[low:high] - y[a]) - (x[a] - x[low:high]) * (avg_y - y[a]))
+        a = low + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def min_max(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of each bucket's lowest and highest point (threshold // 2 equal-width time buckets)."""
+    n = len(x)
+    if threshold >= n or threshold < 2:
+        return np.arange(n)
+    buckets = threshold // 2
+    span = x[-1] - x[0]
+    bucket = np.minimum(((x - x[0]) / span * buckets).astype(np.int64), buckets - 1) if span else np.zeros(n, int)
+    # Sorted by (bucket, value): each bucket's first row is its min, its last its max
+    order = np.lexsort((y, bucket))
+    starts = np.flatnonzero(np.r_[True, bucket[order][1:] != bucket[order][:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    return np.unique(np.concatenate([order[starts], order[ends]]))
+
+
+def downsample(x: np.ndarray, y: np.ndarray, points: int, method: str = "lttb") -> np.ndarray:
+    return (lttb if method == "lttb" else min_max)(x, y, points)
+
+
+def activity_series(
+    history: UserHistory,
+    activity_id: str,
+    metric: str,
+    points: int,
+    method: str,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+) -> Dict:
+    times, values = session_series(history, activity_id, metric, start, end)
+    keep = downsample(times, values, points, method)
+    return {
+        "activity_id": activity_id,
+        "metric": metric,
+        "method": method,
+        "total_points": int(len(times)),
+        "points": [
+            {"t": from_timestamp(t), "value": round(float(v), 2)} for t, v in zip(times[keep], values[keep])
+        ],
+    }
@@ -0,0 +1,187 @@
+"""
+Weekly training volume per muscle group.
+
+Sets are attributed to muscles through an activity x muscle incidence
+matrix built from the catalog: 1.0 for each primary muscle and a
+configurable weight for each secondary one. Working-set totals per (week,
+activity) are kept as a rollup on the user's training history and brought
+up to date incrementally, so a query is a slice of the rollup, one gather
+from the matrix and a bincount per measure.
+"""
+
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from services.activity_catalog import CatalogSnapshot
+from services.training_history import (
+    EPOCH_ORDINAL,
+    UserHistory,
+    activity_index,
+    day_numbers,
+    to_timestamp,
+)
+
+# Per (week, activity) working-set totals
+ROLLUP_FIELDS = ("sets", "reps", "volume")
+
+# 1970-01-01 was a Thursday; weeks start on Monday 1969-12-29
+_WEEK_OFFSET = 3
+
+
+def week_number(day: date) -> int:
+    return (day.toordinal() - EPOCH_ORDINAL + _WEEK_OFFSET) // 7
+
+
+def week_start(week: int) -> date:
+    return date.fromordinal(EPOCH_ORDINAL + week * 7 - _WEEK_OFFSET)
+
+
+def _week_numbers(timestamps: np.ndarray) -> np.ndarray:
+    return (day_numbers(timestamps) + _WEEK_OFFSET) // 7
+
+
+class WeeklyRollup:
+    """
+    Working-set totals per (week, activity), sorted by week then activity.
+    A sync rebuilds only the weeks from the earliest changed set onwards,
+    which for a newly finished session is the current week.
+    """
+
+    def __init__(self):
+        self.revision = 0
+        self.week = np.empty(0, dtype=np.int64)
+        self.activity = np.empty(0, dtype=np.int32)
+        self.totals = {field: np.empty(0, dtype=np.float64) for field in ROLLUP_FIELDS}
+
+    @property
+    def nbytes(self) -> int:
+        return self.week.nbytes + self.activity.nbytes + sum(v.nbytes for v in self.totals.values())
+
+    def sync(self, history: UserHistory, since) -> None:
+        if since is None:
+            keep, first = 0, 0
+        else:
+            first_week = int(_week_numbers(np.array([since]))[0])
+            keep = int(np.searchsorted(self.week, first_week, side="left"))
+            first = history.window(to_timestamp(week_start(first_week))).start
+
+        window = slice(first, history.size)
+        working = ~history.warmup[window]
+        reps = np.nan_to_num(history.reps[window].astype(np.float64))
+        weight = np.nan_to_num(history.weight[window].astype(np.float64))
+        weeks = _week_numbers(history.timestamp[window])[working]
+        activities = history.activity[window][working]
+        values = {"sets": np.ones(len(weeks)), "reps": reps[working], "volume": (weight * reps)[working]}
+
+        keys, inverse = np.unique((weeks << 32) | activities.astype(np.int64), return_inverse=True)
+        self.week = np.concatenate([self.week[:keep], keys >> 32])
+        self.activity = np.concatenate([self.activity[:keep], (keys & 0xFFFFFFFF).astype(np.int32)])
+        for field in ROLLUP_FIELDS:
+            grouped = np.bincount(inverse, weights=values[field], minlength=len(keys))
+            self.totals[field] = np.concatenate([self.totals[field][:keep], grouped])
+        self.revision = history.revision
+
+    def between(self, first_week: int, last_week: int) -> slice:
+        return slice(
+            int(np.searchsorted(self.week, first_week, side="left")),
+            int(np.searchsorted(self.week, last_week, side="right")),
+        )
+
+
+class MuscleMatrix:
+    """
+    Incidence of muscles per activity for one catalog version and secondary
+    weight, with a row per ActivityIndex position (zero for activities the
+    catalog doesn't know). Rows are added as the index grows.
+    """
+
+    def __init__(self, snapshot: CatalogSnapshot, secondary_weight: float):
+        self.snapshot = snapshot
+        self.secondary_weight = secondary_weight
+        self.muscles: List[str] = sorted(
+            {m for entry in snapshot.entries for m in (*entry.primary_muscles, *entry.secondary_muscles)}
+        )
+        self._columns = {muscle: i for i, muscle in enumerate(self.muscles)}
+        self.matrix = np.zeros((0, len(self.muscles)))
+
+    def rows(self, activities: np.ndarray) -> np.ndarray:
+        if len(self.matrix) < len(activity_index):
+            added = np.zeros((len(activity_index) - len(self.matrix), len(self.muscles)))
+            for offset, activity_id in enumerate(activity_index.ids[len(self.matrix) :]):
+                entry = self.snapshot.by_id.get(activity_id)
+                if entry is None:
+                    continue
+                for muscle in entry.secondary_muscles:
+                    added[offset, self._columns[muscle]] = self.secondary_weight
+                for muscle in entry.primary_muscles:
+                    added[offset, self._columns[muscle]] = 1.0
+            self.matrix = np.vstack([self.matrix, added])
+        return self.matrix[activities]
+
+
+_matrices: Dict[Tuple[int, float], MuscleMatrix] = {}
+
+
+def muscle_matrix(snapshot: CatalogSnapshot, secondary_weight: float) -> MuscleMatrix:
+    """Shared matrix for the current catalog; older versions are dropped."""
+    key = (snapshot.version, secondary_weight)
+    matrix = _matrices.get(key)
+    if matrix is None:
+        for stale in [k for k in _matrices if k[0] != snapshot.version]:
+            del _matrices[stale]
+        matrix = _matrices[key] = MuscleMatrix(snapshot, secondary_weight)
+    return matrix
+
+
+def weekly_volume(history: UserHistory, matrix: MuscleMatrix, first_week: int, last_week: int) -> List[dict]:
+    """
+    One entry per week from first_week to last_week (inclusive), empty weeks
+    included, with weighted working sets, reps and tonnage per muscle.
+    """
+    rollup = history.derive("weekly", WeeklyRollup)
+    window = rollup.between(first_week, last_week)
+    weeks, muscles = last_week - first_week + 1, len(matrix.muscles)
+    slot = rollup.week[window] - first_week
+    incidence = matrix.rows(rollup.activity[window])
+    cells = (slot[:, None] * muscles + np.arange(muscles)).ravel()
+
+    grids = {}
+    for field in ROLLUP_FIELDS:
+        contribution = (incidence * rollup.totals[field][window][:, None]).ravel()
+        grids[field] = np.bincount(cells, weights=contribution, minlength=weeks * muscles).reshape(weeks, muscles)
+    per_week = {
+        field: np.bincount(slot, weights=rollup.totals[field][window], minlength=weeks) for field in ROLLUP_FIELDS
+    }
+    unmapped = np.bincount(
+        slot, weights=np.where(incidence.any(axis=1), 0, rollup.totals["sets"][window]), minlength=weeks
+    )
+
+    result = []
+    for w in range(weeks):
+        present = np.flatnonzero(grids["sets"][w])
+        result.append(
+            {
+                "week_start": week_start(first_week + w),
+                "sets": int(per_week["sets"][w]),
+                "reps": int(per_week["reps"][w]),
+                "volume": round(float(per_week["volume"][w]), 2),
+                "unmapped_sets": int(unmapped[w]),
+                "muscles": [
+                    {
+                        "muscle": matrix.muscles[m],
+                        "sets": round(float(grids["sets"][w, m]), 2),
+                        "reps": round(float(grids["reps"][w, m]), 2),
+                        "volume": round(float(grids["volume"][w, m]), 2),
+                    }
+                    for m in present[np.argsort(-grids["sets"][w, present], kind="stable")]
+                ],
+            }
+        )
+    return result
+
+
+def default_range(today: date, weeks: int = 52) -> Tuple[date, date]:
+    """The last `weeks` weeks, ending with the current one."""
+    return today - timedelta(weeks=weeks - 1), today
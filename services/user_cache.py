@@ -0,0 +1,107 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from config import settings
+from services.cache import TTLCache
+from services.metrics import registry
+
+
+@dataclass(frozen=True)
+class UserPrincipal:
+    """The authenticated user as seen by route handlers (no ORM session attached)."""
+
+    id: int
+    email: str
+    plan: Optional[str] = None
+    username: Optional[str] = None
+
+    @classmethod
+    def from_user(cls, user) -> "UserPrincipal":
+        return cls(id=user.id, email=user.email, plan=user.plan, username=user.username)
+
+
+user_cache_requests = registry.counter(
+    "auth_user_cache_requests_total",
+    "Principal lookups by outcome (hit: cache, claims: token claims, miss: database)",
+    ("result",),
+)
+
+
+class UserPrincipalCache:
+    """
+    TTL + LRU cache of principals keyed by token subject (email).
+
+    Invalidating a subject also records when it happened, so access tokens
+    issued before that moment stop being trusted for their embedded claims
+    and fall back to a database lookup. Those records are never evicted by
+    size, only dropped once every token issued before them has expired.
+    """
+
+    def __init__(self, max_size: int, ttl: float, revocation_ttl: float):
+        self._principals = TTLCache(max_size=max_size, ttl=ttl)
+        # subject -> invalidation time, oldest first
+        self._invalidated_at: "OrderedDict[str, float]" = OrderedDict()
+        self._revocation_ttl = revocation_ttl
+
+    def __len__(self):
+        return len(self._principals)
+
+    def get(self, subject: str) -> Optional[UserPrincipal]:
+        return self._principals.get(subject)
+
+    def put(self, principal: UserPrincipal) -> None:
+        self._principals.set(principal.email, principal)
+
+    def invalidate(self, subject: str) -> None:
+        self._principals.pop(subject)
+        now = time.time()
+        self._invalidated_at.pop(subject, None)
+        self._invalidated_at[subject] = now
+        self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        # Kept for as long as a token issued before the invalidation can live
+        while self._invalidated_at:
+            subject, invalidated_at = next(iter(self._invalidated_at.items()))
+            if invalidated_at > now - self._revocation_ttl:
+                break
+            del self._invalidated_at[subject]
+
+    def claims_trusted(self, subject: str, issued_at: Optional[float]) -> bool:
+        invalidated_at = self._invalidated_at.get(subject)
+        if invalidated_at is None or invalidated_at <= time.time() - self._revocation_ttl:
+            return True
+        return issued_at is not None and issued_at > invalidated_at
+
+    @property
+    def hit_ratio(self) -> float:
+        hits = user_cache_requests.value(result="hit") + user_cache_requests.value(
+            result="claims"
+        )
+        total = hits + user_cache_requests.value(result="miss")
+        return hits / total if total else 0.0
+
+    @property
+    def evictions(self) -> int:
+        return self._principals.evictions
+
+
+user_cache = UserPrincipalCache(
+    max_size=settings.USER_CACHE_MAX_SIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+    revocation_ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
+
+registry.gauge(
+    "auth_user_cache_hit_ratio",
+    "Share of authenticated requests served without a user query",
+    callback=lambda: user_cache.hit_ratio,
+)
+registry.gauge(
+    "auth_user_cache_entries", "Principals currently cached", callback=lambda: len(user_cache)
+)
+registry.gauge(
+    "auth_user_cache_evictions", "Principals evicted by the LRU bound", callback=lambda: user_cache.evictions
+)